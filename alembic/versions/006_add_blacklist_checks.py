@@ -0,0 +1,51 @@
+"""Add blacklist_checks table (last result per (IP, RBL) pair).
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17
+
+Changes:
+- blacklist_checks : dernier résultat par couple (IP, RBL) et date de la
+                     prochaine vérification — repli DB du cache Redis des
+                     résultats blacklist (intervalles adaptatifs)
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = "006"
+down_revision: str | None = "005"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # ─────────────────────────────────────────────────────────────────────────
+    # Table : blacklist_checks
+    # ─────────────────────────────────────────────────────────────────────────
+    op.create_table(
+        "blacklist_checks",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("ip_address", sa.String(45), nullable=False),
+        sa.Column("blacklist_name", sa.String(100), nullable=False),
+        sa.Column("listed", sa.Boolean, nullable=False, server_default="0"),
+        sa.Column("checked_at", sa.DateTime),
+        sa.Column("next_check_at", sa.DateTime, nullable=False),
+        sa.UniqueConstraint("ip_address", "blacklist_name", name="uq_blacklist_check_pair"),
+    )
+
+    # Index pour « couples échus » (next_check_at <= maintenant)
+    op.create_index(
+        "ix_blacklist_checks_next_check_at",
+        "blacklist_checks",
+        ["next_check_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_blacklist_checks_next_check_at", table_name="blacklist_checks")
+    op.drop_table("blacklist_checks")
@@ -88,7 +88,7 @@ def validate_domain_dns(domain_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("/validate-all")
-def validate_all_dns(db: Session = Depends(get_db)):
+async def validate_all_dns(db: Session = Depends(get_db)):
     """Run DNS validation for all domains."""
     validator = DNSValidator(db)
-    return validator.validate_all()
+    return await validator.validate_all()
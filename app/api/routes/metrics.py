@@ -6,6 +6,7 @@ from prometheus_client import (
     CollectorRegistry,
     Counter,
     Gauge,
+    Histogram,
     generate_latest,
 )
 
@@ -24,6 +25,15 @@ pmta_running = Gauge("email_engine_pmta_running", "PowerMTA running (1/0)", regi
 pmta_queue_size = Gauge("email_engine_pmta_queue_size", "PowerMTA queue size", registry=REGISTRY)
 disk_usage = Gauge("email_engine_disk_usage_pct", "Disk usage percentage", registry=REGISTRY)
 ram_usage = Gauge("email_engine_ram_usage_pct", "RAM usage percentage", registry=REGISTRY)
+mailwizz_db_pool_connections = Gauge(
+    "email_engine_mailwizz_db_pool_connections", "MailWizz MySQL pool connections",
+    ["state"],  # in_use, free, max
+    registry=REGISTRY,
+)
+mailwizz_db_pool_saturation = Gauge(
+    "email_engine_mailwizz_db_pool_saturation", "MailWizz MySQL pool in-use / max size",
+    registry=REGISTRY,
+)
 
 # Counters
 bounces_received = Counter(
@@ -42,15 +52,37 @@ emails_validated = Counter(
     ["result"],
     registry=REGISTRY,
 )
+domain_cache_lookups = Counter(
+    "email_engine_domain_cache_lookups_total", "Domain verdict cache lookups",
+    ["tier", "result"],
+    registry=REGISTRY,
+)
 blacklist_checks = Counter(
     "email_engine_blacklist_checks_total", "Total blacklist check runs", registry=REGISTRY
 )
+mailwizz_db_reconnects = Counter(
+    "email_engine_mailwizz_db_reconnects_total", "MailWizz MySQL pool re-creations after connection errors",
+    registry=REGISTRY,
+)
 alerts_sent = Counter(
     "email_engine_alerts_sent_total", "Total Telegram alerts sent",
     ["severity"],
     registry=REGISTRY,
 )
 
+# Histograms
+mailwizz_db_acquire_seconds = Histogram(
+    "email_engine_mailwizz_db_acquire_seconds", "Wait to acquire a MailWizz MySQL connection",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    registry=REGISTRY,
+)
+dns_check_seconds = Histogram(
+    "email_engine_dns_check_seconds", "Latency of one domain DNS validation check",
+    ["check"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    registry=REGISTRY,
+)
+
 
 def update_metrics_from_db(db) -> None:
     """Update Prometheus gauges from database state."""
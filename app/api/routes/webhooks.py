@@ -4,6 +4,7 @@ Sécurité :
   - Validation signature HMAC-SHA256 (si WEBHOOK_SECRET configuré)
   - Whitelist IPs PowerMTA (si PMTA_ALLOWED_IPS configuré)
   - Rate limiting : 200 req/min par IP
+  - Endpoints /batch : jusqu'à WEBHOOK_BATCH_MAX_EVENTS événements sous une seule signature
 """
 
 import hashlib
@@ -12,6 +13,7 @@ import secrets as secrets_module
 
 import structlog
 from fastapi import APIRouter, Depends, HTTPException, Request, status
+from pydantic import ValidationError
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from sqlalchemy.orm import Session
@@ -21,6 +23,7 @@ from app.api.schemas import PMTABouncePayload, PMTADeliveryPayload
 from app.config import settings
 from app.database import get_db
 from app.services.scraper_pro_client import scraper_pro_client
+from app.services.webhook_batch import parse_batch_body, process_bounces
 
 logger = structlog.get_logger(__name__)
 limiter = Limiter(key_func=get_remote_address)
@@ -95,6 +98,14 @@ async def _validate_webhook_request(request: Request) -> bytes:
     return body
 
 
+def _parse_batch(body: bytes) -> list:
+    """Décode le lot (tableau JSON ou NDJSON) ou rejette la requête (400)."""
+    try:
+        return parse_batch_body(body)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+
 # =============================================================================
 # Endpoints
 # =============================================================================
@@ -109,27 +120,75 @@ async def pmta_bounce(
     """Receive bounce from PowerMTA accounting pipe and forward to scraper-pro."""
     await _validate_webhook_request(request)
 
-    from app.api.routes.metrics import bounces_forwarded, bounces_received
+    from app.api.routes.metrics import bounces_received
 
     bounces_received.inc()
 
-    forwarded = await scraper_pro_client.forward_bounce(
+    # Accepté = journalisé et mis en tampon (compté dans bounces_forwarded à l'envoi)
+    accepted = await scraper_pro_client.forward_bounce(
         email=payload.email,
         bounce_type=payload.bounce_type.value,
         reason=payload.reason,
         ip_address=payload.source_ip,
     )
-    if forwarded:
-        bounces_forwarded.inc()
 
     return {
         "received": True,
-        "forwarded_to_scraper_pro": forwarded,
+        # Ancien nom gardé pour les clients existants (même valeur)
+        "forwarded_to_scraper_pro": accepted,
+        "accepted_for_scraper_pro": accepted,
         "email": payload.email,
         "bounce_type": payload.bounce_type.value,
     }
 
 
+@router.post("/pmta-bounce/batch")
+@limiter.limit("200/minute")
+async def pmta_bounce_batch(
+    request: Request,
+    db: Session = Depends(get_db),
+):
+    """
+    Receive a batch of PowerMTA bounces (JSON array or NDJSON) under one signature.
+
+    Chaque élément est validé séparément : un élément invalide n'empêche pas
+    le traitement des autres. `results` suit l'ordre du lot.
+    """
+    body = await _validate_webhook_request(request)
+    items = _parse_batch(body)
+
+    results: list[dict] = [{} for _ in items]
+    valid: list[tuple[int, PMTABouncePayload]] = []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, PMTABouncePayload.model_validate(item)))
+        except ValidationError as exc:
+            results[index] = {
+                "index": index,
+                "received": False,
+                "error": exc.errors(include_url=False)[0]["msg"],
+            }
+
+    accepted = await process_bounces([payload for _, payload in valid])
+    for (index, payload), ok in zip(valid, accepted, strict=True):
+        results[index] = {
+            "index": index,
+            "received": True,
+            "forwarded_to_scraper_pro": ok,
+            "accepted_for_scraper_pro": ok,
+            "email": payload.email,
+            "bounce_type": payload.bounce_type.value,
+        }
+
+    return {
+        "received": len(valid),
+        "rejected": len(items) - len(valid),
+        "forwarded_to_scraper_pro": sum(accepted),
+        "accepted_for_scraper_pro": sum(accepted),
+        "results": results,
+    }
+
+
 @router.post("/pmta-delivery")
 @limiter.limit("200/minute")
 async def pmta_delivery(
@@ -144,14 +203,15 @@ async def pmta_delivery(
 
     deliveries_reported.inc(payload.count)
 
-    forwarded = await scraper_pro_client.forward_delivery_feedback(
+    accepted = await scraper_pro_client.forward_delivery_feedback(
         domain=payload.domain,
         count=payload.count,
     )
 
     return {
         "received": True,
-        "forwarded_to_scraper_pro": forwarded,
+        "forwarded_to_scraper_pro": accepted,
+        "accepted_for_scraper_pro": accepted,
         "domain": payload.domain,
         "count": payload.count,
     }
@@ -46,6 +46,26 @@ class Settings(BaseSettings):
     # ─────────────────────────────────────────────────────────────
     REDIS_URL: str = "redis://localhost:6379/0"
 
+    # ─────────────────────────────────────────────────────────────
+    # Cache des verdicts par domaine (MX, jetable, typo)
+    # Niveau 1 : LRU en mémoire par process — Niveau 2 : Redis partagé
+    # ─────────────────────────────────────────────────────────────
+    DOMAIN_CACHE_LOCAL_SIZE: int = 10000           # Entrées max du LRU par process
+    DOMAIN_CACHE_LOCAL_TTL_SECONDS: int = 300      # 5 min en mémoire (borne la divergence entre process)
+    DOMAIN_CACHE_POSITIVE_TTL_SECONDS: int = 86400  # 24h pour un verdict positif (MX présent...)
+    DOMAIN_CACHE_NEGATIVE_TTL_SECONDS: int = 1800   # 30 min pour un négatif (domaine pas encore configuré)
+    DOMAIN_CACHE_REDIS_BACKOFF_SECONDS: int = 30   # Redis ignoré pendant 30s après une erreur
+    BULK_VALIDATION_CHECK_MX: bool = True          # Validation en masse : MX vérifiés (via ce cache)
+
+    # ─────────────────────────────────────────────────────────────
+    # Résolution DNS asynchrone (validation, blacklists, SPF/DKIM/DMARC)
+    # ─────────────────────────────────────────────────────────────
+    DNS_NAMESERVERS: str = ""                # Comma-separated ; vide = /etc/resolv.conf
+    DNS_MAX_CONCURRENCY: int = 200           # Requêtes DNS en vol max par event loop
+    DNS_RATE_PER_NAMESERVER: float = 100.0   # Requêtes/s max envoyées à chaque serveur DNS
+    DNS_LIFETIME_SECONDS: float = 5.0        # Délai total max d'une résolution
+    DNS_VALIDATION_CONCURRENCY: int = 50     # Vérifications SPF/DKIM/DMARC/PTR/MX en parallèle (validate_all)
+
     # ─────────────────────────────────────────────────────────────
     # PowerMTA — Multi-nœuds (jusqu'à 5 × Cloud VPS 10 Contabo)
     #
@@ -98,11 +118,19 @@ class Settings(BaseSettings):
     MAILWIZZ_DB_USER: str = "mailwizz"
     MAILWIZZ_DB_PASSWORD: str = ""
     MAILWIZZ_DB_NAME: str = "mailwizz_v2"
+    MAILWIZZ_DB_POOL_MIN_SIZE: int = 1
+    MAILWIZZ_DB_POOL_MAX_SIZE: int = 20
+    MAILWIZZ_DB_POOL_RECYCLE_SECONDS: int = 3600      # < wait_timeout MySQL (8h par défaut)
+    MAILWIZZ_DB_ACQUIRE_TIMEOUT_SECONDS: float = 10.0  # Attente max d'une connexion libre
 
     # Paramètres delivery servers (créés via MySQL direct)
     MAILWIZZ_FROM_NAME: str = "Hub Travelers"
     MAILWIZZ_DS_MAX_CONN_MESSAGES: int = 50   # Messages par connexion SMTP (conservateur)
     MAILWIZZ_DS_HOURLY_QUOTA: int = 10        # Quota horaire initial (warmup semaine 1)
+    MAILWIZZ_QUOTA_RESYNC_SECONDS: int = 21600  # Quota inchangé renvoyé quand même après 6h
+
+    # Import direct des abonnés (mw_list_subscriber + mw_list_field_value)
+    MAILWIZZ_BULK_CHUNK_SIZE: int = 1000      # Abonnés par transaction / INSERT multi-lignes
 
     # ─────────────────────────────────────────────────────────────
     # Webhook Security
@@ -112,6 +140,20 @@ class Settings(BaseSettings):
     # IPs autorisées à appeler les webhooks (comma-separated: "1.2.3.4,5.6.7.8")
     # Laisser vide = aucune restriction par IP (non recommandé en prod)
     PMTA_ALLOWED_IPS: str = ""
+    # Événements max par requête sur les endpoints /batch (tableau JSON ou NDJSON)
+    WEBHOOK_BATCH_MAX_EVENTS: int = 1000
+    # Taille max d'un corps /batch, vérifiée avant tout décodage JSON
+    WEBHOOK_BATCH_MAX_BYTES: int = 2 * 1024 * 1024
+
+    # Consommateur des fichiers d'accounting PowerMTA (remplace bounce-pipe.sh / delivery-pipe.sh)
+    PMTA_ACCT_DIR: str = "/var/log/pmta"
+    PMTA_ACCT_PATTERN: str = "acct-*.csv"
+    PMTA_ACCT_CHECKPOINT_FILE: str = "/opt/email-engine/data/pmta_acct_offsets.json"
+    PMTA_ACCT_BATCH_SIZE: int = 500           # Enregistrements traités par lot
+    PMTA_ACCT_POLL_SECONDS: float = 2.0       # Intervalle de scrutation des fichiers
+    PMTA_ACCT_FLUSH_SECONDS: float = 2.0      # Mode pipe : attente max avant de traiter un lot incomplet
+    # Mode pipe : lignes lues pas encore traitées, reprises au redémarrage
+    PMTA_ACCT_SPOOL_FILE: str = "/opt/email-engine/data/pmta_acct_spool.csv"
 
     # ─────────────────────────────────────────────────────────────
     # Telegram Alerts (obligatoire en production)
@@ -157,7 +199,13 @@ class Settings(BaseSettings):
     # ─────────────────────────────────────────────────────────────
     # Blacklist check
     # ─────────────────────────────────────────────────────────────
-    BLACKLIST_CHECK_INTERVAL_HOURS: int = 4
+    BLACKLIST_TICK_MINUTES: int = 1             # Passage du planificateur (seuls les couples échus sont interrogés)
+    BLACKLIST_CLEAN_RECHECK_HOURS: int = 12     # Couple (IP, RBL) propre : re-vérifié toutes les 12h
+    BLACKLIST_LISTED_RECHECK_MINUTES: int = 30  # Couple listé : délistage surveillé toutes les 30 min
+    BLACKLIST_PRIORITY_MIN_SENT: int = 5000     # N emails envoyés par une IP dans la fenêtre → vérification prioritaire
+    BLACKLIST_PRIORITY_WINDOW_MINUTES: int = 60  # Fenêtre du compteur d'envois par IP (tous lots confondus)
+    BLACKLIST_SWEEP_CONCURRENCY: int = 50     # Couples (IP, RBL) vérifiés en parallèle
+    BLACKLIST_RATE_PER_RBL: float = 10.0      # Requêtes/s max vers chaque RBL
 
     # ─────────────────────────────────────────────────────────────
     # Monitoring
@@ -172,6 +220,8 @@ class Settings(BaseSettings):
     SCRAPER_PRO_BOUNCE_URL: str = ""
     SCRAPER_PRO_DELIVERY_URL: str = ""
     SCRAPER_PRO_HMAC_SECRET: str = ""
+    SCRAPER_PRO_FLUSH_SECONDS: float = 2.0      # Fenêtre d'agrégation avant envoi
+    SCRAPER_PRO_BOUNCE_BATCH_SIZE: int = 200    # Vidage immédiat au-delà (bounces distincts)
 
     # ─────────────────────────────────────────────────────────────
     # Domaines d'envoi (pour validation et référence)
@@ -1,16 +1,38 @@
 """SQLAlchemy engine and session factory."""
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
 from app.config import settings
 
+
+def enable_sqlite_transactions(sqlite_engine) -> None:
+    """
+    Let SQLAlchemy emit BEGIN itself on pysqlite connections.
+
+    The driver only opens a transaction before DML, so a SAVEPOINT issued
+    first (Session.begin_nested) is released as an implicit COMMIT and an
+    outer rollback cannot undo it.
+    """
+
+    @event.listens_for(sqlite_engine, "connect")
+    def _disable_pysqlite_begin(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(sqlite_engine, "begin")
+    def _emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+
 engine = create_engine(
     settings.DATABASE_URL,
     connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {},
     echo=False,
 )
 
+if engine.dialect.name == "sqlite":
+    enable_sqlite_transactions(engine)
+
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
 
@@ -1,5 +1,6 @@
 """FastAPI application with APScheduler lifespan and rate limiting."""
 
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
@@ -27,6 +28,7 @@ from app.database import engine
 from app.logging_config import setup_logging
 from app.models import Base
 from app.scheduler.setup import create_scheduler
+from app.services.scraper_pro_client import recover_journal, scraper_pro_client
 
 # Import API v2 router (Clean Architecture) — optionnel, pas encore déployé
 try:
@@ -56,12 +58,26 @@ except Exception:
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Startup: create tables + start scheduler. Shutdown: stop scheduler."""
+    """Startup: create tables + start scheduler. Shutdown: stop scheduler, flush webhooks."""
     Base.metadata.create_all(bind=engine)
+    # Événements scraper-pro acceptés mais jamais envoyés (arrêt brutal) → file de retry
+    recover_journal()
+    if _v2_available:
+        # Webhooks v2 acquittés (202) mais pas encore écrits à l'arrêt → écrits maintenant
+        from src.infrastructure.background.webhook_pipeline import get_webhook_pipeline
+
+        await asyncio.to_thread(get_webhook_pipeline().recover_journal)
     scheduler = create_scheduler()
     scheduler.start()
     yield
     scheduler.shutdown(wait=False)
+    # Envoyer à scraper-pro ce qui reste dans le tampon
+    await scraper_pro_client.aclose()
+    if _v2_available:
+        # Écrire les webhooks v2 encore en file avant l'arrêt
+        from src.infrastructure.background.webhook_pipeline import get_webhook_pipeline
+
+        await get_webhook_pipeline().stop()
 
 
 app = FastAPI(
@@ -373,6 +373,21 @@ class BlacklistEvent(Base):
     ip = relationship("IP", back_populates="blacklist_events", foreign_keys=[ip_id])
 
 
+class BlacklistCheck(Base):
+    """Dernier résultat par couple (IP, RBL) — repli DB du cache Redis (blacklist_store)."""
+
+    __tablename__ = "blacklist_checks"
+
+    id = Column(Integer, primary_key=True)
+    ip_address = Column(String(45), nullable=False)
+    blacklist_name = Column(String(100), nullable=False)
+    listed = Column(Boolean, nullable=False, default=False)
+    checked_at = Column(DateTime, default=datetime.utcnow)
+    next_check_at = Column(DateTime, nullable=False, index=True)
+
+    __table_args__ = (UniqueConstraint("ip_address", "blacklist_name", name="uq_blacklist_check_pair"),)
+
+
 class HealthCheck(Base):
     __tablename__ = "health_checks"
 
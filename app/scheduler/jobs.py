@@ -25,7 +25,7 @@ async def job_health_check() -> None:
 
 
 async def job_blacklist_check() -> None:
-    """Check all active IPs against 9 DNS blacklists (every 4h)."""
+    """Check the due (IP, RBL) pairs of active IPs (every BLACKLIST_TICK_MINUTES)."""
     db = SessionLocal()
     try:
         checker = BlacklistChecker(db)
@@ -77,7 +77,7 @@ async def job_dns_validation() -> None:
     db = SessionLocal()
     try:
         validator = DNSValidator(db)
-        results = validator.validate_all()
+        results = await validator.validate_all()
         logger.info("job_dns_validation_complete", domains=len(results))
     except Exception as exc:
         logger.error("job_dns_validation_failed", error=str(exc))
@@ -126,6 +126,8 @@ async def job_sync_warmup_quotas() -> None:
 
     Utilise mailwizz_db (MySQL direct) — PAS d'API MailWizz.
     Convertit quota journalier → quota horaire (÷16 × 0.80).
+    Une requête jointe plans + IPs, puis un seul UPDATE MySQL pour les
+    servers dont le quota a changé.
     """
     db = SessionLocal()
     try:
@@ -133,27 +135,17 @@ async def job_sync_warmup_quotas() -> None:
         from app.services.mailwizz_db import mailwizz_db
 
         # Plans actifs : tous sauf complétés et en quarantaine
-        plans = (
-            db.query(WarmupPlan)
+        rows = (
+            db.query(IP.mailwizz_server_id, WarmupPlan.current_daily_quota)
+            .join(IP, IP.id == WarmupPlan.ip_id)
             .filter(WarmupPlan.phase.notin_(["completed", "emergency_stop"]))
             .filter(WarmupPlan.paused == False)  # noqa: E712
+            .filter(IP.mailwizz_server_id.isnot(None))
             .all()
         )
 
-        synced = 0
-        for plan in plans:
-            ip = db.query(IP).filter(IP.id == plan.ip_id).first()
-            if not ip or not ip.mailwizz_server_id:
-                continue
-
-            success = await mailwizz_db.sync_warmup_quota(
-                server_id=ip.mailwizz_server_id,
-                daily_quota=plan.current_daily_quota,
-            )
-            if success:
-                synced += 1
-
-        logger.info("job_sync_warmup_quotas_complete", synced=synced, total=len(plans))
+        result = await mailwizz_db.sync_warmup_quotas(dict(rows))
+        logger.info("job_sync_warmup_quotas_complete", total=len(rows), **result)
     except Exception as exc:
         logger.error("job_sync_warmup_quotas_failed", error=str(exc))
     finally:
@@ -2,6 +2,7 @@
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
+from app.config import settings
 from app.scheduler.jobs import (
     job_blacklist_check,
     job_dns_validation,
@@ -29,11 +30,11 @@ def create_scheduler() -> AsyncIOScheduler:
         replace_existing=True,
     )
 
-    # Blacklist check every 4 hours
+    # Blacklist check: only due (IP, RBL) pairs, adaptive re-check intervals
     scheduler.add_job(
         job_blacklist_check,
         "interval",
-        hours=4,
+        minutes=settings.BLACKLIST_TICK_MINUTES,
         id="blacklist_check",
         name="Blacklist Check",
         replace_existing=True,
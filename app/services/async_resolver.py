@@ -0,0 +1,133 @@
+"""Résolveur DNS asyncio natif (dns.asyncresolver), partagé par les services.
+
+- Concurrence bornée : sémaphore par event loop (DNS_MAX_CONCURRENCY)
+- Coalescence : une seule requête en vol par (nom, type) ; les appelants
+  suivants attendent la même réponse
+- Débit limité par serveur DNS (token bucket, DNS_RATE_PER_NAMESERVER) ;
+  chaque requête part vers le serveur le moins chargé, les autres restent
+  en secours dans l'ordre de rotation
+"""
+
+import asyncio
+import threading
+import time
+import weakref
+
+import dns.asyncresolver
+import dns.resolver
+import structlog
+
+from app.config import settings
+
+logger = structlog.get_logger(__name__)
+
+
+class _TokenBucket:
+    """Token bucket thread-safe : `reserve` retourne l'attente nécessaire (s)."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def available(self) -> float:
+        with self._lock:
+            return self.tokens + (time.monotonic() - self.updated) * self.rate
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class _LoopState:
+    """État lié à un event loop (les primitives asyncio ne traversent pas les loops)."""
+
+    def __init__(self, max_concurrency: int):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.inflight: dict[tuple[str, str], asyncio.Future] = {}
+
+
+class AsyncDNSResolver:
+    """Résolveur DNS asynchrone à concurrence bornée, avec coalescence et rate limit."""
+
+    def __init__(
+        self,
+        nameservers: list[str] | None = None,
+        max_concurrency: int | None = None,
+        rate_per_nameserver: float | None = None,
+        lifetime: float | None = None,
+    ):
+        configured = [ns.strip() for ns in settings.DNS_NAMESERVERS.split(",") if ns.strip()]
+        self.nameservers = nameservers or configured or None  # None = /etc/resolv.conf
+        self.max_concurrency = max_concurrency or settings.DNS_MAX_CONCURRENCY
+        self.rate_per_nameserver = rate_per_nameserver or settings.DNS_RATE_PER_NAMESERVER
+        self.lifetime = lifetime or settings.DNS_LIFETIME_SECONDS
+
+        self._pool: list[tuple[dns.asyncresolver.Resolver, _TokenBucket]] | None = None
+        self._pool_lock = threading.Lock()
+        self._states: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    async def resolve(self, qname: str, rdtype: str = "A") -> dns.resolver.Answer:
+        """
+        Résoudre `qname`/`rdtype` ; lève les exceptions dnspython
+        (NXDOMAIN, NoAnswer, NoNameservers, Timeout...).
+        """
+        state = self._state()
+        key = (qname.lower().rstrip("."), rdtype.upper())
+
+        future = state.inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._resolve_now(state, *key))
+            state.inflight[key] = future
+            future.add_done_callback(lambda _: state.inflight.pop(key, None))
+        # shield : l'annulation d'un appelant n'annule pas la requête partagée
+        return await asyncio.shield(future)
+
+    async def _resolve_now(self, state: _LoopState, qname: str, rdtype: str) -> dns.resolver.Answer:
+        async with state.semaphore:
+            resolver, bucket = max(self._get_pool(), key=lambda entry: entry[1].available())
+            wait = bucket.reserve()
+            if wait:
+                await asyncio.sleep(wait)
+            return await self._query(resolver, qname, rdtype)
+
+    async def _query(
+        self,
+        resolver: dns.asyncresolver.Resolver,
+        qname: str,
+        rdtype: str,
+    ) -> dns.resolver.Answer:
+        return await resolver.resolve(qname, rdtype, lifetime=self.lifetime)
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None:
+            state = self._states[loop] = _LoopState(self.max_concurrency)
+        return state
+
+    def _get_pool(self) -> list[tuple[dns.asyncresolver.Resolver, _TokenBucket]]:
+        """Un résolveur par serveur DNS, chacun avec les autres serveurs en secours."""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    nameservers = self.nameservers or [
+                        str(ns) for ns in dns.asyncresolver.Resolver().nameservers
+                    ]
+                    pool = []
+                    for i in range(len(nameservers)):
+                        resolver = dns.asyncresolver.Resolver(configure=False)
+                        resolver.nameservers = nameservers[i:] + nameservers[:i]
+                        pool.append((resolver, _TokenBucket(self.rate_per_nameserver)))
+                    logger.info("async_resolver_ready", nameservers=nameservers)
+                    self._pool = pool
+        return self._pool
+
+
+# Instance partagée par le process
+async_resolver = AsyncDNSResolver()
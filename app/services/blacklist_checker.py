@@ -1,15 +1,27 @@
-"""DNS-based blacklist checker for 9 major RBLs."""
+"""DNS-based blacklist checker for 9 major RBLs.
+
+Le balayage planifié (check_all_ips) interroge tous les couples (IP, RBL)
+en parallèle sur le résolveur asyncio partagé, sous une limite globale de
+concurrence et un débit max par RBL ; les délistages sont vérifiés dans le
+même balayage et les écritures groupées en un commit.
+
+Seuls les couples échus sont interrogés : les résultats sont gardés dans
+blacklist_store (Redis, repli DB) avec un délai de re-vérification long
+pour un couple propre et court pour un couple listé.
+"""
 
 import asyncio
 from datetime import datetime
-from functools import partial
 
 import dns.resolver
 import structlog
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.enums import AlertCategory, AlertSeverity, IPStatus
 from app.models import IP, BlacklistEvent
+from app.services.async_resolver import _TokenBucket, async_resolver
+from app.services.blacklist_store import blacklist_store
 from app.services.telegram_alerter import alerter
 
 logger = structlog.get_logger(__name__)
@@ -41,6 +53,8 @@ class BlacklistChecker:
         self.resolver = dns.resolver.Resolver()
         self.resolver.timeout = 5
         self.resolver.lifetime = 5
+        # Débit par RBL partagé par tous les balayages de ce checker
+        self._rbl_buckets: dict[str, _TokenBucket] = {}
 
     def check_single(self, ip_address: str, blacklist: str) -> bool:
         """Check if an IP is listed on a single blacklist."""
@@ -63,90 +77,192 @@ class BlacklistChecker:
                 logger.warning("ip_blacklisted", ip=ip_address, blacklist=bl)
         return listed_on
 
-    async def _check_single_async(self, ip_address: str, blacklist: str) -> bool:
-        """Async wrapper for check_single — runs DNS in thread pool."""
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            None, partial(self.check_single, ip_address, blacklist)
-        )
+    async def _check_single_async(self, ip_address: str, blacklist: str) -> bool | None:
+        """Check one (IP, RBL) pair on the shared async resolver, within the RBL's rate limit."""
+        bucket = self._rbl_buckets.get(blacklist)
+        if bucket is None:
+            bucket = self._rbl_buckets[blacklist] = _TokenBucket(settings.BLACKLIST_RATE_PER_RBL)
+        wait = bucket.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+        query = f"{_reverse_ip(ip_address)}.{blacklist}"
+        try:
+            await async_resolver.resolve(query, "A")
+            return True  # listed
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer, dns.resolver.NoNameservers):
+            return False
+        except dns.exception.Timeout:
+            logger.warning("blacklist_check_timeout", ip=ip_address, bl=blacklist)
+            return None
+
+    async def sweep(self, pairs: list[tuple[str, str]]) -> dict[tuple[str, str], bool | None]:
+        """
+        Vérifie tous les couples (IP, RBL) en parallèle.
+
+        Concurrence globale bornée (BLACKLIST_SWEEP_CONCURRENCY), débit limité
+        par RBL (BLACKLIST_RATE_PER_RBL). Un couple en erreur vaut None : non
+        listé, mais ni mis en cache ni délisté.
+        """
+        semaphore = asyncio.Semaphore(settings.BLACKLIST_SWEEP_CONCURRENCY)
+
+        async def _check(ip_address: str, blacklist: str) -> bool | None:
+            async with semaphore:
+                return await self._check_single_async(ip_address, blacklist)
+
+        unique = list(dict.fromkeys(pairs))
+        results = await asyncio.gather(*(_check(*pair) for pair in unique), return_exceptions=True)
+        return {pair: result if isinstance(result, bool) else None for pair, result in zip(unique, results, strict=True)}
 
     async def _check_ip_async(self, ip_address: str) -> list[str]:
         """Check an IP against all 9 blacklists concurrently."""
-        tasks = [self._check_single_async(ip_address, bl) for bl in BLACKLISTS]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        listed_on = []
-        for bl, result in zip(BLACKLISTS, results):
-            if isinstance(result, bool) and result:
-                listed_on.append(bl)
-                logger.warning("ip_blacklisted", ip=ip_address, blacklist=bl)
+        results = await self.sweep([(ip_address, bl) for bl in BLACKLISTS])
+        listed_on = [bl for bl in BLACKLISTS if results[(ip_address, bl)]]
+        for bl in listed_on:
+            logger.warning("ip_blacklisted", ip=ip_address, blacklist=bl)
         return listed_on
 
-    async def check_all_ips(self) -> dict[str, list[str]]:
-        """Check all active/warming IPs against blacklists (non-blocking)."""
+    async def check_all_ips(self, force: bool = False) -> dict[str, list[str]]:
+        """Check the due (IP, RBL) pairs of all active/warming IPs (non-blocking).
+
+        Un seul balayage pour les couples échus des IPs et des listings
+        encore ouverts (délistage), puis une écriture groupée. `force` ignore
+        le cache et interroge tous les couples. Retourne les listings
+        constatés lors de ce balayage.
+        """
         ips = (
             self.db.query(IP)
             .filter(IP.status.in_([IPStatus.ACTIVE.value, IPStatus.WARMING.value]))
             .all()
         )
+        open_events = (
+            self.db.query(BlacklistEvent)
+            .filter(BlacklistEvent.delisted_at.is_(None))
+            .all()
+        )
+        event_ips = {
+            ip.id: ip
+            for ip in self.db.query(IP).filter(IP.id.in_({event.ip_id for event in open_events}))
+        } if open_events else {}
+
+        pairs = [(ip.address, bl) for ip in ips for bl in BLACKLISTS]
+        pairs += [
+            (event_ips[event.ip_id].address, event.blacklist_name)
+            for event in open_events
+            if event.ip_id in event_ips
+        ]
+        due = pairs if force else blacklist_store.due_pairs(self.db, pairs)
+        listed = await self.sweep(due) if due else {}
+        # Résultats enregistrés avec le commit des listings
+        blacklist_store.save(self.db, listed)
 
         results: dict[str, list[str]] = {}
+        listings: list[tuple[IP, list[str]]] = []
         for ip in ips:
-            listed_on = await self._check_ip_async(ip.address)
+            listed_on = [bl for bl in BLACKLISTS if listed.get((ip.address, bl))]
             if listed_on:
+                for bl in listed_on:
+                    logger.warning("ip_blacklisted", ip=ip.address, blacklist=bl)
                 results[ip.address] = listed_on
-                self._record_listing(ip, listed_on)
+                listings.append((ip, listed_on))
+        self._record_listings(listings)
 
-        # Check if previously blacklisted IPs have been delisted
-        await self._check_delistings()
+        # Check if previously blacklisted IPs have been delisted (couples re-vérifiés seulement)
+        due_events = [
+            event for event in open_events
+            if event.ip_id in event_ips and (event_ips[event.ip_id].address, event.blacklist_name) in listed
+        ]
+        if due_events:
+            await self._check_delistings(due_events, event_ips, listed)
 
         return results
 
     def _record_listing(self, ip: IP, blacklist_names: list[str]) -> None:
         """Record new blacklist events in DB."""
-        for bl_name in blacklist_names:
-            existing = (
-                self.db.query(BlacklistEvent)
-                .filter(
-                    BlacklistEvent.ip_id == ip.id,
-                    BlacklistEvent.blacklist_name == bl_name,
-                    BlacklistEvent.delisted_at.is_(None),
-                )
-                .first()
+        self._record_listings([(ip, blacklist_names)])
+
+    def _record_listings(self, listings: list[tuple[IP, list[str]]]) -> None:
+        """Record new blacklist events for several IPs (one query, one commit)."""
+        already_open = set(
+            self.db.query(BlacklistEvent.ip_id, BlacklistEvent.blacklist_name)
+            .filter(
+                BlacklistEvent.ip_id.in_({ip.id for ip, _ in listings}),
+                BlacklistEvent.delisted_at.is_(None),
             )
-            if not existing:
+            .all()
+        ) if listings else set()
+        now = datetime.utcnow()
+        for ip, blacklist_names in listings:
+            for bl_name in blacklist_names:
+                if (ip.id, bl_name) in already_open:
+                    continue
+                already_open.add((ip.id, bl_name))
                 self.db.add(
                     BlacklistEvent(
                         tenant_id=ip.tenant_id,
                         ip_id=ip.id,
                         blacklist_name=bl_name,
-                        listed_at=datetime.utcnow(),
+                        listed_at=now,
                     )
                 )
         self.db.commit()
 
-    async def _check_delistings(self) -> None:
-        """Check if blacklisted IPs have been delisted."""
-        events = (
-            self.db.query(BlacklistEvent)
-            .filter(BlacklistEvent.delisted_at.is_(None))
-            .all()
-        )
+    async def _check_delistings(
+        self,
+        events: list[BlacklistEvent] | None = None,
+        event_ips: dict[int, IP] | None = None,
+        listed: dict[tuple[str, str], bool] | None = None,
+    ) -> None:
+        """Check if blacklisted IPs have been delisted (all open listings in parallel).
+
+        `listed` : résultats d'un balayage déjà fait (check_all_ips) ; les
+        couples absents sont vérifiés ici.
+        """
+        if events is None:
+            events = (
+                self.db.query(BlacklistEvent)
+                .filter(BlacklistEvent.delisted_at.is_(None))
+                .all()
+            )
+        if not events:
+            return
+        if event_ips is None:
+            event_ips = {
+                ip.id: ip
+                for ip in self.db.query(IP).filter(IP.id.in_({event.ip_id for event in events}))
+            }
+
+        listed = dict(listed or {})
+        pairs = [
+            (event_ips[event.ip_id].address, event.blacklist_name)
+            for event in events
+            if event.ip_id in event_ips
+        ]
+        missing = [pair for pair in pairs if pair not in listed]
+        if missing:
+            listed.update(await self.sweep(missing))
+
+        delisted = []
+        now = datetime.utcnow()
         for event in events:
-            ip = self.db.query(IP).filter(IP.id == event.ip_id).first()
-            if not ip:
+            ip = event_ips.get(event.ip_id)
+            # Délisté seulement sur réponse négative (pas sur timeout)
+            if ip is None or listed[(ip.address, event.blacklist_name)] is not False:
                 continue
-            if not await self._check_single_async(ip.address, event.blacklist_name):
-                event.delisted_at = datetime.utcnow()
-                event.auto_recovered = True
-                logger.info(
-                    "ip_delisted",
-                    ip=ip.address,
-                    blacklist=event.blacklist_name,
-                )
-                await alerter.send(
-                    f"IP *{ip.address}* delisted from {event.blacklist_name}",
-                    severity=AlertSeverity.INFO,
-                    category=AlertCategory.BLACKLIST,
-                    db=self.db,
-                )
+            event.delisted_at = now
+            event.auto_recovered = True
+            delisted.append((ip, event))
+            logger.info(
+                "ip_delisted",
+                ip=ip.address,
+                blacklist=event.blacklist_name,
+            )
         self.db.commit()
+
+        for ip, event in delisted:
+            await alerter.send(
+                f"IP *{ip.address}* delisted from {event.blacklist_name}",
+                severity=AlertSeverity.INFO,
+                category=AlertCategory.BLACKLIST,
+                db=self.db,
+            )
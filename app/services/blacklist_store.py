@@ -0,0 +1,220 @@
+"""Résultats blacklist par couple (IP, RBL) avec intervalles de re-vérification adaptatifs.
+
+Chaque résultat est gardé dans Redis avec un TTL égal au délai avant la
+prochaine vérification : un couple propre n'est ré-interrogé qu'après
+BLACKLIST_CLEAN_RECHECK_HOURS, un couple listé toutes les
+BLACKLIST_LISTED_RECHECK_MINUTES (surveillance du délistage). Une clé
+absente = couple échu.
+
+Les résultats sont aussi écrits dans la table blacklist_checks, lue à la
+place de Redis quand celui-ci est indisponible (backoff comme domain_cache).
+Les envois de chaque IP sont additionnés dans un compteur Redis partagé
+(TTL BLACKLIST_PRIORITY_WINDOW_MINUTES) : une IP qui atteint
+BLACKLIST_PRIORITY_MIN_SENT emails dans la fenêtre, tous lots confondus
+(lots cadencés de quelques centaines compris), voit ses résultats oubliés
+et est vérifiée au passage suivant du planificateur.
+"""
+
+import json
+import time
+from datetime import datetime, timedelta
+
+import redis
+import structlog
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import BlacklistCheck
+
+logger = structlog.get_logger(__name__)
+
+KEY_PREFIX = "blacklist_result"
+SENT_KEY_PREFIX = "blacklist_sent"
+
+
+def _key(ip_address: str, blacklist: str) -> str:
+    return f"{KEY_PREFIX}:{ip_address}:{blacklist}"
+
+
+class BlacklistResultStore:
+    """Cache Redis (repli DB) des derniers résultats par (IP, RBL)."""
+
+    def __init__(
+        self,
+        redis_url: str | None = None,
+        clean_ttl: int | None = None,
+        listed_ttl: int | None = None,
+        redis_backoff: int | None = None,
+        priority_min_sent: int | None = None,
+        priority_window: int | None = None,
+    ):
+        self.redis_url = redis_url if redis_url is not None else settings.REDIS_URL
+        self.clean_ttl = clean_ttl or settings.BLACKLIST_CLEAN_RECHECK_HOURS * 3600
+        self.listed_ttl = listed_ttl or settings.BLACKLIST_LISTED_RECHECK_MINUTES * 60
+        self.redis_backoff = redis_backoff or settings.DOMAIN_CACHE_REDIS_BACKOFF_SECONDS
+        self.priority_min_sent = priority_min_sent or settings.BLACKLIST_PRIORITY_MIN_SENT
+        self.priority_window = priority_window or settings.BLACKLIST_PRIORITY_WINDOW_MINUTES * 60
+
+        self._redis: redis.Redis | None = None
+        self._redis_down_until = 0.0
+
+    def ttl_for(self, listed: bool) -> int:
+        """Délai avant la prochaine vérification d'un couple (secondes)."""
+        return self.listed_ttl if listed else self.clean_ttl
+
+    def due_pairs(
+        self,
+        db: Session,
+        pairs: list[tuple[str, str]],
+        now: datetime | None = None,
+    ) -> list[tuple[str, str]]:
+        """Couples sans résultat encore valide (dans l'ordre, sans doublons)."""
+        pairs = list(dict.fromkeys(pairs))
+        if not pairs:
+            return []
+
+        client = self._client()
+        if client is not None:
+            try:
+                cached = client.mget([_key(*pair) for pair in pairs])
+            except redis.RedisError as exc:
+                self._mark_redis_down(exc)
+            else:
+                return [pair for pair, raw in zip(pairs, cached, strict=True) if raw is None]
+
+        # Repli DB : couples dont la prochaine vérification n'est pas encore due
+        now = now or datetime.utcnow()
+        fresh = set(
+            db.query(BlacklistCheck.ip_address, BlacklistCheck.blacklist_name)
+            .filter(
+                BlacklistCheck.ip_address.in_({ip for ip, _ in pairs}),
+                BlacklistCheck.next_check_at > now,
+            )
+            .all()
+        )
+        return [pair for pair in pairs if pair not in fresh]
+
+    def save(
+        self,
+        db: Session,
+        results: dict[tuple[str, str], bool | None],
+        now: datetime | None = None,
+    ) -> None:
+        """
+        Enregistrer les résultats d'un balayage (Redis + table blacklist_checks).
+
+        Les couples en erreur (None) ne sont pas enregistrés : ils restent échus.
+        L'écriture DB n'est pas commitée ici, elle part avec le commit de l'appelant.
+        """
+        results = {pair: listed for pair, listed in results.items() if listed is not None}
+        if not results:
+            return
+        now = now or datetime.utcnow()
+
+        client = self._client()
+        if client is not None:
+            try:
+                pipe = client.pipeline(transaction=False)
+                for (ip_address, blacklist), listed in results.items():
+                    pipe.setex(
+                        _key(ip_address, blacklist),
+                        self.ttl_for(listed),
+                        json.dumps({"listed": listed, "checked_at": now.isoformat()}),
+                    )
+                pipe.execute()
+            except redis.RedisError as exc:
+                self._mark_redis_down(exc)
+
+        rows = {
+            (row.ip_address, row.blacklist_name): row
+            for row in db.query(BlacklistCheck).filter(
+                BlacklistCheck.ip_address.in_({ip for ip, _ in results})
+            )
+        }
+        for (ip_address, blacklist), listed in results.items():
+            row = rows.get((ip_address, blacklist))
+            if row is None:
+                row = BlacklistCheck(ip_address=ip_address, blacklist_name=blacklist)
+                db.add(row)
+            row.listed = listed
+            row.checked_at = now
+            row.next_check_at = now + timedelta(seconds=self.ttl_for(listed))
+
+    def record_sent(self, db: Session | None, ip_address: str, count: int) -> bool:
+        """
+        Ajouter des envois au compteur d'une IP ; vérification prioritaire au seuil.
+
+        Le compteur est remis à zéro quand il déclenche (un seul process y
+        parvient). Sans Redis, seul le lot courant est comparé au seuil.
+
+        Returns:
+            True si une vérification prioritaire a été demandée
+        """
+        if count <= 0:
+            return False
+        total = count
+
+        client = self._client()
+        if client is not None:
+            key = f"{SENT_KEY_PREFIX}:{ip_address}"
+            try:
+                pipe = client.pipeline(transaction=False)
+                pipe.incrby(key, count)
+                pipe.ttl(key)
+                total, ttl = pipe.execute()
+                if ttl < 0:
+                    # Premier envoi de la fenêtre
+                    client.expire(key, self.priority_window)
+                if total >= self.priority_min_sent and not client.delete(key):
+                    return False  # Déjà déclenché par un autre process
+            except redis.RedisError as exc:
+                self._mark_redis_down(exc)
+                total = count
+
+        if total < self.priority_min_sent:
+            return False
+        self.request_priority_check(db, ip_address)
+        return True
+
+    def request_priority_check(self, db: Session | None, ip_address: str) -> None:
+        """
+        Rendre tous les couples d'une IP échus (ex. gros lot envoyé).
+
+        La mise à jour DB éventuelle part avec le commit de l'appelant.
+        """
+        from app.services.blacklist_checker import BLACKLISTS
+
+        client = self._client()
+        if client is not None:
+            try:
+                client.delete(*(_key(ip_address, bl) for bl in BLACKLISTS))
+            except redis.RedisError as exc:
+                self._mark_redis_down(exc)
+        if db is not None:
+            db.query(BlacklistCheck).filter(BlacklistCheck.ip_address == ip_address).update(
+                {BlacklistCheck.next_check_at: datetime.utcnow()},
+                synchronize_session=False,
+            )
+        logger.info("blacklist_priority_check_requested", ip=ip_address)
+
+    # ── Redis (tolérant aux pannes) ──────────────────────────────
+
+    def _client(self) -> redis.Redis | None:
+        if not self.redis_url or time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(
+                self.redis_url,
+                decode_responses=True,
+                socket_connect_timeout=0.5,
+                socket_timeout=0.5,
+            )
+        return self._redis
+
+    def _mark_redis_down(self, exc: Exception) -> None:
+        self._redis_down_until = time.monotonic() + self.redis_backoff
+        logger.warning("blacklist_store_redis_unavailable", error=str(exc), backoff_s=self.redis_backoff)
+
+
+# Instance partagée par le process (planificateur, tâches d'envoi)
+blacklist_store = BlacklistResultStore()
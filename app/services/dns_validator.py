@@ -1,16 +1,67 @@
-"""DNS record validation: SPF, DKIM, DMARC, PTR, MX."""
-
+"""DNS record validation: SPF, DKIM, DMARC, PTR, MX.
+
+validate_domain (un domaine, API) reste synchrone. validate_all lance
+toutes les vérifications de tous les domaines en parallèle sur le
+résolveur asyncio partagé (DNS_VALIDATION_CONCURRENCY vérifications à la
+fois) ; les réponses identiques (TXT d'un même nom, PTR d'une IP partagée)
+sont mises en cache le temps du passage, et les drapeaux des domaines sont
+écrits en une seule mise à jour groupée.
+"""
+
+import asyncio
+import time
 from datetime import datetime
 
 import dns.resolver
 import structlog
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.models import Domain, IP
+from app.services.async_resolver import async_resolver
 
 logger = structlog.get_logger(__name__)
 
 
+def _spf_valid(domain_name: str, records: list[str], expected_ip: str | None) -> bool:
+    for txt in records:
+        if txt.startswith("v=spf1"):
+            if expected_ip and f"ip4:{expected_ip}" not in txt and "+all" not in txt:
+                logger.warning("spf_missing_ip", domain=domain_name, ip=expected_ip)
+                return False
+            return True
+    return False
+
+
+def _dkim_valid(records: list[str]) -> bool:
+    return any("v=DKIM1" in txt or "p=" in txt for txt in records)
+
+
+def _dmarc_valid(records: list[str]) -> bool:
+    return any(txt.startswith("v=DMARC1") for txt in records)
+
+
+def _ptr_valid(ip_address: str, names: list[str], expected_hostname: str | None) -> bool:
+    for ptr in names:
+        if expected_hostname and ptr != expected_hostname:
+            logger.warning("ptr_mismatch", ip=ip_address, got=ptr, expected=expected_hostname)
+            return False
+        return True
+    return False
+
+
+def _reverse_name(ip_address: str) -> str:
+    return ".".join(reversed(ip_address.split("."))) + ".in-addr.arpa"
+
+
+def _texts(rdtype: str, answers) -> list[str]:
+    """Réponse DNS → chaînes comparables (TXT sans guillemets, noms sans point final)."""
+    if rdtype == "TXT":
+        return [rdata.to_text().strip('"') for rdata in answers]
+    return [str(rdata).rstrip(".") for rdata in answers]
+
+
 class DNSValidator:
     """Validate DNS records for domains and IPs."""
 
@@ -19,19 +70,14 @@ class DNSValidator:
         self.resolver = dns.resolver.Resolver()
         self.resolver.timeout = 10
         self.resolver.lifetime = 10
+        # Réponses du passage validate_all en cours : (nom, type) → tâche
+        self._answers: dict[tuple[str, str], asyncio.Future] = {}
 
     def check_spf(self, domain_name: str, expected_ip: str | None = None) -> bool:
         """Check if domain has valid SPF record, optionally including an IP."""
         try:
             answers = self.resolver.resolve(domain_name, "TXT")
-            for rdata in answers:
-                txt = rdata.to_text().strip('"')
-                if txt.startswith("v=spf1"):
-                    if expected_ip and f"ip4:{expected_ip}" not in txt and "+all" not in txt:
-                        logger.warning("spf_missing_ip", domain=domain_name, ip=expected_ip)
-                        return False
-                    return True
-            return False
+            return _spf_valid(domain_name, _texts("TXT", answers), expected_ip)
         except Exception as exc:
             logger.debug("spf_check_failed", domain=domain_name, error=str(exc))
             return False
@@ -41,11 +87,7 @@ class DNSValidator:
         try:
             qname = f"{selector}._domainkey.{domain_name}"
             answers = self.resolver.resolve(qname, "TXT")
-            for rdata in answers:
-                txt = rdata.to_text().strip('"')
-                if "v=DKIM1" in txt or "p=" in txt:
-                    return True
-            return False
+            return _dkim_valid(_texts("TXT", answers))
         except Exception as exc:
             logger.debug("dkim_check_failed", domain=domain_name, selector=selector, error=str(exc))
             return False
@@ -55,11 +97,7 @@ class DNSValidator:
         try:
             qname = f"_dmarc.{domain_name}"
             answers = self.resolver.resolve(qname, "TXT")
-            for rdata in answers:
-                txt = rdata.to_text().strip('"')
-                if txt.startswith("v=DMARC1"):
-                    return True
-            return False
+            return _dmarc_valid(_texts("TXT", answers))
         except Exception as exc:
             logger.debug("dmarc_check_failed", domain=domain_name, error=str(exc))
             return False
@@ -67,18 +105,8 @@ class DNSValidator:
     def check_ptr(self, ip_address: str, expected_hostname: str | None = None) -> bool:
         """Check reverse DNS (PTR) for an IP address."""
         try:
-            octets = ip_address.split(".")
-            arpa = ".".join(reversed(octets)) + ".in-addr.arpa"
-            answers = self.resolver.resolve(arpa, "PTR")
-            for rdata in answers:
-                ptr = str(rdata).rstrip(".")
-                if expected_hostname and ptr != expected_hostname:
-                    logger.warning(
-                        "ptr_mismatch", ip=ip_address, got=ptr, expected=expected_hostname
-                    )
-                    return False
-                return True
-            return False
+            answers = self.resolver.resolve(_reverse_name(ip_address), "PTR")
+            return _ptr_valid(ip_address, _texts("PTR", answers), expected_hostname)
         except Exception as exc:
             logger.debug("ptr_check_failed", ip=ip_address, error=str(exc))
             return False
@@ -118,10 +146,98 @@ class DNSValidator:
         logger.info("dns_validation_complete", domain=domain.name, results=results)
         return results
 
-    def validate_all(self) -> dict[str, dict[str, bool]]:
-        """Validate DNS for all domains."""
+    # ── Passage complet asynchrone ───────────────────────────────
+
+    async def _lookup(self, qname: str, rdtype: str) -> list[str]:
+        """Résolution mise en cache pour le passage en cours (une requête par (nom, type))."""
+        key = (qname.lower().rstrip("."), rdtype)
+        future = self._answers.get(key)
+        if future is None:
+            future = self._answers[key] = asyncio.ensure_future(async_resolver.resolve(qname, rdtype))
+        return _texts(rdtype, await future)
+
+    async def _timed(self, check: str, semaphore: asyncio.Semaphore, target: str, coro) -> bool:
+        """Une vérification sous la limite de concurrence ; erreur DNS = échec, latence mesurée."""
+        from app.api.routes.metrics import dns_check_seconds
+
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                return await coro
+            except Exception as exc:
+                logger.debug(f"{check}_check_failed", target=target, error=str(exc))
+                return False
+            finally:
+                dns_check_seconds.labels(check=check).observe(time.perf_counter() - started)
+
+    async def _spf(self, domain_name: str, expected_ip: str | None) -> bool:
+        return _spf_valid(domain_name, await self._lookup(domain_name, "TXT"), expected_ip)
+
+    async def _dkim(self, domain_name: str, selector: str) -> bool:
+        return _dkim_valid(await self._lookup(f"{selector}._domainkey.{domain_name}", "TXT"))
+
+    async def _dmarc(self, domain_name: str) -> bool:
+        return _dmarc_valid(await self._lookup(f"_dmarc.{domain_name}", "TXT"))
+
+    async def _ptr(self, ip_address: str, expected_hostname: str | None) -> bool:
+        return _ptr_valid(ip_address, await self._lookup(_reverse_name(ip_address), "PTR"), expected_hostname)
+
+    async def _mx(self, domain_name: str) -> bool:
+        return len(await self._lookup(domain_name, "MX")) > 0
+
+    async def _validate_async(self, domain: Domain, ip: IP | None, semaphore: asyncio.Semaphore) -> dict[str, bool]:
+        checks = [
+            ("spf", domain.name, self._spf(domain.name, ip.address if ip else None)),
+            ("dkim", domain.name, self._dkim(domain.name, domain.dkim_selector or "default")),
+            ("dmarc", domain.name, self._dmarc(domain.name)),
+            ("mx", domain.name, self._mx(domain.name)),
+        ]
+        if ip is not None:
+            checks.append(("ptr", ip.address, self._ptr(ip.address, ip.hostname)))
+        values = await asyncio.gather(*(
+            self._timed(check, semaphore, target, coro) for check, target, coro in checks
+        ))
+        results = {"ptr": False}
+        results.update({check: ok for (check, _, _), ok in zip(checks, values, strict=True)})
+        return {check: results[check] for check in ("spf", "dkim", "dmarc", "ptr", "mx")}
+
+    async def validate_all(self) -> dict[str, dict[str, bool]]:
+        """Validate DNS for all domains (all checks in parallel, one bulk update)."""
         domains = self.db.query(Domain).all()
-        all_results = {}
-        for domain in domains:
-            all_results[domain.name] = self.validate_domain(domain)
+        ip_ids = {domain.ip_id for domain in domains if domain.ip_id}
+        ips = {ip.id: ip for ip in self.db.query(IP).filter(IP.id.in_(ip_ids))} if ip_ids else {}
+
+        semaphore = asyncio.Semaphore(settings.DNS_VALIDATION_CONCURRENCY)
+        self._answers = {}
+        try:
+            results = await asyncio.gather(*(
+                self._validate_async(domain, ips.get(domain.ip_id), semaphore) for domain in domains
+            ))
+        finally:
+            self._answers = {}
+
+        if domains:
+            now = datetime.utcnow()
+            self.db.execute(
+                update(Domain),
+                [
+                    {
+                        "id": domain.id,
+                        "spf_valid": result["spf"],
+                        "dkim_valid": result["dkim"],
+                        "dmarc_valid": result["dmarc"],
+                        "ptr_valid": result["ptr"],
+                        "last_dns_check": now,
+                    }
+                    for domain, result in zip(domains, results, strict=True)
+                ],
+            )
+            self.db.commit()
+
+        all_results = {domain.name: result for domain, result in zip(domains, results, strict=True)}
+        logger.info(
+            "dns_validation_all_complete",
+            domains=len(domains),
+            failed_checks=sum(1 for result in results for ok in result.values() if not ok),
+        )
         return all_results
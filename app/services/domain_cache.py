@@ -0,0 +1,260 @@
+"""Cache partagé des verdicts par domaine (MX, jetable, typo) — 2 niveaux.
+
+Niveau 1 : LRU en mémoire avec TTL, propre à chaque process.
+Niveau 2 : Redis, partagé entre les workers uvicorn et Celery.
+
+Les verdicts négatifs expirent plus vite que les positifs : un domaine sans
+MX aujourd'hui peut être configuré demain. Si Redis est indisponible, le cache
+continue en mémoire seule et Redis est ignoré pendant un délai de backoff.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+import redis
+import structlog
+
+from app.config import settings
+
+logger = structlog.get_logger(__name__)
+
+KEY_PREFIX = "domain_verdict"
+
+# Valeur retournée par DomainVerdictCache.get quand aucun verdict n'est en cache
+MISSING = object()
+
+
+def _record(tier: str, result: str) -> None:
+    from app.api.routes.metrics import domain_cache_lookups
+
+    domain_cache_lookups.labels(tier=tier, result=result).inc()
+
+
+def _record_many(tier: str, hits: int, misses: int) -> None:
+    from app.api.routes.metrics import domain_cache_lookups
+
+    if hits:
+        domain_cache_lookups.labels(tier=tier, result="hit").inc(hits)
+    if misses:
+        domain_cache_lookups.labels(tier=tier, result="miss").inc(misses)
+
+
+class DomainVerdictCache:
+    """Cache à 2 niveaux des verdicts par (type de verdict, domaine)."""
+
+    def __init__(
+        self,
+        redis_url: str | None = None,
+        local_size: int | None = None,
+        local_ttl: int | None = None,
+        positive_ttl: int | None = None,
+        negative_ttl: int | None = None,
+        redis_backoff: int | None = None,
+    ):
+        self.redis_url = redis_url if redis_url is not None else settings.REDIS_URL
+        self.local_size = local_size or settings.DOMAIN_CACHE_LOCAL_SIZE
+        self.local_ttl = local_ttl or settings.DOMAIN_CACHE_LOCAL_TTL_SECONDS
+        self.positive_ttl = positive_ttl or settings.DOMAIN_CACHE_POSITIVE_TTL_SECONDS
+        self.negative_ttl = negative_ttl or settings.DOMAIN_CACHE_NEGATIVE_TTL_SECONDS
+        self.redis_backoff = redis_backoff or settings.DOMAIN_CACHE_REDIS_BACKOFF_SECONDS
+
+        self._local: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis: redis.Redis | None = None
+        self._redis_down_until = 0.0
+
+    def get_or_compute(
+        self,
+        kind: str,
+        domain: str,
+        compute: Callable[[], Any],
+        is_positive: Callable[[Any], bool] = bool,
+    ) -> Any:
+        """
+        Retourner le verdict `kind` du domaine, en le calculant au besoin.
+
+        `compute` n'est appelé qu'en cas de miss sur les 2 niveaux ; s'il lève
+        une exception (erreur DNS transitoire...), rien n'est mis en cache.
+        Les valeurs doivent être sérialisables en JSON.
+        """
+        value = self.get(kind, domain)
+        if value is MISSING:
+            value = compute()
+            self.put(kind, domain, value, is_positive(value))
+        return value
+
+    def get(self, kind: str, domain: str) -> Any:
+        """Verdict en cache (mémoire puis Redis), ou MISSING."""
+        key = f"{KEY_PREFIX}:{kind}:{domain.lower()}"
+
+        value = self._local_get(key)
+        if value is not MISSING:
+            _record("local", "hit")
+            return value
+        _record("local", "miss")
+
+        value = self._redis_get(key)
+        if value is not MISSING:
+            _record("redis", "hit")
+            self._local_set(key, value, self.local_ttl)
+            return value
+        _record("redis", "miss")
+        return MISSING
+
+    def get_many(self, kind: str, domains: list[str]) -> dict[str, Any]:
+        """Verdicts en cache d'un lot de domaines (un seul MGET Redis) ; absents = omis."""
+        found: dict[str, Any] = {}
+        missing: dict[str, str] = {}
+        for domain in domains:
+            key = f"{KEY_PREFIX}:{kind}:{domain.lower()}"
+            value = self._local_get(key)
+            if value is MISSING:
+                missing[key] = domain
+            else:
+                found[domain] = value
+        _record_many("local", hits=len(found), misses=len(missing))
+        if not missing:
+            return found
+
+        cached = self._redis_get_many(list(missing))
+        for key, domain in missing.items():
+            value = cached.get(key, MISSING)
+            if value is not MISSING:
+                self._local_set(key, value, self.local_ttl)
+                found[domain] = value
+        hits = len(found) - (len(domains) - len(missing))
+        _record_many("redis", hits=hits, misses=len(missing) - hits)
+        return found
+
+    def put_many(self, kind: str, values: dict[str, Any], is_positive: Callable[[Any], bool] = bool) -> None:
+        """Enregistrer les verdicts d'un lot de domaines (un seul pipeline Redis)."""
+        entries = []
+        for domain, value in values.items():
+            key = f"{KEY_PREFIX}:{kind}:{domain.lower()}"
+            ttl = self.positive_ttl if is_positive(value) else self.negative_ttl
+            self._local_set(key, value, min(self.local_ttl, ttl))
+            entries.append((key, value, ttl))
+        client = self._client()
+        if client is None or not entries:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            for key, value, ttl in entries:
+                pipe.setex(key, ttl, json.dumps(value))
+            pipe.execute()
+        except redis.RedisError as exc:
+            self._mark_redis_down(exc)
+
+    def put(self, kind: str, domain: str, value: Any, positive: bool) -> None:
+        """Enregistrer un verdict sur les 2 niveaux (TTL positif ou négatif)."""
+        key = f"{KEY_PREFIX}:{kind}:{domain.lower()}"
+        ttl = self.positive_ttl if positive else self.negative_ttl
+        self._local_set(key, value, min(self.local_ttl, ttl))
+        self._redis_set(key, value, ttl)
+
+    def invalidate(self, kind: str, domain: str) -> None:
+        """Oublier un verdict sur les 2 niveaux (ex. domaine reconfiguré)."""
+        key = f"{KEY_PREFIX}:{kind}:{domain.lower()}"
+        with self._lock:
+            self._local.pop(key, None)
+        client = self._client()
+        if client is not None:
+            try:
+                client.delete(key)
+            except redis.RedisError as exc:
+                self._mark_redis_down(exc)
+
+    def clear_local(self) -> None:
+        with self._lock:
+            self._local.clear()
+
+    # ── Niveau 1 : LRU en mémoire ────────────────────────────────
+
+    def _local_get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return MISSING
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._local[key]
+                return MISSING
+            self._local.move_to_end(key)
+            return value
+
+    def _local_set(self, key: str, value: Any, ttl: int) -> None:
+        with self._lock:
+            self._local[key] = (time.monotonic() + ttl, value)
+            self._local.move_to_end(key)
+            while len(self._local) > self.local_size:
+                self._local.popitem(last=False)
+
+    # ── Niveau 2 : Redis (tolérant aux pannes) ───────────────────
+
+    def _client(self) -> redis.Redis | None:
+        if not self.redis_url or time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(
+                self.redis_url,
+                decode_responses=True,
+                socket_connect_timeout=0.5,
+                socket_timeout=0.5,
+            )
+        return self._redis
+
+    def _mark_redis_down(self, exc: Exception) -> None:
+        self._redis_down_until = time.monotonic() + self.redis_backoff
+        logger.warning("domain_cache_redis_unavailable", error=str(exc), backoff_s=self.redis_backoff)
+
+    def _redis_get(self, key: str) -> Any:
+        client = self._client()
+        if client is None:
+            return MISSING
+        try:
+            raw = client.get(key)
+        except redis.RedisError as exc:
+            self._mark_redis_down(exc)
+            return MISSING
+        if raw is None:
+            return MISSING
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            return MISSING
+
+    def _redis_get_many(self, keys: list[str]) -> dict[str, Any]:
+        client = self._client()
+        if client is None:
+            return {}
+        try:
+            raws = client.mget(keys)
+        except redis.RedisError as exc:
+            self._mark_redis_down(exc)
+            return {}
+        values = {}
+        for key, raw in zip(keys, raws, strict=True):
+            if raw is None:
+                continue
+            try:
+                values[key] = json.loads(raw)
+            except json.JSONDecodeError:
+                continue
+        return values
+
+    def _redis_set(self, key: str, value: Any, ttl: int) -> None:
+        client = self._client()
+        if client is None:
+            return
+        try:
+            client.setex(key, ttl, json.dumps(value))
+        except redis.RedisError as exc:
+            self._mark_redis_down(exc)
+
+
+# Instance partagée par le process (validate_single, ContactValidator...)
+domain_cache = DomainVerdictCache()
@@ -2,11 +2,13 @@
 
 import asyncio
 import re
-from functools import lru_cache
 
 import dns.resolver
 import structlog
 
+from app.services.async_resolver import async_resolver
+from app.services.domain_cache import DomainVerdictCache, domain_cache
+
 logger = structlog.get_logger(__name__)
 
 EMAIL_RE = re.compile(r"^[a-zA-Z0-9._%+\-]+@[a-zA-Z0-9.\-]+\.[a-zA-Z]{2,}$")
@@ -29,46 +31,126 @@ DISPOSABLE_DOMAINS = frozenset({
 })
 
 
-@lru_cache(maxsize=4096)
-def _check_mx_cached(domain: str) -> bool:
-    """Check if domain has MX records (cached to avoid repeated lookups)."""
+class _TransientDNSError(Exception):
+    """Erreur DNS temporaire : le verdict n'est pas mis en cache."""
+
+
+def _resolve_mx(domain: str) -> bool:
+    """Résoudre les MX du domaine (verdict définitif ou _TransientDNSError)."""
     try:
         answers = dns.resolver.resolve(domain, "MX", lifetime=5.0)
         return len(answers) > 0
     except (dns.resolver.NXDOMAIN, dns.resolver.NoNameservers):
         return False
-    except (dns.resolver.NoAnswer, dns.resolver.Timeout, dns.exception.DNSException):
+    except dns.resolver.NoAnswer:
+        # Pas de MX mais le domaine existe : MX implicite (RFC 5321 §5.1)
+        return True
+    except (dns.resolver.Timeout, dns.exception.DNSException) as exc:
+        raise _TransientDNSError(str(exc)) from exc
+
+
+async def _resolve_mx_async(domain: str) -> bool:
+    """Équivalent asyncio de _resolve_mx, via le résolveur partagé."""
+    try:
+        answers = await async_resolver.resolve(domain, "MX")
+        return len(answers) > 0
+    except (dns.resolver.NXDOMAIN, dns.resolver.NoNameservers):
+        return False
+    except dns.resolver.NoAnswer:
+        return True
+    except (dns.resolver.Timeout, dns.exception.DNSException) as exc:
+        raise _TransientDNSError(str(exc)) from exc
+
+
+async def _resolve_mx_or_none(domain: str) -> bool | None:
+    """_resolve_mx_async, erreur transitoire → None (ni verdict ni cache)."""
+    try:
+        return await _resolve_mx_async(domain)
+    except _TransientDNSError:
+        return None
+
+
+async def check_mx_many_async(
+    domains: list[str],
+    cache: DomainVerdictCache | None = None,
+) -> dict[str, bool]:
+    """
+    check_mx pour un lot de domaines, sans bloquer la boucle asyncio.
+
+    Le cache (mémoire + Redis) est lu en un MGET puis écrit en un pipeline,
+    tous deux dans l'exécuteur ; seuls les domaines absents du cache sont
+    résolus, en parallèle sur le résolveur asyncio partagé.
+    """
+    cache = cache or domain_cache
+    loop = asyncio.get_running_loop()
+    verdicts = await loop.run_in_executor(None, cache.get_many, "mx", domains)
+
+    missing = [domain for domain in domains if domain not in verdicts]
+    resolved = await asyncio.gather(*(_resolve_mx_or_none(domain) for domain in missing))
+    new = {
+        domain: has_mx
+        for domain, has_mx in zip(missing, resolved, strict=True)
+        if has_mx is not None
+    }
+    if new:
+        await loop.run_in_executor(None, cache.put_many, "mx", new)
+    verdicts.update(new)
+
+    # Erreur transitoire : supposé valide (comme check_mx)
+    return {domain: verdicts.get(domain, True) for domain in domains}
+
+
+def check_mx(domain: str, cache: DomainVerdictCache | None = None) -> bool:
+    """Check if domain has MX records (verdict shared across processes via domain_cache)."""
+    cache = cache or domain_cache
+    try:
+        return cache.get_or_compute("mx", domain, lambda: _resolve_mx(domain))
+    except _TransientDNSError:
         # On timeout/transient error, assume valid to avoid false rejections
         return True
 
 
-def validate_single(email: str) -> tuple[bool, str | None]:
+def _precheck(email: str) -> tuple[str, str | None, str | None]:
     """
-    Validate a single email address.
+    Local checks (no I/O): syntax, blacklisted prefixes, disposable domains.
 
     Returns:
-        (valid, reason) — reason is None if valid, else a short description.
+        (normalized email, domain, reason) — reason is None if the MX check is still due.
     """
     email = email.strip().lower()
 
     if not email:
-        return False, "empty"
+        return email, None, "empty"
 
     if not EMAIL_RE.match(email):
-        return False, "invalid_syntax"
+        return email, None, "invalid_syntax"
 
     local, domain = email.rsplit("@", 1)
 
     # Check blacklisted prefixes
     if local in BLACKLISTED_PREFIXES:
-        return False, "blacklisted_prefix"
+        return email, domain, "blacklisted_prefix"
 
     # Check disposable domains
     if domain in DISPOSABLE_DOMAINS:
-        return False, "disposable_domain"
+        return email, domain, "disposable_domain"
+
+    return email, domain, None
+
+
+def validate_single(email: str) -> tuple[bool, str | None]:
+    """
+    Validate a single email address.
+
+    Returns:
+        (valid, reason) — reason is None if valid, else a short description.
+    """
+    _, domain, reason = _precheck(email)
+    if reason:
+        return False, reason
 
     # DNS MX check
-    if not _check_mx_cached(domain):
+    if not check_mx(domain):
         return False, "no_mx_records"
 
     return True, None
@@ -76,16 +158,23 @@ def validate_single(email: str) -> tuple[bool, str | None]:
 
 async def validate_batch(emails: list[str]) -> list[dict]:
     """
-    Validate a batch of emails concurrently.
+    Validate a batch of emails.
 
-    DNS lookups are done in a thread pool to not block the event loop.
+    Local checks run first; MX lookups are then done once per distinct domain,
+    concurrently on the shared asyncio resolver (bounded, coalesced, rate
+    limited), so latency scales with distinct domains rather than emails.
+    Cached verdicts are read and written in one Redis round trip each, off
+    the event loop.
     Returns list of {"email": str, "valid": bool, "reason": str|None}.
     """
-    loop = asyncio.get_event_loop()
+    prechecked = [_precheck(email) for email in emails]
 
-    async def _validate_one(email: str) -> dict:
-        valid, reason = await loop.run_in_executor(None, validate_single, email)
-        return {"email": email.strip().lower(), "valid": valid, "reason": reason}
+    domains = list({domain for _, domain, reason in prechecked if reason is None})
+    verdicts = await check_mx_many_async(domains) if domains else {}
 
-    tasks = [_validate_one(e) for e in emails]
-    return await asyncio.gather(*tasks)
+    results = []
+    for email, domain, reason in prechecked:
+        if reason is None and not verdicts[domain]:
+            reason = "no_mx_records"
+        results.append({"email": email, "valid": reason is None, "reason": reason})
+    return results
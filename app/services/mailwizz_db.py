@@ -10,26 +10,58 @@ Avantages vs API REST :
   - Gestion fine des quotas warmup
 """
 
+import asyncio
+import secrets
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
 
 import aiomysql
 import structlog
+from sqlalchemy import update
+from sqlalchemy.orm import Session
 
 from app.config import settings
 
 logger = structlog.get_logger(__name__)
 
 
+def _subscriber_uid() -> str:
+    """UID public d'un abonné (13 caractères, comme uniqid() côté MailWizz)."""
+    return secrets.token_hex(7)[:13]
+
+
+def subscriber_fields(contact) -> dict:
+    """Champs MailWizz (tags mw_list_field) d'un Contact — API REST et MySQL direct."""
+    fields = {"EMAIL": contact.email}
+    if contact.first_name:
+        fields["FNAME"] = contact.first_name
+    if contact.last_name:
+        fields["LNAME"] = contact.last_name
+    if contact.company:
+        fields["COMPANY"] = contact.company
+    if contact.website:
+        fields["WEBSITE"] = contact.website
+    return fields
+
+
 class MailWizzDB:
     """
     Client MySQL direct pour MailWizz.
 
     Gère les delivery servers (création, suppression, quotas, statut).
     Toutes les requêtes utilisent des paramètres préparés pour éviter les injections SQL.
+
+    Pool configurable (MAILWIZZ_DB_POOL_*) : chaque connexion est pingée à
+    l'acquisition (reconnexion automatique si MySQL l'a fermée) ; si le pool
+    lui-même ne peut plus ouvrir de connexion, il est recréé une fois.
+    Saturation et temps d'attente exportés vers Prometheus.
     """
 
     def __init__(self):
         self._pool: aiomysql.Pool | None = None
+        # Dernier quota horaire écrit par server_id → (quota, instant monotonic)
+        self._synced_quotas: dict[int, tuple[int, float]] = {}
 
     async def connect(self) -> None:
         """
@@ -61,12 +93,18 @@ class MailWizzDB:
                     password=settings.MAILWIZZ_DB_PASSWORD,
                     db=settings.MAILWIZZ_DB_NAME,
                     autocommit=True,
-                    minsize=1,
-                    maxsize=5,
+                    minsize=settings.MAILWIZZ_DB_POOL_MIN_SIZE,
+                    maxsize=settings.MAILWIZZ_DB_POOL_MAX_SIZE,
+                    pool_recycle=settings.MAILWIZZ_DB_POOL_RECYCLE_SECONDS,
                     charset="utf8mb4",
                     connect_timeout=5,
                 )
-                logger.info("mailwizz_db_connected", host=host, db=settings.MAILWIZZ_DB_NAME)
+                logger.info(
+                    "mailwizz_db_connected",
+                    host=host,
+                    db=settings.MAILWIZZ_DB_NAME,
+                    pool_max=settings.MAILWIZZ_DB_POOL_MAX_SIZE,
+                )
                 return
             except Exception as exc:
                 last_error = exc
@@ -93,6 +131,72 @@ class MailWizzDB:
             await self.connect()
         return self._pool is not None
 
+    async def _get_pool(self) -> aiomysql.Pool | None:
+        """Pool connecté, ou None si MailWizz n'est pas configuré/joignable."""
+        if not await self._ensure_connected():
+            return None
+        return self._pool
+
+    @asynccontextmanager
+    async def _acquire(self):
+        """
+        Connexion du pool, pingée (reconnexion auto), avec délai d'attente max.
+
+        Lève asyncio.TimeoutError si aucune connexion ne se libère à temps.
+        """
+        from app.api.routes.metrics import mailwizz_db_acquire_seconds
+
+        started = time.monotonic()
+        try:
+            pool, conn = await self._checkout()
+        except (aiomysql.OperationalError, OSError) as exc:
+            # Pool inutilisable (MySQL redémarré, réseau) : le recréer une fois.
+            # L'ancien pool est fermé sans attendre : ses connexions encore
+            # prêtées seront fermées à leur libération.
+            from app.api.routes.metrics import mailwizz_db_reconnects
+
+            logger.warning("mailwizz_db_pool_reset", error=str(exc))
+            mailwizz_db_reconnects.inc()
+            if self._pool is not None:
+                self._pool.close()
+                self._pool = None
+            if not await self._ensure_connected():
+                raise
+            pool, conn = await self._checkout()
+        mailwizz_db_acquire_seconds.observe(time.monotonic() - started)
+        self._record_pool_usage()
+
+        try:
+            yield conn
+        finally:
+            pool.release(conn)
+            self._record_pool_usage()
+
+    async def _checkout(self) -> tuple[aiomysql.Pool, aiomysql.Connection]:
+        pool = self._pool
+        conn = await asyncio.wait_for(
+            pool.acquire(), timeout=settings.MAILWIZZ_DB_ACQUIRE_TIMEOUT_SECONDS
+        )
+        try:
+            await conn.ping(reconnect=True)
+        except Exception:
+            conn.close()
+            pool.release(conn)
+            raise
+        return pool, conn
+
+    def _record_pool_usage(self) -> None:
+        from app.api.routes.metrics import mailwizz_db_pool_connections, mailwizz_db_pool_saturation
+
+        pool = self._pool
+        if pool is None:
+            return
+        in_use = pool.size - pool.freesize
+        mailwizz_db_pool_connections.labels(state="in_use").set(in_use)
+        mailwizz_db_pool_connections.labels(state="free").set(pool.freesize)
+        mailwizz_db_pool_connections.labels(state="max").set(pool.maxsize)
+        mailwizz_db_pool_saturation.set(in_use / pool.maxsize if pool.maxsize else 0)
+
     # ─────────────────────────────────────────────────────────────
     # DELIVERY SERVERS — CRUD complet
     # ─────────────────────────────────────────────────────────────
@@ -134,7 +238,7 @@ class MailWizzDB:
         now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
 
         try:
-            async with self._pool.acquire() as conn:
+            async with self._acquire() as conn:
                 async with conn.cursor() as cur:
                     await cur.execute(
                         """
@@ -191,7 +295,7 @@ class MailWizzDB:
         if not await self._ensure_connected():
             return False
         try:
-            async with self._pool.acquire() as conn:
+            async with self._acquire() as conn:
                 async with conn.cursor() as cur:
                     await cur.execute(
                         "DELETE FROM mw_delivery_server WHERE server_id = %s",
@@ -218,7 +322,7 @@ class MailWizzDB:
             logger.error("mailwizz_invalid_status", status=status)
             return False
         try:
-            async with self._pool.acquire() as conn:
+            async with self._acquire() as conn:
                 async with conn.cursor() as cur:
                     now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
                     await cur.execute(
@@ -256,7 +360,7 @@ class MailWizzDB:
         if not await self._ensure_connected():
             return False
         try:
-            async with self._pool.acquire() as conn:
+            async with self._acquire() as conn:
                 async with conn.cursor() as cur:
                     now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
                     await cur.execute(
@@ -267,6 +371,7 @@ class MailWizzDB:
                     )
                     ok = cur.rowcount > 0
                     if ok:
+                        self._synced_quotas[server_id] = (hourly_quota, time.monotonic())
                         logger.info(
                             "mailwizz_quota_updated",
                             server_id=server_id,
@@ -277,11 +382,52 @@ class MailWizzDB:
             logger.error("mailwizz_quota_update_failed", server_id=server_id, error=str(exc))
             return False
 
+    async def set_server_quotas(self, hourly_quotas: dict[int, int]) -> bool:
+        """
+        Met à jour le quota horaire de plusieurs delivery servers en une
+        transaction : un seul UPDATE ... CASE server_id.
+        """
+        if not hourly_quotas:
+            return True
+        if not await self._ensure_connected():
+            return False
+
+        server_ids = list(hourly_quotas)
+        cases = " ".join(["WHEN %s THEN %s"] * len(server_ids))
+        placeholders = ", ".join(["%s"] * len(server_ids))
+        params = [value for sid in server_ids for value in (sid, hourly_quotas[sid])]
+        now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            async with self._acquire() as conn:
+                async with conn.cursor() as cur:
+                    await conn.begin()
+                    try:
+                        await cur.execute(
+                            f"""UPDATE mw_delivery_server
+                                SET hourly_quota = CASE server_id {cases} END,
+                                    last_updated = %s
+                                WHERE server_id IN ({placeholders})""",
+                            (*params, now, *server_ids),
+                        )
+                        await conn.commit()
+                    except Exception:
+                        await conn.rollback()
+                        raise
+        except Exception as exc:
+            logger.error("mailwizz_bulk_quota_update_failed", servers=len(server_ids), error=str(exc))
+            return False
+
+        synced_at = time.monotonic()
+        for sid in server_ids:
+            self._synced_quotas[sid] = (hourly_quotas[sid], synced_at)
+        logger.info("mailwizz_quotas_updated", servers=len(server_ids))
+        return True
+
     async def get_server_quota(self, server_id: int) -> int | None:
         """Retourne le quota horaire actuel d'un delivery server."""
         if not await self._ensure_connected():
             return None
-        async with self._pool.acquire() as conn:
+        async with self._acquire() as conn:
             async with conn.cursor() as cur:
                 await cur.execute(
                     "SELECT hourly_quota FROM mw_delivery_server WHERE server_id = %s",
@@ -298,7 +444,7 @@ class MailWizzDB:
         if not await self._ensure_connected():
             return False
         try:
-            async with self._pool.acquire() as conn:
+            async with self._acquire() as conn:
                 async with conn.cursor() as cur:
                     await cur.execute(
                         "UPDATE mw_delivery_server SET daily_usage = 0, hourly_usage = 0 WHERE server_id = %s",
@@ -314,7 +460,7 @@ class MailWizzDB:
         if not await self._ensure_connected():
             return 0
         try:
-            async with self._pool.acquire() as conn:
+            async with self._acquire() as conn:
                 async with conn.cursor() as cur:
                     await cur.execute(
                         "UPDATE mw_delivery_server SET daily_usage = 0, hourly_usage = 0 WHERE status = 'active'"
@@ -334,7 +480,7 @@ class MailWizzDB:
         """Retourne les détails complets d'un delivery server."""
         if not await self._ensure_connected():
             return None
-        async with self._pool.acquire() as conn:
+        async with self._acquire() as conn:
             async with conn.cursor(aiomysql.DictCursor) as cur:
                 await cur.execute(
                     """SELECT server_id, name, hostname, port, from_email, from_name,
@@ -349,7 +495,7 @@ class MailWizzDB:
         """Retourne le statut d'un delivery server."""
         if not await self._ensure_connected():
             return None
-        async with self._pool.acquire() as conn:
+        async with self._acquire() as conn:
             async with conn.cursor() as cur:
                 await cur.execute(
                     "SELECT status FROM mw_delivery_server WHERE server_id = %s",
@@ -362,7 +508,7 @@ class MailWizzDB:
         """Liste tous les delivery servers avec leurs infos clés."""
         if not await self._ensure_connected():
             return []
-        async with self._pool.acquire() as conn:
+        async with self._acquire() as conn:
             async with conn.cursor(aiomysql.DictCursor) as cur:
                 await cur.execute(
                     """SELECT server_id, name, hostname, port, from_email, from_name,
@@ -377,7 +523,7 @@ class MailWizzDB:
         """Trouve un delivery server par son email expéditeur."""
         if not await self._ensure_connected():
             return None
-        async with self._pool.acquire() as conn:
+        async with self._acquire() as conn:
             async with conn.cursor(aiomysql.DictCursor) as cur:
                 await cur.execute(
                     "SELECT * FROM mw_delivery_server WHERE from_email = %s LIMIT 1",
@@ -394,9 +540,37 @@ class MailWizzDB:
 
         Ex: 50/jour → 50/16 ≈ 4/heure (arrondi à 3 pour la sécurité)
         """
-        # Répartir sur 16h actives avec marge de sécurité (×0.8)
-        hourly = max(1, int(daily_quota / 16 * 0.8))
-        return await self.set_server_quota(server_id, hourly)
+        from app.services.warmup_engine import daily_to_hourly_quota
+
+        return await self.set_server_quota(server_id, daily_to_hourly_quota(daily_quota))
+
+    async def sync_warmup_quotas(self, daily_quotas: dict[int, int]) -> dict:
+        """
+        Version en masse de sync_warmup_quota : {server_id: quota journalier}.
+
+        Les servers dont le quota horaire est identique au dernier quota
+        écrit (depuis moins de MAILWIZZ_QUOTA_RESYNC_SECONDS) sont ignorés ;
+        les autres sont mis à jour en une transaction (set_server_quotas).
+
+        Retourne : {updated, unchanged, success}
+        """
+        from app.services.warmup_engine import daily_to_hourly_quota
+
+        now = time.monotonic()
+        changed = {}
+        for server_id, daily_quota in daily_quotas.items():
+            hourly = daily_to_hourly_quota(daily_quota)
+            last = self._synced_quotas.get(server_id)
+            if last and last[0] == hourly and now - last[1] < settings.MAILWIZZ_QUOTA_RESYNC_SECONDS:
+                continue
+            changed[server_id] = hourly
+
+        success = await self.set_server_quotas(changed)
+        return {
+            "updated": len(changed) if success else 0,
+            "unchanged": len(daily_quotas) - len(changed),
+            "success": success,
+        }
 
     # ─────────────────────────────────────────────────────────────
     # STATS BOUNCE / DELIVERY (depuis les logs MailWizz)
@@ -413,7 +587,7 @@ class MailWizzDB:
             return {"sent": 0, "delivered": 0, "bounced": 0, "complaints": 0,
                     "bounce_rate": 0.0, "spam_rate": 0.0}
         try:
-            async with self._pool.acquire() as conn:
+            async with self._acquire() as conn:
                 async with conn.cursor(aiomysql.DictCursor) as cur:
                     # Récupérer stats depuis la table de tracking MailWizz
                     # Table mw_campaign_delivery_log ou mw_campaign_bounce_log
@@ -453,6 +627,162 @@ class MailWizzDB:
                     "bounce_rate": 0.0, "spam_rate": 0.0}
 
 
+    # ─────────────────────────────────────────────────────────────
+    # ABONNÉS — import en masse (mw_list_subscriber + field values)
+    # ─────────────────────────────────────────────────────────────
+
+    async def bulk_load_subscribers(
+        self,
+        list_id: int,
+        subscribers: list[dict],
+        chunk_size: int | None = None,
+    ) -> dict:
+        """
+        Importe des abonnés dans une liste MailWizz directement en MySQL.
+
+        `subscribers` : dicts de champs par tag (EMAIL obligatoire, FNAME...).
+        Par chunk, dans une transaction :
+          1. SELECT des emails déjà présents dans la liste (dédoublonnage)
+          2. INSERT IGNORE multi-lignes (executemany) dans mw_list_subscriber
+          3. Re-SELECT des subscriber_id ; seules les lignes portant notre
+             subscriber_uid sont nouvelles (un import concurrent reste sûr)
+          4. INSERT multi-lignes des mw_list_field_value des nouveaux abonnés
+
+        Retourne : {inserted, existing, subscriber_ids: {email: subscriber_id}}
+        """
+        result = {"inserted": 0, "existing": 0, "subscriber_ids": {}}
+        by_email: dict[str, dict] = {}
+        for subscriber in subscribers:
+            email = (subscriber.get("EMAIL") or "").strip().lower()
+            if email and email not in by_email:
+                by_email[email] = subscriber
+        if not by_email:
+            return result
+        if not await self._ensure_connected():
+            logger.warning("mailwizz_db_unavailable", operation="bulk_load_subscribers")
+            return result
+
+        size = chunk_size or settings.MAILWIZZ_BULK_CHUNK_SIZE
+        emails = list(by_email)
+        async with self._acquire() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    "SELECT field_id, tag FROM mw_list_field WHERE list_id = %s",
+                    (list_id,),
+                )
+                field_ids = {tag: field_id for field_id, tag in await cur.fetchall()}
+
+                for start in range(0, len(emails), size):
+                    chunk = emails[start:start + size]
+                    await conn.begin()
+                    try:
+                        inserted, ids = await self._load_subscriber_chunk(
+                            cur, list_id, chunk, by_email, field_ids
+                        )
+                        await conn.commit()
+                    except Exception as exc:
+                        await conn.rollback()
+                        logger.error(
+                            "mailwizz_bulk_load_failed",
+                            list_id=list_id,
+                            chunk_start=start,
+                            error=str(exc),
+                        )
+                        raise
+                    result["inserted"] += inserted
+                    result["existing"] += len(chunk) - inserted
+                    result["subscriber_ids"].update(ids)
+
+        logger.info(
+            "mailwizz_subscribers_loaded",
+            list_id=list_id,
+            inserted=result["inserted"],
+            existing=result["existing"],
+        )
+        return result
+
+    async def _load_subscriber_chunk(
+        self,
+        cur,
+        list_id: int,
+        emails: list[str],
+        by_email: dict[str, dict],
+        field_ids: dict[str, int],
+    ) -> tuple[int, dict[str, int]]:
+        """Un chunk de bulk_load_subscribers → (nb insérés, {email: subscriber_id})."""
+
+        async def select_ids(chunk: list[str]) -> list[tuple]:
+            placeholders = ", ".join(["%s"] * len(chunk))
+            await cur.execute(
+                f"""SELECT subscriber_id, email, subscriber_uid FROM mw_list_subscriber
+                    WHERE list_id = %s AND email IN ({placeholders})""",
+                (list_id, *chunk),
+            )
+            return await cur.fetchall()
+
+        existing = {email.lower(): sid for sid, email, _ in await select_ids(emails)}
+        new_emails = [email for email in emails if email not in existing]
+        if not new_emails:
+            return 0, existing
+
+        now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+        uids = {email: _subscriber_uid() for email in new_emails}
+        await cur.executemany(
+            """INSERT IGNORE INTO mw_list_subscriber
+               (subscriber_uid, list_id, email, source, status, date_added, last_updated)
+               VALUES (%s, %s, %s, %s, %s, %s, %s)""",
+            [(uids[email], list_id, email, "import", "confirmed", now, now) for email in new_emails],
+        )
+
+        ids = dict(existing)
+        created = {}
+        for sid, email, uid in await select_ids(new_emails):
+            ids[email.lower()] = sid
+            if uids.get(email.lower()) == uid:
+                created[email.lower()] = sid
+
+        values = [
+            (field_ids[tag], sid, "" if value is None else str(value), now, now)
+            for email, sid in created.items()
+            for tag, value in {**by_email[email], "EMAIL": email}.items()
+            if tag in field_ids
+        ]
+        if values:
+            await cur.executemany(
+                """INSERT INTO mw_list_field_value
+                   (field_id, subscriber_id, value, date_added, last_updated)
+                   VALUES (%s, %s, %s, %s, %s)""",
+                values,
+            )
+        return len(created), ids
+
+    async def bulk_load_contacts(self, db: Session, contacts: list, list_id: int) -> dict:
+        """
+        Importe des Contact dans une liste MailWizz et écrit en retour
+        mailwizz_subscriber_id / mailwizz_list_id dans `contacts`
+        (un UPDATE executemany, commit laissé à l'appelant).
+
+        La session est synchrone : la lecture des Contact (rechargement
+        éventuel des attributs expirés) et l'UPDATE tournent dans
+        l'exécuteur, jamais sur la boucle asyncio.
+        """
+        from app.models import Contact
+
+        loop = asyncio.get_running_loop()
+        pending = await loop.run_in_executor(
+            None, lambda: [(c.id, c.email.strip().lower(), subscriber_fields(c)) for c in contacts]
+        )
+        result = await self.bulk_load_subscribers(list_id, [fields for _, _, fields in pending])
+        ids = result["subscriber_ids"]
+        rows = [
+            {"id": contact_id, "mailwizz_subscriber_id": ids[email], "mailwizz_list_id": list_id}
+            for contact_id, email, _ in pending
+            if email in ids
+        ]
+        if rows:
+            await loop.run_in_executor(None, db.execute, update(Contact), rows)
+        return {**result, "contacts_updated": len(rows)}
+
     # ─────────────────────────────────────────────────────
     # Options MailWizz (table mw_option)
     # ─────────────────────────────────────────────────────
@@ -463,7 +793,7 @@ class MailWizzDB:
         if not pool:
             return None
         try:
-            async with pool.acquire() as conn:
+            async with self._acquire() as conn:
                 async with conn.cursor() as cur:
                     await cur.execute(
                         "SELECT option_value FROM mw_option WHERE option_name = %s LIMIT 1",
@@ -481,7 +811,7 @@ class MailWizzDB:
         if not pool:
             return False
         try:
-            async with pool.acquire() as conn:
+            async with self._acquire() as conn:
                 async with conn.cursor() as cur:
                     await cur.execute(
                         """INSERT INTO mw_option (option_name, option_value)
@@ -512,7 +842,7 @@ class MailWizzDB:
         if not pool:
             return []
         try:
-            async with pool.acquire() as conn:
+            async with self._acquire() as conn:
                 async with conn.cursor() as cur:
                     # Liste des clients
                     await cur.execute(
@@ -578,7 +908,7 @@ class MailWizzDB:
         if not pool:
             return False
         try:
-            async with pool.acquire() as conn:
+            async with self._acquire() as conn:
                 async with conn.cursor() as cur:
                     # Supprimer anciennes assignations
                     await cur.execute(
@@ -0,0 +1,358 @@
+"""Consommateur des fichiers d'accounting PowerMTA (remplace bounce-pipe.sh / delivery-pipe.sh).
+
+Les scripts bash lançaient un curl par enregistrement et perdaient des
+bounces dès que l'API limitait le débit. Ici les fichiers `acct-*.csv`
+sont suivis en continu (ou le pipe lu sur stdin), les enregistrements lus
+par lots avec le module csv, et chaque lot passe directement par le chemin
+commun des webhooks (app.services.webhook_batch), sans HTTP.
+
+Reprise après crash : l'offset de chaque fichier est enregistré après le
+traitement de chaque lot (écriture atomique) ; en mode pipe, les lignes
+lues sont gardées dans un spool jusqu'au traitement de leur lot. Un lot
+interrompu peut donc être retransmis, jamais perdu.
+
+Usage :
+    python -m app.services.pmta_accounting            # suit PMTA_ACCT_DIR
+    python -m app.services.pmta_accounting --stdin    # <acct-file |...> PowerMTA
+"""
+
+import argparse
+import asyncio
+import csv
+import glob
+import json
+import os
+import sys
+import tempfile
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO
+
+import structlog
+
+from app.api.schemas import PMTABouncePayload
+from app.config import settings
+from app.enums import BounceType
+from app.services.scraper_pro_client import scraper_pro_client
+from app.services.webhook_batch import process_bounces, process_deliveries
+
+logger = structlog.get_logger(__name__)
+
+# Colonnes par défaut (records b / d sans ligne d'en-tête), comme les scripts bash
+BOUNCE_COLUMNS = (
+    "type", "bounceCat", "vmta", "orig", "rcpt", "srcMta",
+    "dlvSourceIp", "jobId", "dsnStatus", "dsnMta", "dsnDiag",
+)
+DELIVERY_COLUMNS = (
+    "type", "vmta", "orig", "rcpt", "srcMta",
+    "dlvSourceIp", "jobId", "dsnStatus", "dsnMta", "dsnDiag",
+)
+
+# Catégories bounce-category-patterns PowerMTA → type de bounce (même table que bounce-pipe.sh)
+BOUNCE_CATEGORY_TYPES = {
+    # HARD — permanent, retirer de la liste
+    "bad-mailbox": BounceType.HARD,
+    "bad-domain": BounceType.HARD,
+    "inactive-mailbox": BounceType.HARD,
+    "invalid-mailbox": BounceType.HARD,
+    "invalid-sender": BounceType.HARD,
+    "routing-errors": BounceType.HARD,
+    "no-answer-from-host": BounceType.HARD,
+    "bad-connection": BounceType.HARD,
+    # COMPLAINT — spam/politique, retirer et signaler
+    "spam-related": BounceType.COMPLAINT,
+    "policy-related": BounceType.COMPLAINT,
+    "content-related": BounceType.COMPLAINT,
+    "virus-related": BounceType.COMPLAINT,
+    "relaying-issues": BounceType.COMPLAINT,
+    # SOFT — temporaire (quota-issues, message-expired, protocol-errors, other...)
+}
+
+
+def classify_bounce(category: str) -> BounceType:
+    """Type de bounce d'une catégorie PowerMTA (inconnue → soft)."""
+    return BOUNCE_CATEGORY_TYPES.get(category.strip().lower(), BounceType.SOFT)
+
+
+@dataclass
+class AccountingBatch:
+    """Enregistrements d'un lot, prêts pour le chemin commun des webhooks."""
+
+    bounces: list[PMTABouncePayload] = field(default_factory=list)
+    deliveries: Counter = field(default_factory=Counter)  # domaine → livraisons
+    skipped: int = 0
+
+
+def parse_records(lines: Iterable[str], header: list[str] | None = None) -> tuple[AccountingBatch, list[str] | None]:
+    """
+    Parse des lignes CSV d'accounting (records b et d).
+
+    Une ligne commençant par "type" est un en-tête (map-header-to-column) et
+    définit les colonnes des lignes suivantes ; sans en-tête, l'ordre des
+    scripts bash s'applique.
+
+    Retourne le lot et le dernier en-tête vu (à conserver pour la suite du fichier).
+    """
+    batch = AccountingBatch()
+    for row in csv.reader(lines):
+        if not row or not row[0]:
+            continue
+        if row[0] == "type":
+            header = row
+            continue
+
+        record_type = row[0]
+        if record_type not in ("b", "d"):
+            batch.skipped += 1
+            continue
+        columns = header or (BOUNCE_COLUMNS if record_type == "b" else DELIVERY_COLUMNS)
+        record = dict(zip(columns, row, strict=False))
+        rcpt = record.get("rcpt", "").strip()
+        if not rcpt:
+            batch.skipped += 1
+            continue
+
+        if record_type == "b":
+            category = record.get("bounceCat", "")
+            reason = f"{category}: {record.get('dsnStatus', '')} {record.get('dsnDiag', '')}"
+            batch.bounces.append(PMTABouncePayload(
+                email=rcpt,
+                bounce_type=classify_bounce(category),
+                reason=reason[:500],
+                source_ip=record.get("dlvSourceIp", ""),
+                vmta=record.get("vmta", ""),
+            ))
+        else:
+            domain = rcpt.rsplit("@", 1)[-1].strip('"\\').lower()
+            if domain:
+                batch.deliveries[domain] += 1
+            else:
+                batch.skipped += 1
+    return batch, header
+
+
+async def process_batch(batch: AccountingBatch) -> dict:
+    """Envoie un lot par le chemin commun des webhooks (bounces + livraisons agrégées).
+
+    Le tampon scraper-pro est vidé avant de rendre la main : le checkpoint
+    n'avance que sur des données envoyées ou mises en file de retry.
+    """
+    accepted = await process_bounces(batch.bounces)
+    domains = await process_deliveries(batch.deliveries)
+    await scraper_pro_client.flush()
+    return {
+        "bounces": len(batch.bounces),
+        "bounces_accepted": sum(accepted),
+        "deliveries": sum(batch.deliveries.values()),
+        "delivery_domains_accepted": domains,
+        "skipped": batch.skipped,
+    }
+
+
+class AccountingConsumer:
+    """Suit les fichiers acct-*.csv avec un checkpoint d'offset par fichier."""
+
+    def __init__(
+        self,
+        directory: str | None = None,
+        pattern: str | None = None,
+        checkpoint_file: str | None = None,
+        batch_size: int | None = None,
+    ):
+        self.directory = Path(directory or settings.PMTA_ACCT_DIR)
+        self.pattern = pattern or settings.PMTA_ACCT_PATTERN
+        self.checkpoint_file = Path(checkpoint_file or settings.PMTA_ACCT_CHECKPOINT_FILE)
+        self.batch_size = batch_size or settings.PMTA_ACCT_BATCH_SIZE
+        self.checkpoints = self._load_checkpoints()
+
+    def _load_checkpoints(self) -> dict:
+        try:
+            return json.loads(self.checkpoint_file.read_text())
+        except FileNotFoundError:
+            return {}
+        except (OSError, json.JSONDecodeError) as exc:
+            logger.warning("pmta_acct_checkpoint_unreadable", path=str(self.checkpoint_file), error=str(exc))
+            return {}
+
+    def _save_checkpoints(self) -> None:
+        """Écriture atomique : fichier temporaire puis rename."""
+        self.checkpoint_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=str(self.checkpoint_file.parent), suffix=".json")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.checkpoints, f)
+            os.replace(tmp_path, str(self.checkpoint_file))
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    async def poll_once(self) -> dict:
+        """Traite les lignes complètes ajoutées à chaque fichier depuis le dernier passage."""
+        totals = Counter()
+        paths = sorted(glob.glob(str(self.directory / self.pattern)))
+        for path in paths:
+            totals.update(await self.consume_file(path))
+
+        # Fichiers supprimés par la rotation : oublier leur offset
+        if set(self.checkpoints) - set(paths):
+            self.checkpoints = {path: cp for path, cp in self.checkpoints.items() if path in paths}
+            self._save_checkpoints()
+        return dict(totals)
+
+    async def consume_file(self, path: str) -> Counter:
+        """Lit un fichier depuis son offset, lot par lot, en avançant le checkpoint après chaque lot."""
+        totals = Counter()
+        stat = os.stat(path)
+        checkpoint = self.checkpoints.get(path, {})
+        offset, header = checkpoint.get("offset", 0), checkpoint.get("header")
+        # Fichier remplacé ou tronqué : reprendre du début
+        if checkpoint.get("inode") != stat.st_ino or stat.st_size < offset:
+            offset, header = 0, None
+        if stat.st_size == offset:
+            return totals
+
+        with open(path, "rb") as f:
+            f.seek(offset)
+            while True:
+                lines = []
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        break  # Ligne en cours d'écriture par PowerMTA : au prochain passage
+                    lines.append(raw.decode("utf-8", errors="replace"))
+                    offset += len(raw)
+                    if len(lines) >= self.batch_size:
+                        break
+                if not lines:
+                    break
+
+                batch, header = parse_records(lines, header)
+                totals.update(await process_batch(batch))
+                totals["records"] += len(lines)
+                self.checkpoints[path] = {"offset": offset, "inode": stat.st_ino, "header": header}
+                self._save_checkpoints()
+                if len(lines) < self.batch_size:
+                    break
+
+        logger.info("pmta_acct_file_consumed", path=path, offset=offset, **totals)
+        return totals
+
+    async def run(self, poll_seconds: float | None = None) -> None:
+        """Boucle de suivi des fichiers (service)."""
+        poll_seconds = poll_seconds or settings.PMTA_ACCT_POLL_SECONDS
+        logger.info("pmta_acct_consumer_started", directory=str(self.directory), pattern=self.pattern)
+        while True:
+            try:
+                await self.poll_once()
+            except Exception as exc:
+                logger.error("pmta_acct_poll_error", error=str(exc))
+            await asyncio.sleep(poll_seconds)
+
+
+async def consume_stream(
+    stream: IO[str],
+    batch_size: int | None = None,
+    flush_seconds: float | None = None,
+    spool_file: str | None = None,
+) -> dict:
+    """
+    Mode pipe (<acct-file |...>) : lit stdin par lots jusqu'à la fermeture.
+
+    stdin est lu dans un thread : la boucle reste libre pour les vidages du
+    tampon scraper-pro. Un lot part dès `batch_size` lignes, ou
+    `flush_seconds` après sa première ligne si le pipe se tait.
+
+    Reprise : PowerMTA ne relit pas ce qu'il a écrit dans le pipe. Chaque
+    ligne lue est donc d'abord ajoutée au spool (PMTA_ACCT_SPOOL_FILE),
+    vidé une fois son lot traité ; au démarrage, un spool non vide (arrêt
+    en cours de lot) est retraité. Un lot interrompu peut donc être
+    retransmis, jamais perdu.
+    """
+    batch_size = batch_size or settings.PMTA_ACCT_BATCH_SIZE
+    flush_seconds = flush_seconds if flush_seconds is not None else settings.PMTA_ACCT_FLUSH_SECONDS
+    spool = Path(spool_file or settings.PMTA_ACCT_SPOOL_FILE)
+    spool.parent.mkdir(parents=True, exist_ok=True)
+    loop = asyncio.get_running_loop()
+    totals = Counter()
+    header = None
+
+    # Lignes lues par un process arrêté avant de les avoir traitées
+    if spool.exists():
+        lines = spool.read_text(encoding="utf-8", errors="replace").splitlines(keepends=True)
+        if lines:
+            batch, header = parse_records(lines)
+            totals.update(await process_batch(batch))
+            logger.warning("pmta_acct_spool_recovered", records=len(lines))
+
+    with open(spool, "w", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator="\n")
+
+        def reset_spool() -> None:
+            # L'en-tête reste en tête du spool : les lignes suivantes en dépendent
+            f.seek(0)
+            f.truncate()
+            if header:
+                writer.writerow(header)
+            f.flush()
+
+        reset_spool()
+        lines = []
+        deadline = None
+        read = None
+        while True:
+            if read is None:
+                read = asyncio.ensure_future(asyncio.to_thread(stream.readline))
+            timeout = None if deadline is None else max(0.0, deadline - loop.time())
+            done, _ = await asyncio.wait({read}, timeout=timeout)
+            line = ""
+            if done:
+                line = read.result()
+                read = None
+            if line:
+                if not line.endswith("\n"):
+                    line += "\n"
+                f.write(line)
+                f.flush()
+                lines.append(line)
+                if deadline is None:
+                    deadline = loop.time() + flush_seconds
+
+            eof = bool(done) and not line
+            if lines and (eof or not done or len(lines) >= batch_size):
+                batch, header = parse_records(lines, header)
+                totals.update(await process_batch(batch))
+                totals["records"] += len(lines)
+                lines, deadline = [], None
+                reset_spool()
+            if eof:
+                break
+
+    spool.unlink(missing_ok=True)
+    return dict(totals)
+
+
+def main(argv: list[str] | None = None) -> None:
+    from app.logging_config import setup_logging
+
+    parser = argparse.ArgumentParser(description="Consommateur d'accounting PowerMTA")
+    parser.add_argument("--stdin", action="store_true", help="Lire les enregistrements sur stdin (pipe PowerMTA)")
+    parser.add_argument("--dir", help="Répertoire des fichiers d'accounting (PMTA_ACCT_DIR)")
+    parser.add_argument("--once", action="store_true", help="Un seul passage sur les fichiers puis quitter")
+    args = parser.parse_args(argv)
+
+    setup_logging(settings.LOG_LEVEL)
+    if args.stdin:
+        stats = asyncio.run(consume_stream(sys.stdin))
+        logger.info("pmta_acct_stream_consumed", **stats)
+        return
+
+    consumer = AccountingConsumer(directory=args.dir)
+    if args.once:
+        asyncio.run(consumer.poll_once())
+    else:
+        asyncio.run(consumer.run())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,26 @@
-"""File-based retry queue for failed scraper-pro API calls.
-
-When scraper-pro is unreachable, payloads are saved to a JSONL file.
-APScheduler retries them every 2 minutes until successful or max_retries reached.
+"""Segmented append-only retry queue for failed scraper-pro API calls.
+
+When scraper-pro is unreachable, payloads are appended to a segment file
+named after the minute they become due (`retry_segments/<epoch>.jsonl`).
+APScheduler runs process_queue every 2 minutes: only segments whose time
+has come are read, in chunks, and retried concurrently over one shared
+connection pool. A failed entry is appended again to the segment of its
+next attempt (exponential backoff) until MAX_RETRIES is reached.
+
+Segments are never rewritten: `index.json` keeps the offset acknowledged
+in each segment being processed, and a segment is deleted once fully read.
+A crash resumes after the last acknowledged chunk.
 """
 
+import asyncio
 import json
+import math
 import os
 import tempfile
+import time
+from collections import Counter, defaultdict
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
 
 import structlog
@@ -15,111 +28,215 @@ import structlog
 logger = structlog.get_logger(__name__)
 
 QUEUE_DIR = Path(os.getenv("RETRY_QUEUE_DIR", "/opt/email-engine/data"))
-QUEUE_FILE = QUEUE_DIR / "retry_queue.jsonl"
+QUEUE_FILE = QUEUE_DIR / "retry_queue.jsonl"  # Former single-file queue, imported on the next run
 MAX_RETRIES = 10
 
+# Segment width: every entry of a segment is due by the time in its name
+SEGMENT_SECONDS = 60
 
-def enqueue(url: str, payload: dict, action: str) -> None:
-    """Append a failed payload to the retry queue (atomic write)."""
-    QUEUE_DIR.mkdir(parents=True, exist_ok=True)
-    entry = {
-        "url": url,
-        "payload": payload,
-        "action": action,
-        "retries": 0,
-        "created_at": datetime.utcnow().isoformat(),
-    }
-    line = json.dumps(entry, separators=(",", ":")) + "\n"
-    # Append is atomic on Linux for lines < PIPE_BUF (4096 bytes)
-    with open(QUEUE_FILE, "a") as f:
-        f.write(line)
-    logger.info("retry_enqueued", action=action, url=url)
-
-
-async def process_queue() -> dict:
-    """Retry all queued payloads. Returns stats dict."""
-    if not QUEUE_FILE.exists():
-        return {"processed": 0, "succeeded": 0, "failed": 0, "dropped": 0}
+# Per-entry backoff: 1 min, 2 min, 4 min... capped at 6 h
+BACKOFF_BASE_SECONDS = 60
+BACKOFF_MAX_SECONDS = 6 * 3600
 
-    # Read all entries
-    entries = []
-    try:
-        with open(QUEUE_FILE, "r") as f:
-            for line in f:
-                line = line.strip()
-                if line:
-                    try:
-                        entries.append(json.loads(line))
-                    except json.JSONDecodeError:
-                        continue
-    except FileNotFoundError:
-        return {"processed": 0, "succeeded": 0, "failed": 0, "dropped": 0}
-
-    if not entries:
-        return {"processed": 0, "succeeded": 0, "failed": 0, "dropped": 0}
+# Concurrent requests to scraper-pro / entries read per chunk (one ack per chunk)
+RETRY_CONCURRENCY = 20
+RETRY_CHUNK_SIZE = 500
 
-    # Import here to avoid circular imports
-    from app.services.scraper_pro_client import ScraperProClient, _build_headers
 
-    client = ScraperProClient()
-    import httpx
+def _segments_dir() -> Path:
+    return QUEUE_DIR / "retry_segments"
 
-    remaining = []
-    succeeded = 0
-    dropped = 0
 
-    for entry in entries:
-        url = entry["url"]
-        payload = entry["payload"]
-        action = entry["action"]
-        retries = entry.get("retries", 0)
+def _index_file() -> Path:
+    return _segments_dir() / "index.json"
 
-        if retries >= MAX_RETRIES:
-            logger.warning("retry_max_exceeded", action=action, retries=retries)
-            dropped += 1
-            continue
 
-        body = json.dumps(payload, sort_keys=True)
-        headers = _build_headers(client.secret, body)
+def _segment_path(due_at: float) -> Path:
+    """Segment of an entry: first segment boundary at or after its due time."""
+    bucket = math.ceil(due_at / SEGMENT_SECONDS) * SEGMENT_SECONDS
+    return _segments_dir() / f"{bucket}.jsonl"
 
+
+def _backoff_seconds(retries: int) -> float:
+    return min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** max(retries - 1, 0))
+
+
+def _append(entries: list[dict]) -> None:
+    """Append entries to their segments, one write per line (O_APPEND)."""
+    by_segment = defaultdict(list)
+    for entry in entries:
+        by_segment[_segment_path(entry["next_attempt_at"])].append(
+            json.dumps(entry, separators=(",", ":")) + "\n"
+        )
+
+    _segments_dir().mkdir(parents=True, exist_ok=True)
+    for path, lines in by_segment.items():
+        # Append is atomic on Linux for lines < PIPE_BUF (4096 bytes)
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
         try:
-            async with httpx.AsyncClient(timeout=10) as http:
-                resp = await http.post(url, content=body, headers=headers)
-                if resp.status_code == 200:
-                    succeeded += 1
-                    logger.info("retry_succeeded", action=action)
+            for line in lines:
+                os.write(fd, line.encode())
+        finally:
+            os.close(fd)
+
+
+def _load_index() -> dict:
+    try:
+        return json.loads(_index_file().read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _save_index(index: dict) -> None:
+    """Atomic rewrite: write to temp file then rename."""
+    fd, tmp_path = tempfile.mkstemp(dir=str(_segments_dir()), suffix=".json")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, str(_index_file()))
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+
+def enqueue(url: str, payload: dict, action: str) -> None:
+    """Append a failed payload to the retry queue, due at the next tick."""
+    enqueue_many(url, [payload], action)
+
+
+def enqueue_many(url: str, payloads: list[dict], action: str) -> None:
+    """Append a batch of failed payloads for the same URL in one go."""
+    if not payloads:
+        return
+    now = time.time()
+    created_at = datetime.utcnow().isoformat()
+    _append([
+        {
+            "url": url,
+            "payload": payload,
+            "action": action,
+            "retries": 0,
+            "next_attempt_at": now,
+            "created_at": created_at,
+        }
+        for payload in payloads
+    ])
+    logger.info("retry_enqueued", action=action, url=url, entries=len(payloads))
+
+
+def _import_legacy_queue(now: float) -> int:
+    """Move entries of the former single-file queue into the segments."""
+    if not QUEUE_FILE.exists():
+        return 0
+
+    # Due at once: last segment boundary, read by this same run
+    due_at = math.floor(now / SEGMENT_SECONDS) * SEGMENT_SECONDS
+    imported = 0
+    with open(QUEUE_FILE) as f:
+        while True:
+            entries = []
+            for line in islice(f, RETRY_CHUNK_SIZE):
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
                     continue
-        except Exception as exc:
-            logger.debug("retry_still_failing", action=action, error=str(exc))
+                entry.setdefault("next_attempt_at", due_at)
+                entries.append(entry)
+            if not entries:
+                break
+            _append(entries)
+            imported += len(entries)
+    QUEUE_FILE.unlink()
+    logger.info("retry_queue_legacy_imported", entries=imported)
+    return imported
+
+
+def pending_segments(now: float | None = None) -> list[Path]:
+    """Segments whose entries are all due, oldest first."""
+    now = time.time() if now is None else now
+    if not _segments_dir().exists():
+        return []
+    segments = [path for path in _segments_dir().glob("*.jsonl") if path.stem.isdigit()]
+    return sorted((path for path in segments if int(path.stem) <= now), key=lambda path: int(path.stem))
+
+
+async def process_queue(now: float | None = None) -> dict:
+    """Retry the entries that are due. Returns stats dict."""
+    import httpx
 
-        # Still failed — re-enqueue with incremented retry count
-        entry["retries"] = retries + 1
-        remaining.append(entry)
+    # Import here to avoid circular imports
+    from app.services.scraper_pro_client import ScraperProClient, _build_headers
 
-    # Atomic rewrite: write to temp file then rename
-    if remaining:
-        fd, tmp_path = tempfile.mkstemp(dir=str(QUEUE_DIR), suffix=".jsonl")
-        try:
-            with os.fdopen(fd, "w") as f:
-                for entry in remaining:
-                    f.write(json.dumps(entry, separators=(",", ":")) + "\n")
-            os.replace(tmp_path, str(QUEUE_FILE))
-        except Exception:
-            os.unlink(tmp_path)
-            raise
-    else:
-        # All succeeded or dropped — remove queue file
-        try:
-            QUEUE_FILE.unlink()
-        except FileNotFoundError:
-            pass
-
-    stats = {
-        "processed": len(entries),
-        "succeeded": succeeded,
-        "failed": len(remaining),
-        "dropped": dropped,
-    }
-    if succeeded or dropped:
+    now = time.time() if now is None else now
+    _import_legacy_queue(now)
+    stats = Counter(processed=0, succeeded=0, failed=0, dropped=0)
+
+    segments = pending_segments(now)
+    if not segments:
+        return dict(stats)
+
+    secret = ScraperProClient().secret
+    index = _load_index()
+    semaphore = asyncio.Semaphore(RETRY_CONCURRENCY)
+
+    async def _retry(http: httpx.AsyncClient, entry: dict) -> bool:
+        body = json.dumps(entry["payload"], sort_keys=True)
+        headers = _build_headers(secret, body)
+        async with semaphore:
+            try:
+                resp = await http.post(entry["url"], content=body, headers=headers)
+                if resp.status_code == 200:
+                    logger.info("retry_succeeded", action=entry["action"])
+                    return True
+            except Exception as exc:
+                logger.debug("retry_still_failing", action=entry["action"], error=str(exc))
+        return False
+
+    limits = httpx.Limits(max_connections=RETRY_CONCURRENCY)
+    async with httpx.AsyncClient(timeout=10, limits=limits) as http:
+        for segment in segments:
+            offset = index.get(segment.name, 0)
+            with open(segment, "rb") as f:
+                f.seek(offset)
+                while True:
+                    lines = list(islice(f, RETRY_CHUNK_SIZE))
+                    if not lines:
+                        break
+
+                    entries = []
+                    for line in lines:
+                        try:
+                            entries.append(json.loads(line))
+                        except json.JSONDecodeError:
+                            continue
+                    results = await asyncio.gather(*(_retry(http, entry) for entry in entries))
+
+                    # Still failed — append again with incremented retry count
+                    retry_later = []
+                    for entry, ok in zip(entries, results, strict=True):
+                        if ok:
+                            stats["succeeded"] += 1
+                            continue
+                        entry["retries"] = entry.get("retries", 0) + 1
+                        if entry["retries"] >= MAX_RETRIES:
+                            logger.warning("retry_max_exceeded", action=entry["action"], retries=entry["retries"])
+                            stats["dropped"] += 1
+                            continue
+                        entry["next_attempt_at"] = now + _backoff_seconds(entry["retries"])
+                        retry_later.append(entry)
+                    _append(retry_later)
+
+                    # Acknowledge the chunk
+                    stats["processed"] += len(entries)
+                    stats["failed"] += len(retry_later)
+                    offset += sum(len(line) for line in lines)
+                    index[segment.name] = offset
+                    _save_index(index)
+
+            segment.unlink()
+            index.pop(segment.name, None)
+            _save_index(index)
+
+    if stats["succeeded"] or stats["dropped"]:
         logger.info("retry_queue_processed", **stats)
-    return stats
+    return dict(stats)
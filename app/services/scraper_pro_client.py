@@ -1,9 +1,28 @@
-"""Forward bounce/delivery data to scraper-pro with HMAC-SHA256 signing."""
+"""Forward bounce/delivery data to scraper-pro with HMAC-SHA256 signing.
 
+Les événements ne partent pas un par un : ils sont accumulés dans un
+tampon (ForwardBuffer) vidé toutes les SCRAPER_PRO_FLUSH_SECONDS ou dès
+SCRAPER_PRO_BOUNCE_BATCH_SIZE bounces. Les livraisons d'un même domaine
+sont additionnées, les bounces d'une même adresse fusionnés, et chaque
+vidage passe par un seul client HTTP longue durée (HTTP/2 si `h2` est
+installé). Un lot en échec est mis en file de retry en une fois.
+
+Un événement accepté est d'abord ajouté au journal du process
+(`<QUEUE_DIR>/forward_journal/<pid>.jsonl`) : le journal d'un process
+arrêté avant son vidage est repris dans la file de retry au démarrage
+suivant (recover_journal). Livraison au moins une fois : un crash pendant
+un vidage peut renvoyer des événements déjà transmis.
+"""
+
+import asyncio
 import hashlib
 import hmac
+import importlib.util
 import json
+import os
 import time
+from collections import Counter
+from pathlib import Path
 
 import httpx
 import structlog
@@ -12,6 +31,15 @@ from app.config import settings
 
 logger = structlog.get_logger(__name__)
 
+# Requêtes simultanées vers scraper-pro lors d'un vidage
+BATCH_CONCURRENCY = 20
+
+# HTTP/2 (multiplexage sur une connexion) seulement si le paquet h2 est présent
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Gravité pour fusionner plusieurs bounces d'une même adresse dans une fenêtre
+BOUNCE_SEVERITY = {"soft": 0, "hard": 1, "complaint": 2}
+
 
 def _sign_payload(secret: str, timestamp: str, body: str) -> str:
     """Generate HMAC-SHA256 signature (same scheme as scraper-pro)."""
@@ -19,6 +47,59 @@ def _sign_payload(secret: str, timestamp: str, body: str) -> str:
     return hmac.new(secret.encode(), message.encode(), hashlib.sha256).hexdigest()
 
 
+def _journal_dir() -> Path:
+    from app.services import retry_queue
+
+    return retry_queue.QUEUE_DIR / "forward_journal"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def recover_journal() -> int:
+    """
+    Reprend dans la file de retry les journaux laissés par un process arrêté.
+
+    À appeler au démarrage : les journaux de ce pid (process précédent) et
+    des pids morts sont repris, ceux des autres process vivants ignorés.
+    Retourne le nombre d'événements repris.
+    """
+    from app.services.retry_queue import enqueue_many
+
+    directory = _journal_dir()
+    if not directory.exists():
+        return 0
+
+    recovered = 0
+    for path in sorted(directory.glob("*.jsonl")):
+        pid = path.stem.split("-", 1)[0]
+        if not pid.isdigit() or (int(pid) != os.getpid() and _pid_alive(int(pid))):
+            continue
+        pending: dict[tuple[str, str], list[dict]] = {}
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Dernière ligne tronquée par le crash
+                pending.setdefault((entry["url"], entry["action"]), []).append(entry["payload"])
+        for (url, action), payloads in pending.items():
+            enqueue_many(url, payloads, action)
+            recovered += len(payloads)
+        path.unlink()
+
+    if recovered:
+        logger.warning("scraper_pro_journal_recovered", events=recovered)
+    return recovered
+
+
 def _build_headers(secret: str, body: str) -> dict:
     """Build authenticated headers for scraper-pro API."""
     timestamp = str(int(time.time()))
@@ -30,6 +111,132 @@ def _build_headers(secret: str, body: str) -> dict:
     }
 
 
+class ForwardBuffer:
+    """Tampon des envois vers scraper-pro, vidé sur taille ou sur délai."""
+
+    def __init__(self, client: "ScraperProClient"):
+        self.client = client
+        self.flush_seconds = settings.SCRAPER_PRO_FLUSH_SECONDS
+        self.bounce_batch_size = settings.SCRAPER_PRO_BOUNCE_BATCH_SIZE
+        self.bounces: dict[str, str] = {}  # email → bounce_type le plus grave
+        self.deliveries: Counter = Counter()  # domaine → livraisons
+        self._timer: asyncio.TimerHandle | None = None
+        self._timer_loop: asyncio.AbstractEventLoop | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self.bounces) + len(self.deliveries)
+
+    def add_bounces(self, bounces: list[tuple[str, str]]) -> None:
+        if not bounces:
+            return
+        self._journal([
+            (self.client.bounce_url, {"email": email, "bounce_type": bounce_type}, "bounce_forwarded")
+            for email, bounce_type in bounces
+        ])
+        for email, bounce_type in bounces:
+            current = self.bounces.get(email)
+            if current is None or BOUNCE_SEVERITY.get(bounce_type, 0) > BOUNCE_SEVERITY.get(current, 0):
+                self.bounces[email] = bounce_type
+        if len(self.bounces) >= self.bounce_batch_size:
+            self._schedule_flush(0)
+        else:
+            self._schedule_flush(self.flush_seconds)
+
+    def add_delivery(self, domain: str, count: int) -> None:
+        self._journal([(self.client.delivery_url, {"domain": domain, "count": count}, "delivery_forwarded")])
+        self.deliveries[domain] += count
+        self._schedule_flush(self.flush_seconds)
+
+    # ── Journal (événements acceptés, pas encore envoyés) ────────
+
+    def _journal_path(self) -> Path:
+        return _journal_dir() / f"{os.getpid()}.jsonl"
+
+    def _journal(self, entries: list[tuple[str, dict, str]]) -> None:
+        """Ajoute des événements au journal (une écriture O_APPEND par lot)."""
+        lines = "".join(
+            json.dumps({"url": url, "payload": payload, "action": action}, separators=(",", ":")) + "\n"
+            for url, payload, action in entries
+        )
+        try:
+            _journal_dir().mkdir(parents=True, exist_ok=True)
+            fd = os.open(self._journal_path(), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, lines.encode())
+            finally:
+                os.close(fd)
+        except OSError as exc:
+            # Le tampon mémoire reste utilisable : seule la reprise après crash est perdue
+            logger.error("scraper_pro_journal_write_failed", error=str(exc))
+
+    def _rotate_journal(self) -> Path | None:
+        """Détache le journal du contenu vidé ; les nouveaux événements vont dans un journal neuf."""
+        path = self._journal_path()
+        flushing = path.with_name(f"{os.getpid()}-{time.time_ns()}.jsonl")
+        try:
+            os.rename(path, flushing)
+        except FileNotFoundError:
+            return None
+        except OSError as exc:
+            logger.error("scraper_pro_journal_rotate_failed", error=str(exc))
+            return None
+        return flushing
+
+    def _schedule_flush(self, delay: float) -> None:
+        """Un seul vidage programmé par fenêtre ; immédiat si le lot est plein."""
+        loop = asyncio.get_running_loop()
+        if self._timer_loop is not loop:
+            # Minuterie et vidages d'une boucle précédente (fermée) : oubliés
+            self._timer = None
+            self._tasks = set()
+            self._timer_loop = loop
+        if delay and self._timer is not None:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = loop.call_later(delay, self._start_flush)
+
+    def _start_flush(self) -> None:
+        self._timer = None
+        task = asyncio.get_running_loop().create_task(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self) -> dict:
+        """Envoie le contenu du tampon. Retourne le nombre de requêtes envoyées / mises en retry."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        journal = self._rotate_journal()
+        bounces, self.bounces = self.bounces, {}
+        deliveries, self.deliveries = self.deliveries, Counter()
+
+        stats = Counter()
+        if bounces:
+            stats.update(await self.client._send_batch(
+                self.client.bounce_url,
+                [{"email": email, "bounce_type": bounce_type} for email, bounce_type in bounces.items()],
+                "bounce_forwarded",
+            ))
+        if deliveries:
+            stats.update(await self.client._send_batch(
+                self.client.delivery_url,
+                [{"domain": domain, "count": count} for domain, count in deliveries.items()],
+                "delivery_forwarded",
+            ))
+        if journal is not None:
+            # Tout est envoyé ou en file de retry
+            journal.unlink(missing_ok=True)
+        return dict(stats)
+
+    async def drain(self) -> None:
+        """Attend les vidages en cours puis vide le reste (arrêt)."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.flush()
+
+
 class ScraperProClient:
     """Send bounce and delivery feedback to scraper-pro API."""
 
@@ -37,6 +244,9 @@ class ScraperProClient:
         self.bounce_url = settings.SCRAPER_PRO_BOUNCE_URL
         self.delivery_url = settings.SCRAPER_PRO_DELIVERY_URL
         self.secret = settings.SCRAPER_PRO_HMAC_SECRET
+        self.buffer = ForwardBuffer(self)
+        self._http: httpx.AsyncClient | None = None
+        self._http_loop: asyncio.AbstractEventLoop | None = None
 
     @property
     def bounce_enabled(self) -> bool:
@@ -46,29 +256,59 @@ class ScraperProClient:
     def delivery_enabled(self) -> bool:
         return bool(self.delivery_url and self.secret)
 
+    def _client(self) -> httpx.AsyncClient:
+        """Client HTTP longue durée (recréé si la boucle asyncio a changé)."""
+        loop = asyncio.get_running_loop()
+        if self._http is None or self._http.is_closed or self._http_loop is not loop:
+            self._http = httpx.AsyncClient(
+                timeout=10,
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(max_connections=BATCH_CONCURRENCY),
+            )
+            self._http_loop = loop
+        return self._http
+
     async def _post(self, url: str, payload: dict, log_action: str) -> bool:
-        """Send HMAC-signed POST to scraper-pro. Enqueues for retry on failure."""
+        """Send HMAC-signed POST to scraper-pro. Returns False on failure (no retry)."""
         body = json.dumps(payload, sort_keys=True)
         headers = _build_headers(self.secret, body)
         try:
-            async with httpx.AsyncClient(timeout=10) as client:
-                resp = await client.post(url, content=body, headers=headers)
-                if resp.status_code == 200:
-                    logger.info(f"{log_action}_ok", **payload)
-                    return True
-                logger.warning(
-                    f"{log_action}_failed",
-                    status=resp.status_code,
-                    body=resp.text[:200],
-                )
+            resp = await self._client().post(url, content=body, headers=headers)
+            if resp.status_code == 200:
+                logger.debug(f"{log_action}_ok", **payload)
+                return True
+            logger.warning(
+                f"{log_action}_failed",
+                status=resp.status_code,
+                body=resp.text[:200],
+            )
         except Exception as exc:
             logger.error(f"{log_action}_error", error=str(exc))
-
-        # Enqueue for retry
-        from app.services.retry_queue import enqueue
-        enqueue(url, payload, log_action)
         return False
 
+    async def _send_batch(self, url: str, payloads: list[dict], log_action: str) -> dict:
+        """Send a batch concurrently; failed payloads go to the retry queue in one append."""
+        semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+        async def _send(payload: dict) -> bool:
+            async with semaphore:
+                return await self._post(url, payload, log_action)
+
+        results = await asyncio.gather(*(_send(payload) for payload in payloads))
+        failed = [payload for payload, ok in zip(payloads, results, strict=True) if not ok]
+        if failed:
+            # Enqueue for retry
+            from app.services.retry_queue import enqueue_many
+            enqueue_many(url, failed, log_action)
+
+        sent = len(payloads) - len(failed)
+        if url == self.bounce_url and sent:
+            from app.api.routes.metrics import bounces_forwarded
+
+            bounces_forwarded.inc(sent)
+        logger.info(f"{log_action}_batch", sent=sent, retry=len(failed))
+        return {"sent": sent, "retry": len(failed)}
+
     async def forward_bounce(
         self,
         email: str,
@@ -76,24 +316,47 @@ class ScraperProClient:
         reason: str = "",
         ip_address: str = "",
     ) -> bool:
-        """Forward a bounce event to scraper-pro bounce-feedback endpoint."""
+        """Queue a bounce event for the scraper-pro bounce-feedback endpoint.
+
+        True = accepté : journalisé, envoyé au prochain vidage (ou mis en retry).
+        """
         if not self.bounce_enabled:
             logger.debug("scraper_pro_bounce_not_configured")
             return False
-        payload = {"email": email, "bounce_type": bounce_type}
-        return await self._post(self.bounce_url, payload, "bounce_forwarded")
+        self.buffer.add_bounces([(email, bounce_type)])
+        return True
+
+    async def forward_bounces(self, bounces: list[tuple[str, str]]) -> list[bool]:
+        """Queue a batch of (email, bounce_type). Retourne un booléen par bounce, dans l'ordre."""
+        if not self.bounce_enabled:
+            if bounces:
+                logger.debug("scraper_pro_bounce_not_configured")
+            return [False] * len(bounces)
+        self.buffer.add_bounces(bounces)
+        return [True] * len(bounces)
 
     async def forward_delivery_feedback(
         self,
         domain: str,
         count: int = 1,
     ) -> bool:
-        """Forward delivery stats to scraper-pro for accurate bounce rate calculation."""
+        """Add delivery stats to the per-domain counter sent to scraper-pro."""
         if not self.delivery_enabled:
             logger.debug("scraper_pro_delivery_not_configured")
             return False
-        payload = {"domain": domain, "count": count}
-        return await self._post(self.delivery_url, payload, "delivery_forwarded")
+        self.buffer.add_delivery(domain, count)
+        return True
+
+    async def flush(self) -> dict:
+        """Send everything buffered now."""
+        return await self.buffer.flush()
+
+    async def aclose(self) -> None:
+        """Flush the buffer and close the HTTP client (shutdown)."""
+        await self.buffer.drain()
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
 
 
 scraper_pro_client = ScraperProClient()
@@ -0,0 +1,95 @@
+"""Traitement par lot des événements PowerMTA (webhooks /batch + consommateur d'accounting).
+
+Un lot = un corps de requête (tableau JSON ou NDJSON) signé par un seul HMAC,
+ou un bloc d'enregistrements lus dans les fichiers d'accounting. Chaque
+élément reçoit son propre résultat ; les envois vers scraper-pro passent
+par le tampon de ScraperProClient (agrégation + vidage par lot).
+"""
+
+import json
+from collections import Counter
+
+import structlog
+
+from app.api.schemas import PMTABouncePayload
+from app.config import settings
+from app.services.scraper_pro_client import scraper_pro_client
+
+logger = structlog.get_logger(__name__)
+
+
+def parse_batch_body(body: bytes, max_events: int | None = None, max_bytes: int | None = None) -> list:
+    """
+    Décode un lot d'événements : tableau JSON ou NDJSON (un objet par ligne).
+
+    Lève ValueError si le corps est illisible, vide, dépasse `max_bytes`
+    (WEBHOOK_BATCH_MAX_BYTES par défaut) ou `max_events`
+    (WEBHOOK_BATCH_MAX_EVENTS par défaut). La taille, et pour le NDJSON le
+    nombre de lignes, sont vérifiés avant tout décodage JSON.
+    """
+    max_events = max_events or settings.WEBHOOK_BATCH_MAX_EVENTS
+    max_bytes = max_bytes or settings.WEBHOOK_BATCH_MAX_BYTES
+    if len(body) > max_bytes:
+        raise ValueError(f"Lot trop grand : {len(body)} octets (max {max_bytes})")
+    try:
+        text = body.decode("utf-8").strip()
+    except UnicodeDecodeError as exc:
+        raise ValueError("Lot illisible : UTF-8 invalide") from exc
+    if not text:
+        raise ValueError("Lot vide")
+
+    try:
+        if text.startswith("["):
+            items = json.loads(text)
+        else:
+            lines = [line for line in text.splitlines() if line.strip()]
+            if len(lines) > max_events:
+                raise ValueError(f"Lot trop grand : {len(lines)} événements (max {max_events})")
+            items = [json.loads(line) for line in lines]
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"JSON invalide : {exc.msg} (ligne {exc.lineno})") from exc
+
+    if not isinstance(items, list) or not items:
+        raise ValueError("Le lot doit être un tableau JSON ou du NDJSON non vide")
+    if len(items) > max_events:
+        raise ValueError(f"Lot trop grand : {len(items)} événements (max {max_events})")
+    return items
+
+
+async def process_bounces(bounces: list[PMTABouncePayload]) -> list[bool]:
+    """
+    Chemin commun des bounces PowerMTA par lot (/batch, accounting). Le
+    webhook unitaire /pmta-bounce passe directement par forward_bounce.
+
+    Retourne, dans l'ordre, True si le bounce a été accepté pour scraper-pro
+    (journalisé et mis en tampon ; False = non configuré). bounces_forwarded
+    n'est compté qu'à l'envoi effectif.
+    """
+    from app.api.routes.metrics import bounces_received
+
+    if not bounces:
+        return []
+    bounces_received.inc(len(bounces))
+
+    accepted = await scraper_pro_client.forward_bounces(
+        [(bounce.email, bounce.bounce_type.value) for bounce in bounces]
+    )
+
+    logger.info("bounce_batch_processed", received=len(bounces), accepted=sum(accepted))
+    return accepted
+
+
+async def process_deliveries(domain_counts: Counter) -> int:
+    """
+    Transmet à scraper-pro les livraisons agrégées par domaine.
+
+    Retourne le nombre de domaines acceptés pour scraper-pro.
+    """
+    from app.api.routes.metrics import deliveries_reported
+
+    accepted = 0
+    for domain, count in domain_counts.items():
+        deliveries_reported.inc(count)
+        if await scraper_pro_client.forward_delivery_feedback(domain=domain, count=count):
+            accepted += 1
+    return accepted
@@ -1,7 +1,9 @@
 """Ingest Contacts Use Case."""
 
+from collections.abc import Iterable
 from dataclasses import dataclass
 from datetime import datetime
+from itertools import islice
 from typing import Optional
 
 from app.enums import ContactStatus
@@ -9,6 +11,10 @@ from src.domain.entities import Contact
 from src.domain.repositories import IContactRepository
 from src.domain.value_objects import Email, Language, TagSlug
 
+# Contacts resolved + written per round trip (keeps bind parameters well under
+# the PostgreSQL 65535 limit: ~27 columns × 500 rows).
+BULK_CHUNK_SIZE = 500
+
 
 @dataclass
 class IngestContactDTO:
@@ -46,12 +52,21 @@ class IngestContactsResult:
 
 
 class IngestContactsUseCase:
-    """Use case for ingesting contacts from external sources."""
+    """
+    Use case for ingesting contacts from external sources.
+
+    Contacts are processed in chunks: each chunk costs one SELECT to resolve
+    existing (tenant_id, email) pairs and one multi-row upsert, instead of a
+    SELECT + INSERT/UPDATE round trip per contact.
+    """
 
-    def __init__(self, contact_repo: IContactRepository):
+    def __init__(self, contact_repo: IContactRepository, chunk_size: int = BULK_CHUNK_SIZE):
         self.contact_repo = contact_repo
+        self.chunk_size = chunk_size
+        # Per-chunk tag dictionary: raw tag string -> slug, normalized once
+        self._tag_slugs: dict[str, TagSlug] = {}
 
-    def execute(self, contacts_data: list[IngestContactDTO]) -> IngestContactsResult:
+    def execute(self, contacts_data: Iterable[IngestContactDTO]) -> IngestContactsResult:
         """Ingest multiple contacts."""
         result = IngestContactsResult(
             total_processed=0,
@@ -61,33 +76,81 @@ class IngestContactsUseCase:
             errors=[],
         )
 
-        for contact_dto in contacts_data:
+        iterator = iter(contacts_data)
+        while chunk := list(islice(iterator, self.chunk_size)):
+            self._ingest_chunk(chunk, result)
+
+        return result
+
+    def _ingest_chunk(self, chunk: list[IngestContactDTO], result: IngestContactsResult) -> None:
+        """Resolve, merge and write one chunk of contacts."""
+        self._tag_slugs.clear()
+
+        # 1. Validate emails
+        parsed: list[tuple[IngestContactDTO, Email]] = []
+        for contact_dto in chunk:
             try:
-                # Validate email
-                email = Email(contact_dto.email)
+                parsed.append((contact_dto, Email(contact_dto.email)))
+            except ValueError as e:
+                result.errors.append(f"Invalid email {contact_dto.email}: {str(e)}")
 
-                # Check if contact already exists
-                existing = self.contact_repo.find_by_email(contact_dto.tenant_id, email)
+        if not parsed:
+            return
 
-                if existing:
-                    # Update existing contact
-                    self._update_contact(existing, contact_dto)
-                    self.contact_repo.save(existing)
-                    result.updated_contacts += 1
-                else:
-                    # Create new contact
-                    contact = self._create_contact(contact_dto, email)
-                    self.contact_repo.save(contact)
-                    result.new_contacts += 1
+        # 2. Resolve all existing contacts of the chunk in one query
+        existing = self.contact_repo.find_by_emails(
+            [(contact_dto.tenant_id, email) for contact_dto, email in parsed]
+        )
 
-                result.total_processed += 1
+        # 3. Apply merge rules in memory (a repeated email updates the pending entity)
+        pending: dict[tuple[int, str], Contact] = {}
+        processed: list[str] = []
+        new_contacts = 0
+        updated_contacts = 0
 
+        for contact_dto, email in parsed:
+            key = (contact_dto.tenant_id, email.value)
+            try:
+                contact = pending.get(key) or existing.get(key)
+                if contact:
+                    self._update_contact(contact, contact_dto)
+                    updated_contacts += 1
+                else:
+                    contact = self._create_contact(contact_dto, email)
+                    new_contacts += 1
             except ValueError as e:
                 result.errors.append(f"Invalid email {contact_dto.email}: {str(e)}")
+                continue
             except Exception as e:
                 result.errors.append(f"Error processing {contact_dto.email}: {str(e)}")
+                continue
 
-        return result
+            pending[key] = contact
+            processed.append(contact_dto.email)
+
+        if not pending:
+            return
+
+        # 4. Write the whole chunk with one multi-row upsert
+        try:
+            self.contact_repo.bulk_upsert(list(pending.values()))
+        except Exception as e:
+            result.errors.extend(f"Error processing {email}: {str(e)}" for email in processed)
+            return
+
+        result.new_contacts += new_contacts
+        result.updated_contacts += updated_contacts
+        result.total_processed += len(processed)
+
+    def _resolve_tags(self, tag_strs: list[str] | None) -> list[TagSlug]:
+        """Convert raw tag strings to slugs, normalizing each distinct string once per chunk."""
+        tags = []
+        for tag_str in tag_strs or ():
+            tag_slug = self._tag_slugs.get(tag_str)
+            if tag_slug is None:
+                tag_slug = self._tag_slugs[tag_str] = TagSlug.from_string(tag_str)
+            tags.append(tag_slug)
+        return tags
 
     def _create_contact(self, dto: IngestContactDTO, email: Email) -> Contact:
         """Create new contact entity."""
@@ -96,9 +159,9 @@ class IngestContactsUseCase:
 
         # Create tag slugs
         tags = []
-        if dto.tags:
-            for tag_str in dto.tags:
-                tags.append(TagSlug.from_string(tag_str))
+        for tag_slug in self._resolve_tags(dto.tags):
+            if tag_slug not in tags:
+                tags.append(tag_slug)
 
         # Create contact entity
         contact = Contact(
@@ -159,10 +222,7 @@ class IngestContactsUseCase:
             contact.custom_fields.update(dto.custom_fields)
 
         # Add new tags (don't remove existing ones)
-        if dto.tags:
-            for tag_str in dto.tags:
-                tag_slug = TagSlug.from_string(tag_str)
-                if tag_slug not in contact.tags:
-                    contact.add_tag(tag_slug)
+        for tag_slug in self._resolve_tags(dto.tags):
+            contact.add_tag(tag_slug)
 
         contact.updated_at = datetime.utcnow()
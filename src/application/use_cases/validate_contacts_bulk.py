@@ -1,10 +1,20 @@
 """Validate Contacts Bulk Use Case."""
 
+from collections.abc import Callable
 from dataclasses import dataclass
 
+from src.domain.entities import Contact
 from src.domain.repositories import IContactRepository
 from src.domain.services import ContactValidator
 
+# Contacts fetched (and written back) per keyset page
+VALIDATION_PAGE_SIZE = 1000
+
+
+def build_validation_cursor_key(tenant_id: int) -> str:
+    """Cache key of the resumable validation cursor (last contact id done)."""
+    return f"tenant:{tenant_id}:validation:cursor"
+
 
 @dataclass
 class ValidateContactsBulkResult:
@@ -14,64 +24,151 @@ class ValidateContactsBulkResult:
     valid_count: int
     invalid_count: int
     risky_count: int
+    last_contact_id: int | None = None  # Cursor position after this run
+    backlog_exhausted: bool = False  # True when no pending contact is left after the cursor
 
 
 class ValidateContactsBulkUseCase:
-    """Use case for bulk validating contacts."""
-
-    def __init__(self, contact_repo: IContactRepository, validator: ContactValidator = None):
+    """
+    Use case for bulk validating contacts.
+
+    Pipeline per page:
+    1. Select PENDING, never-validated contacts server-side (keyset on id)
+    2. Group them by domain so domain checks run once per domain; with
+       MX checks on, the page's domains are looked up in one batch through
+       the shared domain verdict cache
+    3. Write every result back with one bulk UPDATE
+    4. Call `commit`, then save the cursor
+
+    The last contact id done is saved in `cursor_store` (RedisCache-like:
+    get/set/delete) once its page is committed, so a run stopped by `limit`
+    or a crash resumes where it left off and never skips uncommitted
+    contacts. The cursor is cleared once the backlog is exhausted so the
+    next run starts over on newly ingested contacts.
+    """
+
+    def __init__(
+        self,
+        contact_repo: IContactRepository,
+        validator: ContactValidator = None,
+        cursor_store=None,
+        commit: Callable[[], None] | None = None,
+        page_size: int = VALIDATION_PAGE_SIZE,
+    ):
+        if cursor_store is not None and commit is None:
+            raise ValueError("cursor_store requires commit: the cursor may only move past committed pages")
         self.contact_repo = contact_repo
         self.validator = validator or ContactValidator()
+        self.cursor_store = cursor_store
+        self.commit = commit
+        self.page_size = page_size
 
     def execute(self, tenant_id: int, limit: int = 100) -> ValidateContactsBulkResult:
         """
-        Validate all pending contacts for a tenant.
+        Validate pending contacts for a tenant.
 
         Args:
             tenant_id: Tenant ID
-            limit: Max contacts to validate in one batch
+            limit: Max contacts to validate in this run
 
         Returns:
-            ValidateContactsBulkResult with counts
+            ValidateContactsBulkResult with counts and cursor position
         """
-        from app.enums import ContactStatus, ValidationStatus
-
-        # Get pending contacts
-        contacts = self.contact_repo.find_by_tags(
-            tenant_id=tenant_id,
-            tags_all=None,
-            tags_any=None,
-            exclude_tags=None,
-            limit=limit,
+        result = ValidateContactsBulkResult(
+            total_validated=0,
+            valid_count=0,
+            invalid_count=0,
+            risky_count=0,
         )
+        cursor_key = build_validation_cursor_key(tenant_id)
+        after_id = self._load_cursor(cursor_key)
+
+        while result.total_validated < limit:
+            page_limit = min(self.page_size, limit - result.total_validated)
+            contacts = self.contact_repo.find_pending_validation(
+                tenant_id, after_id=after_id, limit=page_limit
+            )
+
+            self._validate_page(contacts)
+            if contacts:
+                self.contact_repo.bulk_update_validation(contacts)
+                after_id = contacts[-1].id
+            if self.commit is not None:
+                self.commit()
+            self._count(result, contacts)
+
+            if len(contacts) < page_limit:
+                result.backlog_exhausted = True
+                break
+            self._save_cursor(cursor_key, after_id)
+
+        if result.backlog_exhausted:
+            self._clear_cursor(cursor_key)
+        result.last_contact_id = after_id or None
+        return result
+
+    def execute_ids(self, contact_ids: list[int]) -> ValidateContactsBulkResult:
+        """
+        Validate an explicit chunk of contacts (any tenant, any status).
 
-        # Filter only pending
-        pending_contacts = [c for c in contacts if c.status == ContactStatus.PENDING]
-
-        valid_count = 0
-        invalid_count = 0
-        risky_count = 0
-
-        for contact in pending_contacts:
-            # Validate email
-            status, score, errors = self.validator.validate(str(contact.email))
-
-            # Update contact
-            contact.validate(status, score)
-
-            if status == ValidationStatus.VALID:
-                valid_count += 1
-            elif status == ValidationStatus.INVALID:
-                invalid_count += 1
-            elif status == ValidationStatus.RISKY:
-                risky_count += 1
-
-            # Save
-            self.contact_repo.save(contact)
-
-        return ValidateContactsBulkResult(
-            total_validated=len(pending_contacts),
-            valid_count=valid_count,
-            invalid_count=invalid_count,
-            risky_count=risky_count,
+        Used by the chunked Celery task; no cursor is involved. Unknown ids
+        are skipped.
+        """
+        result = ValidateContactsBulkResult(
+            total_validated=0,
+            valid_count=0,
+            invalid_count=0,
+            risky_count=0,
         )
+        contacts = self.contact_repo.find_by_ids(contact_ids)
+        self._validate_page(contacts)
+        if contacts:
+            self.contact_repo.bulk_update_validation(contacts)
+            result.last_contact_id = contacts[-1].id
+        self._count(result, contacts)
+        return result
+
+    def _validate_page(self, contacts: list[Contact]) -> list[Contact]:
+        """Validate one page, domain checks once per domain, and apply results to the entities."""
+        by_domain: dict[str, list[Contact]] = {}
+        for contact in contacts:
+            by_domain.setdefault(contact.email.domain().lower(), []).append(contact)
+
+        mx_verdicts = self.validator.check_mx_many(list(by_domain))
+        for domain, domain_contacts in by_domain.items():
+            results = self.validator.validate_domain_group(
+                domain, [str(c.email) for c in domain_contacts], mx_verdicts.get(domain)
+            )
+            for contact in domain_contacts:
+                status, score, errors = results[str(contact.email)]
+                contact.validate(status, score)
+                contact.validation_errors = errors
+
+        return contacts
+
+    @staticmethod
+    def _count(result: ValidateContactsBulkResult, contacts: list[Contact]) -> None:
+        from app.enums import ValidationStatus
+
+        for contact in contacts:
+            if contact.validation_status == ValidationStatus.VALID:
+                result.valid_count += 1
+            elif contact.validation_status == ValidationStatus.INVALID:
+                result.invalid_count += 1
+            elif contact.validation_status == ValidationStatus.RISKY:
+                result.risky_count += 1
+        result.total_validated += len(contacts)
+
+    def _load_cursor(self, key: str) -> int:
+        if self.cursor_store is None:
+            return 0
+        value = self.cursor_store.get(key)
+        return int(value) if value else 0
+
+    def _save_cursor(self, key: str, after_id: int) -> None:
+        if self.cursor_store is not None:
+            self.cursor_store.set(key, after_id)
+
+    def _clear_cursor(self, key: str) -> None:
+        if self.cursor_store is not None:
+            self.cursor_store.delete(key)
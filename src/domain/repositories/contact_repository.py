@@ -1,6 +1,7 @@
 """Contact Repository Interface (Port)."""
 
 from abc import ABC, abstractmethod
+from datetime import datetime
 from typing import Optional
 
 from src.domain.entities import Contact
@@ -20,11 +21,26 @@ class IContactRepository(ABC):
         """Find contact by ID."""
         pass
 
+    @abstractmethod
+    def find_by_ids(self, contact_ids: list[int]) -> list[Contact]:
+        """Find contacts by ID in one round trip, by ascending id (unknown ids skipped)."""
+        pass
+
     @abstractmethod
     def find_by_email(self, tenant_id: int, email: Email) -> Optional[Contact]:
         """Find contact by email (scoped to tenant)."""
         pass
 
+    @abstractmethod
+    def find_by_emails(self, keys: list[tuple[int, Email]]) -> dict[tuple[int, str], Contact]:
+        """Find contacts by (tenant_id, email) pairs in one round trip."""
+        pass
+
+    @abstractmethod
+    def bulk_upsert(self, contacts: list[Contact]) -> list[Contact]:
+        """Insert or update many contacts at once (keyed by tenant_id + email)."""
+        pass
+
     @abstractmethod
     def find_by_tags(
         self,
@@ -37,6 +53,37 @@ class IContactRepository(ABC):
         """Find contacts by tag filters."""
         pass
 
+    @abstractmethod
+    def list_page(
+        self,
+        tenant_id: int,
+        limit: int = 100,
+        order_by: str = "id",
+        after: int | tuple[datetime, int] | None = None,
+    ) -> list[Contact]:
+        """
+        List one keyset page of a tenant's contacts.
+
+        order_by "id": `after` is the last id seen.
+        order_by "created_at": `after` is the last (created_at, id) seen.
+        """
+        pass
+
+    @abstractmethod
+    def find_pending_validation(
+        self,
+        tenant_id: int,
+        after_id: int = 0,
+        limit: int = 1000,
+    ) -> list[Contact]:
+        """Find PENDING contacts never validated, by ascending id after `after_id`."""
+        pass
+
+    @abstractmethod
+    def bulk_update_validation(self, contacts: list[Contact]) -> None:
+        """Write status and validation fields of many contacts at once."""
+        pass
+
     @abstractmethod
     def delete(self, contact_id: int) -> None:
         """Delete contact."""
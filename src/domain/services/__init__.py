@@ -2,14 +2,22 @@
 
 from .template_selector import TemplateSelector
 from .contact_validator import ContactValidator
-from .quota_checker import QuotaChecker
+from .quota_checker import QuotaChecker, QuotaReservation
 from .vmta_selector import VMTASelector
+from .send_allocator import SendAllocator, SendPlan, SendShare
 from .template_renderer import TemplateRenderer
+from .segment_engine import SegmentEngine, TagBitmap
 
 __all__ = [
     "TemplateSelector",
     "ContactValidator",
     "QuotaChecker",
+    "QuotaReservation",
     "VMTASelector",
+    "SendAllocator",
+    "SendPlan",
+    "SendShare",
     "TemplateRenderer",
+    "SegmentEngine",
+    "TagBitmap",
 ]
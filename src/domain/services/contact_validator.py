@@ -1,9 +1,11 @@
 """Contact Validator Service - Email validation logic."""
 
+import asyncio
 import re
 from typing import Optional, Tuple
 
 from app.enums import ValidationStatus
+from app.services.email_validator import check_mx, check_mx_many_async
 
 
 class ContactValidator:
@@ -45,14 +47,18 @@ class ContactValidator:
         "postmaster",
     }
 
-    def __init__(self, external_validator=None):
+    def __init__(self, external_validator=None, check_mx: bool = False, domain_cache=None):
         """
         Initialize validator.
 
         Args:
             external_validator: Optional external validation service (ZeroBounce, NeverBounce, etc.)
+            check_mx: Also require MX records for the domain (DNS lookup, cached)
+            domain_cache: DomainVerdictCache for MX verdicts (default: shared process cache)
         """
         self.external_validator = external_validator
+        self.require_mx = check_mx
+        self.domain_cache = domain_cache
 
     def validate(self, email: str) -> Tuple[ValidationStatus, float, list[str]]:
         """
@@ -68,9 +74,6 @@ class ContactValidator:
             status, score, errors = validator.validate("test@example.com")
             # (ValidationStatus.VALID, 0.95, [])
         """
-        errors = []
-        score = 1.0
-
         # 1. Syntax validation
         if not self._is_valid_syntax(email):
             return ValidationStatus.INVALID, 0.0, ["Invalid email syntax"]
@@ -78,24 +81,90 @@ class ContactValidator:
         # 2. Extract domain
         domain = email.split("@")[1].lower()
 
-        # 3. Check disposable domains
+        # 3. Domain-level checks (disposable, typos)
+        return self.validate_with_domain(email, self.check_domain(domain))
+
+    def check_mx_many(self, domains: list[str]) -> dict[str, bool]:
+        """
+        MX verdicts of many domains at once (empty when check_mx is off).
+
+        Cached verdicts are read in one round trip; the other domains are
+        resolved concurrently on the shared asyncio resolver and cached.
+        Must not be called from a running event loop.
+
+        Args:
+            domains: Lowercase email domains
+
+        Returns:
+            Dict mapping domain to True if it accepts mail
+        """
+        if not self.require_mx or not domains:
+            return {}
+        return asyncio.run(check_mx_many_async(domains, cache=self.domain_cache))
+
+    def check_domain(self, domain: str, has_mx: bool | None = None) -> tuple[float, list[str]]:
+        """
+        Run the checks that only depend on the domain.
+
+        Disposable and typo checks are set lookups done in memory; only the
+        MX lookup goes through the domain verdict cache.
+
+        Args:
+            domain: Lowercase email domain
+            has_mx: MX verdict already looked up (see check_mx_many)
+
+        Returns:
+            Tuple of (score penalty, errors), shareable by every address of the domain
+        """
+        errors = []
+        penalty = 0.0
+
+        # Check disposable domains
         if domain in self.DISPOSABLE_DOMAINS:
             errors.append("Disposable email domain")
-            score -= 0.5
+            penalty += 0.5
+
+        # Check for common typos in popular domains
+        typo_check = self._check_domain_typos(domain)
+        if typo_check:
+            errors.append(f"Possible typo: did you mean {typo_check}?")
+            penalty += 0.3
+
+        # Check MX records (shares the "mx" verdict with validate_single)
+        if has_mx is None and self.require_mx:
+            has_mx = check_mx(domain, cache=self.domain_cache)
+        if has_mx is False:
+            errors.append("No MX records for domain")
+            penalty += 1.0
+
+        return penalty, errors
+
+    def validate_with_domain(
+        self,
+        email: str,
+        domain_check: tuple[float, list[str]],
+    ) -> tuple[ValidationStatus, float, list[str]]:
+        """
+        Validate an address whose domain was already checked (see check_domain).
+
+        Args:
+            email: Email address with valid syntax
+            domain_check: Result of check_domain for its domain
+
+        Returns:
+            Tuple of (status, score, errors)
+        """
+        domain_penalty, domain_errors = domain_check
+        errors = list(domain_errors)
+        score = 1.0 - domain_penalty
 
-        # 4. Check role-based
+        # 1. Check role-based
         local_part = email.split("@")[0].lower()
         if local_part in self.ROLE_BASED_PREFIXES:
             errors.append("Role-based email address")
             score -= 0.2
 
-        # 5. Check for common typos in popular domains
-        typo_check = self._check_domain_typos(domain)
-        if typo_check:
-            errors.append(f"Possible typo: did you mean {typo_check}?")
-            score -= 0.3
-
-        # 6. External validation (if available)
+        # 2. External validation (if available)
         if self.external_validator:
             ext_status, ext_score, ext_errors = self.external_validator.validate(email)
             score = min(score, ext_score)
@@ -105,7 +174,7 @@ class ContactValidator:
             if ext_status == ValidationStatus.INVALID:
                 return ValidationStatus.INVALID, 0.0, errors
 
-        # 7. Determine final status
+        # 3. Determine final status
         if score >= 0.8:
             status = ValidationStatus.VALID
         elif score >= 0.5:
@@ -117,6 +186,32 @@ class ContactValidator:
 
         return status, max(0.0, score), errors
 
+    def validate_domain_group(
+        self,
+        domain: str,
+        emails: list[str],
+        has_mx: bool | None = None,
+    ) -> dict[str, tuple[ValidationStatus, float, list[str]]]:
+        """
+        Validate addresses sharing one domain, running domain checks once.
+
+        Args:
+            domain: Lowercase email domain
+            emails: Addresses of that domain
+            has_mx: MX verdict already looked up (see check_mx_many)
+
+        Returns:
+            Dict mapping email to (status, score, errors)
+        """
+        domain_check = self.check_domain(domain, has_mx)
+        results = {}
+        for email in emails:
+            if not self._is_valid_syntax(email):
+                results[email] = (ValidationStatus.INVALID, 0.0, ["Invalid email syntax"])
+            else:
+                results[email] = self.validate_with_domain(email, domain_check)
+        return results
+
     def _is_valid_syntax(self, email: str) -> bool:
         """
         Validate email syntax (RFC 5322 simplified).
@@ -1,6 +1,7 @@
 """Quota Checker - Enforce warmup daily quotas."""
 
-from datetime import datetime
+from dataclasses import dataclass, field
+from datetime import UTC, date, datetime, time, timedelta
 from typing import Optional, Tuple
 
 from sqlalchemy.orm import Session
@@ -8,6 +9,93 @@ from sqlalchemy.orm import Session
 from app.models import IP, WarmupPlan
 from src.infrastructure.cache import get_cache
 
+# Sent counters outlive their day so the nightly consolidation can read them
+SENT_KEY_GRACE_SECONDS = 2 * 86400
+
+# Atomic reservation across IPs, in order.
+# KEYS: sent counters. ARGV: expire_at, needed, allow_partial, then
+# (daily_limit, wanted) per key, daily_limit < 0 meaning unlimited.
+# Returns the count granted per key; all zeros when the reservation is
+# incomplete and partial reservations are not allowed.
+RESERVE_SCRIPT = """
+local expire_at = tonumber(ARGV[1])
+local needed = tonumber(ARGV[2])
+local allow_partial = ARGV[3] == '1'
+local grants = {}
+local total = 0
+for i, key in ipairs(KEYS) do
+  local limit = tonumber(ARGV[2 + i * 2])
+  local grant = math.min(tonumber(ARGV[3 + i * 2]), needed - total)
+  if limit >= 0 then
+    local remaining = limit - tonumber(redis.call('GET', key) or '0')
+    grant = math.min(grant, remaining)
+  end
+  if grant < 0 then grant = 0 end
+  grants[i] = grant
+  total = total + grant
+end
+if total < needed and not allow_partial then
+  for i = 1, #KEYS do grants[i] = 0 end
+  return grants
+end
+for i, key in ipairs(KEYS) do
+  if grants[i] > 0 then
+    redis.call('INCRBY', key, grants[i])
+    redis.call('EXPIREAT', key, expire_at)
+  end
+end
+return grants
+"""
+
+# Refund of reserved quota, floored at zero.
+# KEYS: sent counters. ARGV: count to give back per key.
+# Returns the count refunded per key.
+REFUND_SCRIPT = """
+local refunds = {}
+for i, key in ipairs(KEYS) do
+  local sent = tonumber(redis.call('GET', key) or '0')
+  local refund = math.min(tonumber(ARGV[i]), sent)
+  if refund > 0 then
+    redis.call('DECRBY', key, refund)
+  else
+    refund = 0
+  end
+  refunds[i] = refund
+end
+return refunds
+"""
+
+
+def build_sent_key(ip_id: int, day: str | None = None) -> str:
+    """Redis key of the emails sent today by an IP (day: ISO date, default today UTC)."""
+    day = day or datetime.utcnow().date().isoformat()
+    return f"warmup:ip:{ip_id}:date:{day}:sent"
+
+
+def sent_key_expire_at(day: str) -> int:
+    """Unix time at which the sent counter of a day expires (end of day UTC + grace)."""
+    end_of_day = datetime.combine(date.fromisoformat(day) + timedelta(days=1), time(), tzinfo=UTC)
+    return int(end_of_day.timestamp()) + SENT_KEY_GRACE_SECONDS
+
+
+@dataclass
+class QuotaReservation:
+    """Quota granted per IP by one atomic reservation."""
+
+    day: str
+    requested: int
+    grants: dict[int, int] = field(default_factory=dict)
+
+    @property
+    def reserved(self) -> int:
+        """Total number of emails reserved."""
+        return sum(self.grants.values())
+
+    @property
+    def complete(self) -> bool:
+        """True if the whole requested count was reserved."""
+        return self.reserved >= self.requested
+
 
 class QuotaChecker:
     """
@@ -51,6 +139,59 @@ class QuotaChecker:
         if not ip:
             return False, f"IP {ip_id} not found", {}
 
+        plan = ip.warmup_plan if ip.status == "warming" else None
+        sent_today = int(self.cache.get(build_sent_key(ip_id)) or 0) if plan else 0
+        return self._evaluate(ip, plan, sent_today, emails_to_send)
+
+    def evaluate_ips(
+        self,
+        tenant_id: int,
+        emails_to_send: int = 0,
+    ) -> list[tuple[IP, bool, str, dict]]:
+        """
+        Evaluate the quota of every IP of a tenant in one pass.
+
+        IPs and their warmup plans are loaded with one joined query, and the
+        sent-today counters of all warming IPs with one Redis MGET.
+
+        Args:
+            tenant_id: Tenant ID
+            emails_to_send: Number of emails to send
+
+        Returns:
+            List of (ip, allowed, message, quota_info), by IP id
+        """
+        rows = (
+            self.db.query(IP, WarmupPlan)
+            .outerjoin(WarmupPlan, WarmupPlan.ip_id == IP.id)
+            .filter(IP.tenant_id == tenant_id)
+            .order_by(IP.id)
+            .all()
+        )
+
+        warming = [ip.id for ip, plan in rows if ip.status == "warming" and plan]
+        today = datetime.utcnow().date().isoformat()
+        counters = self.cache.get_many([build_sent_key(ip_id, today) for ip_id in warming])
+        sent_by_ip = {ip_id: int(value or 0) for ip_id, value in zip(warming, counters, strict=True)}
+
+        return [
+            (ip, *self._evaluate(
+                ip,
+                plan if ip.status == "warming" else None,
+                sent_by_ip.get(ip.id, 0),
+                emails_to_send,
+            ))
+            for ip, plan in rows
+        ]
+
+    def _evaluate(
+        self,
+        ip: IP,
+        plan: WarmupPlan | None,
+        sent_today: int,
+        emails_to_send: int,
+    ) -> tuple[bool, str, dict]:
+        """Quota decision for an IP from already loaded plan and counter."""
         # If IP is ACTIVE (warmup completed), no quota limits
         if ip.status == "active":
             return True, "IP is active - no quota limits", {
@@ -69,11 +210,9 @@ class QuotaChecker:
             }
 
         # Check warmup plan exists
-        if not ip.warmup_plan:
+        if not plan:
             return False, f"IP {ip.address} is in warmup but has no warmup plan", {}
 
-        plan = ip.warmup_plan
-
         # Check if plan is paused
         if plan.paused:
             pause_msg = ""
@@ -91,11 +230,6 @@ class QuotaChecker:
         # Get daily quota
         daily_quota = plan.current_daily_quota
 
-        # Count emails sent today from Redis
-        today = datetime.utcnow().date().isoformat()
-        key = f"warmup:ip:{ip_id}:date:{today}:sent"
-        sent_today = int(self.cache.get(key) or 0)
-
         # Calculate remaining
         remaining = daily_quota - sent_today
 
@@ -163,23 +297,18 @@ class QuotaChecker:
             for ip in ips:
                 print(f"{ip['address']}: {ip['remaining']} remaining")
         """
-        # Get all IPs for tenant
-        ips = self.db.query(IP).filter_by(tenant_id=tenant_id).all()
-
-        available = []
-
-        for ip in ips:
-            allowed, message, info = self.check_quota(ip.id, emails_to_send)
-
-            if allowed:
-                available.append({
-                    "ip_id": ip.id,
-                    "address": ip.address,
-                    "status": ip.status,
-                    "allowed": True,
-                    "message": message,
-                    **info
-                })
+        available = [
+            {
+                "ip_id": ip.id,
+                "address": ip.address,
+                "status": ip.status,
+                "allowed": True,
+                "message": message,
+                **info
+            }
+            for ip, allowed, message, info in self.evaluate_ips(tenant_id, emails_to_send)
+            if allowed
+        ]
 
         # Sort by remaining quota (most remaining first)
         # Active IPs (unlimited) come first
@@ -200,7 +329,9 @@ class QuotaChecker:
         Reserve quota for sending (increment counter).
 
         This should be called BEFORE sending to reserve the quota.
-        If sending fails, quota is already counted (safe side).
+        The check and the increment run in one Lua script, so concurrent
+        senders cannot overshoot the daily quota. If sending fails, give the
+        quota back with refund_quota().
 
         Args:
             ip_id: IP ID
@@ -209,15 +340,121 @@ class QuotaChecker:
         Returns:
             True if reserved successfully
         """
-        # Check quota first
+        # Cheap rejection (unknown / paused IP) before touching Redis
         allowed, message, info = self.check_quota(ip_id, email_count)
 
         if not allowed:
             return False
 
-        # Increment Redis counter
-        today = datetime.utcnow().date().isoformat()
-        key = f"warmup:ip:{ip_id}:date:{today}:sent"
-        self.cache.increment(key, email_count)
+        limit = info["daily_quota"] if info.get("status") == "warming" else None
+        return self.reserve_quotas([(ip_id, limit)], email_count).complete
+
+    def reserve_for_tenant(
+        self,
+        tenant_id: int,
+        email_count: int,
+        allow_partial: bool = False,
+    ) -> QuotaReservation:
+        """
+        Reserve quota across the sending IPs of a tenant in one round trip.
+
+        IPs are filled in get_available_ips_for_sending() order (active IPs,
+        then warming IPs with the most remaining quota first).
+
+        Args:
+            tenant_id: Tenant ID
+            email_count: Number of emails to send
+            allow_partial: Keep a reservation smaller than email_count
+
+        Returns:
+            QuotaReservation (empty if nothing could be reserved)
 
-        return True
+        Example:
+            reservation = checker.reserve_for_tenant(tenant_id=1, email_count=5000)
+            if not reservation.complete:
+                print(f"Only {reservation.reserved} emails reserved")
+        """
+        limits = [
+            (ip["ip_id"], ip["daily_quota"] if ip["status"] == "warming" else None)
+            for ip in self.get_available_ips_for_sending(tenant_id, 0)
+            if ip["status"] in ("active", "warming")
+        ]
+        return self.reserve_quotas(limits, email_count, allow_partial=allow_partial)
+
+    def reserve_quotas(
+        self,
+        limits: list[tuple[int, int | None]],
+        email_count: int,
+        allow_partial: bool = False,
+        wanted: dict[int, int] | None = None,
+        day: str | None = None,
+    ) -> QuotaReservation:
+        """
+        Atomically reserve quota on several IPs (RESERVE_SCRIPT).
+
+        Each IP gets at most its wanted count (default: everything still
+        needed) within its remaining daily quota, in the given order, until
+        email_count is reached. Counters expire after the day rolls over.
+        Fails closed: nothing is reserved if Redis is unavailable.
+
+        Args:
+            limits: (ip_id, daily quota or None if unlimited), in fill order
+            email_count: Total number of emails to reserve
+            allow_partial: Keep a reservation smaller than email_count
+            wanted: Maximum count per IP (e.g. a weighted split)
+            day: ISO date of the counters (default today UTC)
+
+        Returns:
+            QuotaReservation with the count granted per IP
+        """
+        day = day or datetime.utcnow().date().isoformat()
+        reservation = QuotaReservation(day=day, requested=email_count)
+        if not limits or email_count <= 0:
+            return reservation
+
+        args = [sent_key_expire_at(day), email_count, int(allow_partial)]
+        for ip_id, limit in limits:
+            args += [-1 if limit is None else limit, (wanted or {}).get(ip_id, email_count)]
+
+        grants = self.cache.run_script(
+            RESERVE_SCRIPT,
+            [build_sent_key(ip_id, day) for ip_id, _ in limits],
+            args,
+        )
+        reservation.grants = {
+            ip_id: int(granted)
+            for (ip_id, _), granted in zip(limits, grants or [], strict=False)
+            if int(granted) > 0
+        }
+        return reservation
+
+    def refund_quota(
+        self,
+        reservation: QuotaReservation,
+        counts: dict[int, int] | None = None,
+    ) -> int:
+        """
+        Give back reserved quota for emails that were not sent.
+
+        Refunds hit the counters of the reservation day, even after midnight,
+        and never bring a counter below zero.
+
+        Args:
+            reservation: Reservation to refund
+            counts: Count to refund per IP (default: the whole reservation)
+
+        Returns:
+            Number of emails refunded
+        """
+        counts = {ip_id: n for ip_id, n in (counts or reservation.grants).items() if n > 0}
+        if not counts:
+            return 0
+
+        refunds = self.cache.run_script(
+            REFUND_SCRIPT,
+            [build_sent_key(ip_id, reservation.day) for ip_id in counts],
+            list(counts.values()),
+        )
+        for ip_id, refunded in zip(counts, refunds or [], strict=False):
+            reservation.grants[ip_id] = reservation.grants.get(ip_id, 0) - int(refunded)
+        return sum(int(refunded) for refunded in refunds or [])
@@ -0,0 +1,255 @@
+"""Segment Engine - Tag expressions over a per-tenant bitmap index."""
+
+from collections.abc import Iterable, Iterator
+
+from sqlalchemy.orm import Session
+
+# Roaring-style containers: ids are split on their high 16 bits; a container
+# holds the low 16 bits either as a set (sparse) or as an int bitmask (dense).
+_CONTAINER_BITS = 16
+_LOW_MASK = (1 << _CONTAINER_BITS) - 1
+_SPARSE_MAX = 4096
+_DENSE_BYTES = (1 << _CONTAINER_BITS) // 8
+
+
+def _to_mask(container) -> int:
+    """Dense (int bitmask) form of a container."""
+    if isinstance(container, int):
+        return container
+    buffer = bytearray(_DENSE_BYTES)
+    for low in container:
+        buffer[low >> 3] |= 1 << (low & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def _iter_mask(mask: int) -> Iterator[int]:
+    """Yield the set bits of a dense container in ascending order."""
+    for byte_index, byte in enumerate(mask.to_bytes(_DENSE_BYTES, "little")):
+        while byte:
+            lowest = byte & -byte
+            yield (byte_index << 3) + lowest.bit_length() - 1
+            byte ^= lowest
+
+
+def _cardinality(container) -> int:
+    return container.bit_count() if isinstance(container, int) else len(container)
+
+
+def _normalize(container):
+    """Pick the cheaper representation; None when the container is empty."""
+    if not container:
+        return None
+    if isinstance(container, int) and container.bit_count() <= _SPARSE_MAX:
+        return set(_iter_mask(container))
+    if isinstance(container, set) and len(container) > _SPARSE_MAX:
+        return _to_mask(container)
+    return container
+
+
+class TagBitmap:
+    """
+    Compressed set of contact ids (Roaring-style).
+
+    Supports `&` (AND), `|` (OR) and `-` (AND NOT); operations work
+    container by container, so only id ranges present in both operands
+    are touched.
+    """
+
+    __slots__ = ("_containers",)
+
+    def __init__(self, containers: dict | None = None):
+        self._containers: dict[int, object] = containers or {}
+
+    @classmethod
+    def from_ids(cls, ids: Iterable[int]) -> "TagBitmap":
+        """Build a bitmap from contact ids (any order)."""
+        bitmap = cls()
+        for contact_id in ids:
+            bitmap.add(contact_id)
+        return bitmap
+
+    def add(self, contact_id: int) -> None:
+        high, low = contact_id >> _CONTAINER_BITS, contact_id & _LOW_MASK
+        container = self._containers.get(high)
+        if container is None:
+            self._containers[high] = {low}
+        elif isinstance(container, set):
+            container.add(low)
+            if len(container) > _SPARSE_MAX:
+                self._containers[high] = _to_mask(container)
+        else:
+            self._containers[high] = container | (1 << low)
+
+    def discard(self, contact_id: int) -> None:
+        high, low = contact_id >> _CONTAINER_BITS, contact_id & _LOW_MASK
+        container = self._containers.get(high)
+        if container is None:
+            return
+        if isinstance(container, set):
+            container.discard(low)
+        else:
+            container &= ~(1 << low)
+        container = _normalize(container)
+        if container is None:
+            del self._containers[high]
+        else:
+            self._containers[high] = container
+
+    def __contains__(self, contact_id: int) -> bool:
+        container = self._containers.get(contact_id >> _CONTAINER_BITS)
+        if container is None:
+            return False
+        low = contact_id & _LOW_MASK
+        return low in container if isinstance(container, set) else bool(container >> low & 1)
+
+    def __len__(self) -> int:
+        return sum(_cardinality(c) for c in self._containers.values())
+
+    def __iter__(self) -> Iterator[int]:
+        for high in sorted(self._containers):
+            container = self._containers[high]
+            lows = sorted(container) if isinstance(container, set) else _iter_mask(container)
+            base = high << _CONTAINER_BITS
+            for low in lows:
+                yield base + low
+
+    def ids_after(self, after_id: int = 0, limit: int | None = None) -> list[int]:
+        """Ascending ids greater than `after_id` (keyset page), skipping whole containers."""
+        ids: list[int] = []
+        first_high = after_id >> _CONTAINER_BITS
+        for high in sorted(h for h in self._containers if h >= first_high):
+            container = self._containers[high]
+            lows = sorted(container) if isinstance(container, set) else _iter_mask(container)
+            base = high << _CONTAINER_BITS
+            for low in lows:
+                if limit is not None and len(ids) >= limit:
+                    return ids
+                if base + low > after_id:
+                    ids.append(base + low)
+        return ids
+
+    def __and__(self, other: "TagBitmap") -> "TagBitmap":
+        result = {}
+        for high in self._containers.keys() & other._containers.keys():
+            a, b = self._containers[high], other._containers[high]
+            if isinstance(a, set) and isinstance(b, set):
+                container = a & b
+            elif isinstance(a, set) or isinstance(b, set):
+                sparse, dense = (a, b) if isinstance(a, set) else (b, a)
+                container = {low for low in sparse if dense >> low & 1}
+            else:
+                container = a & b
+            container = _normalize(container)
+            if container is not None:
+                result[high] = container
+        return TagBitmap(result)
+
+    def __or__(self, other: "TagBitmap") -> "TagBitmap":
+        result = {high: _copy(c) for high, c in self._containers.items()}
+        for high, b in other._containers.items():
+            a = result.get(high)
+            if a is None:
+                result[high] = _copy(b)
+            elif isinstance(a, set) and isinstance(b, set):
+                result[high] = _normalize(a | b)
+            else:
+                result[high] = _normalize(_to_mask(a) | _to_mask(b))
+        return TagBitmap(result)
+
+    def __sub__(self, other: "TagBitmap") -> "TagBitmap":
+        result = {}
+        for high, a in self._containers.items():
+            b = other._containers.get(high)
+            if b is None:
+                result[high] = _copy(a)
+                continue
+            if isinstance(a, set):
+                container = a - b if isinstance(b, set) else {low for low in a if not b >> low & 1}
+            else:
+                container = a & ~_to_mask(b)
+            container = _normalize(container)
+            if container is not None:
+                result[high] = container
+        return TagBitmap(result)
+
+    def copy(self) -> "TagBitmap":
+        return TagBitmap({high: _copy(c) for high, c in self._containers.items()})
+
+
+def _copy(container):
+    return set(container) if isinstance(container, set) else container
+
+
+class SegmentEngine:
+    """
+    Answer campaign tag expressions from an in-memory bitmap index.
+
+    Tenant indexes (tag and status bitmaps) come from the infrastructure
+    SegmentIndexCache: built from `contact_tags` and `contacts` in two
+    queries, reused until a contact write from any process bumps the
+    tenant's shared version.
+
+    Example:
+        engine = SegmentEngine(db)
+        segment = engine.segment(tenant_id=1, tags_all=["blogger"], statuses=["valid"])
+        print(len(segment), list(segment)[:10])
+    """
+
+    def __init__(self, db: Session, index_cache=None):
+        if index_cache is None:
+            from src.infrastructure.cache.segment_index import segment_indexes
+
+            index_cache = segment_indexes
+        self.db = db
+        self.index_cache = index_cache
+
+    def segment(
+        self,
+        tenant_id: int,
+        tags_all: list[str] | None = None,
+        tags_any: list[str] | None = None,
+        exclude_tags: list[str] | None = None,
+        statuses: list[str] | None = None,
+    ) -> TagBitmap:
+        """
+        Contacts having every `tags_all`, at least one `tags_any` and none
+        of `exclude_tags`, restricted to `statuses` when given. Without
+        positive filters the whole tenant is used.
+        """
+        index = self.index_cache.get(self.db, tenant_id)
+        empty = TagBitmap()
+
+        result = None
+        for slug in tags_all or ():
+            bitmap = index.tags.get(slug, empty)
+            result = bitmap.copy() if result is None else result & bitmap
+        if tags_any:
+            any_bitmap = TagBitmap()
+            for slug in tags_any:
+                any_bitmap = any_bitmap | index.tags.get(slug, empty)
+            result = any_bitmap if result is None else result & any_bitmap
+        if statuses is not None:
+            status_bitmap = TagBitmap()
+            for status in statuses:
+                status_bitmap = status_bitmap | index.statuses.get(status, empty)
+            result = status_bitmap if result is None else result & status_bitmap
+        if result is None:
+            result = index.contacts.copy()
+        for slug in exclude_tags or ():
+            result = result - index.tags.get(slug, empty)
+
+        return result
+
+    def count(self, tenant_id: int, **filters) -> int:
+        """Exact number of contacts in a segment."""
+        return len(self.segment(tenant_id, **filters))
+
+    def contact_ids(
+        self,
+        tenant_id: int,
+        limit: int | None = None,
+        after_id: int = 0,
+        **filters,
+    ) -> list[int]:
+        """Ascending contact ids of a segment, optionally paginated by id."""
+        return self.segment(tenant_id, **filters).ids_after(after_id, limit)
@@ -0,0 +1,221 @@
+"""Send Allocator - Split a campaign across the IPs of a tenant pool."""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from .quota_checker import QuotaChecker, QuotaReservation
+from .vmta_selector import VMTASelector
+
+# Reservation passes when concurrent sends take quota between evaluation and reservation
+ALLOCATION_ATTEMPTS = 3
+
+
+def allocate_shares(
+    candidates: list[tuple[int, int | None, int]],
+    total: int,
+) -> dict[int, int]:
+    """
+    Split a count across IPs, weighted by remaining quota x IP weight.
+
+    Unlimited IPs weigh as if they could take the whole count. Shares are
+    rounded with the largest remainder method and capped to the remaining
+    quota; what capped IPs cannot take is spread over the others.
+
+    Args:
+        candidates: (ip_id, remaining quota or None if unlimited, IP weight)
+        total: Count to split
+
+    Returns:
+        Dict of IP ID -> share (IPs with no share omitted); the shares sum
+        to less than total only when the pool has not enough quota
+
+    Example:
+        allocate_shares([(1, 800, 100), (2, 400, 100)], 600)
+        # {1: 400, 2: 200}
+    """
+    shares = {ip_id: 0 for ip_id, _, _ in candidates}
+    pending = [c for c in candidates if (c[1] is None or c[1] > 0) and c[2] > 0]
+    left = total
+
+    while left > 0 and pending:
+        weights = {ip_id: (total if remaining is None else remaining) * weight for ip_id, remaining, weight in pending}
+        total_weight = sum(weights.values())
+        exact = {ip_id: left * w / total_weight for ip_id, w in weights.items()}
+        portions = {ip_id: int(value) for ip_id, value in exact.items()}
+        by_remainder = sorted(exact, key=lambda ip_id: exact[ip_id] - portions[ip_id], reverse=True)
+        for ip_id in by_remainder[:left - sum(portions.values())]:
+            portions[ip_id] += 1
+
+        for ip_id, remaining, _ in pending:
+            give = portions[ip_id]
+            if remaining is not None:
+                give = min(give, remaining - shares[ip_id])
+            shares[ip_id] += give
+            left -= give
+
+        # Every pass either places everything or caps at least one IP
+        pending = [c for c in pending if c[1] is None or shares[c[0]] < c[1]]
+
+    return {ip_id: share for ip_id, share in shares.items() if share > 0}
+
+
+@dataclass
+class SendShare:
+    """Part of a campaign sent through one IP."""
+
+    ip_id: int
+    address: str
+    status: str
+    vmta_name: str
+    count: int
+
+
+@dataclass
+class SendPlan:
+    """Per-IP send plan of a campaign, backed by a quota reservation."""
+
+    tenant_id: int
+    requested: int
+    pool_name: str
+    reservation: QuotaReservation
+    shares: list[SendShare] = field(default_factory=list)
+
+    @property
+    def planned(self) -> int:
+        """Number of emails covered by the plan."""
+        return sum(share.count for share in self.shares)
+
+    @property
+    def complete(self) -> bool:
+        """True if every recipient has an IP."""
+        return self.planned >= self.requested
+
+    def to_dict(self) -> dict:
+        """Serializable plan (task results, API responses)."""
+        return {
+            "pool_name": self.pool_name,
+            "requested": self.requested,
+            "planned": self.planned,
+            "day": self.reservation.day,
+            "shares": [
+                {
+                    "ip_id": share.ip_id,
+                    "address": share.address,
+                    "status": share.status,
+                    "vmta_name": share.vmta_name,
+                    "count": share.count,
+                }
+                for share in self.shares
+            ],
+        }
+
+
+class SendAllocator:
+    """
+    Spread campaigns over every eligible IP of a tenant.
+
+    Shares follow remaining quota x IP.weight and are reserved atomically
+    (QuotaChecker.reserve_quotas), so a campaign larger than any single
+    IP's quota can still go out when the pool as a whole has room.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.quota_checker = QuotaChecker(db)
+        self.vmta_selector = VMTASelector(db)
+
+    def plan_campaign(
+        self,
+        tenant_id: int,
+        total_recipients: int,
+        allow_partial: bool = False,
+    ) -> SendPlan:
+        """
+        Reserve quota for a campaign across the tenant pool.
+
+        Args:
+            tenant_id: Tenant ID
+            total_recipients: Number of emails to send
+            allow_partial: Keep a plan covering only part of the recipients
+
+        Returns:
+            SendPlan (no shares if the pool cannot take the campaign)
+
+        Example:
+            plan = allocator.plan_campaign(tenant_id=1, total_recipients=3000)
+            for share in plan.shares:
+                print(f"{share.vmta_name}: {share.count}")
+            # On send failure: allocator.release(plan)
+        """
+        reservation = QuotaReservation(
+            day=datetime.utcnow().date().isoformat(),
+            requested=total_recipients,
+        )
+        eligible = {}
+
+        for _ in range(ALLOCATION_ATTEMPTS):
+            missing = total_recipients - reservation.reserved
+            if missing <= 0:
+                break
+
+            limits = {}
+            candidates = []
+            for ip, allowed, _, info in self.quota_checker.evaluate_ips(tenant_id):
+                if not allowed or ip.status not in ("active", "warming"):
+                    continue
+                eligible[ip.id] = ip
+                limits[ip.id] = info["daily_quota"] if ip.status == "warming" else None
+                candidates.append((ip.id, info["remaining"] if ip.status == "warming" else None, ip.weight))
+
+            wanted = allocate_shares(candidates, missing)
+            if not wanted:
+                break
+
+            attempt = self.quota_checker.reserve_quotas(
+                [(ip_id, limits[ip_id]) for ip_id in wanted],
+                missing,
+                allow_partial=True,
+                wanted=wanted,
+                day=reservation.day,
+            )
+            for ip_id, granted in attempt.grants.items():
+                reservation.grants[ip_id] = reservation.grants.get(ip_id, 0) + granted
+
+        if not reservation.complete and not allow_partial:
+            self.quota_checker.refund_quota(reservation)
+
+        vmta_names = self.vmta_selector.get_vmta_names_for_tenant(tenant_id)
+        shares = [
+            SendShare(
+                ip_id=ip_id,
+                address=eligible[ip_id].address,
+                status=eligible[ip_id].status,
+                vmta_name=vmta_names[ip_id],
+                count=count,
+            )
+            for ip_id, count in sorted(reservation.grants.items(), key=lambda item: -item[1])
+            if count > 0
+        ]
+        return SendPlan(
+            tenant_id=tenant_id,
+            requested=total_recipients,
+            pool_name=self.vmta_selector.get_pool_name_for_tenant(tenant_id),
+            reservation=reservation,
+            shares=shares,
+        )
+
+    def release(self, plan: SendPlan) -> int:
+        """
+        Refund the quota of a plan whose campaign was not sent.
+
+        Args:
+            plan: Plan returned by plan_campaign()
+
+        Returns:
+            Number of emails refunded
+        """
+        refunded = self.quota_checker.refund_quota(plan.reservation)
+        plan.shares = []
+        return refunded
@@ -0,0 +1,233 @@
+"""Send Pacer - Release campaigns hour by hour within the sending window."""
+
+import json
+import math
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime, timedelta
+
+from src.infrastructure.cache import get_cache
+
+from .send_allocator import SendPlan
+
+# Sending window (UTC hours, end excluded) - same 16 active hours as the warmup plans
+PACING_WINDOW_START_HOUR = 7
+PACING_WINDOW_END_HOUR = 23
+
+# Contacts per released batch (one task each)
+PACING_MAX_BATCH_SIZE = 500
+
+# Redis sorted set of pending batches, scored by release timestamp
+PACING_QUEUE_KEY = "pacing:batches"
+
+# Claim due batches: ZRANGEBYSCORE + ZREM in one step so that concurrent
+# dispatchers never release the same batch twice.
+# KEYS: queue. ARGV: now (timestamp), max batches.
+POP_DUE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+if #due > 0 then
+  redis.call('ZREM', KEYS[1], unpack(due))
+end
+return due
+"""
+
+# KEYS: queue. ARGV: score, member, score, member, ...
+SCHEDULE_SCRIPT = """
+for i = 1, #ARGV, 2 do
+  redis.call('ZADD', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+return #ARGV / 2
+"""
+
+
+def _timestamp(moment: datetime) -> float:
+    """Unix time of a naive UTC datetime."""
+    return moment.replace(tzinfo=UTC).timestamp()
+
+
+def hourly_send_budget(daily_quota: int) -> int:
+    """Emails an IP may send per hour to use its daily quota over the window."""
+    return max(1, math.ceil(daily_quota / (PACING_WINDOW_END_HOUR - PACING_WINDOW_START_HOUR)))
+
+
+def window_slots(start: datetime) -> list[datetime]:
+    """
+    Hourly release times left in the window of start's day.
+
+    The first slot is start itself, then every following full hour until
+    the window closes. Empty if start is outside the window.
+    """
+    if not PACING_WINDOW_START_HOUR <= start.hour < PACING_WINDOW_END_HOUR:
+        return []
+
+    slots = [start]
+    slot = start.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    while slot.hour < PACING_WINDOW_END_HOUR and slot.date() == start.date():
+        slots.append(slot)
+        slot += timedelta(hours=1)
+    return slots
+
+
+def next_window_open(now: datetime) -> datetime:
+    """Next opening of the sending window (now if it is open)."""
+    if window_slots(now):
+        return now
+    opening = now.replace(hour=PACING_WINDOW_START_HOUR, minute=0, second=0, microsecond=0)
+    return opening if now < opening else opening + timedelta(days=1)
+
+
+@dataclass
+class PacedBatch:
+    """Contacts of a campaign released through one IP at one time."""
+
+    campaign_id: int
+    tenant_id: int
+    ip_id: int
+    vmta_name: str
+    release_at: float
+    seq: int
+    contact_ids: list[int] = field(default_factory=list)
+    # Day of the quota reservation covering the batch (None: reserve on release)
+    quota_day: str | None = None
+    # MailWizz list of the campaign's autoresponder for this IP (batch imported into it)
+    list_uid: str | None = None
+
+    def to_json(self) -> str:
+        """Queue member (unique per campaign and seq)."""
+        return json.dumps(asdict(self), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, member: str) -> "PacedBatch":
+        """Batch from a queue member."""
+        return cls(**json.loads(member))
+
+
+def build_batches(
+    campaign_id: int,
+    tenant_id: int,
+    plan: SendPlan,
+    contact_ids: list[int],
+    hourly_budgets: dict[int, int | None],
+    now: datetime,
+    max_batch_size: int = PACING_MAX_BATCH_SIZE,
+) -> list[PacedBatch]:
+    """
+    Slice a send plan into hourly batches per IP.
+
+    Each share is spread evenly over the hours left in the window, without
+    exceeding the IP's hourly budget. What does not fit today rolls over
+    to the next days' windows and reserves its quota when released.
+
+    Args:
+        campaign_id: Campaign ID
+        tenant_id: Tenant ID
+        plan: Per-IP plan (quota already reserved for plan.reservation.day)
+        contact_ids: Recipients, assigned to the shares in plan order
+        hourly_budgets: IP ID -> hourly budget (None: unlimited)
+        now: Release time of the first slot
+        max_batch_size: Contacts per batch
+
+    Returns:
+        Batches ordered by release time
+
+    Example:
+        batches = build_batches(campaign.id, campaign.tenant_id, plan, ids,
+                                {ip_id: 63}, datetime.utcnow())
+    """
+    batches = []
+    offset = 0
+
+    for share in plan.shares:
+        ids = contact_ids[offset:offset + share.count]
+        offset += share.count
+        budget = hourly_budgets.get(share.ip_id)
+        start, quota_day = now, plan.reservation.day
+
+        while ids:
+            slots = window_slots(start)
+            if not slots:
+                start, quota_day = next_window_open(start), None
+                continue
+
+            per_hour = math.ceil(len(ids) / len(slots))
+            if budget is not None:
+                per_hour = min(per_hour, budget)
+
+            for release_at in slots:
+                hour_ids, ids = ids[:per_hour], ids[per_hour:]
+                for i in range(0, len(hour_ids), max_batch_size):
+                    batches.append(PacedBatch(
+                        campaign_id=campaign_id,
+                        tenant_id=tenant_id,
+                        ip_id=share.ip_id,
+                        vmta_name=share.vmta_name,
+                        release_at=_timestamp(release_at),
+                        seq=0,
+                        contact_ids=hour_ids[i:i + max_batch_size],
+                        quota_day=quota_day,
+                    ))
+                if not ids:
+                    break
+
+            # Leftovers go to the next day's window, reserved on release
+            start = next_window_open(slots[-1].replace(minute=0, second=0, microsecond=0) + timedelta(hours=1))
+            quota_day = None
+
+    batches.sort(key=lambda batch: (batch.release_at, batch.ip_id))
+    for seq, batch in enumerate(batches):
+        batch.seq = seq
+    return batches
+
+
+class SendPacer:
+    """
+    Persistent queue of paced batches (Redis sorted set).
+
+    Batches are scored by release time; the dispatcher claims due ones
+    atomically, so pending sends survive worker restarts.
+
+    Example:
+        pacer = SendPacer()
+        pacer.schedule(batches)
+        for batch in pacer.pop_due(datetime.utcnow()):
+            send_paced_batch_task.delay(batch.to_json())
+    """
+
+    def __init__(self, queue_key: str = PACING_QUEUE_KEY):
+        self.cache = get_cache()
+        self.queue_key = queue_key
+
+    def schedule(self, batches: list[PacedBatch]) -> int:
+        """
+        Add batches to the queue in one round trip.
+
+        Args:
+            batches: Batches to schedule
+
+        Returns:
+            Number of batches scheduled (0 on Redis error)
+        """
+        if not batches:
+            return 0
+        args = []
+        for batch in batches:
+            args += [batch.release_at, batch.to_json()]
+        return int(self.cache.run_script(SCHEDULE_SCRIPT, [self.queue_key], args) or 0)
+
+    def reschedule(self, batch: PacedBatch, release_at: datetime) -> int:
+        """Put a batch back in the queue for a later release."""
+        batch.release_at = _timestamp(release_at)
+        return self.schedule([batch])
+
+    def pop_due(self, now: datetime, limit: int = 100) -> list[PacedBatch]:
+        """
+        Claim batches whose release time has come.
+
+        Args:
+            now: Current time
+            limit: Maximum number of batches claimed
+
+        Returns:
+            Claimed batches, oldest first (removed from the queue)
+        """
+        members = self.cache.run_script(POP_DUE_SCRIPT, [self.queue_key], [_timestamp(now), limit])
+        return [PacedBatch.from_json(member) for member in members or []]
@@ -1,7 +1,7 @@
 """Template Renderer - Render email templates with variables."""
 
 from typing import Dict, Any
-from jinja2 import Template, TemplateSyntaxError, UndefinedError
+from jinja2 import Template, TemplateSyntaxError, Undefined, UndefinedError
 
 
 class TemplateRenderer:
@@ -183,16 +183,13 @@ class TemplateRenderer:
         return self.render(template_content, sample_variables, strict=False)
 
 
-class SilentUndefined:
+class SilentUndefined(Undefined):
     """
     Jinja2 Undefined class that returns empty string for undefined variables.
 
     This prevents errors when variables are missing.
     """
 
-    def __init__(self, *args, **kwargs):
-        pass
-
     def __str__(self):
         return ""
 
@@ -6,6 +6,11 @@ from sqlalchemy.orm import Session
 from app.models import IP, Tenant
 
 
+def build_vmta_name(tenant_slug: str, ip_id: int) -> str:
+    """Default VirtualMTA name of an IP (e.g. "vmta-client-1-3")."""
+    return f"vmta-{tenant_slug}-{ip_id}"
+
+
 class VMTASelector:
     """
     Select VirtualMTA pool for tenant.
@@ -80,7 +85,7 @@ class VMTASelector:
                 "id": ip.id,
                 "address": ip.address,
                 "hostname": ip.domain.domain if ip.domain else f"mail{ip.id}.{tenant.sending_domain_base}",
-                "vmta_name": f"vmta-{tenant.slug}-{ip.id}",
+                "vmta_name": build_vmta_name(tenant.slug, ip.id),
                 "weight": ip.weight,
                 "status": ip.status,
             })
@@ -103,6 +108,29 @@ class VMTASelector:
             "sending_domain_base": tenant.sending_domain_base,
         }
 
+    def get_vmta_names_for_tenant(self, tenant_id: int) -> dict[int, str]:
+        """
+        Get the VirtualMTA name of every IP of a tenant in one query.
+
+        Args:
+            tenant_id: Tenant ID
+
+        Returns:
+            Dict of IP ID -> VirtualMTA name (provisioned IP.vmta_name,
+            else the default name derived from the tenant slug)
+
+        Example:
+            names = selector.get_vmta_names_for_tenant(tenant_id=1)
+            # {3: "vmta-client-1-3", 4: "vmta-hub-travelers"}
+        """
+        rows = (
+            self.db.query(IP.id, IP.vmta_name, Tenant.slug)
+            .join(Tenant, Tenant.id == IP.tenant_id)
+            .filter(IP.tenant_id == tenant_id)
+            .all()
+        )
+        return {ip_id: vmta_name or build_vmta_name(slug, ip_id) for ip_id, vmta_name, slug in rows}
+
     def get_sending_domain_for_ip(self, ip_id: int) -> Optional[str]:
         """
         Get sending domain for an IP.
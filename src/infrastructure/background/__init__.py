@@ -4,14 +4,32 @@ from .celery_app import celery_app
 from .tasks import (
     validate_contact_task,
     inject_contact_to_mailwizz_task,
+    validate_contacts_chunk_task,
+    validate_pending_contacts_task,
+    inject_contacts_chunk_to_mailwizz_task,
+    fan_out_contact_chunks_task,
+    dispatch_contact_chunks,
     send_campaign_task,
+    dispatch_paced_batches_task,
+    send_paced_batch_task,
     advance_warmup_task,
 )
+from .webhook_pipeline import WebhookEvent, WebhookPipeline, get_webhook_pipeline
 
 __all__ = [
     "celery_app",
     "validate_contact_task",
     "inject_contact_to_mailwizz_task",
+    "validate_contacts_chunk_task",
+    "validate_pending_contacts_task",
+    "inject_contacts_chunk_to_mailwizz_task",
+    "fan_out_contact_chunks_task",
+    "dispatch_contact_chunks",
     "send_campaign_task",
+    "dispatch_paced_batches_task",
+    "send_paced_batch_task",
     "advance_warmup_task",
+    "WebhookEvent",
+    "WebhookPipeline",
+    "get_webhook_pipeline",
 ]
@@ -28,7 +28,13 @@ celery_app.conf.update(
 celery_app.conf.task_routes = {
     "src.infrastructure.background.tasks.validate_contact_task": {"queue": "validation"},
     "src.infrastructure.background.tasks.inject_contact_to_mailwizz_task": {"queue": "mailwizz"},
+    "src.infrastructure.background.tasks.validate_contacts_chunk_task": {"queue": "validation"},
+    "src.infrastructure.background.tasks.validate_pending_contacts_task": {"queue": "validation"},
+    "src.infrastructure.background.tasks.inject_contacts_chunk_to_mailwizz_task": {"queue": "mailwizz"},
+    "src.infrastructure.background.tasks.fan_out_contact_chunks_task": {"queue": "validation"},
     "src.infrastructure.background.tasks.send_campaign_task": {"queue": "campaigns"},
+    "src.infrastructure.background.tasks.dispatch_paced_batches_task": {"queue": "campaigns"},
+    "src.infrastructure.background.tasks.send_paced_batch_task": {"queue": "campaigns"},
     "src.infrastructure.background.tasks.advance_warmup_task": {"queue": "warmup"},
     "src.infrastructure.background.tasks.consolidate_warmup_stats_task": {"queue": "warmup"},
 }
@@ -36,6 +42,11 @@ celery_app.conf.task_routes = {
 # Beat schedule for periodic tasks (cron-like)
 # All times are in UTC
 celery_app.conf.beat_schedule = {
+    # Release paced campaign batches whose hour has come
+    "dispatch-paced-batches": {
+        "task": "src.infrastructure.background.tasks.dispatch_paced_batches_task",
+        "schedule": crontab(),  # every minute
+    },
     # Consolidate warmup stats from Redis to PostgreSQL
     # Runs daily at 00:30 UTC to process previous day's data
     "consolidate-warmup-stats-daily": {
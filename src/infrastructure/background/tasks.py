@@ -2,6 +2,37 @@
 
 from .celery_app import celery_app
 
+# Contacts per chunk task (one session and one MailWizz client per chunk)
+CONTACT_CHUNK_SIZE = 1000
+
+# Contacts validated per resumable validation run
+VALIDATION_RUN_LIMIT = 10_000
+
+# Subscribers per MailWizz bulk import call in a chunk (one commit per call)
+INJECT_COMMIT_BATCH_SIZE = 200
+
+# Campaigns from this size are released hour by hour (SendPacer) instead of
+# being handed to MailWizz at once
+PACED_CAMPAIGN_MIN_RECIPIENTS = 1000
+
+# Batches claimed per dispatcher round
+PACING_DISPATCH_LIMIT = 100
+
+# Paced campaigns: one MailWizz autoresponder per IP, sending to each
+# subscriber as soon as a released batch is imported into its list
+PACED_AUTORESPONDER_OPTIONS = {
+    "autoresponder_event": "AFTER-SUBSCRIBE",
+    "autoresponder_time_unit": "minute",
+    "autoresponder_time_value": 0,
+    "autoresponder_include_imported": "yes",
+    "autoresponder_include_current": "no",
+}
+
+# Unsubscribe link appended to campaign templates lacking one (MailWizz tag)
+UNSUBSCRIBE_TAG = "[UNSUBSCRIBE_URL]"
+UNSUBSCRIBE_FOOTER_HTML = f'<p style="font-size:12px;color:#888"><a href="{UNSUBSCRIBE_TAG}">Unsubscribe</a></p>'
+UNSUBSCRIBE_FOOTER_TEXT = f"\n\nUnsubscribe: {UNSUBSCRIBE_TAG}"
+
 
 @celery_app.task(name="src.infrastructure.background.tasks.validate_contact_task")
 def validate_contact_task(contact_id: int) -> dict:
@@ -26,6 +57,7 @@ def validate_contact_task(contact_id: int) -> dict:
     from app.database import SessionLocal
     from app.models import Contact
     from src.domain.services import ContactValidator
+    from src.infrastructure.cache.segment_index import mark_contacts_changed
 
     db = SessionLocal()
     try:
@@ -51,6 +83,7 @@ def validate_contact_task(contact_id: int) -> dict:
         elif status.value == "invalid":
             contact.status = "invalid"
 
+        mark_contacts_changed(db, [(contact.tenant_id, contact.id)])
         db.commit()
 
         return {
@@ -91,6 +124,7 @@ def inject_contact_to_mailwizz_task(contact_id: int) -> dict:
     """
     from app.database import SessionLocal
     from app.models import Contact, MailwizzInstance
+    from app.services.mailwizz_db import subscriber_fields
     from src.infrastructure.external import MailWizzClient
 
     db = SessionLocal()
@@ -120,22 +154,9 @@ def inject_contact_to_mailwizz_task(contact_id: int) -> dict:
             private_key=mailwizz.api_private_key,
         )
 
-        # Prepare subscriber data
-        subscriber_data = {
-            "EMAIL": contact.email,
-        }
-        if contact.first_name:
-            subscriber_data["FNAME"] = contact.first_name
-        if contact.last_name:
-            subscriber_data["LNAME"] = contact.last_name
-        if contact.company:
-            subscriber_data["COMPANY"] = contact.company
-        if contact.website:
-            subscriber_data["WEBSITE"] = contact.website
-
         # Create subscriber
         list_id = str(mailwizz.default_list_id)
-        result = client.create_subscriber(list_id=list_id, subscriber=subscriber_data)
+        result = client.create_subscriber(list_id=list_id, subscriber=subscriber_fields(contact))
 
         # Update contact
         contact.mailwizz_subscriber_id = result.get("subscriber_uid")
@@ -155,6 +176,286 @@ def inject_contact_to_mailwizz_task(contact_id: int) -> dict:
         db.close()
 
 
+@celery_app.task(name="src.infrastructure.background.tasks.validate_contacts_chunk_task")
+def validate_contacts_chunk_task(contact_ids: list[int]) -> dict:
+    """
+    Validate a chunk of contacts with one session (background task).
+
+    Args:
+        contact_ids: Contact IDs to validate (unknown ids are skipped)
+
+    Returns:
+        Dict with per-chunk counts
+
+    Flow:
+        1. Fetch all contacts of the chunk in one query
+        2. Run domain checks once per domain (ValidateContactsBulkUseCase),
+           MX verdicts through the shared domain verdict cache
+        3. Write all results with one bulk UPDATE and commit once
+
+    Example:
+        validate_contacts_chunk_task.delay(contact_ids=[1, 2, 3])
+    """
+    from app.config import settings
+    from app.database import SessionLocal
+    from src.application.use_cases.validate_contacts_bulk import ValidateContactsBulkUseCase
+    from src.domain.services import ContactValidator
+    from src.infrastructure.persistence import SQLAlchemyContactRepository
+
+    db = SessionLocal()
+    try:
+        result = ValidateContactsBulkUseCase(
+            SQLAlchemyContactRepository(db),
+            validator=ContactValidator(check_mx=settings.BULK_VALIDATION_CHECK_MX),
+        ).execute_ids(contact_ids)
+        db.commit()
+
+        return {
+            "success": True,
+            "requested": len(contact_ids),
+            "validated": result.total_validated,
+            "valid": result.valid_count,
+            "invalid": result.invalid_count,
+            "risky": result.risky_count,
+        }
+
+    except Exception as e:
+        db.rollback()
+        return {"success": False, "requested": len(contact_ids), "error": str(e)}
+    finally:
+        db.close()
+
+
+@celery_app.task(name="src.infrastructure.background.tasks.validate_pending_contacts_task")
+def validate_pending_contacts_task(tenant_id: int, limit: int = VALIDATION_RUN_LIMIT) -> dict:
+    """
+    Validate a tenant's pending contacts, resuming from the last run (background task).
+
+    Args:
+        tenant_id: Tenant ID
+        limit: Max contacts to validate in this run
+
+    Returns:
+        Dict with counts and cursor position
+
+    Flow:
+        1. Resume after the cursor saved in Redis by the previous run
+        2. Validate page by page (ValidateContactsBulkUseCase)
+        3. Commit each page, then move the cursor past it
+
+    Example:
+        validate_pending_contacts_task.delay(tenant_id=1)
+    """
+    from app.config import settings
+    from app.database import SessionLocal
+    from src.application.use_cases.validate_contacts_bulk import ValidateContactsBulkUseCase
+    from src.domain.services import ContactValidator
+    from src.infrastructure.cache import get_cache
+    from src.infrastructure.persistence import SQLAlchemyContactRepository
+
+    db = SessionLocal()
+    try:
+        result = ValidateContactsBulkUseCase(
+            SQLAlchemyContactRepository(db),
+            validator=ContactValidator(check_mx=settings.BULK_VALIDATION_CHECK_MX),
+            cursor_store=get_cache(),
+            commit=db.commit,
+        ).execute(tenant_id, limit=limit)
+
+        return {
+            "success": True,
+            "tenant_id": tenant_id,
+            "validated": result.total_validated,
+            "valid": result.valid_count,
+            "invalid": result.invalid_count,
+            "risky": result.risky_count,
+            "last_contact_id": result.last_contact_id,
+            "backlog_exhausted": result.backlog_exhausted,
+        }
+
+    except Exception as e:
+        db.rollback()
+        return {"success": False, "tenant_id": tenant_id, "error": str(e)}
+    finally:
+        db.close()
+
+
+@celery_app.task(name="src.infrastructure.background.tasks.inject_contacts_chunk_to_mailwizz_task")
+def inject_contacts_chunk_to_mailwizz_task(contact_ids: list[int]) -> dict:
+    """
+    Inject a chunk of contacts into MailWizz with one session (background task).
+
+    Args:
+        contact_ids: Contact IDs to inject (unknown ids are skipped)
+
+    Returns:
+        Dict with per-chunk counts and per-contact failures
+
+    Flow:
+        1. Fetch all contacts of the chunk, then their tenants' MailWizz
+           instances, in one query each
+        2. Per instance: one pooled MailWizzClient and bulk subscriber
+           import calls; a failing contact does not stop the chunk
+        3. Commit after each import call, so a crash mid-chunk keeps the
+           subscriber ids already created (a retry skips those contacts)
+
+    Example:
+        inject_contacts_chunk_to_mailwizz_task.delay(contact_ids=[1, 2, 3])
+    """
+    from app.database import SessionLocal
+    from app.models import Contact, MailwizzInstance
+    from app.services.mailwizz_db import subscriber_fields
+    from src.infrastructure.external import MailWizzClient
+
+    db = SessionLocal()
+    injected = 0
+    try:
+        contacts = (
+            db.query(Contact)
+            .filter(Contact.id.in_(set(contact_ids)))
+            .order_by(Contact.id)
+            .all()
+        )
+        tenant_ids = {c.tenant_id for c in contacts}
+        # Same instance as filter_by(tenant_id=...).first() in the single-contact task
+        instances = {}
+        for mw in (
+            db.query(MailwizzInstance)
+            .filter(MailwizzInstance.tenant_id.in_(tenant_ids))
+            .order_by(MailwizzInstance.id)
+        ):
+            instances.setdefault(mw.tenant_id, mw)
+
+        already_injected = 0
+        failed = []
+        by_instance: dict[int, list] = {}
+        for contact in contacts:
+            if contact.mailwizz_subscriber_id:
+                already_injected += 1
+                continue
+            mailwizz = instances.get(contact.tenant_id)
+            if not mailwizz:
+                failed.append({"contact_id": contact.id, "error": "MailWizz instance not found for tenant"})
+                continue
+            by_instance.setdefault(mailwizz.tenant_id, []).append(contact)
+
+        for tenant_id, pending in by_instance.items():
+            mailwizz = instances[tenant_id]
+            with MailWizzClient(
+                base_url=mailwizz.base_url,
+                public_key=mailwizz.api_public_key,
+                private_key=mailwizz.api_private_key,
+            ) as client:
+                for start in range(0, len(pending), INJECT_COMMIT_BATCH_SIZE):
+                    batch = pending[start:start + INJECT_COMMIT_BATCH_SIZE]
+                    results = client.create_subscribers_bulk(
+                        list_id=str(mailwizz.default_list_id),
+                        subscribers=[subscriber_fields(c) for c in batch],
+                    )
+                    for contact, result in zip(batch, results, strict=True):
+                        if not result["success"]:
+                            failed.append({"contact_id": contact.id, "error": result["error"]})
+                            continue
+                        contact.mailwizz_subscriber_id = result["subscriber_uid"]
+                        contact.mailwizz_list_id = mailwizz.default_list_id
+                        injected += 1
+                    db.commit()
+
+        return {
+            "success": True,
+            "requested": len(contact_ids),
+            "injected": injected,
+            "already_injected": already_injected,
+            "not_found": len(set(contact_ids)) - len(contacts),
+            "failed": failed,
+        }
+
+    except Exception as e:
+        db.rollback()
+        return {"success": False, "requested": len(contact_ids), "injected": injected, "error": str(e)}
+    finally:
+        db.close()
+
+
+def dispatch_contact_chunks(db, tenant_id: int, operation: str, chunk_size: int = CONTACT_CHUNK_SIZE) -> dict:
+    """
+    Split a tenant backlog into chunk tasks.
+
+    Args:
+        db: Database session
+        tenant_id: Tenant ID
+        operation: "validate" (PENDING, never validated) or "inject"
+            (VALID, not yet in MailWizz)
+        chunk_size: Contacts per chunk task
+
+    Returns:
+        Dict with the number of chunks and contacts dispatched
+
+    Only ids are read (keyset pages on id); each page becomes one chunk
+    task carrying its explicit id list, so contacts that change state
+    after the fan-out are not picked up by a stale range.
+    """
+    from app.models import Contact
+
+    if operation == "validate":
+        task = validate_contacts_chunk_task
+        backlog = (Contact.status == "pending", Contact.validation_status.is_(None))
+    elif operation == "inject":
+        task = inject_contacts_chunk_to_mailwizz_task
+        backlog = (Contact.status == "valid", Contact.mailwizz_subscriber_id.is_(None))
+    else:
+        raise ValueError(f"Unsupported operation: {operation}")
+
+    chunks = 0
+    contacts = 0
+    after_id = 0
+    while True:
+        ids = [
+            row.id
+            for row in db.query(Contact.id)
+            .filter(Contact.tenant_id == tenant_id, Contact.id > after_id, *backlog)
+            .order_by(Contact.id)
+            .limit(chunk_size)
+        ]
+        if not ids:
+            break
+        task.delay(contact_ids=ids)
+        chunks += 1
+        contacts += len(ids)
+        after_id = ids[-1]
+        if len(ids) < chunk_size:
+            break
+
+    return {"tenant_id": tenant_id, "operation": operation, "chunks": chunks, "contacts": contacts}
+
+
+@celery_app.task(name="src.infrastructure.background.tasks.fan_out_contact_chunks_task")
+def fan_out_contact_chunks_task(tenant_id: int, operation: str, chunk_size: int = CONTACT_CHUNK_SIZE) -> dict:
+    """
+    Fan a tenant backlog out into chunk tasks (background task).
+
+    Args:
+        tenant_id: Tenant ID
+        operation: "validate" or "inject"
+        chunk_size: Contacts per chunk task
+
+    Returns:
+        Dict with the number of chunks and contacts dispatched
+
+    Example:
+        fan_out_contact_chunks_task.delay(tenant_id=1, operation="validate")
+    """
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return {"success": True, **dispatch_contact_chunks(db, tenant_id, operation, chunk_size)}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+    finally:
+        db.close()
+
+
 @celery_app.task(name="src.infrastructure.background.tasks.send_campaign_task")
 def send_campaign_task(campaign_id: int) -> dict:
     """
@@ -170,11 +471,11 @@ def send_campaign_task(campaign_id: int) -> dict:
         1. Fetch campaign + template
         2. Get contacts (filtered by tags if specified)
         3. CHECK QUOTAS - CRITICAL for warmup
-        4. Select IP with available quota
-        5. Render template with variables
-        6. Create MailWizz campaign
-        7. Send campaign
-        8. Reserve quota (increment counter)
+        4. Split recipients across the tenant IPs (remaining quota x weight)
+        5. Reserve each IP share atomically (refunded if the send fails)
+        6. Render template with variables
+        7. Create MailWizz campaign
+        8. Send campaign
         9. Update campaign.status = "sending"
 
     Example:
@@ -182,11 +483,14 @@ def send_campaign_task(campaign_id: int) -> dict:
     """
     from datetime import datetime
     from app.database import SessionLocal
-    from app.models import Campaign, MailwizzInstance, Contact, EmailTemplate, IP
+    from app.models import Campaign, MailwizzInstance, Contact, IP
     from src.infrastructure.external import MailWizzClient
-    from src.domain.services import QuotaChecker
+    from src.domain.services import SendAllocator
 
     db = SessionLocal()
+    allocator = SendAllocator(db)
+    plan = None
+    success = False
     try:
         # =====================================================================
         # 1. Fetch Campaign
@@ -196,102 +500,47 @@ def send_campaign_task(campaign_id: int) -> dict:
             return {"success": False, "error": f"Campaign {campaign_id} not found"}
 
         # =====================================================================
-        # 2. Get Contacts (TODO: Filter by tags when implemented)
+        # 2. Get Contacts (same source for paced and unpaced campaigns)
         # =====================================================================
-        # For now, get total_recipients from campaign
-        # In future: query Contact table with tag filtering
-        total_recipients = campaign.total_recipients
+        contact_ids = _campaign_recipients(db, campaign)
+        total_recipients = len(contact_ids)
 
         if total_recipients == 0:
             return {"success": False, "error": "No recipients for this campaign"}
 
+        # Large campaigns: hour-by-hour batches per IP instead of one burst
+        if total_recipients >= PACED_CAMPAIGN_MIN_RECIPIENTS:
+            return _schedule_paced_campaign(db, campaign, allocator, contact_ids)
+
         # =====================================================================
-        # 3. CHECK QUOTAS - CRITICAL FOR WARMUP
+        # 3-4. CHECK QUOTAS + Reserve per-IP shares - CRITICAL FOR WARMUP
         # =====================================================================
-        quota_checker = QuotaChecker(db)
-
-        # Get available IPs for this tenant that can send
-        available_ips = quota_checker.get_available_ips_for_sending(
+        # Spread the campaign over every eligible IP of the tenant pool,
+        # each share reserved atomically before sending
+        plan = allocator.plan_campaign(
             tenant_id=campaign.tenant_id,
-            emails_to_send=total_recipients
+            total_recipients=total_recipients,
         )
 
-        if not available_ips:
+        if not plan.complete:
             return {
                 "success": False,
                 "error": f"No IPs available with sufficient quota to send {total_recipients} emails",
                 "total_recipients": total_recipients,
             }
 
-        # Use the IP with most remaining quota
-        selected_ip = available_ips[0]
-
-        # =====================================================================
-        # 4. Reserve Quota (before sending)
-        # =====================================================================
-        quota_reserved = quota_checker.reserve_quota(
-            ip_id=selected_ip["ip_id"],
-            email_count=total_recipients
-        )
-
-        if not quota_reserved:
-            return {
-                "success": False,
-                "error": "Failed to reserve quota (possible race condition)",
-            }
-
         # =====================================================================
         # 5. Fetch MailWizz Instance
         # =====================================================================
         mailwizz = db.query(MailwizzInstance).filter_by(tenant_id=campaign.tenant_id).first()
         if not mailwizz:
+            allocator.release(plan)
             return {"success": False, "error": "MailWizz instance not found"}
 
-        # Create MailWizz client
-        client = MailWizzClient(
-            base_url=mailwizz.base_url,
-            public_key=mailwizz.api_public_key,
-            private_key=mailwizz.api_private_key,
-        )
-
         # =====================================================================
         # 6. Fetch Template & Render with Variables
         # =====================================================================
-        from src.domain.services import TemplateRenderer
-
-        renderer = TemplateRenderer()
-
-        # Default variables for rendering
-        # TODO: Get from contact when implementing contact filtering
-        default_variables = {
-            "first_name": "[FNAME]",  # MailWizz will replace these
-            "last_name": "[LNAME]",
-            "email": "[EMAIL]",
-            "company": "[COMPANY]",
-        }
-
-        if campaign.template_id:
-            template = db.query(EmailTemplate).filter_by(id=campaign.template_id).first()
-            if template:
-                # Render subject
-                subject = renderer.render_subject(template.subject, default_variables)
-
-                # Render HTML body
-                html_content = renderer.render(template.body_html, default_variables)
-
-                # Render plain text if exists
-                plain_content = None
-                if template.body_text:
-                    plain_content = renderer.render(template.body_text, default_variables)
-            else:
-                subject = campaign.name
-                html_content = "<p>Hello [FNAME]!</p>"
-                plain_content = None
-        else:
-            # Fallback - use campaign name as subject
-            subject = campaign.name
-            html_content = "<p>Hello [FNAME]!</p>"
-            plain_content = None
+        subject, html_content, plain_content = _render_campaign_content(db, campaign)
 
         # =====================================================================
         # 7. Create Campaign in MailWizz
@@ -301,28 +550,54 @@ def send_campaign_task(campaign_id: int) -> dict:
         from_name = f"Tenant {campaign.tenant_id}"
         from_email = f"contact@tenant{campaign.tenant_id}.com"
         reply_to = from_email
-
-        mw_campaign = client.create_campaign(
-            list_id=str(mailwizz.default_list_id),
-            name=campaign.name,
-            subject=subject,
-            from_name=from_name,
-            from_email=from_email,
-            reply_to=reply_to,
-            html_content=html_content,
-            plain_content=plain_content,  # Include plain text version
-        )
-
-        campaign.mailwizz_campaign_id = mw_campaign.get("campaign_uid")
-
-        # =====================================================================
-        # 8. Send Campaign
-        # =====================================================================
-        success = client.send_campaign(campaign.mailwizz_campaign_id)
+        server_ids = [
+            server_id
+            for (server_id,) in db.query(IP.mailwizz_server_id).filter(
+                IP.id.in_([share.ip_id for share in plan.shares]), IP.mailwizz_server_id.isnot(None)
+            )
+        ]
+        contacts = db.query(Contact).filter(Contact.id.in_(contact_ids)).all()
+
+        # Client closed (pooled HTTP session released) once the campaign is sent
+        with MailWizzClient(
+            base_url=mailwizz.base_url,
+            public_key=mailwizz.api_public_key,
+            private_key=mailwizz.api_private_key,
+        ) as client:
+            # The campaign's own list holds exactly its recipients, so
+            # MailWizz adds the unsubscribe link / List-Unsubscribe header
+            # and tracks opens and clicks
+            list_uid = _create_campaign_list(client, campaign, from_name, from_email, subject)
+            imported = _import_recipients(client, list_uid, contacts)
+            if not imported:
+                allocator.release(plan)
+                return {"success": False, "error": "No recipient imported into MailWizz"}
+
+            mw_campaign = client.create_campaign(
+                list_id=list_uid,
+                name=campaign.name,
+                subject=subject,
+                from_name=from_name,
+                from_email=from_email,
+                reply_to=reply_to,
+                html_content=html_content,
+                plain_content=plain_content,  # Include plain text version
+                delivery_server_ids=server_ids,
+            )
+
+            campaign.mailwizz_campaign_id = mw_campaign.get("campaign_uid")
+
+            # =================================================================
+            # 8. Send Campaign
+            # =================================================================
+            success = client.send_campaign(campaign.mailwizz_campaign_id)
 
         if success:
             campaign.status = "sending"
             campaign.started_at = datetime.utcnow()
+            _request_blacklist_checks(db, [(share.address, share.count) for share in plan.shares])
+        else:
+            allocator.release(plan)
 
         db.commit()
 
@@ -331,22 +606,411 @@ def send_campaign_task(campaign_id: int) -> dict:
             "campaign_id": campaign_id,
             "mailwizz_campaign_id": campaign.mailwizz_campaign_id,
             "total_recipients": total_recipients,
-            "ip_used": selected_ip["address"],
-            "ip_status": selected_ip["status"],
-            "quota_info": {
-                "daily_quota": selected_ip.get("daily_quota"),
-                "sent_today_before": selected_ip.get("sent_today"),
-                "remaining_after": selected_ip.get("after_send"),
-            }
+            "imported": imported,
+            "send_plan": plan.to_dict(),
         }
 
     except Exception as e:
         db.rollback()
+        if plan is not None and not success:
+            allocator.release(plan)
         return {"success": False, "error": str(e)}
     finally:
         db.close()
 
 
+def _request_blacklist_checks(db, sends: list[tuple[str, int]]) -> None:
+    """
+    Count emails sent per IP; request a priority blacklist check past the threshold.
+
+    Sends are summed per IP over BLACKLIST_PRIORITY_WINDOW_MINUTES across
+    batches and workers, so paced batches trigger the check as well.
+
+    Args:
+        db: Session whose commit carries the store update
+        sends: (IP address, emails sent) pairs
+    """
+    from app.services.blacklist_store import blacklist_store
+
+    for address, count in sends:
+        blacklist_store.record_sent(db, address, count)
+
+
+def _campaign_tags(value) -> list[str]:
+    """Tag slugs of a campaign JSON tag column (normalized like ingested tags)."""
+    import json
+
+    from src.domain.value_objects import TagSlug
+
+    try:
+        tags = json.loads(value) if value else []
+    except (json.JSONDecodeError, TypeError):
+        return []
+    return [TagSlug.from_string(str(tag)).value for tag in tags]
+
+
+def _campaign_recipients(db, campaign) -> list[int]:
+    """Contact IDs a campaign goes to: valid contacts matching its tags (never unsubscribed, blacklisted or unvalidated)."""
+    from src.domain.services import SegmentEngine
+
+    return SegmentEngine(db).contact_ids(
+        campaign.tenant_id,
+        tags_all=_campaign_tags(campaign.tags_all),
+        tags_any=_campaign_tags(campaign.tags_any),
+        exclude_tags=_campaign_tags(campaign.exclude_tags),
+        statuses=["valid"],
+    )
+
+
+def _render_campaign_content(db, campaign) -> tuple[str, str, str | None]:
+    """
+    Subject, HTML and plain text of a campaign, personalized with MailWizz tags.
+
+    An unsubscribe link ([UNSUBSCRIBE_URL], filled by MailWizz per
+    subscriber) is appended to the HTML when the template has none.
+    """
+    from app.models import EmailTemplate
+    from src.domain.services import TemplateRenderer
+
+    renderer = TemplateRenderer()
+
+    # Default variables for rendering
+    default_variables = {
+        "first_name": "[FNAME]",  # MailWizz will replace these
+        "last_name": "[LNAME]",
+        "email": "[EMAIL]",
+        "company": "[COMPANY]",
+    }
+
+    template = None
+    if campaign.template_id:
+        template = db.query(EmailTemplate).filter_by(id=campaign.template_id).first()
+    if template:
+        subject = renderer.render_subject(template.subject, default_variables)
+        html_content = renderer.render(template.body_html, default_variables)
+        plain_content = renderer.render(template.body_text, default_variables) if template.body_text else None
+    else:
+        # Fallback - use campaign name as subject
+        subject = campaign.name
+        html_content = "<p>Hello [FNAME]!</p>"
+        plain_content = None
+
+    if UNSUBSCRIBE_TAG not in html_content:
+        html_content += UNSUBSCRIBE_FOOTER_HTML
+    if plain_content and UNSUBSCRIBE_TAG not in plain_content:
+        plain_content += UNSUBSCRIBE_FOOTER_TEXT
+    return subject, html_content, plain_content
+
+
+def _create_campaign_list(client, campaign, from_name: str, from_email: str, subject: str, suffix: str = "") -> str:
+    """Create the MailWizz list a campaign sends to (single opt-in: imports are confirmed)."""
+    mw_list = client.create_list(
+        name=f"{campaign.name} #{campaign.id}{suffix}",
+        defaults={
+            "from_name": from_name,
+            "from_email": from_email,
+            "reply_to": from_email,
+            "subject": subject,
+        },
+        single_opt_in=True,
+    )
+    list_uid = mw_list.get("list_uid")
+    if not list_uid:
+        raise RuntimeError(f"MailWizz list not created for campaign {campaign.id}")
+    return list_uid
+
+
+def _import_recipients(client, list_uid: str, contacts) -> int:
+    """Import contacts into a campaign list; returns how many MailWizz accepted."""
+    from app.services.mailwizz_db import subscriber_fields
+
+    if not contacts:
+        return 0
+    results = client.create_subscribers_bulk(list_uid, [subscriber_fields(contact) for contact in contacts])
+    return sum(1 for result in results if result["success"])
+
+
+def _schedule_paced_campaign(db, campaign, allocator, contact_ids: list[int]) -> dict:
+    """
+    Reserve quota for a large campaign and queue it as hourly batches per IP.
+
+    Every IP of the plan gets its own MailWizz list and an autoresponder
+    campaign triggered on subscription, pinned to the IP's delivery server.
+    Releasing a batch imports its contacts into that list, so MailWizz
+    sends them with its unsubscribe link and header, and tracks them.
+
+    Outside the sending window the campaign is retried when it opens, so
+    that quota is always reserved on the day the batches start.
+    """
+    from collections import Counter
+    from datetime import datetime
+
+    from app.models import IP, MailwizzInstance, WarmupPlan
+    from src.domain.services.send_pacer import (
+        SendPacer,
+        build_batches,
+        hourly_send_budget,
+        next_window_open,
+    )
+    from src.infrastructure.external import MailWizzClient
+
+    now = datetime.utcnow()
+    opening = next_window_open(now)
+    if opening > now:
+        send_campaign_task.apply_async((campaign.id,), eta=opening)
+        return {
+            "success": True,
+            "campaign_id": campaign.id,
+            "paced": True,
+            "deferred_until": opening.isoformat(),
+        }
+
+    mailwizz = db.query(MailwizzInstance).filter_by(tenant_id=campaign.tenant_id).first()
+    if not mailwizz:
+        return {"success": False, "error": "MailWizz instance not found"}
+
+    plan = allocator.plan_campaign(campaign.tenant_id, len(contact_ids))
+    if not plan.complete:
+        return {
+            "success": False,
+            "error": f"No IPs available with sufficient quota to send {len(contact_ids)} emails",
+            "total_recipients": len(contact_ids),
+        }
+
+    try:
+        ips = {ip.id: ip for ip in db.query(IP).filter(IP.id.in_([share.ip_id for share in plan.shares]))}
+        subject, html_content, plain_content = _render_campaign_content(db, campaign)
+        from_name = f"Tenant {campaign.tenant_id}"
+        list_uids = {}
+        with MailWizzClient(
+            base_url=mailwizz.base_url,
+            public_key=mailwizz.api_public_key,
+            private_key=mailwizz.api_private_key,
+        ) as client:
+            for share in plan.shares:
+                ip = ips[share.ip_id]
+                from_email = ip.sender_email or f"contact@tenant{campaign.tenant_id}.com"
+                list_uid = _create_campaign_list(
+                    client, campaign, from_name, from_email, subject, suffix=f" {share.vmta_name}"
+                )
+                client.create_campaign(
+                    list_id=list_uid,
+                    name=f"{campaign.name} #{campaign.id} {share.vmta_name}",
+                    subject=subject,
+                    from_name=from_name,
+                    from_email=from_email,
+                    reply_to=from_email,
+                    html_content=html_content,
+                    plain_content=plain_content,
+                    campaign_type="autoresponder",
+                    options=PACED_AUTORESPONDER_OPTIONS,
+                    delivery_server_ids=[ip.mailwizz_server_id] if ip.mailwizz_server_id else None,
+                )
+                list_uids[share.ip_id] = list_uid
+    except Exception as e:
+        allocator.release(plan)
+        return {"success": False, "error": f"MailWizz setup failed: {e}"}
+
+    daily_quotas = dict(
+        db.query(WarmupPlan.ip_id, WarmupPlan.current_daily_quota)
+        .filter(WarmupPlan.ip_id.in_([share.ip_id for share in plan.shares]))
+        .all()
+    )
+    hourly_budgets = {
+        share.ip_id: hourly_send_budget(daily_quotas[share.ip_id]) if share.status == "warming" else None
+        for share in plan.shares
+    }
+    batches = build_batches(campaign.id, campaign.tenant_id, plan, contact_ids, hourly_budgets, now)
+    for batch in batches:
+        batch.list_uid = list_uids[batch.ip_id]
+
+    # Batches rolled over to later days reserve their quota when released
+    rolled_over = Counter()
+    for batch in batches:
+        if batch.quota_day is None:
+            rolled_over[batch.ip_id] += len(batch.contact_ids)
+    allocator.quota_checker.refund_quota(plan.reservation, dict(rolled_over))
+
+    if not SendPacer().schedule(batches):
+        allocator.release(plan)
+        return {"success": False, "error": "Failed to queue paced batches"}
+
+    campaign.status = "sending"
+    campaign.started_at = now
+    db.commit()
+
+    return {
+        "success": True,
+        "campaign_id": campaign.id,
+        "paced": True,
+        "total_recipients": len(contact_ids),
+        "batches": len(batches),
+        "last_release_at": datetime.utcfromtimestamp(batches[-1].release_at).isoformat(),
+        "send_plan": plan.to_dict(),
+    }
+
+
+@celery_app.task(name="src.infrastructure.background.tasks.dispatch_paced_batches_task")
+def dispatch_paced_batches_task(max_rounds: int = 10) -> dict:
+    """
+    Release due paced batches (periodic task - every minute).
+
+    Args:
+        max_rounds: Claim rounds of PACING_DISPATCH_LIMIT batches per run
+
+    Returns:
+        Dict with the number of batches released
+
+    Flow:
+        1. Atomically claim due batches from the Redis sorted set
+        2. Queue one send_paced_batch_task per batch; if queuing fails,
+           put the batches not queued back in the set
+        3. Loop while full rounds come back (backlog after downtime)
+
+    Example:
+        # Triggered by Celery Beat every minute
+        dispatch_paced_batches_task.delay()
+    """
+    from datetime import datetime
+
+    from src.domain.services.send_pacer import SendPacer
+
+    pacer = SendPacer()
+    released = 0
+    for _ in range(max_rounds):
+        batches = pacer.pop_due(datetime.utcnow(), limit=PACING_DISPATCH_LIMIT)
+        for i, batch in enumerate(batches):
+            try:
+                send_paced_batch_task.delay(batch.to_json())
+            except Exception as e:
+                # Broker unreachable: claimed batches must not be lost
+                requeued = pacer.schedule(batches[i:])
+                return {"success": False, "released": released + i, "requeued": requeued, "error": str(e)}
+        released += len(batches)
+        if len(batches) < PACING_DISPATCH_LIMIT:
+            break
+
+    return {"success": True, "released": released}
+
+
+@celery_app.task(name="src.infrastructure.background.tasks.send_paced_batch_task")
+def send_paced_batch_task(member: str) -> dict:
+    """
+    Release one paced batch through its IP (background task).
+
+    Args:
+        member: PacedBatch JSON, as stored in the pacing queue
+
+    Returns:
+        Dict with batch send results
+
+    Flow:
+        1. Skip batches of paused / cancelled campaigns (quota refunded)
+        2. Reserve quota if the batch rolled over from an earlier day;
+           push it back one hour when the IP has no quota left
+        3. Re-read the batch contacts, keeping only those still valid
+           (unsubscribed / blacklisted since the campaign was planned are skipped)
+        4. Import them into the IP's campaign list: its autoresponder
+           sends each one through the IP's delivery server, with the
+           unsubscribe link and List-Unsubscribe header
+        5. Refund the quota of skipped and failed emails, add sent ones
+           to the campaign
+
+    Example:
+        send_paced_batch_task.delay(batch.to_json())
+    """
+    from datetime import datetime, timedelta
+
+    from sqlalchemy import func
+
+    from app.database import SessionLocal
+    from app.models import IP, Campaign, Contact, MailwizzInstance
+    from src.domain.services import QuotaChecker, QuotaReservation
+    from src.domain.services.send_pacer import PacedBatch, SendPacer, next_window_open
+    from src.infrastructure.external import MailWizzClient
+
+    batch = PacedBatch.from_json(member)
+    count = len(batch.contact_ids)
+
+    db = SessionLocal()
+    quota_checker = QuotaChecker(db)
+    reservation = None
+    sent = 0
+    refunded = 0
+    try:
+        campaign = db.query(Campaign).filter_by(id=batch.campaign_id).first()
+        if not campaign or campaign.status in ("paused", "cancelled") or not batch.list_uid:
+            if batch.quota_day:
+                quota_checker.refund_quota(
+                    QuotaReservation(day=batch.quota_day, requested=count, grants={batch.ip_id: count})
+                )
+            return {"success": False, "seq": batch.seq, "error": "Campaign not sending", "skipped": count}
+
+        if batch.quota_day is None:
+            allowed, message, info = quota_checker.check_quota(batch.ip_id, count)
+            limit = info.get("daily_quota") if info.get("status") == "warming" else None
+            reservation = quota_checker.reserve_quotas([(batch.ip_id, limit)], count) if allowed else None
+            if reservation is None or not reservation.complete:
+                release_at = next_window_open(datetime.utcnow() + timedelta(hours=1))
+                SendPacer().reschedule(batch, release_at)
+                return {"success": False, "seq": batch.seq, "rescheduled_at": release_at.isoformat()}
+        else:
+            reservation = QuotaReservation(day=batch.quota_day, requested=count, grants={batch.ip_id: count})
+
+        ip = db.query(IP).filter_by(id=batch.ip_id).first()
+        mailwizz = db.query(MailwizzInstance).filter_by(tenant_id=batch.tenant_id).first()
+        if not ip or not mailwizz:
+            quota_checker.refund_quota(reservation)
+            return {"success": False, "seq": batch.seq, "error": "IP or MailWizz instance not found"}
+
+        contacts = (
+            db.query(Contact)
+            .filter(Contact.id.in_(batch.contact_ids), Contact.status == "valid")
+            .all()
+        )
+
+        skipped = count - len(contacts)
+        with MailWizzClient(
+            base_url=mailwizz.base_url,
+            public_key=mailwizz.api_public_key,
+            private_key=mailwizz.api_private_key,
+        ) as client:
+            sent = _import_recipients(client, batch.list_uid, contacts)
+        failed = len(contacts) - sent
+
+        if skipped or failed:
+            refunded = quota_checker.refund_quota(reservation, {batch.ip_id: skipped + failed})
+        _request_blacklist_checks(db, [(ip.address, sent)])
+
+        db.query(Campaign).filter_by(id=campaign.id).update(
+            {Campaign.sent_count: func.coalesce(Campaign.sent_count, 0) + sent},
+            synchronize_session=False,
+        )
+        db.commit()
+
+        return {
+            "success": True,
+            "campaign_id": batch.campaign_id,
+            "seq": batch.seq,
+            "ip_id": batch.ip_id,
+            "vmta_name": batch.vmta_name,
+            "sent": sent,
+            "skipped": skipped,
+            "failed": failed,
+        }
+
+    except Exception as e:
+        db.rollback()
+        if reservation is not None:
+            # Emails already handed to MailWizz keep their quota, and what
+            # was already refunded is not refunded twice
+            unsent = count - sent - refunded
+            quota_checker.refund_quota(reservation, {batch.ip_id: unsent})
+        return {"success": False, "seq": batch.seq, "error": str(e)}
+    finally:
+        db.close()
+
+
 @celery_app.task(name="src.infrastructure.background.tasks.advance_warmup_task")
 def advance_warmup_task() -> dict:
     """
@@ -0,0 +1,448 @@
+"""Webhook ingestion pipeline - Acknowledge now, write events in batches.
+
+Every accepted event is appended to the process journal
+(`<RETRY_QUEUE_DIR>/webhook_journal/<pid>-<segment>.jsonl`) before the
+endpoint answers 202. A journal segment is deleted once all its events are
+written; segments left by a stopped process are written at the next
+startup (recover_journal). Delivery is at least once: a crash during a
+write can replay events already written.
+"""
+
+import asyncio
+import json
+import os
+from collections import Counter, deque
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+import structlog
+from sqlalchemy import insert, or_, update
+from sqlalchemy.orm import selectinload
+
+from app.enums import ContactStatus, EventType
+
+logger = structlog.get_logger(__name__)
+
+# Events waiting for the consumer (beyond this, webhooks get 503 and are retried)
+WEBHOOK_QUEUE_MAX_SIZE = 10000
+
+# Events written per batch (one session, one commit)
+WEBHOOK_BATCH_SIZE = 500
+
+# Maximum wait for a batch to fill before writing it
+WEBHOOK_FLUSH_SECONDS = 0.5
+
+# Events that failed even when written alone, kept for inspection / replay
+WEBHOOK_DEAD_LETTER_MAX_SIZE = 1000
+
+# Events per journal segment (a segment is deleted once all its events are written)
+WEBHOOK_JOURNAL_SEGMENT_EVENTS = 10000
+
+# Contact status precedence: an event never replaces a status of higher rank
+# (a bounce arriving after an unsubscribe must not turn it into "invalid")
+STATUS_RANK = {
+    ContactStatus.INVALID.value: 1,
+    ContactStatus.UNSUBSCRIBED.value: 2,
+    ContactStatus.BLACKLISTED.value: 3,
+}
+
+# Warmup counter suffix per event type (consolidated daily by consolidate_warmup_stats_task)
+WARMUP_COUNTERS = {
+    EventType.SENT.value: "sent",
+    EventType.DELIVERED.value: "delivered",
+    EventType.BOUNCED.value: "bounced",
+    EventType.COMPLAINED.value: "complaints",
+    EventType.OPENED.value: "opens",
+    EventType.CLICKED.value: "clicks",
+}
+
+
+@dataclass
+class WebhookEvent:
+    """Validated webhook event, ready to be written."""
+
+    source: str
+    email: str
+    event_type: str
+    event_data: dict = field(default_factory=dict)
+    sending_ip: str | None = None
+    vmta: str | None = None
+    campaign_id: int | None = None
+    # New contact status (hard bounce, complaint, unsubscribe)
+    contact_status: str | None = None
+    received_at: datetime = field(default_factory=datetime.utcnow)
+
+    def to_json(self) -> str:
+        """Journal line."""
+        data = asdict(self)
+        data["received_at"] = self.received_at.isoformat()
+        return json.dumps(data, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, line: str) -> "WebhookEvent":
+        data = json.loads(line)
+        data["received_at"] = datetime.fromisoformat(data["received_at"])
+        return cls(**data)
+
+
+class WebhookPipeline:
+    """
+    In-process queue between the webhook endpoints and the database.
+
+    Endpoints validate the payload, submit() it and answer right away; a
+    consumer task on the same event loop drains the queue and writes each
+    batch with a handful of bulk statements (process_batch). With a
+    journal_dir, submit() journals the event first, so an event
+    acknowledged but not yet written survives a restart.
+
+    Example:
+        pipeline = get_webhook_pipeline()
+        if not pipeline.submit(event):
+            raise HTTPException(503, "Webhook queue full")
+    """
+
+    def __init__(
+        self,
+        max_queue_size: int = WEBHOOK_QUEUE_MAX_SIZE,
+        batch_size: int = WEBHOOK_BATCH_SIZE,
+        flush_seconds: float = WEBHOOK_FLUSH_SECONDS,
+        session_factory: Callable | None = None,
+        journal_dir: Path | None = None,
+    ):
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.session_factory = session_factory
+        self.journal_dir = journal_dir
+        self.stats = Counter()
+        self.dead_letters: deque[WebhookEvent] = deque(maxlen=WEBHOOK_DEAD_LETTER_MAX_SIZE)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue | None = None
+        self._consumer: asyncio.Task | None = None
+        # Journal segment being appended to, and unwritten events per segment
+        self._segment = 0
+        self._segment_size = 0
+        self._pending: Counter = Counter()
+
+    def submit(self, event: WebhookEvent) -> bool:
+        """
+        Journal and queue an event without waiting (must run on the event loop).
+
+        Returns:
+            False if the queue is full or the journal cannot be written
+            (caller should ask for a retry)
+        """
+        self._ensure_consumer()
+        if self._queue.full():
+            self.stats["rejected"] += 1
+            return False
+        segment = self._journal(event)
+        if segment is False:
+            self.stats["rejected"] += 1
+            return False
+        self._queue.put_nowait((segment, event))
+        self.stats["queued"] += 1
+        return True
+
+    # ── Journal (events acknowledged, not written yet) ───────────
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.journal_dir / f"{os.getpid()}-{segment}.jsonl"
+
+    def _journal(self, event: WebhookEvent):
+        """Append an event to the current segment; its number, None without journal, False on error."""
+        if self.journal_dir is None:
+            return None
+        if self._segment_size >= WEBHOOK_JOURNAL_SEGMENT_EVENTS:
+            self._segment += 1
+            self._segment_size = 0
+        try:
+            self.journal_dir.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self._segment_path(self._segment), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, (event.to_json() + "\n").encode())
+            finally:
+                os.close(fd)
+        except OSError as e:
+            logger.error("webhook_journal_write_failed", error=str(e))
+            return False
+        self._segment_size += 1
+        self._pending[self._segment] += 1
+        return self._segment
+
+    def _release(self, segments: Counter) -> None:
+        """Forget written events; delete the segments with nothing left to write."""
+        for segment, count in segments.items():
+            self._pending[segment] -= count
+            if self._pending[segment] > 0:
+                continue
+            del self._pending[segment]
+            if segment == self._segment:
+                # Next events go to a new segment
+                self._segment += 1
+                self._segment_size = 0
+            self._segment_path(segment).unlink(missing_ok=True)
+
+    def recover_journal(self) -> int:
+        """
+        Write the events journaled by a stopped process (call at startup).
+
+        Segments of this pid (previous process) and of dead pids are
+        written then deleted; those of other live processes are left alone.
+
+        Returns:
+            Number of events recovered
+        """
+        if self.journal_dir is None or not self.journal_dir.exists():
+            return 0
+
+        recovered = 0
+        for path in sorted(self.journal_dir.glob("*.jsonl")):
+            pid = path.stem.split("-", 1)[0]
+            if not pid.isdigit() or (int(pid) != os.getpid() and _pid_alive(int(pid))):
+                continue
+            events = []
+            with open(path) as f:
+                for line in f:
+                    try:
+                        events.append(WebhookEvent.from_json(line))
+                    except (ValueError, TypeError, KeyError):
+                        continue  # Last line cut short by the crash
+            for start in range(0, len(events), self.batch_size):
+                self._write(events[start:start + self.batch_size])
+            recovered += len(events)
+            path.unlink()
+
+        if recovered:
+            logger.warning("webhook_journal_recovered", events=recovered)
+        return recovered
+
+    def _ensure_consumer(self) -> None:
+        """Start the consumer on the running loop (again after a loop change)."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._consumer = None
+            # Events journaled on the previous loop are replayed by recover_journal
+            self._segment += 1
+            self._segment_size = 0
+            self._pending = Counter()
+        if self._consumer is None or self._consumer.done():
+            self._consumer = loop.create_task(self._consume())
+
+    async def _consume(self) -> None:
+        """Consumer loop: batch up to batch_size events or flush_seconds."""
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            deadline = self._loop.time() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except TimeoutError:
+                    break
+
+            try:
+                await asyncio.to_thread(self._write, [event for _, event in batch])
+                self._release(Counter(segment for segment, _ in batch if segment is not None))
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    def _write(self, batch: list[WebhookEvent]) -> None:
+        """
+        Write a batch; if it fails, write its events one by one.
+
+        An event that still fails on its own is dead-lettered (logged with
+        its payload and kept in dead_letters), so one bad event never
+        drops the rest of its batch.
+        """
+        try:
+            self.process_batch(batch)
+            return
+        except Exception as e:
+            if len(batch) == 1:
+                self._dead_letter(batch[0], str(e))
+                return
+            logger.warning("webhook_batch_failed", events=len(batch), error=str(e))
+
+        for event in batch:
+            try:
+                self.process_batch([event])
+            except Exception as e:
+                self._dead_letter(event, str(e))
+
+    def _dead_letter(self, event: WebhookEvent, error: str) -> None:
+        self.stats["failed"] += 1
+        self.dead_letters.append(event)
+        logger.error("webhook_event_dead_lettered", error=error, payload=asdict(event))
+
+    async def drain(self) -> None:
+        """Wait until every queued event has been written."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def stop(self) -> None:
+        """Write what is queued, then stop the consumer (application shutdown)."""
+        await self.drain()
+        if self._consumer is not None:
+            self._consumer.cancel()
+            self._consumer = None
+
+    def process_batch(self, events: list[WebhookEvent]) -> dict:
+        """
+        Write a batch of events in one transaction.
+
+        Contacts are resolved with one query (tenant taken from the sending
+        IP / VirtualMTA when known), events inserted with one multi-row
+        INSERT and status changes applied with one UPDATE per status.
+
+        Args:
+            events: Events to write
+
+        Returns:
+            Dict with written / unmatched counts
+        """
+        from app.models import IP, Contact, ContactEvent
+        from src.infrastructure.cache.segment_index import mark_contacts_changed
+
+        session_factory = self.session_factory
+        if session_factory is None:
+            from app.database import SessionLocal as session_factory
+
+        db = session_factory()
+        try:
+            addresses = {e.sending_ip for e in events if e.sending_ip}
+            vmtas = {e.vmta for e in events if e.vmta}
+            ips_by_address, ips_by_vmta = {}, {}
+            if addresses or vmtas:
+                for ip in (
+                    db.query(IP)
+                    .options(selectinload(IP.warmup_plan))
+                    .filter(or_(IP.address.in_(addresses), IP.vmta_name.in_(vmtas)))
+                ):
+                    ips_by_address[ip.address] = ip
+                    if ip.vmta_name:
+                        ips_by_vmta[ip.vmta_name] = ip
+
+            emails = {e.email for e in events}
+            contacts = {}
+            for contact_id, tenant_id, email in (
+                db.query(Contact.id, Contact.tenant_id, Contact.email)
+                .filter(Contact.email.in_(emails))
+                .order_by(Contact.id)
+            ):
+                contacts.setdefault(email, []).append((contact_id, tenant_id))
+
+            rows = []
+            statuses = {}
+            status_contacts = {}
+            warmup = Counter()
+            unmatched = 0
+            for event in events:
+                ip = ips_by_address.get(event.sending_ip) or ips_by_vmta.get(event.vmta)
+                candidates = contacts.get(event.email)
+                if not candidates:
+                    unmatched += 1
+                    continue
+
+                # Same email in several tenants: the sending IP decides
+                contact_id, tenant_id = candidates[0]
+                if ip is not None and ip.tenant_id is not None:
+                    contact_id, tenant_id = next(
+                        (c for c in candidates if c[1] == ip.tenant_id), candidates[0]
+                    )
+
+                rows.append({
+                    "tenant_id": tenant_id,
+                    "contact_id": contact_id,
+                    "campaign_id": event.campaign_id,
+                    "event_type": event.event_type,
+                    "event_data": json.dumps({"source": event.source, **event.event_data}),
+                    "timestamp": event.received_at,
+                })
+                if event.contact_status and _rank(event.contact_status) >= _rank(statuses.get(contact_id)):
+                    statuses[contact_id] = event.contact_status
+                    status_contacts[contact_id] = tenant_id
+
+                suffix = WARMUP_COUNTERS.get(event.event_type)
+                if suffix and ip is not None and ip.status == "warming" and ip.warmup_plan:
+                    day = event.received_at.date().isoformat()
+                    warmup[f"warmup:ip:{ip.id}:date:{day}:{suffix}"] += 1
+
+            if rows:
+                db.execute(insert(ContactEvent), rows)
+            by_status = {}
+            for contact_id, status in statuses.items():
+                by_status.setdefault(status, []).append(contact_id)
+            for status, contact_ids in by_status.items():
+                # Never downgrade a stronger status already stored (e.g. unsubscribed -> invalid)
+                stronger = [s for s, rank in STATUS_RANK.items() if rank > _rank(status)]
+                db.execute(
+                    update(Contact)
+                    .where(Contact.id.in_(contact_ids), Contact.status.notin_(stronger))
+                    .values(status=status),
+                    execution_options={"synchronize_session": False},
+                )
+            if status_contacts:
+                mark_contacts_changed(db, [(t, c) for c, t in status_contacts.items()])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        if warmup:
+            from src.infrastructure.cache import get_cache
+
+            cache = get_cache()
+            for key, count in warmup.items():
+                cache.increment(key, count)
+
+        self.stats["written"] += len(rows)
+        self.stats["unmatched"] += unmatched
+        return {"written": len(rows), "unmatched": unmatched, "status_updates": len(statuses)}
+
+
+def _rank(status: str | None) -> int:
+    return STATUS_RANK.get(status, 0) if status else -1
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _journal_dir() -> Path:
+    from app.services import retry_queue
+
+    return retry_queue.QUEUE_DIR / "webhook_journal"
+
+
+# Global pipeline instance
+_pipeline: WebhookPipeline | None = None
+
+
+def get_webhook_pipeline() -> WebhookPipeline:
+    """
+    Get global webhook pipeline instance.
+
+    Returns:
+        WebhookPipeline instance
+    """
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = WebhookPipeline(journal_dir=_journal_dir())
+    return _pipeline
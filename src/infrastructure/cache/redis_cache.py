@@ -1,10 +1,37 @@
 """Redis cache layer for caching queries and results."""
 
 import json
+import time
 import redis
+from redis.backoff import NoBackoff
+from redis.retry import Retry
 from typing import Optional, Any
 from datetime import timedelta
 
+# Seconds to wait for Redis before giving up on a command
+REDIS_SOCKET_TIMEOUT_SECONDS = 0.5
+
+# Seconds during which Redis is skipped after a connection error
+REDIS_DOWN_BACKOFF_SECONDS = 30
+
+
+class _FailFastRedis(redis.Redis):
+    """Redis client that stops calling the server for a while after it failed."""
+
+    def __init__(self, *args, down_backoff: float = REDIS_DOWN_BACKOFF_SECONDS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.down_backoff = down_backoff
+        self._down_until = 0.0
+
+    def execute_command(self, *args, **options):
+        if time.monotonic() < self._down_until:
+            raise redis.ConnectionError("Redis marked down, retrying later")
+        try:
+            return super().execute_command(*args, **options)
+        except (redis.ConnectionError, redis.TimeoutError):
+            self._down_until = time.monotonic() + self.down_backoff
+            raise
+
 
 class RedisCache:
     """Simple Redis cache wrapper."""
@@ -18,12 +45,16 @@ class RedisCache:
             port: Redis port
             db: Redis database number (0 is for Celery, use 1 for cache)
         """
-        self.redis = redis.Redis(
+        self.redis = _FailFastRedis(
             host=host,
             port=port,
             db=db,
             decode_responses=True,
+            socket_connect_timeout=REDIS_SOCKET_TIMEOUT_SECONDS,
+            socket_timeout=REDIS_SOCKET_TIMEOUT_SECONDS,
+            retry=Retry(NoBackoff(), 0),
         )
+        self._scripts: dict[str, Any] = {}
 
     def get(self, key: str) -> Optional[Any]:
         """
@@ -50,6 +81,35 @@ class RedisCache:
             print(f"Redis GET error: {e}")
             return None
 
+    def get_many(self, keys: list[str]) -> list[Any | None]:
+        """
+        Get many values in one round trip (MGET).
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            Values in key order (None for missing keys, or all None on error)
+        """
+        if not keys:
+            return []
+        try:
+            values = self.redis.mget(keys)
+        except redis.RedisError as e:
+            print(f"Redis MGET error: {e}")
+            return [None] * len(keys)
+
+        result = []
+        for value in values:
+            if value is None:
+                result.append(None)
+                continue
+            try:
+                result.append(json.loads(value))
+            except (json.JSONDecodeError, TypeError):
+                result.append(value)
+        return result
+
     def set(
         self,
         key: str,
@@ -166,6 +226,30 @@ class RedisCache:
             print(f"Redis INCREMENT error: {e}")
             return None
 
+    def run_script(self, script: str, keys: list[str], args: list[Any]) -> Any | None:
+        """
+        Run a Lua script atomically on the server.
+
+        Scripts are registered once and then called by SHA (EVALSHA, with
+        redis-py falling back to EVAL when the server lost its script cache).
+
+        Args:
+            script: Lua source
+            keys: KEYS passed to the script
+            args: ARGV passed to the script
+
+        Returns:
+            Script result or None if error
+        """
+        try:
+            registered = self._scripts.get(script)
+            if registered is None:
+                registered = self._scripts[script] = self.redis.register_script(script)
+            return registered(keys=keys, args=args)
+        except redis.RedisError as e:
+            print(f"Redis SCRIPT error: {e}")
+            return None
+
     def flush_all(self) -> bool:
         """
         Clear entire cache database.
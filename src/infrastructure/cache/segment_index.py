@@ -0,0 +1,329 @@
+"""Segment Index Cache - per-tenant tag/status bitmaps behind SegmentEngine.
+
+Each process keeps the indexes it built in memory. After every committed
+contact write (contacts, tag links, statuses), from any process, the
+tenant's version counter in Redis is bumped and the ids of the contacts
+written are added to a change log (sorted set scored by version). An index
+behind the shared version reloads only those contacts and patches its
+bitmaps; it is rebuilt from scratch only when the log no longer reaches
+back to its version or holds more than SEGMENT_DELTA_MAX_CONTACTS changes.
+Without Redis nothing is cached and every query rebuilds.
+"""
+
+import threading
+import time
+from collections.abc import Iterable
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.models import Contact, ContactTag, Tag
+from src.domain.services.segment_engine import TagBitmap
+
+from .redis_cache import build_tenant_key, get_cache
+
+# Backstop: an index is rebuilt after this age even if no version bump was seen
+# (a bump lost while Redis was briefly unreachable)
+SEGMENT_INDEX_MAX_AGE_SECONDS = 3600
+
+# Contacts kept in each tenant's change log (oldest changes are trimmed first)
+SEGMENT_CHANGE_LOG_MAX_SIZE = 200_000
+
+# Beyond this many changed contacts, a full rebuild is cheaper than a delta
+SEGMENT_DELTA_MAX_CONTACTS = 50_000
+
+# Contact ids per IN (...) when reloading changed contacts
+SEGMENT_DELTA_QUERY_CHUNK = 5_000
+
+# Session.info keys: contacts written in the current transaction / listener installed
+_DIRTY_KEY = "segment_index_dirty"
+_LISTENING_KEY = "segment_index_listening"
+
+# Bump a tenant version and log the contacts written at that version.
+# KEYS: version, change log, log floor (highest version trimmed from the log)
+# ARGV: log max size, contact ids...
+BUMP_SCRIPT = """
+local version = redis.call('INCR', KEYS[1])
+for i = 2, #ARGV do
+    redis.call('ZADD', KEYS[2], version, ARGV[i])
+end
+local excess = redis.call('ZCARD', KEYS[2]) - tonumber(ARGV[1])
+if excess > 0 then
+    local last = redis.call('ZRANGE', KEYS[2], excess - 1, excess - 1, 'WITHSCORES')
+    redis.call('ZREMRANGEBYRANK', KEYS[2], 0, excess - 1)
+    redis.call('SET', KEYS[3], last[2])
+end
+return version
+"""
+
+# Current version and contacts changed since a version, read atomically.
+# KEYS: version, change log, log floor
+# ARGV: since version, max changes
+# Returns {version, ids} or {version} when the log cannot serve a delta.
+CHANGES_SCRIPT = """
+local version = tonumber(redis.call('GET', KEYS[1]) or '0')
+local floor = tonumber(redis.call('GET', KEYS[3]) or '0')
+if floor > tonumber(ARGV[1]) then
+    return {version}
+end
+local since = '(' .. ARGV[1]
+if redis.call('ZCOUNT', KEYS[2], since, '+inf') > tonumber(ARGV[2]) then
+    return {version}
+end
+return {version, redis.call('ZRANGEBYSCORE', KEYS[2], since, '+inf')}
+"""
+
+
+def _keys(tenant_id: int) -> list[str]:
+    return [
+        build_tenant_key(tenant_id, "segment_version"),
+        build_tenant_key(tenant_id, "segment_changes"),
+        build_tenant_key(tenant_id, "segment_changes_floor"),
+    ]
+
+
+class TenantIndex:
+    """Tag slug -> bitmap and status -> bitmap for one tenant, plus all its contact ids."""
+
+    def __init__(
+        self,
+        tags: dict[str, TagBitmap],
+        statuses: dict[str, TagBitmap],
+        contacts: TagBitmap,
+        version: int | None,
+        built_at: float | None = None,
+    ):
+        self.tags = tags
+        self.statuses = statuses
+        self.contacts = contacts
+        self.version = version
+        # Time of the last full build (deltas keep it)
+        self.built_at = time.monotonic() if built_at is None else built_at
+
+
+class SegmentIndexCache:
+    """
+    Process-local cache of tenant indexes, kept current from a shared Redis change log.
+
+    Example:
+        index = segment_indexes.get(db, tenant_id=1)
+        bloggers = index.tags.get("blogger")
+    """
+
+    def __init__(
+        self,
+        max_age_seconds: int = SEGMENT_INDEX_MAX_AGE_SECONDS,
+        delta_max_contacts: int = SEGMENT_DELTA_MAX_CONTACTS,
+    ):
+        self.max_age_seconds = max_age_seconds
+        self.delta_max_contacts = delta_max_contacts
+        self._indexes: dict[int, TenantIndex] = {}
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, tenant_id: int) -> TenantIndex:
+        """
+        Current index of a tenant: patched with the contacts changed since
+        its version, or rebuilt when no delta is available.
+
+        Args:
+            db: Session used to load contacts
+            tenant_id: Tenant ID
+
+        Returns:
+            TenantIndex (read-only for callers)
+        """
+        version = self.version(tenant_id)
+        index = self._indexes.get(tenant_id)
+        if (
+            index is not None
+            and version is not None
+            and index.version is not None
+            and time.monotonic() - index.built_at < self.max_age_seconds
+        ):
+            if index.version == version:
+                return index
+            changes = self.changes_since(tenant_id, index.version)
+            if changes is not None:
+                version, contact_ids = changes
+                index = apply_changes(db, tenant_id, index, contact_ids, version)
+                return self._store(tenant_id, index)
+
+        index = build_index(db, tenant_id, version)
+        if version is None:
+            return index
+        return self._store(tenant_id, index)
+
+    def version(self, tenant_id: int) -> int | None:
+        """Shared index version of a tenant (0 if never bumped, None if Redis is down)."""
+        # INCRBY 0 reads the counter, creating it at 0, and returns None on error
+        return get_cache().increment(_keys(tenant_id)[0], 0)
+
+    def changes_since(self, tenant_id: int, version: int) -> tuple[int, list[int]] | None:
+        """
+        Current version and the contacts changed after `version`.
+
+        Returns:
+            None when Redis is down, the log was trimmed past `version`, or
+            more than delta_max_contacts contacts changed
+        """
+        result = get_cache().run_script(
+            CHANGES_SCRIPT, _keys(tenant_id), [version, self.delta_max_contacts]
+        )
+        if not result or len(result) < 2:
+            return None
+        return int(result[0]), [int(contact_id) for contact_id in result[1]]
+
+    def clear(self) -> None:
+        """Drop every index of this process."""
+        with self._lock:
+            self._indexes.clear()
+
+    def _store(self, tenant_id: int, index: TenantIndex) -> TenantIndex:
+        with self._lock:
+            current = self._indexes.get(tenant_id)
+            # A concurrent caller may already have stored a newer index
+            if current is None or current.version is None or current.version <= index.version:
+                self._indexes[tenant_id] = index
+        return index
+
+
+def build_index(db: Session, tenant_id: int, version: int | None = None) -> TenantIndex:
+    """Load every tag link and contact (id, status) of a tenant (two streamed queries)."""
+    tags: dict[str, TagBitmap] = {}
+    links = db.execute(
+        select(ContactTag.contact_id, Tag.slug)
+        .join(Tag, Tag.id == ContactTag.tag_id)
+        .where(Tag.tenant_id == tenant_id)
+        .execution_options(yield_per=10_000)
+    )
+    for contact_id, slug in links:
+        bitmap = tags.get(slug)
+        if bitmap is None:
+            bitmap = tags[slug] = TagBitmap()
+        bitmap.add(contact_id)
+
+    statuses: dict[str, TagBitmap] = {}
+    contacts = TagBitmap()
+    rows = db.execute(
+        select(Contact.id, Contact.status)
+        .where(Contact.tenant_id == tenant_id)
+        .execution_options(yield_per=10_000)
+    )
+    for contact_id, status in rows:
+        contacts.add(contact_id)
+        bitmap = statuses.get(status)
+        if bitmap is None:
+            bitmap = statuses[status] = TagBitmap()
+        bitmap.add(contact_id)
+
+    return TenantIndex(tags, statuses, contacts, version)
+
+
+def apply_changes(
+    db: Session,
+    tenant_id: int,
+    index: TenantIndex,
+    contact_ids: list[int],
+    version: int,
+) -> TenantIndex:
+    """
+    New index with the current rows of `contact_ids` (deleted ones dropped).
+
+    Only the changed contacts are queried. Bitmaps they do not touch are
+    shared with `index`, which is left unchanged for concurrent readers.
+    """
+    changed = TagBitmap.from_ids(contact_ids)
+    present = TagBitmap()
+    tags: dict[str, TagBitmap] = {}
+    statuses: dict[str, TagBitmap] = {}
+
+    for start in range(0, len(contact_ids), SEGMENT_DELTA_QUERY_CHUNK):
+        chunk = contact_ids[start:start + SEGMENT_DELTA_QUERY_CHUNK]
+        rows = db.execute(
+            select(Contact.id, Contact.status)
+            .where(Contact.tenant_id == tenant_id, Contact.id.in_(chunk))
+        )
+        for contact_id, status in rows:
+            present.add(contact_id)
+            statuses.setdefault(status, TagBitmap()).add(contact_id)
+        links = db.execute(
+            select(ContactTag.contact_id, Tag.slug)
+            .join(Tag, Tag.id == ContactTag.tag_id)
+            .where(Tag.tenant_id == tenant_id, ContactTag.contact_id.in_(chunk))
+        )
+        for contact_id, slug in links:
+            tags.setdefault(slug, TagBitmap()).add(contact_id)
+
+    return TenantIndex(
+        _patch(index.tags, changed, tags),
+        _patch(index.statuses, changed, statuses),
+        (index.contacts - changed) | present,
+        version,
+        built_at=index.built_at,
+    )
+
+
+def _patch(
+    bitmaps: dict[str, TagBitmap],
+    changed: TagBitmap,
+    added: dict[str, TagBitmap],
+) -> dict[str, TagBitmap]:
+    """Remove `changed` from every bitmap and add the reloaded ids back."""
+    patched: dict[str, TagBitmap] = {}
+    for key in bitmaps.keys() | added.keys():
+        bitmap = bitmaps.get(key)
+        if bitmap is not None and key not in added and not len(bitmap & changed):
+            patched[key] = bitmap  # untouched: shared with the previous index
+            continue
+        bitmap = bitmap - changed if bitmap is not None else TagBitmap()
+        if key in added:
+            bitmap = bitmap | added[key]
+        if len(bitmap):
+            patched[key] = bitmap
+    return patched
+
+
+def mark_contacts_changed(db: Session, contacts: Iterable[tuple[int, int]]) -> None:
+    """
+    Log contact writes for the segment indexes once `db` commits.
+
+    Call from every write to contacts, their tags or their status. The
+    log entry is written after the commit, so no process can patch an
+    index from rows older than the version it is stored under. Nothing is
+    logged if the session rolls back and never commits.
+
+    Args:
+        db: Session carrying the write
+        contacts: (tenant_id, contact_id) pairs written
+    """
+    dirty = db.info.setdefault(_DIRTY_KEY, {})
+    for tenant_id, contact_id in contacts:
+        dirty.setdefault(tenant_id, set()).add(contact_id)
+    if not db.info.get(_LISTENING_KEY):
+        # Listeners on this session only (not on the Session class)
+        event.listen(db, "after_commit", _bump_versions)
+        event.listen(db, "after_rollback", _forget_changes)
+        db.info[_LISTENING_KEY] = True
+
+
+def bump_versions(changes: dict[int, Iterable[int]]) -> None:
+    """Log changed contacts per tenant and move the tenants' shared versions."""
+    cache = get_cache()
+    for tenant_id, contact_ids in changes.items():
+        cache.run_script(
+            BUMP_SCRIPT, _keys(tenant_id), [SEGMENT_CHANGE_LOG_MAX_SIZE, *sorted(contact_ids)]
+        )
+
+
+def _bump_versions(session: Session) -> None:
+    changes = session.info.pop(_DIRTY_KEY, None)
+    if changes:
+        bump_versions(changes)
+
+
+def _forget_changes(session: Session) -> None:
+    session.info.pop(_DIRTY_KEY, None)
+
+
+# Shared by every SegmentEngine of the process
+segment_indexes = SegmentIndexCache()
@@ -1,6 +1,6 @@
 """External services - MailWizz, PowerMTA, etc."""
 
-from .mailwizz_client import MailWizzClient
+from .mailwizz_client import AsyncMailWizzClient, MailWizzClient
 from .powermta_config_generator import PowerMTAConfigGenerator
 
-__all__ = ["MailWizzClient", "PowerMTAConfigGenerator"]
+__all__ = ["AsyncMailWizzClient", "MailWizzClient", "PowerMTAConfigGenerator"]
@@ -1,17 +1,93 @@
 """MailWizz API Client - Enhanced version."""
 
-import requests
+import asyncio
 from typing import Optional
 
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Keep-alive connections kept open per client
+DEFAULT_POOL_SIZE = 10
+# Retries on connection errors and on RETRY_STATUSES (idempotent methods only)
+DEFAULT_MAX_RETRIES = 3
+# Exponential backoff between retries: factor * 2 ** (retry - 1) seconds
+DEFAULT_BACKOFF_FACTOR = 0.5
+DEFAULT_TIMEOUT = 30
+RETRY_STATUSES = (429, 502, 503, 504)
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+# Subscribers sent per bulk import call
+BULK_CHUNK_SIZE = 1000
+BULK_MAX_CHUNK_SIZE = 10000
+
+
+def _chunks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _bulk_chunk_size(chunk_size: int | None) -> int:
+    size = chunk_size or BULK_CHUNK_SIZE
+    if not 1 <= size <= BULK_MAX_CHUNK_SIZE:
+        raise ValueError(f"chunk_size must be between 1 and {BULK_MAX_CHUNK_SIZE}")
+    return size
+
+
+def _bulk_results(subscribers: list[dict], response: dict) -> list[dict]:
+    """
+    Per-subscriber results of one bulk call, in input order.
+
+    MailWizz answers with one record per submitted subscriber, positionally:
+    {"status": "success", "data": {"record": {"subscriber_uid": ...}}} or
+    {"status": "error", "error": "..."}.
+    """
+    records = response.get("data", {}).get("records", [])
+    results = []
+    for i, subscriber in enumerate(subscribers):
+        record = records[i] if i < len(records) else {"status": "error", "error": "Missing in bulk response"}
+        data = record.get("data") or {}
+        uid = (data.get("record") or data).get("subscriber_uid")
+        success = record.get("status") == "success" and uid is not None
+        results.append({
+            "email": subscriber.get("EMAIL"),
+            "success": success,
+            "subscriber_uid": uid if success else None,
+            "error": None if success else str(record.get("error") or "Bulk import failed"),
+        })
+    return results
+
+
+def _failed_chunk(subscribers: list[dict], error: Exception) -> list[dict]:
+    return [
+        {"email": s.get("EMAIL"), "success": False, "subscriber_uid": None, "error": str(error)}
+        for s in subscribers
+    ]
+
 
 class MailWizzClient:
     """
     MailWizz API Client for subscriber and campaign management.
 
+    Requests go through one pooled keep-alive Session per client, with
+    retries and exponential backoff on connection errors and on 429/5xx
+    gateway statuses (status retries for idempotent methods only, so a
+    POST is never replayed once MailWizz has received it).
+
     Docs: https://api-docs.mailwizz.com/
     """
 
-    def __init__(self, base_url: str, public_key: str, private_key: str):
+    def __init__(
+        self,
+        base_url: str,
+        public_key: str,
+        private_key: str,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
         """
         Initialize MailWizz client.
 
@@ -19,10 +95,42 @@ class MailWizzClient:
             base_url: MailWizz instance URL (e.g., https://mailwizz.sos-holidays.com)
             public_key: API public key
             private_key: API private key
+            pool_size: Keep-alive connections kept open
+            max_retries: Retries on connection errors / retryable statuses
+            backoff_factor: Exponential backoff factor between retries (seconds)
+            timeout: Per-request timeout (seconds)
         """
         self.base_url = base_url.rstrip("/")
         self.public_key = public_key
         self.private_key = private_key
+        self.timeout = timeout
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=IDEMPOTENT_METHODS,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "X-MW-PUBLIC-KEY": self.public_key,
+            "X-MW-PRIVATE-KEY": self.private_key,
+        })
+
+    def close(self) -> None:
+        """Close pooled connections."""
+        self.session.close()
+
+    def __enter__(self) -> "MailWizzClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
 
     def _request(self, method: str, endpoint: str, data: Optional[dict] = None) -> dict:
         """
@@ -40,17 +148,12 @@ class MailWizzClient:
             requests.HTTPError: If request fails
         """
         url = f"{self.base_url}/api{endpoint}"
-        headers = {
-            "X-MW-PUBLIC-KEY": self.public_key,
-            "X-MW-PRIVATE-KEY": self.private_key,
-        }
 
-        response = requests.request(
+        response = self.session.request(
             method=method,
             url=url,
-            headers=headers,
             json=data,
-            timeout=30,
+            timeout=self.timeout,
         )
         response.raise_for_status()
         return response.json()
@@ -69,13 +172,15 @@ class MailWizzClient:
         response = self._request("GET", "/lists")
         return response.get("data", {}).get("records", [])
 
-    def create_list(self, name: str, defaults: dict) -> dict:
+    def create_list(self, name: str, defaults: dict, single_opt_in: bool = False) -> dict:
         """
         Create new list.
 
         Args:
             name: List name
             defaults: Dict with from_name, from_email, reply_to, subject
+            single_opt_in: Subscribers added through the API are confirmed
+                right away (no confirmation email)
 
         Returns:
             Created list dict
@@ -87,8 +192,12 @@ class MailWizzClient:
             },
             "defaults": defaults,
         }
+        if single_opt_in:
+            data["general"]["opt_in"] = "single"
+            data["general"]["opt_out"] = "single"
         response = self._request("POST", "/lists", data)
-        return response.get("data", {}).get("record", {})
+        # MailWizz answers a create with the new list_uid only
+        return response.get("data", {}).get("record") or {"list_uid": response.get("list_uid")}
 
     # =========================================================================
     # SUBSCRIBERS
@@ -119,6 +228,38 @@ class MailWizzClient:
         response = self._request("POST", f"/lists/{list_id}/subscribers", subscriber)
         return response.get("data", {}).get("record", {})
 
+    def create_subscribers_bulk(
+        self,
+        list_id: str,
+        subscribers: list[dict],
+        chunk_size: int | None = None,
+    ) -> list[dict]:
+        """
+        Create many subscribers, `chunk_size` per HTTP call.
+
+        Args:
+            list_id: MailWizz list UID
+            subscribers: Subscriber dicts (same format as create_subscriber)
+            chunk_size: Subscribers per call (default BULK_CHUNK_SIZE, max BULK_MAX_CHUNK_SIZE)
+
+        Returns:
+            One {"email", "success", "subscriber_uid", "error"} dict per
+            subscriber, in input order. A failing call marks its whole chunk
+            as failed; the other chunks are still sent.
+        """
+        size = _bulk_chunk_size(chunk_size)
+        results = []
+        for chunk in _chunks(subscribers, size):
+            try:
+                response = self._request(
+                    "POST", f"/lists/{list_id}/subscribers/bulk", {"subscribers": chunk}
+                )
+            except requests.RequestException as e:
+                results.extend(_failed_chunk(chunk, e))
+                continue
+            results.extend(_bulk_results(chunk, response))
+        return results
+
     def update_subscriber(self, list_id: str, subscriber_uid: str, data: dict) -> dict:
         """
         Update subscriber.
@@ -215,6 +356,9 @@ class MailWizzClient:
         reply_to: str,
         html_content: str,
         plain_content: Optional[str] = None,
+        campaign_type: str = "regular",
+        options: dict | None = None,
+        delivery_server_ids: list[int] | None = None,
     ) -> dict:
         """
         Create campaign.
@@ -228,13 +372,16 @@ class MailWizzClient:
             reply_to: Reply-to email
             html_content: HTML content
             plain_content: Optional plain text content
+            campaign_type: "regular" or "autoresponder"
+            options: Campaign options (autoresponder_event, tracking...)
+            delivery_server_ids: Only send through these delivery servers
 
         Returns:
             Campaign dict with campaign_uid
         """
         data = {
             "name": name,
-            "type": "regular",  # or "autoresponder"
+            "type": campaign_type,
             "from_name": from_name,
             "from_email": from_email,
             "reply_to": reply_to,
@@ -248,6 +395,10 @@ class MailWizzClient:
 
         if plain_content:
             data["template"]["plain_text"] = plain_content
+        if options:
+            data["options"] = options
+        if delivery_server_ids:
+            data["delivery_servers"] = ",".join(str(server_id) for server_id in delivery_server_ids)
 
         response = self._request("POST", "/campaigns", data)
         return response.get("data", {}).get("record", {})
@@ -297,3 +448,112 @@ class MailWizzClient:
             return True
         except Exception:
             return False
+
+
+class AsyncMailWizzClient:
+    """
+    Async MailWizz API client for the API process (subscriber endpoints).
+
+    Same pooling, retry and bulk semantics as MailWizzClient, on one shared
+    httpx.AsyncClient. Use as `async with AsyncMailWizzClient(...) as client:`
+    or call `aclose()`.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        public_key: str,
+        private_key: str,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        timeout: float = DEFAULT_TIMEOUT,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.client = httpx.AsyncClient(
+            base_url=f"{self.base_url}/api",
+            headers={
+                "X-MW-PUBLIC-KEY": public_key,
+                "X-MW-PRIVATE-KEY": private_key,
+            },
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            transport=transport or httpx.AsyncHTTPTransport(retries=max_retries),
+        )
+
+    async def aclose(self) -> None:
+        """Close pooled connections."""
+        await self.client.aclose()
+
+    async def __aenter__(self) -> "AsyncMailWizzClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def _request(self, method: str, endpoint: str, data: dict | None = None) -> dict:
+        """
+        Make API request, retrying retryable statuses of idempotent methods.
+
+        Raises:
+            httpx.HTTPStatusError: If request fails
+        """
+        attempt = 0
+        while True:
+            response = await self.client.request(method, endpoint, json=data)
+            if (
+                response.status_code in RETRY_STATUSES
+                and method in IDEMPOTENT_METHODS
+                and attempt < self.max_retries
+            ):
+                attempt += 1
+                await asyncio.sleep(self.backoff_factor * 2 ** (attempt - 1))
+                continue
+            response.raise_for_status()
+            return response.json()
+
+    async def create_subscriber(self, list_id: str, subscriber: dict) -> dict:
+        """Create/update subscriber in list (see MailWizzClient.create_subscriber)."""
+        response = await self._request("POST", f"/lists/{list_id}/subscribers", subscriber)
+        return response.get("data", {}).get("record", {})
+
+    async def create_subscribers_bulk(
+        self,
+        list_id: str,
+        subscribers: list[dict],
+        chunk_size: int | None = None,
+    ) -> list[dict]:
+        """Create many subscribers (see MailWizzClient.create_subscribers_bulk)."""
+        size = _bulk_chunk_size(chunk_size)
+        results = []
+        for chunk in _chunks(subscribers, size):
+            try:
+                response = await self._request(
+                    "POST", f"/lists/{list_id}/subscribers/bulk", {"subscribers": chunk}
+                )
+            except httpx.HTTPError as e:
+                results.extend(_failed_chunk(chunk, e))
+                continue
+            results.extend(_bulk_results(chunk, response))
+        return results
+
+    async def get_subscriber(self, list_id: str, subscriber_uid: str) -> dict | None:
+        """Get subscriber by UID, or None."""
+        try:
+            response = await self._request("GET", f"/lists/{list_id}/subscribers/{subscriber_uid}")
+            return response.get("data", {}).get("record")
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                return None
+            raise
+
+    async def health_check(self) -> bool:
+        """Check if MailWizz API is reachable."""
+        try:
+            await self._request("GET", "/lists")
+            return True
+        except Exception:
+            return False
@@ -1,8 +1,11 @@
 """SQLAlchemy Contact Repository Implementation."""
 
 import json
+from datetime import datetime
 from typing import Optional
 
+from sqlalchemy import Text, and_, case, cast, exists, func, insert, or_, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
 
 from app.enums import ContactStatus as ContactStatusEnum
@@ -13,6 +16,73 @@ from app.models import Tag as TagModel
 from src.domain.entities import Contact
 from src.domain.repositories import IContactRepository
 from src.domain.value_objects import Email, Language, TagSlug
+from src.infrastructure.cache.segment_index import mark_contacts_changed
+
+# Dialects supporting multi-row INSERT ... ON CONFLICT DO UPDATE ... RETURNING.
+# SQLite (>= 3.35) shares the PostgreSQL syntax, which keeps the test suite on
+# the same code path as production.
+_UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+# Columns overwritten on conflict — mirrors _update_model (identity columns,
+# data source and creation date are never touched on update).
+_UPSERT_UPDATE_COLUMNS = (
+    "first_name",
+    "last_name",
+    "company",
+    "website",
+    "language",
+    "category",
+    "phone",
+    "country",
+    "city",
+    "linkedin_url",
+    "facebook_url",
+    "instagram_url",
+    "twitter_url",
+    "custom_fields",
+    "status",
+    "validation_status",
+    "validation_score",
+    "validation_errors",
+    "mailwizz_subscriber_id",
+    "mailwizz_list_id",
+    "last_campaign_sent_at",
+    "total_campaigns_received",
+    "updated_at",
+)
+
+# Conflict path of the upsert (row inserted by another writer after
+# find_by_emails): the merge rules of IngestContactsUseCase apply in SQL.
+# A provided profile field wins, custom fields are merged and every other
+# column (language, status, validation, MailWizz state) keeps its stored value.
+_UPSERT_MERGE_COLUMNS = (
+    "first_name",
+    "last_name",
+    "company",
+    "website",
+    "category",
+    "phone",
+    "country",
+    "city",
+    "linkedin_url",
+    "facebook_url",
+    "instagram_url",
+    "twitter_url",
+)
+
+
+def _load_json(raw: str | None, default: type) -> dict | list:
+    """Decode a JSON column (empty, invalid or wrong-typed JSON -> empty `default`)."""
+    if not raw:
+        return default()
+    try:
+        value = json.loads(raw)
+    except json.JSONDecodeError:
+        return default()
+    return value if isinstance(value, default) else default()
 
 
 class SQLAlchemyContactRepository(IContactRepository):
@@ -36,6 +106,8 @@ class SQLAlchemyContactRepository(IContactRepository):
 
         self.db.flush()
         contact.id = contact_model.id
+        self._sync_tags([contact])
+        mark_contacts_changed(self.db, [(contact.tenant_id, contact.id)])
         return contact
 
     def find_by_id(self, contact_id: int) -> Optional[Contact]:
@@ -43,7 +115,19 @@ class SQLAlchemyContactRepository(IContactRepository):
         contact_model = self.db.query(ContactModel).filter_by(id=contact_id).first()
         if not contact_model:
             return None
-        return self._to_entity(contact_model)
+        return self._to_entities([contact_model])[0]
+
+    def find_by_ids(self, contact_ids: list[int]) -> list[Contact]:
+        """Find contacts by ID in one query, by ascending id (unknown ids skipped)."""
+        if not contact_ids:
+            return []
+        contact_models = (
+            self.db.query(ContactModel)
+            .filter(ContactModel.id.in_(set(contact_ids)))
+            .order_by(ContactModel.id)
+            .all()
+        )
+        return self._to_entities(contact_models)
 
     def find_by_email(self, tenant_id: int, email: Email) -> Optional[Contact]:
         """Find contact by email (scoped to tenant)."""
@@ -54,7 +138,169 @@ class SQLAlchemyContactRepository(IContactRepository):
         )
         if not contact_model:
             return None
-        return self._to_entity(contact_model)
+        return self._to_entities([contact_model])[0]
+
+    def find_by_emails(self, keys: list[tuple[int, Email]]) -> dict[tuple[int, str], Contact]:
+        """Find contacts by (tenant_id, email) pairs in one query."""
+        pairs = list({(tenant_id, email.value) for tenant_id, email in keys})
+        if not pairs:
+            return {}
+        contact_models = (
+            self.db.query(ContactModel)
+            .filter(tuple_(ContactModel.tenant_id, ContactModel.email).in_(pairs))
+            .populate_existing()
+            .all()
+        )
+        return {(c.tenant_id, c.email.value): c for c in self._to_entities(contact_models)}
+
+    def bulk_upsert(self, contacts: list[Contact]) -> list[Contact]:
+        """
+        Insert or update many contacts with one multi-row statement.
+
+        Contacts are keyed by (tenant_id, email); when the same key appears
+        twice, the last entity wins. A row inserted by another writer since
+        the entities were read is merged, not overwritten: its status,
+        validation and MailWizz columns are kept. Runs inside a SAVEPOINT so
+        a failing batch does not poison the surrounding transaction.
+        """
+        by_key = {(c.tenant_id, c.email.value): c for c in contacts}
+        if not by_key:
+            return contacts
+
+        with self.db.begin_nested():
+            dialect = self.db.get_bind().dialect.name
+            if dialect in _UPSERT_INSERTS:
+                ids = self._upsert_on_conflict(_UPSERT_INSERTS[dialect], by_key)
+            else:
+                ids = self._upsert_by_primary_key(by_key)
+
+            for contact in contacts:
+                contact.id = ids[(contact.tenant_id, contact.email.value)]
+            self._sync_tags(list(by_key.values()))
+        mark_contacts_changed(self.db, [(c.tenant_id, c.id) for c in by_key.values()])
+
+        return contacts
+
+    def _upsert_on_conflict(self, insert_fn, by_key: dict) -> dict[tuple[int, str], int]:
+        """INSERT ... ON CONFLICT (tenant_id, email) DO UPDATE ... RETURNING id."""
+        stmt = insert_fn(ContactModel).values([self._to_row(c) for c in by_key.values()])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ContactModel.tenant_id, ContactModel.email],
+            set_=self._conflict_merge(stmt.excluded),
+        ).returning(ContactModel.id, ContactModel.tenant_id, ContactModel.email)
+        return {(row.tenant_id, row.email): row.id for row in self.db.execute(stmt)}
+
+    def _conflict_merge(self, excluded) -> dict:
+        """SET clause merging an incoming row into the stored one (see _UPSERT_MERGE_COLUMNS)."""
+        table = ContactModel.__table__.c
+        merged = {
+            column: case(
+                (or_(excluded[column].is_(None), excluded[column] == ""), table[column]),
+                else_=excluded[column],
+            )
+            for column in _UPSERT_MERGE_COLUMNS
+        }
+
+        stored = func.coalesce(table.custom_fields, "{}")
+        incoming = func.coalesce(excluded.custom_fields, "{}")
+        if self.db.get_bind().dialect.name == "postgresql":
+            merged["custom_fields"] = cast(
+                cast(stored, postgresql.JSONB).op("||")(cast(incoming, postgresql.JSONB)), Text
+            )
+        else:
+            merged["custom_fields"] = func.json_patch(stored, incoming)
+
+        merged["updated_at"] = excluded.updated_at
+        return merged
+
+    def _upsert_by_primary_key(self, by_key: dict) -> dict[tuple[int, str], int]:
+        """Fallback for dialects without ON CONFLICT: executemany INSERT + UPDATE."""
+        new_rows = [self._to_row(c) for c in by_key.values() if not c.id]
+        updated_rows = []
+        for contact in by_key.values():
+            if contact.id:
+                row = self._to_row(contact)
+                updated_rows.append(
+                    {"id": contact.id, **{col: row[col] for col in _UPSERT_UPDATE_COLUMNS}}
+                )
+
+        if new_rows:
+            self.db.execute(insert(ContactModel), new_rows)
+        if updated_rows:
+            self.db.execute(update(ContactModel), updated_rows)
+
+        rows = self.db.execute(
+            ContactModel.__table__.select()
+            .with_only_columns(ContactModel.id, ContactModel.tenant_id, ContactModel.email)
+            .where(tuple_(ContactModel.tenant_id, ContactModel.email).in_(list(by_key)))
+        )
+        return {(row.tenant_id, row.email): row.id for row in rows}
+
+    def _sync_tags(self, contacts: list[Contact]) -> None:
+        """
+        Persist the tags of many contacts (add-only: existing links are kept).
+
+        All distinct (tenant_id, slug) pairs are resolved with one SELECT,
+        missing tags are created with one multi-row INSERT, and every
+        contact-tag link is written with one multi-row INSERT skipping
+        pairs that already exist.
+        """
+        links = {(c.id, c.tenant_id, tag.value) for c in contacts for tag in c.tags}
+        if not links:
+            return
+
+        tag_ids = self._resolve_tag_ids({(tenant_id, slug) for _, tenant_id, slug in links})
+        self._insert_missing(
+            ContactTagModel,
+            [
+                {"contact_id": contact_id, "tag_id": tag_ids[(tenant_id, slug)]}
+                for contact_id, tenant_id, slug in links
+            ],
+            ("contact_id", "tag_id"),
+        )
+
+    def _resolve_tag_ids(self, keys: set[tuple[int, str]]) -> dict[tuple[int, str], int]:
+        """Map (tenant_id, slug) to tag id, creating the missing tags."""
+
+        def select_ids(pairs: list[tuple[int, str]]) -> dict[tuple[int, str], int]:
+            rows = self.db.execute(
+                TagModel.__table__.select()
+                .with_only_columns(TagModel.id, TagModel.tenant_id, TagModel.slug)
+                .where(tuple_(TagModel.tenant_id, TagModel.slug).in_(pairs))
+            )
+            return {(row.tenant_id, row.slug): row.id for row in rows}
+
+        tag_ids = select_ids(list(keys))
+        missing = keys - tag_ids.keys()
+        if missing:
+            self._insert_missing(
+                TagModel,
+                [{"tenant_id": tenant_id, "slug": slug, "label": slug} for tenant_id, slug in missing],
+                ("tenant_id", "slug"),
+            )
+            tag_ids.update(select_ids(list(missing)))
+        return tag_ids
+
+    def _insert_missing(self, model, rows: list[dict], key_columns: tuple[str, ...]) -> None:
+        """Multi-row INSERT skipping rows whose unique key already exists."""
+        if not rows:
+            return
+        dialect = self.db.get_bind().dialect.name
+        if dialect in _UPSERT_INSERTS:
+            stmt = _UPSERT_INSERTS[dialect](model).values(rows)
+            self.db.execute(stmt.on_conflict_do_nothing(index_elements=list(key_columns)))
+            return
+
+        columns = [getattr(model, column) for column in key_columns]
+        keys = [tuple(row[column] for column in key_columns) for row in rows]
+        existing = set(
+            self.db.execute(
+                model.__table__.select().with_only_columns(*columns).where(tuple_(*columns).in_(keys))
+            ).tuples()
+        )
+        rows = [row for row, key in zip(rows, keys, strict=True) if key not in existing]
+        if rows:
+            self.db.execute(insert(model), rows)
 
     def find_by_tags(
         self,
@@ -64,32 +310,129 @@ class SQLAlchemyContactRepository(IContactRepository):
         exclude_tags: Optional[list[TagSlug]] = None,
         limit: int = 100,
     ) -> list[Contact]:
-        """Find contacts by tag filters."""
+        """
+        Find contacts by tag filters.
+
+        tags_all: contact has every tag; tags_any: at least one;
+        exclude_tags: none of them. Each filter is a single subquery, so
+        rows are never duplicated whatever the number of tags.
+        """
         query = self.db.query(ContactModel).filter_by(tenant_id=tenant_id)
 
+        def tagged_with(slugs: list[str]):
+            return (
+                select(ContactTagModel.contact_id)
+                .join(TagModel, TagModel.id == ContactTagModel.tag_id)
+                .where(TagModel.tenant_id == tenant_id, TagModel.slug.in_(slugs))
+            )
+
         # Tags ALL (AND condition)
         if tags_all:
-            for tag_slug in tags_all:
-                query = query.join(ContactTagModel).join(TagModel).filter(
-                    TagModel.slug == tag_slug.value
+            slugs = list({t.value for t in tags_all})
+            query = query.filter(
+                ContactModel.id.in_(
+                    tagged_with(slugs)
+                    .group_by(ContactTagModel.contact_id)
+                    .having(func.count(TagModel.id) == len(slugs))
                 )
+            )
 
-        # Tags ANY (OR condition) - TODO: Implement properly with subquery
-        # For now, this is a simplified version
+        # Tags ANY (OR condition)
         if tags_any:
-            tag_slugs = [t.value for t in tags_any]
-            query = query.join(ContactTagModel).join(TagModel).filter(
-                TagModel.slug.in_(tag_slugs)
+            query = query.filter(
+                exists(
+                    tagged_with([t.value for t in tags_any]).where(
+                        ContactTagModel.contact_id == ContactModel.id
+                    )
+                )
             )
 
         # Exclude tags
         if exclude_tags:
-            # TODO: Implement exclude properly with NOT IN subquery
-            pass
+            query = query.filter(
+                ~exists(
+                    tagged_with([t.value for t in exclude_tags]).where(
+                        ContactTagModel.contact_id == ContactModel.id
+                    )
+                )
+            )
 
         # Limit and execute
-        contact_models = query.limit(limit).all()
-        return [self._to_entity(cm) for cm in contact_models]
+        contact_models = query.order_by(ContactModel.id).limit(limit).all()
+        return self._to_entities(contact_models)
+
+    def list_page(
+        self,
+        tenant_id: int,
+        limit: int = 100,
+        order_by: str = "id",
+        after: int | tuple[datetime, int] | None = None,
+    ) -> list[Contact]:
+        """
+        List one keyset page of a tenant's contacts.
+
+        Pages seek past the last key seen instead of using OFFSET, so every
+        page costs the same. Tags of the whole page are loaded with one
+        extra query.
+        """
+        query = self.db.query(ContactModel).filter(ContactModel.tenant_id == tenant_id)
+
+        if order_by == "id":
+            if after is not None:
+                query = query.filter(ContactModel.id > after)
+            query = query.order_by(ContactModel.id)
+        elif order_by == "created_at":
+            if after is not None:
+                created_at, last_id = after
+                query = query.filter(
+                    or_(
+                        ContactModel.created_at > created_at,
+                        and_(ContactModel.created_at == created_at, ContactModel.id > last_id),
+                    )
+                )
+            query = query.order_by(ContactModel.created_at, ContactModel.id)
+        else:
+            raise ValueError(f"Unsupported order_by: {order_by}")
+
+        return self._to_entities(query.limit(limit).all())
+
+    def find_pending_validation(
+        self,
+        tenant_id: int,
+        after_id: int = 0,
+        limit: int = 1000,
+    ) -> list[Contact]:
+        """Find PENDING contacts never validated, by ascending id after `after_id`."""
+        contact_models = (
+            self.db.query(ContactModel)
+            .filter(
+                ContactModel.tenant_id == tenant_id,
+                ContactModel.status == ContactStatusEnum.PENDING.value,
+                ContactModel.validation_status.is_(None),
+                ContactModel.id > after_id,
+            )
+            .order_by(ContactModel.id)
+            .limit(limit)
+            .all()
+        )
+        return self._to_entities(contact_models)
+
+    def bulk_update_validation(self, contacts: list[Contact]) -> None:
+        """Write status and validation fields with one executemany UPDATE by primary key."""
+        rows = [
+            {
+                "id": c.id,
+                "status": c.status.value,
+                "validation_status": c.validation_status.value if c.validation_status else None,
+                "validation_score": c.validation_score,
+                "validation_errors": json.dumps(c.validation_errors),
+                "updated_at": c.updated_at,
+            }
+            for c in contacts
+        ]
+        if rows:
+            self.db.execute(update(ContactModel), rows)
+            mark_contacts_changed(self.db, [(c.tenant_id, c.id) for c in contacts])
 
     def delete(self, contact_id: int) -> None:
         """Delete contact."""
@@ -97,6 +440,7 @@ class SQLAlchemyContactRepository(IContactRepository):
         if contact_model:
             self.db.delete(contact_model)
             self.db.flush()
+            mark_contacts_changed(self.db, [(contact_model.tenant_id, contact_id)])
 
     def count_by_tenant(self, tenant_id: int) -> int:
         """Count contacts for a tenant."""
@@ -106,29 +450,35 @@ class SQLAlchemyContactRepository(IContactRepository):
     # Entity <-> Model Mapping
     # =========================================================================
 
-    def _to_entity(self, model: ContactModel) -> Contact:
-        """Convert SQLAlchemy model to domain entity."""
-        # Parse tags
-        tags = []
-        for ct in model.contact_tags:
-            tags.append(TagSlug(ct.tag.slug))
-
-        # Parse custom fields
-        custom_fields = {}
-        if model.custom_fields:
-            try:
-                custom_fields = json.loads(model.custom_fields)
-            except json.JSONDecodeError:
-                custom_fields = {}
-
-        # Parse validation errors
-        validation_errors = []
-        if model.validation_errors:
-            try:
-                validation_errors = json.loads(model.validation_errors)
-            except json.JSONDecodeError:
-                validation_errors = []
+    def _to_entities(self, models: list[ContactModel]) -> list[Contact]:
+        """
+        Convert a batch of models to entities.
+
+        Tags of the whole batch are fetched with one IN query (instead of
+        lazy-loading contact_tags then tag per contact), and JSON columns
+        are decoded on first access only.
+        """
+        if not models:
+            return []
+
+        slugs: dict[str, TagSlug] = {}
+        tags_by_contact: dict[int, list[TagSlug]] = {}
+        rows = self.db.execute(
+            select(ContactTagModel.contact_id, TagModel.slug)
+            .join(TagModel, TagModel.id == ContactTagModel.tag_id)
+            .where(ContactTagModel.contact_id.in_([m.id for m in models]))
+            .order_by(ContactTagModel.id)
+        )
+        for contact_id, slug in rows:
+            tag = slugs.get(slug)
+            if tag is None:
+                tag = slugs[slug] = TagSlug(slug)
+            tags_by_contact.setdefault(contact_id, []).append(tag)
+
+        return [self._to_entity(m, tags_by_contact.get(m.id, [])) for m in models]
 
+    def _to_entity(self, model: ContactModel, tags: list[TagSlug]) -> Contact:
+        """Convert SQLAlchemy model to domain entity (tags resolved by _to_entities)."""
         return Contact(
             id=model.id,
             tenant_id=model.tenant_id,
@@ -147,13 +497,13 @@ class SQLAlchemyContactRepository(IContactRepository):
             facebook_url=model.facebook_url,
             instagram_url=model.instagram_url,
             twitter_url=model.twitter_url,
-            custom_fields=custom_fields,
+            custom_fields=_load_json(model.custom_fields, dict),
             status=ContactStatusEnum(model.status),
             validation_status=ValidationStatusEnum(model.validation_status)
             if model.validation_status
             else None,
             validation_score=model.validation_score,
-            validation_errors=validation_errors,
+            validation_errors=_load_json(model.validation_errors, list),
             tags=tags,
             mailwizz_subscriber_id=model.mailwizz_subscriber_id,
             mailwizz_list_id=model.mailwizz_list_id,
@@ -165,35 +515,39 @@ class SQLAlchemyContactRepository(IContactRepository):
 
     def _to_model(self, entity: Contact) -> ContactModel:
         """Convert domain entity to SQLAlchemy model."""
-        return ContactModel(
-            tenant_id=entity.tenant_id,
-            data_source_id=entity.data_source_id,
-            email=entity.email.value,
-            first_name=entity.first_name,
-            last_name=entity.last_name,
-            company=entity.company,
-            website=entity.website,
-            language=entity.language.code,
-            category=entity.category,
-            phone=entity.phone,
-            country=entity.country,
-            city=entity.city,
-            linkedin_url=entity.linkedin_url,
-            facebook_url=entity.facebook_url,
-            instagram_url=entity.instagram_url,
-            twitter_url=entity.twitter_url,
-            custom_fields=json.dumps(entity.custom_fields),
-            status=entity.status.value,
-            validation_status=entity.validation_status.value if entity.validation_status else None,
-            validation_score=entity.validation_score,
-            validation_errors=json.dumps(entity.validation_errors),
-            mailwizz_subscriber_id=entity.mailwizz_subscriber_id,
-            mailwizz_list_id=entity.mailwizz_list_id,
-            last_campaign_sent_at=entity.last_campaign_sent_at,
-            total_campaigns_received=entity.total_campaigns_received,
-            created_at=entity.created_at,
-            updated_at=entity.updated_at,
-        )
+        return ContactModel(**self._to_row(entity))
+
+    def _to_row(self, entity: Contact) -> dict:
+        """Convert domain entity to a column dict (for Core bulk statements)."""
+        return {
+            "tenant_id": entity.tenant_id,
+            "data_source_id": entity.data_source_id,
+            "email": entity.email.value,
+            "first_name": entity.first_name,
+            "last_name": entity.last_name,
+            "company": entity.company,
+            "website": entity.website,
+            "language": entity.language.code,
+            "category": entity.category,
+            "phone": entity.phone,
+            "country": entity.country,
+            "city": entity.city,
+            "linkedin_url": entity.linkedin_url,
+            "facebook_url": entity.facebook_url,
+            "instagram_url": entity.instagram_url,
+            "twitter_url": entity.twitter_url,
+            "custom_fields": json.dumps(entity.custom_fields),
+            "status": entity.status.value,
+            "validation_status": entity.validation_status.value if entity.validation_status else None,
+            "validation_score": entity.validation_score,
+            "validation_errors": json.dumps(entity.validation_errors),
+            "mailwizz_subscriber_id": entity.mailwizz_subscriber_id,
+            "mailwizz_list_id": entity.mailwizz_list_id,
+            "last_campaign_sent_at": entity.last_campaign_sent_at,
+            "total_campaigns_received": entity.total_campaigns_received,
+            "created_at": entity.created_at,
+            "updated_at": entity.updated_at,
+        }
 
     def _update_model(self, model: ContactModel, entity: Contact) -> None:
         """Update SQLAlchemy model from domain entity."""
@@ -1,6 +1,6 @@
 """Simple API Key authentication for internal tool."""
 
-from fastapi import Header, HTTPException, status
+from fastapi import Header, HTTPException, Request, status
 
 
 def verify_api_key(x_api_key: str = Header(..., description="API Key for internal authentication")):
@@ -38,3 +38,18 @@ def verify_api_key(x_api_key: str = Header(..., description="API Key for interna
 def no_auth():
     """No authentication - for internal tools behind firewall."""
     return None
+
+
+async def verify_webhook_signature(request: Request) -> bytes:
+    """
+    Check the HMAC-SHA256 signature of a webhook body (X-Webhook-Signature).
+
+    Same secret, scheme and IP whitelist as the v1 PowerMTA webhooks; a batch
+    is signed once as a whole.
+
+    Returns:
+        Raw request body
+    """
+    from app.api.routes.webhooks import _validate_webhook_request
+
+    return await _validate_webhook_request(request)
@@ -1,21 +1,46 @@
 """Contacts API v2 - Enterprise endpoints."""
 
-from typing import List, Optional
-
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+import base64
+import csv
+import json
+from collections.abc import AsyncIterator, Iterator
+from datetime import datetime
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.types import Receive, Scope, Send
 
 from app.database import get_db
+from app.enums import ContactStatus
 from src.application.use_cases import IngestContactsUseCase
 from src.application.use_cases.ingest_contacts import (
     IngestContactDTO,
     IngestContactsResult,
 )
+from src.domain.entities import Contact
+from src.domain.services import SegmentEngine
+from src.domain.value_objects import TagSlug
 from src.infrastructure.persistence import SQLAlchemyContactRepository
 
 router = APIRouter()
 
+# Contacts buffered per chunk on the streaming endpoint (one upsert + one commit each)
+STREAM_CHUNK_SIZE = 1000
+# Separator for multiple tags in a CSV "tags" column
+CSV_TAG_SEPARATOR = "|"
+# Longest CSV record (characters); bounds the buffer behind an unbalanced quote
+CSV_MAX_RECORD_CHARS = 64 * 1024
+# Longest line of a streamed upload (bytes); beyond it the upload is rejected with 413
+STREAM_MAX_LINE_BYTES = 1024 * 1024
+# Contacts fetched per keyset page by the NDJSON export
+EXPORT_PAGE_SIZE = 1000
+
+ContactOrder = Literal["id", "created_at"]
+
 
 # =============================================================================
 # Request/Response Schemas
@@ -76,6 +101,25 @@ class ContactResponse(BaseModel):
     tags: List[str]
 
 
+class SegmentRequest(BaseModel):
+    """Request schema for a tag segment (same filters as campaigns)."""
+
+    tags_all: list[str] | None = None
+    tags_any: list[str] | None = None
+    exclude_tags: list[str] | None = None
+    statuses: list[ContactStatus] | None = None
+    limit: int = Field(100, ge=0, le=10_000)
+    after_id: int = 0
+
+
+class SegmentResponse(BaseModel):
+    """Response schema for a tag segment."""
+
+    count: int
+    contact_ids: list[int]
+    next_after_id: int | None
+
+
 # =============================================================================
 # Endpoints
 # =============================================================================
@@ -99,29 +143,7 @@ def ingest_contacts(
     """
     try:
         # 1. Map request to DTOs
-        contact_dtos = [
-            IngestContactDTO(
-                tenant_id=c.tenant_id,
-                data_source_id=c.data_source_id,
-                email=c.email,
-                first_name=c.first_name,
-                last_name=c.last_name,
-                company=c.company,
-                website=c.website,
-                language=c.language,
-                category=c.category,
-                phone=c.phone,
-                country=c.country,
-                city=c.city,
-                linkedin_url=c.linkedin_url,
-                facebook_url=c.facebook_url,
-                instagram_url=c.instagram_url,
-                twitter_url=c.twitter_url,
-                custom_fields=c.custom_fields,
-                tags=c.tags,
-            )
-            for c in request.contacts
-        ]
+        contact_dtos = [_to_dto(c) for c in request.contacts]
 
         # 2. Create repository and use case (Dependency Injection)
         contact_repo = SQLAlchemyContactRepository(db)
@@ -148,42 +170,432 @@ def ingest_contacts(
         raise HTTPException(status_code=500, detail=f"Ingestion failed: {str(e)}")
 
 
+# =============================================================================
+# Streaming ingestion helpers
+# =============================================================================
+
+
+def _to_dto(c: IngestContactRequest) -> IngestContactDTO:
+    """Map a validated request row to the use case DTO."""
+    return IngestContactDTO(
+        tenant_id=c.tenant_id,
+        data_source_id=c.data_source_id,
+        email=c.email,
+        first_name=c.first_name,
+        last_name=c.last_name,
+        company=c.company,
+        website=c.website,
+        language=c.language,
+        category=c.category,
+        phone=c.phone,
+        country=c.country,
+        city=c.city,
+        linkedin_url=c.linkedin_url,
+        facebook_url=c.facebook_url,
+        instagram_url=c.instagram_url,
+        twitter_url=c.twitter_url,
+        custom_fields=c.custom_fields,
+        tags=c.tags,
+    )
+
+
+def _line_too_long() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Line longer than {STREAM_MAX_LINE_BYTES} bytes",
+    )
+
+
+async def _iter_lines(body: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Split the raw request stream into text lines.
+
+    Only the newly received bytes are searched for newlines; the partial
+    line held between chunks never exceeds STREAM_MAX_LINE_BYTES (413).
+    """
+    pending: list[bytes] = []
+    size = 0
+    async for data in body:
+        start = 0
+        while (end := data.find(b"\n", start)) != -1:
+            if size + end - start > STREAM_MAX_LINE_BYTES:
+                raise _line_too_long()
+            line = b"".join([*pending, data[start:end]])
+            pending, size = [], 0
+            yield line.decode("utf-8", errors="replace").rstrip("\r")
+            start = end + 1
+        if start < len(data):
+            pending.append(data[start:])
+            size += len(data) - start
+            if size > STREAM_MAX_LINE_BYTES:
+                raise _line_too_long()
+    if pending:
+        yield b"".join(pending).decode("utf-8", errors="replace").rstrip("\r")
+
+
+async def _iter_ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[dict | str]:
+    """Yield one dict per NDJSON line (or an error string for malformed lines)."""
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield f"Line {line_no}: invalid JSON ({e.msg})"
+            continue
+        if not isinstance(record, dict):
+            yield f"Line {line_no}: expected a JSON object"
+            continue
+        yield record
+
+
+async def _iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[dict | str]:
+    """
+    Yield one dict per CSV row, keyed by the header line.
+
+    Quoted fields spanning several lines are buffered until their quotes
+    balance; a record longer than CSV_MAX_RECORD_CHARS (typically an
+    unbalanced quote) is rejected with an error and parsing resumes on the
+    next line. Known columns map to contact fields, "tags" is split on
+    CSV_TAG_SEPARATOR and any other column goes to custom_fields.
+    """
+    header: list[str] | None = None
+    buffered: list[str] = []
+    quotes = size = 0
+    line_no = 0
+    known = set(IngestContactRequest.model_fields) - {"custom_fields", "tags"}
+
+    async for line in lines:
+        line_no += 1
+        buffered.append(line)
+        quotes += line.count('"')
+        size += len(line) + 1
+        if quotes % 2:
+            if size > CSV_MAX_RECORD_CHARS:
+                yield (
+                    f"Line {line_no - len(buffered) + 1}: CSV record longer than "
+                    f"{CSV_MAX_RECORD_CHARS} characters (unbalanced quote?)"
+                )
+                buffered, quotes, size = [], 0, 0
+            continue  # open quoted field, wait for the rest of the record
+        text = "\n".join(buffered)
+        buffered, quotes, size = [], 0, 0
+        if not text.strip():
+            continue
+
+        row = next(csv.reader([text]))
+        if header is None:
+            header = [column.strip() for column in row]
+            continue
+
+        record: dict = {}
+        custom_fields: dict = {}
+        for column, value in zip(header, row, strict=False):
+            value = value.strip()
+            if not value:
+                continue
+            if column == "tags":
+                record["tags"] = [t.strip() for t in value.split(CSV_TAG_SEPARATOR) if t.strip()]
+            elif column in known:
+                record[column] = value
+            else:
+                custom_fields[column] = value
+        if custom_fields:
+            record["custom_fields"] = custom_fields
+        yield record
+
+    if buffered:
+        yield f"Line {line_no - len(buffered) + 1}: unterminated quoted field at end of upload"
+
+
+class _RequestStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body iterator consumes the request body itself.
+
+    The stock response listens for `http.disconnect` concurrently, which
+    would steal the `http.request` messages the iterator is reading. A client
+    disconnect still surfaces through `request.stream()` (ClientDisconnect).
+
+    The status line is only sent with the first body line: an HTTPException
+    raised before it becomes a plain JSON error response.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        body = self.body_iterator
+        try:
+            first = await anext(body)
+        except HTTPException as exc:
+            await JSONResponse({"detail": exc.detail}, status_code=exc.status_code)(scope, receive, send)
+            return
+        except StopAsyncIteration:
+            first = None
+
+        async def resumed() -> AsyncIterator:
+            if first is not None:
+                yield first
+            async for chunk in body:
+                yield chunk
+
+        self.body_iterator = resumed()
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+def _ingest_chunk(db: Session, dtos: list[IngestContactDTO]) -> IngestContactsResult:
+    """Run the ingestion use case on one chunk and commit it."""
+    use_case = IngestContactsUseCase(SQLAlchemyContactRepository(db))
+    try:
+        result = use_case.execute(dtos)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return result
+
+
+# =============================================================================
+# Endpoints
+# =============================================================================
+
+
+@router.post("/ingest/stream")
+async def ingest_contacts_stream(
+    request: Request,
+    tenant_id: int | None = None,
+    data_source_id: int | None = None,
+    chunk_size: int = Query(STREAM_CHUNK_SIZE, ge=1, le=10_000),
+    db: Session = Depends(get_db),
+):
+    """
+    Stream-ingest contacts from an NDJSON or CSV request body.
+
+    - Content-Type `text/csv`: header line + one contact per row
+    - anything else: NDJSON, one contact object per line
+
+    `tenant_id` / `data_source_id` query parameters are used for rows that
+    do not carry them. The body is read incrementally and committed every
+    `chunk_size` contacts, so memory stays bounded whatever the upload size.
+    The response is NDJSON: one progress line per chunk, then a summary line.
+    A line longer than STREAM_MAX_LINE_BYTES answers 413, or, once progress
+    lines were sent, ends the stream with a `"done": false` line.
+    """
+    is_csv = "csv" in request.headers.get("content-type", "")
+    parse_records = _iter_csv_records if is_csv else _iter_ndjson_records
+    defaults = {
+        key: value
+        for key, value in (("tenant_id", tenant_id), ("data_source_id", data_source_id))
+        if value is not None
+    }
+
+    async def progress() -> AsyncIterator[str]:
+        totals = {
+            "total_processed": 0,
+            "new_contacts": 0,
+            "updated_contacts": 0,
+            "duplicates_skipped": 0,
+            "errors": 0,
+        }
+        chunk_no = 0
+        dtos: list[IngestContactDTO] = []
+        errors: list[str] = []
+
+        async def flush() -> str:
+            nonlocal chunk_no, dtos, errors
+            chunk_no += 1
+            line = {"chunk": chunk_no, "received": len(dtos) + len(errors)}
+            try:
+                result = await run_in_threadpool(_ingest_chunk, db, dtos) if dtos else None
+            except Exception as e:
+                errors.append(f"Chunk {chunk_no} failed: {str(e)}")
+                result = None
+            if result:
+                errors.extend(result.errors)
+                for key in ("total_processed", "new_contacts", "updated_contacts", "duplicates_skipped"):
+                    line[key] = getattr(result, key)
+                    totals[key] += line[key]
+            line["errors"] = errors
+            totals["errors"] += len(errors)
+            dtos, errors = [], []
+            return json.dumps(line) + "\n"
+
+        row_no = 0
+        try:
+            async for record in parse_records(_iter_lines(request.stream())):
+                row_no += 1
+                if isinstance(record, str):
+                    errors.append(record)
+                else:
+                    try:
+                        dtos.append(_to_dto(IngestContactRequest(**{**defaults, **record})))
+                    except ValidationError as e:
+                        fields = ", ".join(".".join(map(str, err["loc"])) for err in e.errors())
+                        errors.append(f"Row {row_no}: invalid or missing fields ({fields})")
+                if len(dtos) + len(errors) >= chunk_size:
+                    yield await flush()
+        except HTTPException as e:
+            if not chunk_no:
+                raise  # Nothing committed or sent yet: plain error response
+            # Status already sent: the last line reports the abort (earlier chunks are committed)
+            yield json.dumps({
+                "done": False, "error": e.detail, "status_code": e.status_code, "chunks": chunk_no, **totals,
+            }) + "\n"
+            return
+
+        if dtos or errors:
+            yield await flush()
+
+        yield json.dumps({"done": True, "chunks": chunk_no, **totals}) + "\n"
+
+    return _RequestStreamingResponse(progress(), media_type="application/x-ndjson")
+
+
+@router.post("/{tenant_id}/segment", response_model=SegmentResponse)
+def segment_contacts(
+    tenant_id: int,
+    request: SegmentRequest,
+    db: Session = Depends(get_db),
+):
+    """
+    Count and list the contacts matching a tag expression.
+
+    Answered from the in-memory tag bitmap index: `count` is exact,
+    `contact_ids` is one page of ascending ids after `after_id`.
+    `statuses` restricts the segment to contacts in those statuses
+    (e.g. `["valid"]` for the recipients of a send).
+    """
+    try:
+        filters = {
+            name: [TagSlug.from_string(tag).value for tag in tags] if tags else None
+            for name, tags in (
+                ("tags_all", request.tags_all),
+                ("tags_any", request.tags_any),
+                ("exclude_tags", request.exclude_tags),
+            )
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        statuses = [status.value for status in request.statuses] if request.statuses else None
+        segment = SegmentEngine(db).segment(tenant_id, statuses=statuses, **filters)
+        contact_ids = segment.ids_after(request.after_id, request.limit)
+
+        return SegmentResponse(
+            count=len(segment),
+            contact_ids=contact_ids,
+            next_after_id=contact_ids[-1] if contact_ids and len(contact_ids) == request.limit else None,
+        )
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to compute segment: {str(e)}")
+
+
+# =============================================================================
+# Listing helpers
+# =============================================================================
+
+
+def _to_response(contact: Contact) -> ContactResponse:
+    return ContactResponse(
+        id=contact.id,
+        email=str(contact.email),
+        first_name=contact.first_name,
+        last_name=contact.last_name,
+        company=contact.company,
+        language=contact.language.code,
+        category=contact.category,
+        status=contact.status.value,
+        tags=[str(tag) for tag in contact.tags],
+    )
+
+
+def _page_key(contact: Contact, order_by: str):
+    """Keyset position of a contact for list_page(after=...)."""
+    return contact.id if order_by == "id" else (contact.created_at, contact.id)
+
+
+def _encode_cursor(contact: Contact, order_by: str) -> str:
+    key = {"id": contact.id}
+    if order_by == "created_at":
+        key["created_at"] = contact.created_at.isoformat()
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, order_by: str):
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if order_by == "id":
+            return int(key["id"])
+        return datetime.fromisoformat(key["created_at"]), int(key["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.get("/{tenant_id}", response_model=List[ContactResponse])
 def list_contacts(
     tenant_id: int,
-    limit: int = 100,
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: str | None = None,
+    order_by: ContactOrder = "id",
     db: Session = Depends(get_db),
 ):
     """
-    List contacts for a tenant.
+    List contacts for a tenant, one keyset page at a time.
 
     Query parameters:
     - limit: Maximum number of contacts to return (default: 100)
+    - order_by: `id` (default) or `created_at`
+    - cursor: value of the `X-Next-Cursor` header of the previous page
+
+    `X-Next-Cursor` is only set when more contacts may follow.
     """
+    after = _decode_cursor(cursor, order_by) if cursor else None
+
     try:
         contact_repo = SQLAlchemyContactRepository(db)
+        contacts = contact_repo.list_page(tenant_id, limit=limit, order_by=order_by, after=after)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to list contacts: {str(e)}")
+
+    if len(contacts) == limit:
+        response.headers["X-Next-Cursor"] = _encode_cursor(contacts[-1], order_by)
+    return [_to_response(c) for c in contacts]
+
 
-        # For now, we'll use find_by_tags with no filters to get all contacts
-        # TODO: Add proper list_all method to repository
-        contacts = contact_repo.find_by_tags(tenant_id=tenant_id, limit=limit)
-
-        return [
-            ContactResponse(
-                id=c.id,
-                email=str(c.email),
-                first_name=c.first_name,
-                last_name=c.last_name,
-                company=c.company,
-                language=c.language.code,
-                category=c.category,
-                status=c.status.value,
-                tags=[str(tag) for tag in c.tags],
+@router.get("/{tenant_id}/export")
+def export_contacts(
+    tenant_id: int,
+    order_by: ContactOrder = "id",
+    db: Session = Depends(get_db),
+):
+    """
+    Stream every contact of a tenant as NDJSON.
+
+    The tenant is walked in keyset pages of EXPORT_PAGE_SIZE and the
+    session is emptied after each page, so memory stays constant
+    whatever the tenant size.
+    """
+    contact_repo = SQLAlchemyContactRepository(db)
+
+    def lines() -> Iterator[str]:
+        after = None
+        while True:
+            page = contact_repo.list_page(
+                tenant_id, limit=EXPORT_PAGE_SIZE, order_by=order_by, after=after
             )
-            for c in contacts
-        ]
+            if not page:
+                return
+            yield "".join(_to_response(c).model_dump_json() + "\n" for c in page)
+            db.expunge_all()
+            if len(page) < EXPORT_PAGE_SIZE:
+                return
+            after = _page_key(page[-1], order_by)
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to list contacts: {str(e)}")
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 
 @router.get("/{tenant_id}/{contact_id}", response_model=ContactResponse)
@@ -200,17 +612,7 @@ def get_contact(
         if not contact or contact.tenant_id != tenant_id:
             raise HTTPException(status_code=404, detail="Contact not found")
 
-        return ContactResponse(
-            id=contact.id,
-            email=str(contact.email),
-            first_name=contact.first_name,
-            last_name=contact.last_name,
-            company=contact.company,
-            language=contact.language.code,
-            category=contact.category,
-            status=contact.status.value,
-            tags=[str(tag) for tag in contact.tags],
-        )
+        return _to_response(contact)
 
     except HTTPException:
         raise
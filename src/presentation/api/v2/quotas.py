@@ -78,14 +78,12 @@ def get_tenant_quotas(
     Returns current capacity, what's been sent today, and what remains.
     """
     try:
-        from app.models import IP
-
         checker = QuotaChecker(db)
 
-        # Get all IPs for tenant
-        ips = db.query(IP).filter_by(tenant_id=tenant_id).all()
+        # All IPs for tenant, evaluated in one pass (one query + one Redis MGET)
+        evaluations = checker.evaluate_ips(tenant_id)
 
-        if not ips:
+        if not evaluations:
             raise HTTPException(status_code=404, detail=f"No IPs found for tenant {tenant_id}")
 
         # Build response
@@ -97,9 +95,7 @@ def get_tenant_quotas(
         paused_count = 0
         has_unlimited = False
 
-        for ip in ips:
-            quota_info = checker.get_quota_info(ip.id)
-
+        for ip, _, _, quota_info in evaluations:
             if not quota_info:
                 continue
 
@@ -137,7 +133,7 @@ def get_tenant_quotas(
 
         return TenantCapacityResponse(
             tenant_id=tenant_id,
-            total_ips=len(ips),
+            total_ips=len(evaluations),
             active_ips=active_count,
             warming_ips=warming_count,
             paused_ips=paused_count,
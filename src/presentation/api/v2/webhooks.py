@@ -1,16 +1,21 @@
 """Webhooks API v2 - Handle external webhooks (MailWizz, PowerMTA, etc.)."""
 
-from typing import Optional
+from collections.abc import Callable
 from datetime import datetime
+from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Request, Header
-from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from pydantic import BaseModel, ValidationError
 
-from app.database import get_db
-from app.models import ContactEvent, Contact
-from app.enums import EventType
-from .auth import no_auth  # Simple auth for internal tool
+from app.enums import ContactStatus, EventType
+from app.services.webhook_batch import parse_batch_body
+from src.infrastructure.background.webhook_pipeline import (
+    WebhookEvent,
+    WebhookPipeline,
+    get_webhook_pipeline,
+)
+
+from .auth import no_auth, verify_webhook_signature  # Simple auth for internal tool
 
 router = APIRouter()
 
@@ -87,91 +92,146 @@ def _map_powermta_event(event: str) -> EventType:
     return mapping.get(event.lower())
 
 
-def _create_contact_event(
-    db: Session,
-    contact_id: int,
-    event_type: EventType,
-    campaign_id: Optional[int] = None,
-    metadata: Optional[dict] = None,
-) -> ContactEvent:
-    """Create a contact event."""
-    # Récupérer le contact pour obtenir le tenant_id
-    contact = db.query(Contact).filter(Contact.id == contact_id).first()
-    if not contact:
-        raise ValueError(f"Contact {contact_id} not found")
-
-    event = ContactEvent(
-        tenant_id=contact.tenant_id,
-        contact_id=contact_id,
-        campaign_id=campaign_id,
-        event_type=event_type,
-        metadata=metadata or {},
+# PowerMTA bounce categories that make an address undeliverable
+HARD_BOUNCE_CATEGORIES = ("bad-mailbox", "bad-domain", "policy-related")
+
+# Contact status after an event (hard bounces handled per source)
+EVENT_CONTACT_STATUS = {
+    EventType.COMPLAINED: ContactStatus.BLACKLISTED.value,
+    EventType.UNSUBSCRIBED: ContactStatus.UNSUBSCRIBED.value,
+}
+
+
+def _mailwizz_event(request: MailWizzWebhookRequest) -> WebhookEvent | None:
+    """Build the pipeline event for a MailWizz webhook (None if the event is unknown)."""
+    event_type = _map_mailwizz_event(request.event)
+    if not event_type:
+        return None
+
+    # Build metadata
+    metadata = {
+        "subscriber_uid": request.subscriber_uid,
+        "campaign_uid": request.campaign_uid,
+        "ip_address": request.ip_address,
+        "user_agent": request.user_agent,
+    }
+
+    if request.url:
+        metadata["url"] = request.url
+    if request.bounce_type:
+        metadata["bounce_type"] = request.bounce_type
+    if request.bounce_message:
+        metadata["bounce_message"] = request.bounce_message
+
+    # Only bounces explicitly reported as hard make the address undeliverable
+    # (soft, internal or untyped bounces leave the contact as is)
+    contact_status = EVENT_CONTACT_STATUS.get(event_type)
+    if event_type == EventType.BOUNCED and (request.bounce_type or "").lower() == "hard":
+        contact_status = ContactStatus.INVALID.value
+
+    return WebhookEvent(
+        source="mailwizz",
+        email=request.email,
+        event_type=event_type.value,
+        event_data=metadata,
+        sending_ip=request.ip_address,
+        contact_status=contact_status,
     )
-    db.add(event)
-    db.commit()
-    db.refresh(event)
-    return event
 
 
-def _track_warmup_event(
-    db: Session,
-    sending_ip: Optional[str],
-    event_type: EventType,
-) -> None:
-    """
-    Track warmup stats for IPs in warming status.
+def _powermta_event(request: PowerMTAWebhookRequest) -> WebhookEvent | None:
+    """Build the pipeline event for a PowerMTA record (None if the event is unknown)."""
+    event_type = _map_powermta_event(request.event)
+    if not event_type:
+        return None
+
+    # Build metadata
+    metadata = {
+        "vmta": request.vmta,
+        "domain": request.domain,
+        "message_id": request.message_id,
+        "smtp_response": request.smtp_response,
+        "bounce_category": request.bounce_category,
+    }
+
+    # Only hard bounces make the address undeliverable
+    contact_status = None
+    if event_type == EventType.BOUNCED and request.bounce_category in HARD_BOUNCE_CATEGORIES:
+        contact_status = ContactStatus.INVALID.value
+
+    return WebhookEvent(
+        source="powermta",
+        email=request.recipient,
+        event_type=event_type.value,
+        event_data=metadata,
+        sending_ip=request.sending_ip,
+        vmta=request.vmta,
+        contact_status=contact_status,
+    )
 
-    Increments Redis counters for daily warmup tracking.
-    These counters are consolidated to PostgreSQL daily by consolidate_warmup_stats_task.
+
+def _enqueue(pipeline: WebhookPipeline, event: WebhookEvent) -> dict:
+    """Queue an event for the batch writer and build the acknowledgement."""
+    if not pipeline.submit(event):
+        raise HTTPException(status_code=503, detail="Webhook queue full, retry later")
+    return {
+        "success": True,
+        "queued": True,
+        "message": f"Event {event.event_type} queued for {event.email}",
+    }
+
+
+def _parse_batch(body: bytes) -> list:
+    """Decode a batch body (JSON array or NDJSON), 400 if malformed or too large."""
+    try:
+        return parse_batch_body(body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _enqueue_batch(
+    pipeline: WebhookPipeline,
+    items: list,
+    schema: type[BaseModel],
+    build_event: Callable[[BaseModel], WebhookEvent | None],
+) -> dict:
+    """
+    Validate and queue each item of a batch.
 
     Args:
-        db: Database session
-        sending_ip: IP address that sent the email
-        event_type: Type of event (sent, delivered, bounced, etc.)
-
-    Redis Keys:
-        warmup:ip:{ip_id}:date:{YYYY-MM-DD}:sent
-        warmup:ip:{ip_id}:date:{YYYY-MM-DD}:delivered
-        warmup:ip:{ip_id}:date:{YYYY-MM-DD}:bounced
-        warmup:ip:{ip_id}:date:{YYYY-MM-DD}:complaints
-        warmup:ip:{ip_id}:date:{YYYY-MM-DD}:opens
-        warmup:ip:{ip_id}:date:{YYYY-MM-DD}:clicks
+        pipeline: Webhook pipeline
+        items: Decoded batch items
+        schema: Request model of one item
+        build_event: Item -> pipeline event (None if the event is unknown)
+
+    Returns:
+        Totals and one result per item, in order (items not queued
+        because the queue is full can be sent again)
     """
-    if not sending_ip:
-        return
-
-    from app.models import IP
-    from src.infrastructure.cache import get_cache
-
-    # Find IP in warming status
-    ip = db.query(IP).filter(
-        IP.address == sending_ip,
-        IP.status == "warming"
-    ).first()
-
-    if not ip or not ip.warmup_plan:
-        return  # Not in warmup, nothing to track
-
-    # Get cache
-    cache = get_cache()
-
-    # Build Redis key for today
-    today = datetime.utcnow().date().isoformat()
-    key_prefix = f"warmup:ip:{ip.id}:date:{today}"
-
-    # Increment appropriate counter
-    if event_type == EventType.SENT:
-        cache.increment(f"{key_prefix}:sent")
-    elif event_type == EventType.DELIVERED:
-        cache.increment(f"{key_prefix}:delivered")
-    elif event_type == EventType.BOUNCED:
-        cache.increment(f"{key_prefix}:bounced")
-    elif event_type == EventType.COMPLAINED:
-        cache.increment(f"{key_prefix}:complaints")
-    elif event_type == EventType.OPENED:
-        cache.increment(f"{key_prefix}:opens")
-    elif event_type == EventType.CLICKED:
-        cache.increment(f"{key_prefix}:clicks")
+    results = []
+    for index, item in enumerate(items):
+        try:
+            event = build_event(schema.model_validate(item))
+        except ValidationError as e:
+            error = e.errors(include_url=False)[0]
+            field_name = ".".join(str(part) for part in error["loc"])
+            results.append({"index": index, "queued": False, "error": f"{field_name}: {error['msg']}"})
+            continue
+
+        if event is None:
+            results.append({"index": index, "queued": False, "error": "Unknown event type"})
+        elif not pipeline.submit(event):
+            results.append({"index": index, "queued": False, "error": "Webhook queue full, retry later"})
+        else:
+            results.append({"index": index, "queued": True})
+
+    queued = sum(1 for result in results if result["queued"])
+    return {
+        "success": queued == len(items),
+        "received": len(items),
+        "queued": queued,
+        "results": results,
+    }
 
 
 # =============================================================================
@@ -179,189 +239,90 @@ def _track_warmup_event(
 # =============================================================================
 
 
-@router.post("/mailwizz", dependencies=[Depends(no_auth)])
-def mailwizz_webhook(
+@router.post("/mailwizz", status_code=202, dependencies=[Depends(no_auth)])
+async def mailwizz_webhook(
     request: MailWizzWebhookRequest,
-    db: Session = Depends(get_db),
+    pipeline: WebhookPipeline = Depends(get_webhook_pipeline),
 ):
     """
     Handle MailWizz delivery webhooks.
 
     MailWizz can send webhooks for: delivered, opened, clicked, bounced, complained, unsubscribed.
+    The event is acknowledged at once and written by the webhook pipeline.
     """
-    try:
-        # Map event type
-        event_type = _map_mailwizz_event(request.event)
-        if not event_type:
-            return {"success": False, "error": f"Unknown event type: {request.event}"}
-
-        # Find contact by email
-        contact = db.query(Contact).filter(Contact.email == request.email).first()
-
-        if not contact:
-            return {"success": False, "error": f"Contact not found: {request.email}"}
-
-        # Build metadata
-        metadata = {
-            "subscriber_uid": request.subscriber_uid,
-            "campaign_uid": request.campaign_uid,
-            "ip_address": request.ip_address,
-            "user_agent": request.user_agent,
-        }
+    event = _mailwizz_event(request)
+    if event is None:
+        return {"success": False, "error": f"Unknown event type: {request.event}"}
+    return _enqueue(pipeline, event)
 
-        if request.url:
-            metadata["url"] = request.url
-        if request.bounce_type:
-            metadata["bounce_type"] = request.bounce_type
-        if request.bounce_message:
-            metadata["bounce_message"] = request.bounce_message
-
-        # Create event
-        _create_contact_event(
-            db=db,
-            contact_id=contact.id,
-            event_type=event_type,
-            metadata=metadata,
-        )
-
-        # Track warmup stats if IP is in warming status
-        _track_warmup_event(
-            db=db,
-            sending_ip=request.ip_address,
-            event_type=event_type,
-        )
-
-        # Update contact status based on event
-        from app.enums import ContactStatus
-
-        if event_type == EventType.BOUNCED:
-            contact.status = ContactStatus.BOUNCED
-            db.commit()
-        elif event_type == EventType.COMPLAINED:
-            contact.status = ContactStatus.COMPLAINED
-            db.commit()
-        elif event_type == EventType.UNSUBSCRIBED:
-            contact.status = ContactStatus.UNSUBSCRIBED
-            db.commit()
 
-        return {
-            "success": True,
-            "message": f"Event {request.event} recorded for {request.email}",
-        }
+@router.post("/mailwizz/batch", status_code=202)
+async def mailwizz_webhook_batch(
+    body: bytes = Depends(verify_webhook_signature),
+    pipeline: WebhookPipeline = Depends(get_webhook_pipeline),
+):
+    """
+    Handle a batch of MailWizz webhooks (JSON array or NDJSON, one signature).
 
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Failed to process webhook: {str(e)}")
+    Each item gets its own result, in order; invalid items do not block the others.
+    """
+    return _enqueue_batch(pipeline, _parse_batch(body), MailWizzWebhookRequest, _mailwizz_event)
 
 
-@router.post("/powermta", dependencies=[Depends(no_auth)])
-def powermta_webhook(
+@router.post("/powermta", status_code=202, dependencies=[Depends(no_auth)])
+async def powermta_webhook(
     request: PowerMTAWebhookRequest,
-    db: Session = Depends(get_db),
+    pipeline: WebhookPipeline = Depends(get_webhook_pipeline),
 ):
     """
     Handle PowerMTA accounting webhooks.
 
     PowerMTA can send: delivered, bounced, deferred.
+    The event is acknowledged at once and written by the webhook pipeline.
     """
-    try:
-        # Map event type
-        event_type = _map_powermta_event(request.event)
-        if not event_type:
-            return {"success": False, "error": f"Unknown event type: {request.event}"}
-
-        # Find contact by email
-        contact = db.query(Contact).filter(Contact.email == request.recipient).first()
-
-        if not contact:
-            return {"success": False, "error": f"Contact not found: {request.recipient}"}
-
-        # Build metadata
-        metadata = {
-            "vmta": request.vmta,
-            "domain": request.domain,
-            "message_id": request.message_id,
-            "smtp_response": request.smtp_response,
-            "bounce_category": request.bounce_category,
-        }
+    event = _powermta_event(request)
+    if event is None:
+        return {"success": False, "error": f"Unknown event type: {request.event}"}
+    return _enqueue(pipeline, event)
 
-        # Create event
-        _create_contact_event(
-            db=db,
-            contact_id=contact.id,
-            event_type=event_type,
-            metadata=metadata,
-        )
-
-        # Track warmup stats if IP is in warming status
-        # PowerMTA includes sending_ip in webhook payload
-        _track_warmup_event(
-            db=db,
-            sending_ip=request.sending_ip,
-            event_type=event_type,
-        )
-
-        # Update contact status for bounces
-        from app.enums import ContactStatus
-
-        if event_type == EventType.BOUNCED:
-            # Determine if hard or soft bounce
-            is_hard_bounce = request.bounce_category in ["bad-mailbox", "bad-domain", "policy-related"]
-
-            if is_hard_bounce:
-                contact.status = ContactStatus.BOUNCED
-                db.commit()
 
-        return {
-            "success": True,
-            "message": f"Event {request.event} recorded for {request.recipient}",
-        }
+@router.post("/powermta/batch", status_code=202)
+async def powermta_webhook_batch(
+    body: bytes = Depends(verify_webhook_signature),
+    pipeline: WebhookPipeline = Depends(get_webhook_pipeline),
+):
+    """
+    Handle a batch of PowerMTA accounting records (JSON array or NDJSON, one signature).
 
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Failed to process webhook: {str(e)}")
+    Each item gets its own result, in order; invalid items do not block the others.
+    """
+    return _enqueue_batch(pipeline, _parse_batch(body), PowerMTAWebhookRequest, _powermta_event)
 
 
-@router.post("/generic", dependencies=[Depends(no_auth)])
-def generic_webhook(
+@router.post("/generic", status_code=202, dependencies=[Depends(no_auth)])
+async def generic_webhook(
     request: GenericEventRequest,
-    db: Session = Depends(get_db),
+    pipeline: WebhookPipeline = Depends(get_webhook_pipeline),
 ):
     """
     Generic webhook handler for custom integrations.
 
-    Accepts any event and stores it.
+    Accepts any event and stores it (through the webhook pipeline).
     """
+    # Map event type
     try:
-        # Map event type
-        try:
-            event_type = EventType(request.event_type.lower())
-        except ValueError:
-            return {"success": False, "error": f"Invalid event type: {request.event_type}"}
-
-        # Find contact by email
-        contact = db.query(Contact).filter(Contact.email == request.email).first()
-
-        if not contact:
-            return {"success": False, "error": f"Contact not found: {request.email}"}
+        event_type = EventType(request.event_type.lower())
+    except ValueError:
+        return {"success": False, "error": f"Invalid event type: {request.event_type}"}
 
-        # Create event
-        _create_contact_event(
-            db=db,
-            contact_id=contact.id,
-            event_type=event_type,
-            campaign_id=request.campaign_id,
-            metadata=request.metadata or {},
-        )
-
-        return {
-            "success": True,
-            "message": f"Event {request.event_type} recorded for {request.email}",
-        }
-
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Failed to process webhook: {str(e)}")
+    return _enqueue(pipeline, WebhookEvent(
+        source="generic",
+        email=request.email,
+        event_type=event_type.value,
+        event_data=request.metadata or {},
+        campaign_id=request.campaign_id,
+        contact_status=EVENT_CONTACT_STATUS.get(event_type),
+    ))
 
 
 @router.post("/test", dependencies=[Depends(no_auth)])
@@ -397,7 +358,9 @@ def webhook_health():
         "timestamp": datetime.utcnow().isoformat(),
         "endpoints": [
             "/webhooks/mailwizz",
+            "/webhooks/mailwizz/batch",
             "/webhooks/powermta",
+            "/webhooks/powermta/batch",
             "/webhooks/generic",
             "/webhooks/test",
         ],
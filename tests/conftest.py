@@ -9,7 +9,7 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
 from app.config import settings
-from app.database import get_db
+from app.database import enable_sqlite_transactions, get_db
 from app.models import Base
 
 # Single shared in-memory SQLite for all test connections
@@ -18,6 +18,7 @@ test_engine = create_engine(
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
+enable_sqlite_transactions(test_engine)
 TestSession = sessionmaker(bind=test_engine, autoflush=False, autocommit=False)
 
 
@@ -40,7 +41,7 @@ def db():
 
 
 @pytest.fixture
-def client(db):
+def client(db, tmp_path, monkeypatch):
     """FastAPI test client with overridden DB and patched lifespan engine."""
 
     def _override_db():
@@ -51,6 +52,10 @@ def client(db):
 
     from app import main as main_module
 
+    # Journals (webhooks v2, scraper-pro) in a per-test directory
+    monkeypatch.setattr("app.services.retry_queue.QUEUE_DIR", tmp_path)
+    monkeypatch.setattr("src.infrastructure.background.webhook_pipeline._pipeline", None)
+
     app = main_module.app
     app.dependency_overrides[get_db] = _override_db
 
@@ -65,3 +70,14 @@ def client(db):
 def api_headers():
     """Headers with valid API key."""
     return {"X-API-Key": settings.API_KEY}
+
+
+@pytest.fixture(autouse=True)
+def offline_cache(monkeypatch):
+    """Shared RedisCache with Redis marked down: no test waits on a connection."""
+    from src.infrastructure.cache import redis_cache
+
+    cache = redis_cache.RedisCache()
+    cache.redis._down_until = float("inf")
+    monkeypatch.setattr(redis_cache, "_cache", cache)
+    return cache
@@ -33,3 +33,4 @@ def test_pmta_bounce_forward_fail(mock_client, client, api_headers):
     assert resp.status_code == 200
     data = resp.json()
     assert data["forwarded_to_scraper_pro"] is False
+    assert data["accepted_for_scraper_pro"] is False
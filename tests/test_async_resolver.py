@@ -0,0 +1,179 @@
+"""Tests for the asyncio DNS resolver and batch email validation.
+
+Tests couverts :
+  - Coalescence : une seule requête en vol par (nom, type)
+  - Concurrence bornée par le sémaphore
+  - Rate limit par serveur DNS, répartition entre serveurs
+  - validate_batch : une résolution MX par domaine distinct
+  - validate_batch : cache Redis lu en un MGET / écrit en un pipeline, hors boucle asyncio
+"""
+
+import asyncio
+import threading
+
+import dns.resolver
+
+from app.services import email_validator
+from app.services.async_resolver import AsyncDNSResolver
+from app.services.domain_cache import DomainVerdictCache
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ─────────────────────────────────────────────────────────────────────────────
+
+class _FakeResolver(AsyncDNSResolver):
+    """Resolver whose network query is replaced by a short sleep."""
+
+    def __init__(self, answers=None, delay=0.01, **kwargs):
+        kwargs.setdefault("nameservers", ["10.0.0.1", "10.0.0.2"])
+        super().__init__(**kwargs)
+        self.answers = answers or {}
+        self.delay = delay
+        self.queries = []
+        self.active = 0
+        self.max_active = 0
+
+    async def _query(self, resolver, qname, rdtype):
+        self.queries.append((resolver.nameservers[0], qname, rdtype))
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        answer = self.answers.get(qname, ["mx1"])
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+def test_concurrent_lookups_of_same_name_are_coalesced():
+    resolver = _FakeResolver()
+
+    async def run():
+        return await asyncio.gather(*(resolver.resolve("Example.com.", "mx") for _ in range(20)))
+
+    assert asyncio.run(run()) == [["mx1"]] * 20
+    assert [q[1:] for q in resolver.queries] == [("example.com", "MX")]
+
+    # Once done, the next lookup queries again (the domain cache sits above this)
+    asyncio.run(resolver.resolve("example.com", "MX"))
+    assert len(resolver.queries) == 2
+
+
+def test_concurrency_is_bounded_by_semaphore():
+    resolver = _FakeResolver(max_concurrency=3, rate_per_nameserver=1000)
+
+    async def run():
+        await asyncio.gather(*(resolver.resolve(f"d{i}.com", "MX") for i in range(12)))
+
+    asyncio.run(run())
+    assert len(resolver.queries) == 12
+    assert resolver.max_active == 3
+
+
+def test_rate_limit_spreads_queries_across_nameservers():
+    resolver = _FakeResolver(delay=0, rate_per_nameserver=2)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await asyncio.gather(*(resolver.resolve(f"d{i}.com", "MX") for i in range(6)))
+        return loop.time() - start
+
+    elapsed = asyncio.run(run())
+    # 2 servers x 2 burst tokens = 4 immediate queries, the 2 others wait ~0.5s
+    assert elapsed >= 0.4
+    servers = [q[0] for q in resolver.queries]
+    assert servers.count("10.0.0.1") == servers.count("10.0.0.2") == 3
+
+
+def test_errors_are_shared_by_coalesced_callers():
+    resolver = _FakeResolver(answers={"gone.com": dns.resolver.NXDOMAIN()})
+
+    async def run():
+        return await asyncio.gather(
+            *(resolver.resolve("gone.com", "MX") for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, dns.resolver.NXDOMAIN) for r in results)
+    assert len(resolver.queries) == 1
+
+
+def test_validate_batch_resolves_each_distinct_domain_once(monkeypatch):
+    resolver = _FakeResolver(answers={
+        "nomx.com": dns.resolver.NXDOMAIN(),
+        "flaky.com": dns.resolver.Timeout(),
+    })
+    monkeypatch.setattr(email_validator, "async_resolver", resolver)
+    monkeypatch.setattr(email_validator, "domain_cache", DomainVerdictCache(redis_url=""))
+
+    emails = [f"user{i}@ok.com" for i in range(50)]
+    emails += ["a@nomx.com", "b@nomx.com", "c@flaky.com", "noreply@ok.com", "bad", "x@mailinator.com"]
+    results = asyncio.run(email_validator.validate_batch(emails))
+
+    assert sorted(q[1] for q in resolver.queries) == ["flaky.com", "nomx.com", "ok.com"]
+    by_email = {r["email"]: (r["valid"], r["reason"]) for r in results}
+    assert len(results) == len(emails)
+    assert by_email["user7@ok.com"] == (True, None)
+    assert by_email["a@nomx.com"] == (False, "no_mx_records")
+    assert by_email["c@flaky.com"] == (True, None)  # transient: assume valid
+    assert by_email["noreply@ok.com"] == (False, "blacklisted_prefix")
+    assert by_email["bad"] == (False, "invalid_syntax")
+    assert by_email["x@mailinator.com"] == (False, "disposable_domain")
+
+    # Definitive verdicts are cached, transient ones are retried
+    asyncio.run(email_validator.validate_batch(["z@ok.com", "z@nomx.com", "z@flaky.com"]))
+    assert sorted(q[1] for q in resolver.queries) == ["flaky.com", "flaky.com", "nomx.com", "ok.com"]
+
+
+class _ThreadRecordingRedis:
+    """Fake redis client recording which thread each round trip runs on."""
+
+    def __init__(self, data=None):
+        self.data = data or {}
+        self.calls = []
+
+    def mget(self, keys):
+        self.calls.append(("mget", threading.current_thread()))
+        return [self.data.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return _ThreadRecordingPipeline(self)
+
+
+class _ThreadRecordingPipeline:
+    def __init__(self, redis_client):
+        self.redis = redis_client
+        self.pending = []
+
+    def setex(self, key, ttl, value):
+        self.pending.append((key, value))
+
+    def execute(self):
+        self.redis.calls.append(("pipeline", threading.current_thread()))
+        self.redis.data.update(self.pending)
+
+
+def test_validate_batch_reads_cache_in_one_round_trip_off_the_loop(monkeypatch):
+    resolver = _FakeResolver(answers={"nomx.com": dns.resolver.NXDOMAIN()})
+    redis_client = _ThreadRecordingRedis({"domain_verdict:mx:cached.com": "true"})
+    cache = DomainVerdictCache(redis_url="redis://shared")
+    cache._redis = redis_client
+    monkeypatch.setattr(email_validator, "async_resolver", resolver)
+    monkeypatch.setattr(email_validator, "domain_cache", cache)
+
+    emails = ["a@cached.com", "b@ok.com", "c@nomx.com", "d@ok.com"]
+    results = asyncio.run(email_validator.validate_batch(emails))
+
+    assert [r["valid"] for r in results] == [True, True, False, True]
+    assert sorted(q[1] for q in resolver.queries) == ["nomx.com", "ok.com"]
+    assert [name for name, _ in redis_client.calls] == ["mget", "pipeline"]
+    assert all(thread is not threading.main_thread() for _, thread in redis_client.calls)
+    assert redis_client.data["domain_verdict:mx:nomx.com"] == "false"
@@ -1,9 +1,23 @@
 """Tests for blacklist checker."""
 
+import asyncio
+from datetime import datetime, timedelta
 from unittest.mock import patch
 
-from app.models import IP, BlacklistEvent
-from app.services.blacklist_checker import BlacklistChecker, _reverse_ip
+import dns.resolver
+import pytest
+
+from app.models import IP, BlacklistCheck, BlacklistEvent, Tenant
+from app.services.blacklist_checker import BLACKLISTS, BlacklistChecker, _reverse_ip
+from app.services.blacklist_store import BlacklistResultStore
+
+
+@pytest.fixture(autouse=True)
+def store(monkeypatch):
+    """Résultats blacklist sans Redis (repli DB seul)."""
+    store = BlacklistResultStore(redis_url="", clean_ttl=12 * 3600, listed_ttl=30 * 60)
+    monkeypatch.setattr("app.services.blacklist_checker.blacklist_store", store)
+    return store
 
 
 def _make_ip(db, address="1.2.3.4"):
@@ -52,3 +66,162 @@ def test_no_duplicate_listing(mock_check, db):
     checker._record_listing(ip, ["zen.spamhaus.org"])
     events = db.query(BlacklistEvent).filter(BlacklistEvent.ip_id == ip.id).all()
     assert len(events) == 1
+
+
+class _FakeResolver:
+    """Résolveur simulé : listé si (IP inversée, RBL) est dans `listed` ; mesure la concurrence."""
+
+    def __init__(self, listed=(), delay=0.01):
+        self.listed = {f"{_reverse_ip(ip)}.{bl}" for ip, bl in listed}
+        self.delay = delay
+        self.queries = []
+        self.active = self.peak = 0
+
+    async def resolve(self, qname, rdtype="A"):
+        self.queries.append(qname)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        if qname in self.listed:
+            return ["127.0.0.2"]
+        raise dns.resolver.NXDOMAIN()
+
+
+async def test_sweep_runs_all_pairs_concurrently_under_cap(db, monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "BLACKLIST_SWEEP_CONCURRENCY", 25)
+    monkeypatch.setattr(settings, "BLACKLIST_RATE_PER_RBL", 10_000.0)
+    resolver = _FakeResolver(listed=[("10.0.0.3", "bl.spamcop.net")])
+    monkeypatch.setattr("app.services.blacklist_checker.async_resolver", resolver)
+    pairs = [(f"10.0.0.{i}", bl) for i in range(10) for bl in BLACKLISTS]
+
+    results = await BlacklistChecker(db).sweep(pairs + pairs[:5])
+
+    assert len(resolver.queries) == 90
+    assert resolver.peak == 25
+    assert [pair for pair, listed in results.items() if listed] == [("10.0.0.3", "bl.spamcop.net")]
+
+
+async def test_rbl_rate_limit_spaces_queries(db, monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "BLACKLIST_RATE_PER_RBL", 20.0)
+    resolver = _FakeResolver(delay=0)
+    monkeypatch.setattr("app.services.blacklist_checker.async_resolver", resolver)
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    await BlacklistChecker(db).sweep([(f"10.0.0.{i}", "zen.spamhaus.org") for i in range(30)])
+
+    # 20 jetons d'emblée, puis 10 requêtes à 20/s
+    assert loop.time() - started >= 0.45
+
+
+async def test_check_all_ips_records_and_delists_in_one_sweep(db, monkeypatch):
+    sent = []
+
+    async def _send(message, **kwargs):
+        sent.append(message)
+        return True
+
+    monkeypatch.setattr("app.services.blacklist_checker.alerter.send", _send)
+    tenant = Tenant(slug="acme", name="Acme", brand_domain="acme.com", sending_domain_base="mail.acme.com")
+    db.add(tenant)
+    db.commit()
+    listed_ip, clean_ip, quarantined = (
+        IP(address=address, hostname="mail.test.com", status=status, purpose="marketing", tenant_id=tenant.id)
+        for address, status in (("10.0.0.1", "active"), ("10.0.0.2", "warming"), ("10.0.0.9", "quarantined"))
+    )
+    db.add_all([listed_ip, clean_ip, quarantined])
+    db.commit()
+    db.add_all([
+        BlacklistEvent(tenant_id=tenant.id, ip_id=clean_ip.id, blacklist_name="psbl.surriel.com"),
+        BlacklistEvent(tenant_id=tenant.id, ip_id=quarantined.id, blacklist_name="zen.spamhaus.org"),
+        BlacklistEvent(tenant_id=tenant.id, ip_id=listed_ip.id, blacklist_name="bl.spamcop.net"),
+    ])
+    db.commit()
+
+    resolver = _FakeResolver(listed=[("10.0.0.1", "bl.spamcop.net"), ("10.0.0.1", "all.s5h.net")])
+    monkeypatch.setattr("app.services.blacklist_checker.async_resolver", resolver)
+    commits = []
+    monkeypatch.setattr(db, "commit", lambda real=db.commit: (commits.append(1), real())[1])
+
+    results = await BlacklistChecker(db).check_all_ips()
+
+    assert results == {"10.0.0.1": ["bl.spamcop.net", "all.s5h.net"]}
+    assert len(resolver.queries) == 2 * len(BLACKLISTS) + 1  # + le listing de l'IP en quarantaine
+    assert len(commits) == 2  # listings, délistages
+    open_events = {(e.ip_id, e.blacklist_name) for e in db.query(BlacklistEvent).filter(BlacklistEvent.delisted_at.is_(None))}
+    assert open_events == {(listed_ip.id, "bl.spamcop.net"), (listed_ip.id, "all.s5h.net")}
+    assert len(sent) == 2
+
+
+def _tenant_ips(db, *addresses):
+    tenant = Tenant(slug="acme", name="Acme", brand_domain="acme.com", sending_domain_base="mail.acme.com")
+    db.add(tenant)
+    db.commit()
+    ips = [
+        IP(address=address, hostname="mail.test.com", status="active", purpose="marketing", tenant_id=tenant.id)
+        for address in addresses
+    ]
+    db.add_all(ips)
+    db.commit()
+    return ips
+
+
+async def test_results_are_cached_with_adaptive_intervals(db, store, monkeypatch):
+    monkeypatch.setattr("app.services.blacklist_checker.alerter.send", lambda *a, **k: asyncio.sleep(0))
+    _tenant_ips(db, "10.0.0.1", "10.0.0.2")
+    resolver = _FakeResolver(listed=[("10.0.0.1", "bl.spamcop.net")])
+    monkeypatch.setattr("app.services.blacklist_checker.async_resolver", resolver)
+    checker = BlacklistChecker(db)
+
+    assert await checker.check_all_ips() == {"10.0.0.1": ["bl.spamcop.net"]}
+    assert len(resolver.queries) == 2 * len(BLACKLISTS)
+
+    # Rien d'échu au passage suivant : aucune requête DNS
+    assert await checker.check_all_ips() == {}
+    assert len(resolver.queries) == 2 * len(BLACKLISTS)
+
+    # 31 min plus tard : seul le couple listé est ré-interrogé ; 13h plus tard, tout
+    pairs = [(ip, bl) for ip in ("10.0.0.1", "10.0.0.2") for bl in BLACKLISTS]
+    now = datetime.utcnow()
+    assert store.due_pairs(db, pairs, now + timedelta(minutes=31)) == [("10.0.0.1", "bl.spamcop.net")]
+    assert len(store.due_pairs(db, pairs, now + timedelta(hours=13))) == len(pairs)
+
+
+async def test_priority_check_and_timeouts(db, store, monkeypatch):
+    monkeypatch.setattr("app.services.blacklist_checker.alerter.send", lambda *a, **k: asyncio.sleep(0))
+    ip, other = _tenant_ips(db, "10.0.0.1", "10.0.0.2")
+    db.add(BlacklistEvent(tenant_id=ip.tenant_id, ip_id=ip.id, blacklist_name="zen.spamhaus.org"))
+    db.commit()
+
+    class _TimeoutOnSpamhaus(_FakeResolver):
+        async def resolve(self, qname, rdtype="A"):
+            if qname.endswith("zen.spamhaus.org"):
+                self.queries.append(qname)
+                raise dns.exception.Timeout()
+            return await super().resolve(qname, rdtype)
+
+    resolver = _TimeoutOnSpamhaus()
+    monkeypatch.setattr("app.services.blacklist_checker.async_resolver", resolver)
+    checker = BlacklistChecker(db)
+    await checker.check_all_ips()
+
+    # Timeout : listing conservé, couple non mis en cache (ré-interrogé au passage suivant)
+    assert db.query(BlacklistEvent).filter(BlacklistEvent.delisted_at.is_(None)).count() == 1
+    assert db.query(BlacklistCheck).count() == 2 * len(BLACKLISTS) - 2
+    resolver.queries.clear()
+    await checker.check_all_ips()
+    assert sorted(resolver.queries) == sorted(f"{_reverse_ip(a)}.zen.spamhaus.org" for a in ("10.0.0.1", "10.0.0.2"))
+
+    # Gros lot envoyé par une IP : tous ses couples redeviennent échus
+    store.request_priority_check(db, "10.0.0.2")
+    db.commit()
+    resolver.queries.clear()
+    await checker.check_all_ips()
+    assert len([q for q in resolver.queries if q.startswith(_reverse_ip("10.0.0.2"))]) == len(BLACKLISTS)
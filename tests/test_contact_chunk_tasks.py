@@ -0,0 +1,187 @@
+"""Tests for the chunked contact Celery tasks (validation, MailWizz injection, fan-out).
+
+Tests couverts :
+  - validate_contacts_chunk_task : un chunk, une session, résultats par chunk,
+    MX vérifiés via le cache de verdicts de domaine
+  - validate_pending_contacts_task : reprise depuis le curseur Redis du run précédent
+  - inject_contacts_chunk_to_mailwizz_task : import bulk par instance, échecs isolés
+  - inject_contacts_chunk_to_mailwizz_task : commit par lot importé
+  - dispatch_contact_chunks : découpage du backlog d'un tenant en chunks d'ids
+"""
+
+import pytest
+
+from app.models import Contact, DataSource, MailwizzInstance, Tenant
+from app.services.domain_cache import DomainVerdictCache
+from src.infrastructure.background import tasks
+from tests.conftest import TestSession
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ─────────────────────────────────────────────────────────────────────────────
+
+class _FakeMailWizzClient:
+    instances = []
+
+    def __init__(self, base_url, public_key, private_key):
+        self.base_url = base_url
+        self.created = []
+        _FakeMailWizzClient.instances.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def create_subscribers_bulk(self, list_id, subscribers):
+        if any(s["EMAIL"].startswith("crash") for s in subscribers):
+            raise RuntimeError("connection reset")
+        results = []
+        for subscriber in subscribers:
+            if subscriber["EMAIL"].startswith("fail"):
+                results.append({"success": False, "subscriber_uid": None, "error": "Invalid email"})
+                continue
+            self.created.append((list_id, subscriber))
+            results.append({"success": True, "subscriber_uid": 1000 + len(self.created), "error": None})
+        return results
+
+
+@pytest.fixture(autouse=True)
+def _patched(monkeypatch):
+    async def fake_resolve_mx(domain):
+        return not domain.startswith("nomx.")
+
+    monkeypatch.setattr("app.database.SessionLocal", TestSession)
+    monkeypatch.setattr("app.services.email_validator._resolve_mx_async", fake_resolve_mx)
+    monkeypatch.setattr("app.services.email_validator.domain_cache", DomainVerdictCache(redis_url=""))
+    monkeypatch.setattr("src.infrastructure.external.MailWizzClient", _FakeMailWizzClient)
+    _FakeMailWizzClient.instances = []
+
+
+@pytest.fixture
+def tenant(db):
+    tenant = Tenant(
+        slug="acme",
+        name="Acme",
+        brand_domain="acme.com",
+        sending_domain_base="mail.acme.com",
+    )
+    db.add(tenant)
+    db.commit()
+    db.add(DataSource(tenant_id=tenant.id, name="Scraper-Pro", type="scraper_pro"))
+    db.add(MailwizzInstance(tenant_id=tenant.id, name="Acme MW", base_url="https://mw.acme.com", default_list_id=7))
+    db.commit()
+    return tenant
+
+
+def _add_contacts(db, tenant, emails, **fields):
+    ds_id = db.query(DataSource.id).filter_by(tenant_id=tenant.id).scalar()
+    contacts = [Contact(tenant_id=tenant.id, data_source_id=ds_id, email=e, **fields) for e in emails]
+    db.add_all(contacts)
+    db.commit()
+    ids = [c.id for c in contacts]
+    db.commit()  # release the shared connection before the task opens its own session
+    return ids
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+def test_validate_chunk_reports_per_chunk_counts(db, tenant):
+    ids = _add_contacts(
+        db, tenant, ["a@example.com", "b@example.com", "admin@mailinator.com", "c@gmial.com", "d@nomx.example"]
+    )
+
+    result = tasks.validate_contacts_chunk_task(contact_ids=ids + [999999])
+
+    assert result == {
+        "success": True,
+        "requested": 6,
+        "validated": 5,
+        "valid": 2,
+        "invalid": 2,
+        "risky": 1,
+    }
+    db.expire_all()
+    statuses = dict(db.query(Contact.email, Contact.validation_status))
+    assert statuses["admin@mailinator.com"] == "invalid"
+    assert statuses["d@nomx.example"] == "invalid"
+    assert statuses["a@example.com"] == "valid"
+
+
+
+def test_validate_pending_resumes_from_cursor(db, tenant, monkeypatch):
+    class _DictStore(dict):
+        def set(self, key, value):
+            self[key] = value
+
+        def delete(self, key):
+            self.pop(key, None)
+
+    store = _DictStore()
+    monkeypatch.setattr("src.infrastructure.cache.get_cache", lambda: store)
+    tenant_id = tenant.id
+    _add_contacts(db, tenant, [f"user{i}@example.com" for i in range(5)])
+
+    first = tasks.validate_pending_contacts_task(tenant_id=tenant_id, limit=3)
+    assert (first["success"], first["validated"], first["backlog_exhausted"]) == (True, 3, False)
+    assert store
+
+    second = tasks.validate_pending_contacts_task(tenant_id=tenant_id, limit=3)
+    assert (second["validated"], second["backlog_exhausted"]) == (2, True)
+    assert not store
+    db.expire_all()
+    assert db.query(Contact).filter(Contact.validation_status.is_(None)).count() == 0
+
+def test_inject_chunk_uses_one_client_and_isolates_failures(db, tenant):
+    ids = _add_contacts(db, tenant, ["a@example.com", "fail@example.com", "b@example.com"], status="valid")
+    done = _add_contacts(db, tenant, ["old@example.com"], status="valid", mailwizz_subscriber_id=42)
+
+    result = tasks.inject_contacts_chunk_to_mailwizz_task(contact_ids=ids + done)
+
+    assert result["success"]
+    assert (result["injected"], result["already_injected"], result["not_found"]) == (2, 1, 0)
+    assert result["failed"] == [{"contact_id": ids[1], "error": "Invalid email"}]
+    assert len(_FakeMailWizzClient.instances) == 1
+    assert [s["EMAIL"] for _, s in _FakeMailWizzClient.instances[0].created] == ["a@example.com", "b@example.com"]
+
+    db.expire_all()
+    injected = db.query(Contact).filter(Contact.mailwizz_subscriber_id.isnot(None)).count()
+    assert injected == 3
+
+
+def test_inject_chunk_commits_each_import_batch(db, tenant, monkeypatch):
+    monkeypatch.setattr(tasks, "INJECT_COMMIT_BATCH_SIZE", 2)
+    emails = ["a@example.com", "b@example.com", "c@example.com", "crash@example.com"]
+    ids = _add_contacts(db, tenant, emails, status="valid")
+
+    result = tasks.inject_contacts_chunk_to_mailwizz_task(contact_ids=ids)
+
+    assert not result["success"]
+    assert result["injected"] == 2
+    db.expire_all()
+    lists = dict(db.query(Contact.email, Contact.mailwizz_list_id))
+    # First batch committed before the second one failed
+    assert lists == {"a@example.com": 7, "b@example.com": 7, "c@example.com": None, "crash@example.com": None}
+
+
+@pytest.mark.parametrize("operation, status", [("validate", "pending"), ("inject", "valid")])
+def test_dispatch_splits_backlog_into_id_chunks(db, tenant, monkeypatch, operation, status):
+    backlog = _add_contacts(db, tenant, [f"u{i}@example.com" for i in range(7)], status=status)
+    _add_contacts(db, tenant, ["skip@example.com"], status="invalid")
+    sent = []
+    task = tasks.validate_contacts_chunk_task if operation == "validate" else tasks.inject_contacts_chunk_to_mailwizz_task
+    monkeypatch.setattr(task, "delay", lambda contact_ids: sent.append(contact_ids))
+
+    result = tasks.dispatch_contact_chunks(db, tenant.id, operation, chunk_size=3)
+
+    assert (result["chunks"], result["contacts"]) == (3, 7)
+    assert sent == [backlog[:3], backlog[3:6], backlog[6:]]
+
+
+def test_dispatch_rejects_unknown_operation(db, tenant):
+    with pytest.raises(ValueError):
+        tasks.dispatch_contact_chunks(db, tenant.id, "delete")
@@ -0,0 +1,165 @@
+"""Tests for keyset-paginated contact listing and NDJSON export (API v2).
+
+Tests couverts :
+  - Pagination par curseur (id et created_at avec égalités), sans doublon ni trou
+  - Tags chargés en une requête par page (pas de N+1)
+  - Mapping en lot : nombre de requêtes constant, colonnes JSON décodées en vrais dict/list
+  - Curseur invalide → 400
+  - Export NDJSON de tout le tenant
+"""
+
+import json
+from datetime import datetime
+
+import pytest
+from pydantic import TypeAdapter
+from sqlalchemy import event
+
+from app.models import Contact, ContactTag, DataSource, Tag, Tenant
+from src.infrastructure.persistence import SQLAlchemyContactRepository
+from src.presentation.api.v2 import contacts as contacts_api
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ─────────────────────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def tenant_contacts(db):
+    tenant = Tenant(
+        slug="acme",
+        name="Acme",
+        brand_domain="acme.com",
+        sending_domain_base="mail.acme.com",
+    )
+    db.add(tenant)
+    db.commit()
+    ds = DataSource(tenant_id=tenant.id, name="Scraper-Pro", type="scraper_pro")
+    tag = Tag(tenant_id=tenant.id, slug="blogger", label="Blogger")
+    db.add_all([ds, tag])
+    db.commit()
+
+    same_time = datetime(2026, 1, 1, 12, 0)
+    for i in range(7):
+        contact = Contact(
+            tenant_id=tenant.id,
+            data_source_id=ds.id,
+            email=f"user{i}@example.com",
+            # Creation order differs from id order (with a tie), to tell both orders apart
+            created_at=same_time if i in (2, 3) else datetime(2026, 1, 10 - i),
+        )
+        db.add(contact)
+        db.flush()
+        db.add(ContactTag(contact_id=contact.id, tag_id=tag.id))
+    db.commit()
+    return tenant
+
+
+def _walk(client, tenant_id, limit, **params):
+    """Follow X-Next-Cursor until exhausted; return all emails and page count."""
+    emails, pages, cursor = [], 0, None
+    while True:
+        query = {"limit": limit, **params}
+        if cursor:
+            query["cursor"] = cursor
+        response = client.get(f"/api/v2/contacts/{tenant_id}", params=query)
+        assert response.status_code == 200
+        pages += 1
+        emails += [c["email"] for c in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return emails, pages
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+def test_cursor_pagination_by_id(client, tenant_contacts):
+    emails, pages = _walk(client, tenant_contacts.id, limit=3)
+    assert emails == [f"user{i}@example.com" for i in range(7)]
+    assert pages == 3
+
+
+def test_cursor_pagination_by_created_at_with_ties(client, tenant_contacts):
+    emails, _ = _walk(client, tenant_contacts.id, limit=2, order_by="created_at")
+    assert emails == [
+        "user2@example.com",  # tie on created_at, broken by id
+        "user3@example.com",
+        "user6@example.com",
+        "user5@example.com",
+        "user4@example.com",
+        "user1@example.com",
+        "user0@example.com",
+    ]
+
+
+def test_page_loads_tags_with_one_query(db, tenant_contacts):
+    tenant_id = tenant_contacts.id
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        page = SQLAlchemyContactRepository(db).list_page(tenant_id, limit=5)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+
+    assert [str(t) for c in page for t in c.tags] == ["blogger"] * 5
+    assert len([s for s in statements if s.startswith("SELECT")]) == 2
+
+
+def test_batch_mapping_query_count_is_constant(db, tenant_contacts):
+    tenant_id = tenant_contacts.id
+    repo = SQLAlchemyContactRepository(db)
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        contacts = repo.find_by_tags(tenant_id, limit=1000)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+
+    assert len(contacts) == 7
+    assert all([str(t) for t in c.tags] == ["blogger"] for c in contacts)
+    assert len([s for s in statements if s.startswith("SELECT")]) == 2
+
+
+def test_json_columns_are_decoded(db, tenant_contacts):
+    model = db.query(Contact).filter_by(email="user0@example.com").one()
+    model.custom_fields = '{"score": 1, "src": "scraper"}'
+    model.validation_errors = '["typo"]'
+    db.commit()
+    repo = SQLAlchemyContactRepository(db)
+
+    contact = repo.find_by_id(model.id)
+    # Real containers: json.dumps and Pydantic see the decoded values
+    assert json.dumps(contact.custom_fields) == '{"score": 1, "src": "scraper"}'
+    assert json.dumps(contact.validation_errors) == '["typo"]'
+    assert TypeAdapter(dict).validate_python(contact.custom_fields) == {"score": 1, "src": "scraper"}
+
+    contact.custom_fields.update({"score": 2})
+    repo.save(contact)
+    db.commit()
+    db.refresh(model)
+    assert json.loads(model.custom_fields) == {"score": 2, "src": "scraper"}
+
+    model.custom_fields = "not json"
+    db.commit()
+    assert repo.find_by_id(model.id).custom_fields == {}
+
+
+def test_invalid_cursor_is_rejected(client, tenant_contacts):
+    response = client.get(f"/api/v2/contacts/{tenant_contacts.id}", params={"cursor": "nope"})
+    assert response.status_code == 400
+
+
+def test_export_streams_whole_tenant(client, tenant_contacts, monkeypatch):
+    monkeypatch.setattr(contacts_api, "EXPORT_PAGE_SIZE", 3)
+
+    response = client.get(f"/api/v2/contacts/{tenant_contacts.id}/export")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["email"] for r in rows] == [f"user{i}@example.com" for i in range(7)]
+    assert all(r["tags"] == ["blogger"] for r in rows)
@@ -1,7 +1,10 @@
 """Tests for DNS validator."""
 
+import asyncio
 from unittest.mock import MagicMock, patch
 
+import dns.resolver
+
 from app.models import Domain, IP
 from app.services.dns_validator import DNSValidator
 
@@ -54,3 +57,88 @@ def test_validate_domain_partial_fail(m_mx, m_ptr, m_dmarc, m_dkim, m_spf, db):
     assert results["dmarc"] is False
     assert domain.spf_valid is False
     assert domain.dmarc_valid is False
+
+
+class _Rdata:
+    def __init__(self, value):
+        self.value = value
+
+    def to_text(self):
+        return f'"{self.value}"'
+
+    def __str__(self):
+        return f"{self.value}."
+
+
+class _FakeAsyncResolver:
+    """Résolveur asyncio simulé : enregistre les requêtes et la concurrence."""
+
+    def __init__(self, records):
+        self.records = records
+        self.queries = []
+        self.active = self.peak = 0
+
+    async def resolve(self, qname, rdtype="A"):
+        self.queries.append((qname, rdtype))
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            self.active -= 1
+        if (qname, rdtype) not in self.records:
+            raise dns.resolver.NXDOMAIN()
+        return [_Rdata(value) for value in self.records[(qname, rdtype)]]
+
+
+async def test_validate_all_runs_checks_concurrently_with_one_bulk_update(db, monkeypatch):
+    from app.config import settings
+
+    ip = IP(address="1.2.3.4", hostname="mail.example.com", status="active", purpose="marketing")
+    db.add(ip)
+    db.commit()
+    db.add_all([
+        Domain(name="a.com", purpose="marketing", ip_id=ip.id, dkim_selector="default"),
+        Domain(name="b.com", purpose="marketing", ip_id=ip.id, dkim_selector="s1"),
+        Domain(name="c.com", purpose="marketing"),
+    ])
+    db.commit()
+
+    resolver = _FakeAsyncResolver({
+        ("a.com", "TXT"): ["v=spf1 ip4:1.2.3.4 -all"],
+        ("default._domainkey.a.com", "TXT"): ["v=DKIM1; k=rsa; p=MIGf"],
+        ("_dmarc.a.com", "TXT"): ["v=DMARC1; p=none"],
+        ("a.com", "MX"): ["10 mx.a.com"],
+        ("b.com", "TXT"): ["v=spf1 ip4:9.9.9.9 -all"],
+        ("4.3.2.1.in-addr.arpa", "PTR"): ["mail.example.com"],
+    })
+    monkeypatch.setattr("app.services.dns_validator.async_resolver", resolver)
+    monkeypatch.setattr(settings, "DNS_VALIDATION_CONCURRENCY", 4)
+    commits = []
+    monkeypatch.setattr(db, "commit", lambda real=db.commit: (commits.append(1), real())[1])
+
+    results = await DNSValidator(db).validate_all()
+
+    assert results["a.com"] == {"spf": True, "dkim": True, "dmarc": True, "ptr": True, "mx": True}
+    assert results["b.com"] == {"spf": False, "dkim": False, "dmarc": False, "ptr": True, "mx": False}
+    assert results["c.com"] == {"spf": False, "dkim": False, "dmarc": False, "ptr": False, "mx": False}
+    # PTR de l'IP partagée résolu une seule fois ; 4 vérifications à la fois au plus
+    assert resolver.queries.count(("4.3.2.1.in-addr.arpa", "PTR")) == 1
+    assert len(resolver.queries) == 3 * 4 + 1
+    assert resolver.peak == 4
+    assert len(commits) == 1
+
+    domains = {d.name: d for d in db.query(Domain)}
+    assert domains["a.com"].dmarc_valid is True and domains["a.com"].last_dns_check is not None
+    assert domains["b.com"].spf_valid is False and domains["b.com"].ptr_valid is True
+
+
+async def test_identical_lookups_share_one_query(db, monkeypatch):
+    resolver = _FakeAsyncResolver({("x.com", "TXT"): ["v=spf1 -all"]})
+    monkeypatch.setattr("app.services.dns_validator.async_resolver", resolver)
+    validator = DNSValidator(db)
+
+    first, second = await asyncio.gather(validator._lookup("x.com", "TXT"), validator._lookup("X.com.", "TXT"))
+
+    assert first == second == ["v=spf1 -all"]
+    assert resolver.queries == [("x.com", "TXT")]
@@ -0,0 +1,163 @@
+"""Tests for the two-tier domain verdict cache (app/services/domain_cache.py).
+
+Tests couverts :
+  - Niveau mémoire : hit, TTL, éviction LRU
+  - Niveau Redis : partagé entre 2 instances, TTL positif / négatif
+  - Redis indisponible : backoff, le cache continue en mémoire
+  - validate_single : une seule résolution MX par domaine, erreurs DNS transitoires non cachées
+  - ContactValidator : seul le verdict MX passe par le cache (jetable / typo en mémoire)
+"""
+
+import dns.resolver
+import pytest
+
+from app.services import email_validator
+from app.services.domain_cache import DomainVerdictCache
+from src.domain.services import ContactValidator
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ─────────────────────────────────────────────────────────────────────────────
+
+class _FakeRedis:
+    """Minimal in-memory stand-in for the redis client methods used by the cache."""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+        self.ttls[key] = ttl
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+def _cache(redis_client=None, **kwargs):
+    cache = DomainVerdictCache(redis_url="redis://shared" if redis_client else "", **kwargs)
+    cache._redis = redis_client
+    return cache
+
+
+class _Counter:
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+def test_local_tier_hits_and_evicts():
+    cache = _cache(local_size=2)
+    compute = _Counter(True)
+
+    assert cache.get_or_compute("mx", "A.com", compute) is True
+    assert cache.get_or_compute("mx", "a.com", compute) is True  # case-insensitive key
+    assert compute.calls == 1
+
+    cache.get_or_compute("mx", "b.com", compute)
+    cache.get_or_compute("mx", "c.com", compute)  # evicts a.com (least recently used)
+    cache.get_or_compute("mx", "a.com", compute)
+    assert compute.calls == 4
+
+
+def test_local_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.services.domain_cache.time.monotonic", lambda: now[0])
+    cache = _cache(local_ttl=60, negative_ttl=10)
+    compute = _Counter(False)
+
+    cache.get_or_compute("mx", "a.com", compute)
+    now[0] += 11  # negative verdicts use the shorter TTL
+    cache.get_or_compute("mx", "a.com", compute)
+    assert compute.calls == 2
+
+
+def test_redis_tier_is_shared_with_positive_and_negative_ttls():
+    redis_client = _FakeRedis()
+    first = _cache(redis_client, positive_ttl=86400, negative_ttl=1800)
+    second = _cache(redis_client, positive_ttl=86400, negative_ttl=1800)
+
+    first.get_or_compute("mx", "good.com", lambda: True)
+    first.get_or_compute("mx", "bad.com", lambda: False)
+
+    compute = _Counter(None)
+    assert second.get_or_compute("mx", "good.com", compute) is True
+    assert second.get_or_compute("mx", "bad.com", compute) is False
+    assert compute.calls == 0
+    assert redis_client.ttls == {
+        "domain_verdict:mx:good.com": 86400,
+        "domain_verdict:mx:bad.com": 1800,
+    }
+
+
+def test_unreachable_redis_backs_off_and_keeps_local_tier():
+    cache = DomainVerdictCache(redis_url="redis://127.0.0.1:1/0", redis_backoff=60)
+    compute = _Counter(True)
+
+    assert cache.get_or_compute("mx", "a.com", compute) is True
+    assert cache._client() is None  # backing off
+    assert cache.get_or_compute("mx", "a.com", compute) is True
+    assert compute.calls == 1
+
+
+def test_validate_single_resolves_each_domain_once(monkeypatch):
+    monkeypatch.setattr(email_validator, "domain_cache", _cache())
+    calls = []
+
+    def fake_resolve(domain, rdtype, lifetime):
+        calls.append(domain)
+        if domain == "flaky.com":
+            raise dns.resolver.Timeout()
+        if domain == "nomx.com":
+            raise dns.resolver.NXDOMAIN()
+        return ["mx1"]
+
+    monkeypatch.setattr(email_validator.dns.resolver, "resolve", fake_resolve)
+
+    assert email_validator.validate_single("jane@ok.com") == (True, None)
+    assert email_validator.validate_single("john@ok.com") == (True, None)
+    assert email_validator.validate_single("jane@nomx.com") == (False, "no_mx_records")
+    assert email_validator.validate_single("jane@nomx.com") == (False, "no_mx_records")
+    # Transient errors assume valid and are not cached
+    assert email_validator.validate_single("jane@flaky.com") == (True, None)
+    assert email_validator.validate_single("jane@flaky.com") == (True, None)
+
+    assert calls == ["ok.com", "nomx.com", "flaky.com", "flaky.com"]
+
+
+@pytest.mark.parametrize("require_mx", [False, True])
+def test_contact_validator_caches_only_mx(monkeypatch, require_mx):
+    resolved = []
+
+    def fake_resolve_mx(domain):
+        resolved.append(domain)
+        return domain != "nomx.com"
+
+    monkeypatch.setattr(email_validator, "_resolve_mx", fake_resolve_mx)
+    cache = _cache()
+    validator = ContactValidator(check_mx=require_mx, domain_cache=cache)
+
+    validator.validate("a@gmial.com")
+    status, _, errors = validator.validate("b@gmial.com")
+    assert errors == ["Possible typo: did you mean gmail.com?"]
+
+    status, _, errors = validator.validate("a@nomx.com")
+    validator.validate("b@nomx.com")
+    assert (status.value, errors) == (
+        ("invalid", ["No MX records for domain"]) if require_mx else ("valid", [])
+    )
+    # One MX lookup per domain; disposable/typo verdicts never touch the cache
+    assert resolved == (["gmial.com", "nomx.com"] if require_mx else [])
+    assert {key.split(":")[1] for key in cache._local} <= {"mx"}
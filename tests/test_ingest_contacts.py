@@ -0,0 +1,305 @@
+"""Tests for bulk contact ingestion (IngestContactsUseCase).
+
+Tests couverts :
+  - Création en masse : compteurs + lignes en base
+  - Mise à jour : seuls les champs fournis écrasent, custom_fields fusionnés, tags add-only
+  - Conflit (ligne insérée par un autre écrivain) : mêmes règles de fusion, statut conservé
+  - Doublons dans un même lot, emails invalides, découpage en chunks
+  - Tags en masse : nombre de requêtes constant, tags existants réutilisés
+  - Endpoint streaming /ingest/stream : NDJSON et CSV, progression par chunk
+  - CSV : guillemet non fermé rejeté au-delà de CSV_MAX_RECORD_CHARS, lecture reprise ensuite
+  - Ligne plus longue que STREAM_MAX_LINE_BYTES : 413, ou ligne finale "done": false en cours de flux
+"""
+
+import json
+
+import pytest
+from sqlalchemy import event
+
+from app.models import Contact, ContactTag, DataSource, Tag, Tenant
+from src.application.use_cases.ingest_contacts import (
+    IngestContactDTO,
+    IngestContactsUseCase,
+)
+from src.infrastructure.persistence import SQLAlchemyContactRepository
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ─────────────────────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def source(db):
+    tenant = Tenant(
+        slug="acme",
+        name="Acme",
+        brand_domain="acme.com",
+        sending_domain_base="mail.acme.com",
+    )
+    db.add(tenant)
+    db.commit()
+    ds = DataSource(tenant_id=tenant.id, name="Scraper-Pro", type="scraper_pro")
+    db.add(ds)
+    db.commit()
+    return ds
+
+
+def _dto(source, email, **kwargs):
+    return IngestContactDTO(
+        tenant_id=source.tenant_id,
+        data_source_id=source.id,
+        email=email,
+        **kwargs,
+    )
+
+
+def _ingest(db, dtos, chunk_size=500):
+    use_case = IngestContactsUseCase(SQLAlchemyContactRepository(db), chunk_size=chunk_size)
+    result = use_case.execute(dtos)
+    db.commit()
+    return result
+
+
+def _tags_of(db, email):
+    return sorted(
+        slug
+        for (slug,) in db.query(Tag.slug)
+        .join(ContactTag, ContactTag.tag_id == Tag.id)
+        .join(Contact, Contact.id == ContactTag.contact_id)
+        .filter(Contact.email == email)
+    )
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+def test_ingest_new_contacts(db, source):
+    result = _ingest(db, [
+        _dto(source, "a@example.com", first_name="Ann", tags=["Blogger"]),
+        _dto(source, "b@example.com"),
+    ])
+
+    assert result.total_processed == 2
+    assert result.new_contacts == 2
+    assert result.updated_contacts == 0
+    assert result.errors == []
+    assert db.query(Contact).count() == 2
+    assert _tags_of(db, "a@example.com") == ["blogger"]
+
+
+def test_ingest_update_merges_like_single_row_path(db, source):
+    _ingest(db, [
+        _dto(
+            source,
+            "a@example.com",
+            first_name="Ann",
+            company="Acme",
+            custom_fields={"src": "scraper", "score": 1},
+            tags=["blogger"],
+        ),
+    ])
+
+    result = _ingest(db, [
+        _dto(
+            source,
+            "a@example.com",
+            first_name="Anna",
+            custom_fields={"score": 2},
+            tags=["influencer"],
+        ),
+    ])
+
+    assert result.updated_contacts == 1
+    assert result.new_contacts == 0
+
+    contact = db.query(Contact).filter_by(email="a@example.com").one()
+    db.refresh(contact)
+    assert contact.first_name == "Anna"
+    assert contact.company == "Acme"  # not provided → untouched
+    assert json.loads(contact.custom_fields) == {"src": "scraper", "score": 2}
+    assert contact.updated_at is not None
+    assert _tags_of(db, "a@example.com") == ["blogger", "influencer"]
+
+
+def test_row_inserted_concurrently_is_merged_not_overwritten(db, source, monkeypatch):
+    db.add(Contact(
+        tenant_id=source.tenant_id, data_source_id=source.id, email="a@example.com",
+        first_name="Ann", company="Acme", custom_fields=json.dumps({"src": "scraper"}),
+        status="unsubscribed", validation_status="valid", language="fr",
+    ))
+    db.commit()
+    # The other writer's row is not seen when the chunk is read
+    monkeypatch.setattr(SQLAlchemyContactRepository, "find_by_emails", lambda self, keys: {})
+
+    _ingest(db, [_dto(source, "a@example.com", first_name="Anna", custom_fields={"score": 2})])
+
+    contact = db.query(Contact).filter_by(email="a@example.com").one()
+    db.refresh(contact)
+    assert (contact.first_name, contact.company, contact.language) == ("Anna", "Acme", "fr")
+    assert (contact.status, contact.validation_status) == ("unsubscribed", "valid")
+    assert json.loads(contact.custom_fields) == {"src": "scraper", "score": 2}
+
+
+def test_duplicate_email_in_batch_counts_as_update(db, source):
+    result = _ingest(db, [
+        _dto(source, "a@example.com", first_name="Ann"),
+        _dto(source, "a@example.com", last_name="Smith"),
+    ])
+
+    assert result.new_contacts == 1
+    assert result.updated_contacts == 1
+    contact = db.query(Contact).filter_by(email="a@example.com").one()
+    assert (contact.first_name, contact.last_name) == ("Ann", "Smith")
+
+
+def test_invalid_rows_are_reported_and_skipped(db, source):
+    result = _ingest(db, [
+        _dto(source, "not-an-email"),
+        _dto(source, "ok@example.com", language="xx"),
+        _dto(source, "fine@example.com"),
+    ])
+
+    assert result.total_processed == 1
+    assert len(result.errors) == 2
+    assert result.errors[0].startswith("Invalid email not-an-email")
+    assert db.query(Contact).count() == 1
+
+
+def test_ingest_spans_multiple_chunks(db, source):
+    dtos = [_dto(source, f"user{i}@example.com") for i in range(7)]
+    result = _ingest(db, dtos, chunk_size=3)
+
+    assert result.new_contacts == 7
+    assert db.query(Contact).count() == 7
+
+    result = _ingest(db, dtos, chunk_size=3)
+    assert result.updated_contacts == 7
+    assert db.query(Contact).count() == 7
+
+
+def test_heavily_tagged_chunk_uses_constant_statements(db, source):
+    db.add(Tag(tenant_id=source.tenant_id, slug="tag-0", label="Tag 0"))
+    db.commit()
+    tags = [f"Tag {i}" for i in range(10)]
+    dtos = [_dto(source, f"user{i}@example.com", tags=tags) for i in range(40)]
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        result = _ingest(db, dtos)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+
+    assert result.new_contacts == 40
+    assert len([s for s in statements if "tags" in s]) <= 4
+    assert db.query(Tag).count() == 10
+    assert db.query(Tag).filter_by(slug="tag-0").one().label == "Tag 0"
+    assert db.query(ContactTag).count() == 400
+
+    # Re-ingesting the same links is a no-op
+    _ingest(db, dtos[:5])
+    assert db.query(ContactTag).count() == 400
+
+
+def _stream_lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_stream_ingest_ndjson(client, db, source):
+    body = "\n".join([
+        json.dumps({"email": "a@example.com", "tags": ["blogger"]}),
+        "{not json",
+        json.dumps({"email": "b@example.com"}),
+        json.dumps({"email": "c@example.com", "tenant_id": source.tenant_id}),
+    ])
+    response = client.post(
+        "/api/v2/contacts/ingest/stream",
+        params={"tenant_id": source.tenant_id, "data_source_id": source.id, "chunk_size": 2},
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    lines = _stream_lines(response)
+    assert [line["chunk"] for line in lines[:-1]] == [1, 2]
+    assert lines[0]["errors"][0].startswith("Line 2: invalid JSON")
+    assert lines[-1] == {
+        "done": True,
+        "chunks": 2,
+        "total_processed": 3,
+        "new_contacts": 3,
+        "updated_contacts": 0,
+        "duplicates_skipped": 0,
+        "errors": 1,
+    }
+    assert db.query(Contact).count() == 3
+    assert _tags_of(db, "a@example.com") == ["blogger"]
+
+
+def test_stream_ingest_csv(client, db, source):
+    body = (
+        "email,first_name,tags,score,notes\r\n"
+        'a@example.com,Ann,Blogger|Influencer,7,"multi\nline"\r\n'
+        "missing-tenant-row\r\n"
+    )
+    response = client.post(
+        "/api/v2/contacts/ingest/stream",
+        params={"tenant_id": source.tenant_id, "data_source_id": source.id},
+        content=body,
+        headers={"Content-Type": "text/csv"},
+    )
+
+    lines = _stream_lines(response)
+    assert lines[-1]["new_contacts"] == 1
+    assert lines[-1]["errors"] == 1
+
+    contact = db.query(Contact).filter_by(email="a@example.com").one()
+    assert contact.first_name == "Ann"
+    assert json.loads(contact.custom_fields) == {"score": "7", "notes": "multi\nline"}
+    assert _tags_of(db, "a@example.com") == ["blogger", "influencer"]
+
+
+def test_stream_ingest_csv_unbalanced_quote_is_bounded(client, db, source, monkeypatch):
+    monkeypatch.setattr("src.presentation.api.v2.contacts.CSV_MAX_RECORD_CHARS", 60)
+    body = (
+        "email,notes\n"
+        'a@example.com,"never closed\n'
+        + "".join(f"filler-{i}@example.com,x\n" for i in range(5))
+        + "b@example.com,ok\n"
+        + 'c@example.com,"open again\n'
+    )
+    response = client.post(
+        "/api/v2/contacts/ingest/stream",
+        params={"tenant_id": source.tenant_id, "data_source_id": source.id},
+        content=body,
+        headers={"Content-Type": "text/csv"},
+    )
+
+    lines = _stream_lines(response)
+    errors = [error for line in lines[:-1] for error in line["errors"]]
+    assert errors[0].startswith("Line 2: CSV record longer than 60 characters")
+    assert errors[-1] == "Line 9: unterminated quoted field at end of upload"
+    # Lecture reprise après le rejet : la ligne valide suivante est ingérée
+    assert db.query(Contact).filter_by(email="b@example.com").count() == 1
+    assert db.query(Contact).filter_by(email="a@example.com").count() == 0
+
+
+def test_stream_ingest_line_over_cap_is_rejected(client, db, source, monkeypatch):
+    monkeypatch.setattr("src.presentation.api.v2.contacts.STREAM_MAX_LINE_BYTES", 80)
+    params = {"tenant_id": source.tenant_id, "data_source_id": source.id}
+    long_line = json.dumps({"email": "b@example.com", "notes": "x" * 200})
+
+    response = client.post("/api/v2/contacts/ingest/stream", params=params,
+                           content=json.dumps({"email": "a@example.com"}) + "\n" + long_line)
+    assert response.status_code == 413
+    assert db.query(Contact).count() == 0
+
+    response = client.post("/api/v2/contacts/ingest/stream", params={**params, "chunk_size": 1},
+                           content=json.dumps({"email": "a@example.com"}) + "\n" + long_line + "\n")
+    lines = _stream_lines(response)
+    assert lines[-1] == {"done": False, "error": "Line longer than 80 bytes", "status_code": 413, "chunks": 1,
+                         "total_processed": 1, "new_contacts": 1, "updated_contacts": 0,
+                         "duplicates_skipped": 0, "errors": 0}
+    assert db.query(Contact).count() == 1
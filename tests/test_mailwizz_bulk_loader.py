@@ -0,0 +1,186 @@
+"""Tests for the direct MySQL bulk subscriber loader (MailWizzDB.bulk_load_subscribers).
+
+Tests couverts :
+  - INSERT multi-lignes par chunk, field values des nouveaux abonnés
+  - Dédoublonnage : emails déjà dans la liste et doublons du lot
+  - Écriture en retour de mailwizz_subscriber_id dans contacts (session hors boucle asyncio)
+"""
+
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+
+from app.models import Contact, DataSource, Tenant
+from app.services.mailwizz_db import MailWizzDB
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Helpers — SQLite stand-in for the MailWizz schema behind the aiomysql API
+# ─────────────────────────────────────────────────────────────────────────────
+
+SCHEMA = """
+CREATE TABLE mw_list_subscriber (
+    subscriber_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    subscriber_uid CHAR(13) NOT NULL UNIQUE,
+    list_id INTEGER NOT NULL,
+    email VARCHAR(100) NOT NULL,
+    source VARCHAR(10),
+    status VARCHAR(15),
+    date_added DATETIME,
+    last_updated DATETIME,
+    UNIQUE (list_id, email)
+);
+CREATE TABLE mw_list_field (field_id INTEGER PRIMARY KEY, list_id INTEGER, tag VARCHAR(50));
+CREATE TABLE mw_list_field_value (
+    value_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    field_id INTEGER, subscriber_id INTEGER, value VARCHAR(255),
+    date_added DATETIME, last_updated DATETIME
+);
+INSERT INTO mw_list_field VALUES (1, 7, 'EMAIL'), (2, 7, 'FNAME'), (3, 7, 'LNAME');
+"""
+
+
+def _sql(query):
+    return query.replace("%s", "?").replace("INSERT IGNORE", "INSERT OR IGNORE")
+
+
+class _Cursor:
+    def __init__(self, conn, log):
+        self._cur = conn.cursor()
+        self.log = log
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._cur.close()
+
+    async def execute(self, query, params=()):
+        self.log.append(("execute", query.split()[0]))
+        self._cur.execute(_sql(query), params)
+
+    async def executemany(self, query, rows):
+        table = query.split("INTO")[1].split()[0]
+        self.log.append(("executemany", table, len(rows)))
+        self._cur.executemany(_sql(query), rows)
+
+    async def fetchall(self):
+        return self._cur.fetchall()
+
+
+class _Connection:
+    def __init__(self, conn, log):
+        self._conn = conn
+        self.log = log
+
+    async def ping(self, reconnect=False):
+        pass
+
+    def cursor(self):
+        return _Cursor(self._conn, self.log)
+
+    async def begin(self):
+        pass
+
+    async def commit(self):
+        self._conn.commit()
+
+    async def rollback(self):
+        self._conn.rollback()
+
+
+class _Pool:
+    size = maxsize = 1
+    freesize = 0
+
+    def __init__(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.executescript(SCHEMA)
+        self.log = []
+
+    async def acquire(self):
+        return _Connection(self.conn, self.log)
+
+    def release(self, conn):
+        pass
+
+
+@pytest.fixture
+def mw():
+    loader = MailWizzDB()
+    loader._pool = _Pool()
+    return loader
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+def test_bulk_load_inserts_chunks_and_dedupes(mw):
+    first = asyncio.run(mw.bulk_load_subscribers(7, [
+        {"EMAIL": "a@example.com", "FNAME": "Ann"},
+        {"EMAIL": "b@example.com"},
+    ]))
+    assert (first["inserted"], first["existing"]) == (2, 0)
+
+    mw._pool.log.clear()
+    subscribers = [{"EMAIL": f"user{i}@example.com", "FNAME": f"U{i}", "COMPANY": "ignored"} for i in range(5)]
+    subscribers += [{"EMAIL": "A@example.com"}, {"EMAIL": "user0@example.com"}]  # existing + in-batch duplicate
+    result = asyncio.run(mw.bulk_load_subscribers(7, subscribers, chunk_size=3))
+
+    assert (result["inserted"], result["existing"]) == (5, 1)
+    assert result["subscriber_ids"]["a@example.com"] == first["subscriber_ids"]["a@example.com"]
+    # 2 chunks of 3 emails: one multi-row insert per table per chunk
+    assert [entry for entry in mw._pool.log if entry[0] == "executemany"] == [
+        ("executemany", "mw_list_subscriber", 3),
+        ("executemany", "mw_list_field_value", 6),
+        ("executemany", "mw_list_subscriber", 2),
+        ("executemany", "mw_list_field_value", 4),
+    ]
+
+    rows = mw._pool.conn.execute(
+        """SELECT s.email, f.tag, v.value FROM mw_list_field_value v
+           JOIN mw_list_subscriber s USING (subscriber_id) JOIN mw_list_field f USING (field_id)
+           WHERE s.email = 'user3@example.com' ORDER BY f.tag"""
+    ).fetchall()
+    assert rows == [("user3@example.com", "EMAIL", "user3@example.com"), ("user3@example.com", "FNAME", "U3")]
+    assert mw._pool.conn.execute("SELECT COUNT(*) FROM mw_list_subscriber").fetchone() == (7,)
+
+
+def test_bulk_load_contacts_writes_subscriber_ids_back(mw, db):
+    tenant = Tenant(slug="acme", name="Acme", brand_domain="acme.com", sending_domain_base="mail.acme.com")
+    db.add(tenant)
+    db.commit()
+    ds = DataSource(tenant_id=tenant.id, name="Scraper-Pro", type="scraper_pro")
+    db.add(ds)
+    db.commit()
+    contacts = [
+        Contact(tenant_id=tenant.id, data_source_id=ds.id, email=f"c{i}@example.com", first_name="C")
+        for i in range(4)
+    ]
+    db.add_all(contacts)
+    db.commit()
+
+    loop_threads = []
+    execute = db.execute
+
+    def recording_execute(*args, **kwargs):
+        loop_threads.append(threading.current_thread())
+        return execute(*args, **kwargs)
+
+    db.execute = recording_execute  # write-back UPDATE
+    result = asyncio.run(mw.bulk_load_contacts(db, contacts, list_id=7))
+    del db.execute
+    db.commit()
+
+    assert loop_threads and threading.main_thread() not in loop_threads
+
+    assert (result["inserted"], result["contacts_updated"]) == (4, 4)
+    db.expire_all()
+    stored = dict(db.query(Contact.email, Contact.mailwizz_subscriber_id))
+    assert stored == {
+        email: sid for sid, email in mw._pool.conn.execute("SELECT subscriber_id, email FROM mw_list_subscriber")
+    }
+    assert {c.mailwizz_list_id for c in db.query(Contact)} == {7}
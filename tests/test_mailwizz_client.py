@@ -0,0 +1,129 @@
+"""Tests for the pooled MailWizz REST client (src/infrastructure/external/mailwizz_client.py).
+
+Tests couverts :
+  - Session persistante : auth, pool et retries configurés une fois
+  - Import bulk : découpage en chunks, résultats par abonné dans l'ordre
+  - Client async : retries avec backoff sur méthodes idempotentes uniquement
+"""
+
+import asyncio
+
+import httpx
+import pytest
+import requests
+
+from src.infrastructure.external import AsyncMailWizzClient, MailWizzClient
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _bulk_response(subscribers):
+    records = []
+    for subscriber in subscribers:
+        if subscriber["EMAIL"].startswith("dup"):
+            records.append({"status": "error", "error": "Email already exists"})
+        else:
+            records.append({"status": "success", "data": {"record": {"subscriber_uid": f"uid-{subscriber['EMAIL']}"}}})
+    return {"status": "success", "data": {"records": records}}
+
+
+class _FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self.payload = payload
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error", response=self)
+
+    def json(self):
+        return self.payload
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+def test_client_reuses_one_pooled_session():
+    client = MailWizzClient("https://mw.example.com/", "pub", "priv", pool_size=25, max_retries=4)
+
+    adapter = client.session.get_adapter("https://mw.example.com/api/lists")
+    assert adapter._pool_maxsize == 25
+    assert adapter.max_retries.total == 4
+    assert 503 in adapter.max_retries.status_forcelist
+    assert "POST" not in adapter.max_retries.allowed_methods
+    assert client.session.headers["X-MW-PUBLIC-KEY"] == "pub"
+    client.close()
+
+
+def test_bulk_import_batches_subscribers_per_call(monkeypatch):
+    client = MailWizzClient("https://mw.example.com", "pub", "priv")
+    calls = []
+
+    def fake_request(method, url, json=None, timeout=None):
+        calls.append((method, url, len(json["subscribers"])))
+        if len(calls) == 2:
+            return _FakeResponse({}, status_code=500)
+        return _FakeResponse(_bulk_response(json["subscribers"]))
+
+    monkeypatch.setattr(client.session, "request", fake_request)
+    subscribers = [{"EMAIL": f"user{i}@example.com"} for i in range(2500)]
+    subscribers[10] = {"EMAIL": "dup@example.com"}
+
+    results = client.create_subscribers_bulk("list-1", subscribers, chunk_size=1000)
+
+    assert calls == [
+        ("POST", "https://mw.example.com/api/lists/list-1/subscribers/bulk", 1000),
+        ("POST", "https://mw.example.com/api/lists/list-1/subscribers/bulk", 1000),
+        ("POST", "https://mw.example.com/api/lists/list-1/subscribers/bulk", 500),
+    ]
+    assert len(results) == 2500
+    assert results[0] == {
+        "email": "user0@example.com",
+        "success": True,
+        "subscriber_uid": "uid-user0@example.com",
+        "error": None,
+    }
+    assert results[10]["error"] == "Email already exists"
+    # The failed call only fails its own chunk
+    assert not any(r["success"] for r in results[1000:2000])
+    assert all(r["success"] for r in results[2000:])
+
+
+def test_bulk_chunk_size_is_bounded():
+    client = MailWizzClient("https://mw.example.com", "pub", "priv")
+    with pytest.raises(ValueError):
+        client.create_subscribers_bulk("list-1", [{"EMAIL": "a@example.com"}], chunk_size=20000)
+
+
+def test_async_client_retries_idempotent_requests_only():
+    attempts = {"GET": 0, "POST": 0}
+
+    def handler(request):
+        attempts[request.method] += 1
+        if attempts[request.method] < 3:
+            return httpx.Response(503)
+        if request.method == "POST":
+            return httpx.Response(200, json=_bulk_response([{"EMAIL": "a@example.com"}]))
+        return httpx.Response(200, json={"data": {"record": {"subscriber_uid": "uid-1"}}})
+
+    async def run():
+        async with AsyncMailWizzClient(
+            "https://mw.example.com",
+            "pub",
+            "priv",
+            backoff_factor=0,
+            transport=httpx.MockTransport(handler),
+        ) as client:
+            record = await client.get_subscriber("list-1", "uid-1")
+            bulk = await client.create_subscribers_bulk("list-1", [{"EMAIL": "a@example.com"}])
+        return record, bulk
+
+    record, bulk = asyncio.run(run())
+    assert record == {"subscriber_uid": "uid-1"}
+    assert attempts["GET"] == 3
+    # POST is never replayed: the 503 fails the chunk
+    assert attempts["POST"] == 1
+    assert bulk[0]["success"] is False
@@ -0,0 +1,169 @@
+"""Tests for the MailWizzDB aiomysql pool (configuration, health checks, metrics).
+
+Tests couverts :
+  - Pool créé avec les réglages MAILWIZZ_DB_POOL_*
+  - Ping avec reconnexion à chaque acquisition, _get_pool défini
+  - Délai d'acquisition max, recréation du pool après erreur de connexion
+  - Saturation et histogramme d'attente exportés dans le registre Prometheus
+"""
+
+import asyncio
+
+import aiomysql
+import pytest
+
+from app.api.routes.metrics import REGISTRY
+from app.config import settings
+from app.services import mailwizz_db as mailwizz_db_module
+from app.services.mailwizz_db import MailWizzDB
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ─────────────────────────────────────────────────────────────────────────────
+
+class _FakeCursor:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def execute(self, query, params=()):
+        self.query = query
+
+    async def fetchone(self):
+        return ("LICENSE-KEY",)
+
+
+class _FakeConnection:
+    def __init__(self):
+        self.pings = []
+        self.closed = False
+
+    async def ping(self, reconnect=False):
+        self.pings.append(reconnect)
+
+    def cursor(self, *args):
+        return _FakeCursor()
+
+    def close(self):
+        self.closed = True
+
+
+class _FakePool:
+    def __init__(self, maxsize=2, fail=False):
+        self.maxsize = maxsize
+        self.fail = fail
+        self.used = []
+        self.free = [_FakeConnection() for _ in range(maxsize)]
+        self.closed = False
+
+    @property
+    def size(self):
+        return len(self.used) + len(self.free)
+
+    @property
+    def freesize(self):
+        return len(self.free)
+
+    async def acquire(self):
+        if self.fail:
+            raise aiomysql.OperationalError(2003, "Can't connect to MySQL server")
+        while not self.free:
+            await asyncio.sleep(0.01)
+        conn = self.free.pop()
+        self.used.append(conn)
+        return conn
+
+    def release(self, conn):
+        self.used.remove(conn)
+        self.free.append(conn)
+
+    def close(self):
+        self.closed = True
+
+
+def _sample(name, labels=None):
+    return REGISTRY.get_sample_value(name, labels or {})
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+def test_pool_is_created_with_configured_sizes(monkeypatch):
+    captured = {}
+
+    async def fake_create_pool(**kwargs):
+        captured.update(kwargs)
+        return _FakePool()
+
+    monkeypatch.setattr(settings, "MAILWIZZ_DB_PASSWORD", "secret")
+    monkeypatch.setattr(settings, "MAILWIZZ_DB_POOL_MAX_SIZE", 32)
+    monkeypatch.setattr(settings, "MAILWIZZ_DB_POOL_RECYCLE_SECONDS", 900)
+    monkeypatch.setattr(mailwizz_db_module.aiomysql, "create_pool", fake_create_pool)
+
+    db = MailWizzDB()
+    assert asyncio.run(db._get_pool()) is db._pool
+    assert (captured["minsize"], captured["maxsize"], captured["pool_recycle"]) == (1, 32, 900)
+
+
+def test_acquire_pings_and_exports_saturation():
+    db = MailWizzDB()
+    db._pool = _FakePool(maxsize=4)
+    before = _sample("email_engine_mailwizz_db_acquire_seconds_count") or 0
+
+    async def run():
+        async with db._acquire() as first:
+            async with db._acquire():
+                saturation = _sample("email_engine_mailwizz_db_pool_saturation")
+        return first, saturation
+
+    conn, saturation = asyncio.run(run())
+    assert conn.pings == [True]
+    assert saturation == 0.5
+    assert _sample("email_engine_mailwizz_db_pool_saturation") == 0
+    assert _sample("email_engine_mailwizz_db_pool_connections", {"state": "max"}) == 4
+    assert _sample("email_engine_mailwizz_db_acquire_seconds_count") == before + 2
+
+    # Methods relying on _get_pool work through the same path
+    assert asyncio.run(db.get_option("system.license_key")) == "LICENSE-KEY"
+
+
+def test_acquire_times_out_when_pool_is_exhausted(monkeypatch):
+    monkeypatch.setattr(settings, "MAILWIZZ_DB_ACQUIRE_TIMEOUT_SECONDS", 0.05)
+    db = MailWizzDB()
+    db._pool = _FakePool(maxsize=1)
+
+    async def run():
+        async with db._acquire():
+            async with db._acquire():
+                pass
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(run())
+
+
+def test_broken_pool_is_recreated_once(monkeypatch):
+    broken = _FakePool(fail=True)
+    healthy = _FakePool()
+
+    async def fake_create_pool(**kwargs):
+        return healthy
+
+    monkeypatch.setattr(settings, "MAILWIZZ_DB_PASSWORD", "secret")
+    monkeypatch.setattr(mailwizz_db_module.aiomysql, "create_pool", fake_create_pool)
+    before = _sample("email_engine_mailwizz_db_reconnects_total") or 0
+
+    db = MailWizzDB()
+    db._pool = broken
+
+    async def run():
+        async with db._acquire() as conn:
+            return conn
+
+    assert asyncio.run(run()) in healthy.free
+    assert broken.closed
+    assert db._pool is healthy
+    assert _sample("email_engine_mailwizz_db_reconnects_total") == before + 1
@@ -0,0 +1,409 @@
+"""Tests for batched quota evaluation in QuotaChecker.
+
+Tests couverts :
+  - evaluate_ips : une requête jointe IPs + plans, un seul MGET Redis
+  - get_available_ips_for_sending : classement (actives, puis reste décroissant)
+  - GET /api/v2/quotas/{tenant_id} via l'évaluation en lot
+  - Réservation atomique (script Lua) : mono-IP, multi-IP, partielle, remboursement
+  - Expiration des compteurs après le changement de jour
+  - Scripts Lua exécutés par un vrai Redis (REDIS_TEST_URL, sinon fakeredis + lupa ;
+    ignorés si aucun n'est disponible) : réservation, remboursement, EXPIREAT, concurrence
+  - SendAllocator : répartition pondérée (quota restant x poids) sur le pool,
+    plan par IP avec noms de VMTA, complément après course, libération
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import redis
+from sqlalchemy import event
+
+from app.models import IP, Tenant, WarmupPlan
+from src.domain.services import QuotaChecker, SendAllocator
+from src.domain.services.quota_checker import (
+    REFUND_SCRIPT,
+    RESERVE_SCRIPT,
+    SENT_KEY_GRACE_SECONDS,
+    build_sent_key,
+    sent_key_expire_at,
+)
+from src.domain.services.send_allocator import allocate_shares
+from src.infrastructure.cache.redis_cache import RedisCache
+from tests.conftest import test_engine
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ─────────────────────────────────────────────────────────────────────────────
+
+class _FakeCache:
+    def __init__(self, values=None):
+        self.values = values or {}
+        self.expire_at = {}
+        self.calls = []
+
+    def get(self, key):
+        self.calls.append(("get", key))
+        return self.values.get(key)
+
+    def get_many(self, keys):
+        self.calls.append(("mget", tuple(keys)))
+        return [self.values.get(key) for key in keys]
+
+    def increment(self, key, amount=1):
+        self.values[key] = int(self.values.get(key) or 0) + amount
+        return self.values[key]
+
+    def run_script(self, script, keys, args):
+        """Python rendition of the Lua scripts' contract (no Lua-capable Redis in tests)."""
+        self.calls.append(("script", script, tuple(keys)))
+        sent = [int(self.values.get(key) or 0) for key in keys]
+        if script == REFUND_SCRIPT:
+            refunds = [max(0, min(int(n), count)) for n, count in zip(args, sent, strict=True)]
+            for key, refund, count in zip(keys, refunds, sent, strict=True):
+                self.values[key] = count - refund
+            return refunds
+
+        assert script == RESERVE_SCRIPT
+        expire_at, needed, allow_partial = args[0], args[1], args[2] == 1
+        grants, total = [], 0
+        for i, count in enumerate(sent):
+            limit, wanted = args[3 + i * 2], args[4 + i * 2]
+            grant = min(wanted, needed - total)
+            if limit >= 0:
+                grant = min(grant, limit - count)
+            grants.append(max(grant, 0))
+            total += grants[-1]
+        if total < needed and not allow_partial:
+            return [0] * len(keys)
+        for key, grant, count in zip(keys, grants, sent, strict=True):
+            if grant:
+                self.values[key] = count + grant
+                self.expire_at[key] = expire_at
+        return grants
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    fake = _FakeCache()
+    monkeypatch.setattr("src.domain.services.quota_checker.get_cache", lambda: fake)
+    return fake
+
+
+@pytest.fixture
+def lua_cache(monkeypatch):
+    """RedisCache on a server that really runs the Lua scripts (skipped when unavailable)."""
+    url = os.environ.get("REDIS_TEST_URL")
+    if url:
+        client = redis.Redis.from_url(url, decode_responses=True)
+        try:
+            client.ping()
+        except redis.RedisError:
+            pytest.skip(f"Redis not reachable at {url}")
+    else:
+        fakeredis = pytest.importorskip("fakeredis")
+        pytest.importorskip("lupa")  # fakeredis needs lupa for EVAL/EVALSHA
+        client = fakeredis.FakeRedis(decode_responses=True)
+
+    cache = RedisCache()
+    cache.redis = client
+    monkeypatch.setattr("src.domain.services.quota_checker.get_cache", lambda: cache)
+    keys = [build_sent_key(ip_id) for ip_id in LUA_IP_IDS]
+    client.delete(*keys)
+    yield cache
+    client.delete(*keys)
+
+
+# IP ids used against a real server (well clear of any real IP row)
+LUA_IP_IDS = (990_001, 990_002)
+
+
+@pytest.fixture
+def tenant_ips(db, cache):
+    tenant = Tenant(slug="acme", name="Acme", brand_domain="acme.com", sending_domain_base="mail.acme.com")
+    db.add(tenant)
+    db.commit()
+
+    ips = {}
+    for name, status, quota, paused, sent in [
+        ("w-low", "warming", 500, False, 450),
+        ("w-high", "warming", 1000, False, 100),
+        ("w-paused", "warming", 1000, True, 0),
+        ("active", "active", None, False, 0),
+        ("standby", "standby", None, False, 0),
+    ]:
+        ip = IP(address=f"10.0.0.{len(ips) + 1}", hostname=f"{name}.acme.com", status=status, tenant_id=tenant.id)
+        db.add(ip)
+        db.flush()
+        if quota:
+            db.add(WarmupPlan(tenant_id=tenant.id, ip_id=ip.id, current_daily_quota=quota, paused=paused))
+            cache.values[build_sent_key(ip.id)] = sent
+        ips[name] = ip.id
+    db.commit()
+    return tenant.id, ips
+
+
+@pytest.fixture
+def warming_pool(db, cache):
+    """Five warming IPs with 800 emails left each, the last one weighted x3."""
+    tenant = Tenant(slug="pool", name="Pool", brand_domain="pool.com", sending_domain_base="mail.pool.com")
+    db.add(tenant)
+    db.commit()
+
+    ips = []
+    for i in range(5):
+        ip = IP(
+            address=f"10.1.0.{i}", hostname=f"mail{i}.pool.com", status="warming", tenant_id=tenant.id,
+            weight=300 if i == 4 else 100, vmta_name="vmta-provisioned" if i == 0 else None,
+        )
+        db.add(ip)
+        db.flush()
+        db.add(WarmupPlan(tenant_id=tenant.id, ip_id=ip.id, current_daily_quota=1000))
+        cache.values[build_sent_key(ip.id)] = 200
+        ips.append(ip.id)
+    db.commit()
+    return tenant.id, ips
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+def test_evaluate_ips_uses_one_query_and_one_mget(db, cache, tenant_ips):
+    tenant_id, ips = tenant_ips
+    db.expire_all()
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+    event.listen(test_engine, "before_cursor_execute", listener)
+    try:
+        evaluations = QuotaChecker(db).evaluate_ips(tenant_id, emails_to_send=100)
+    finally:
+        event.remove(test_engine, "before_cursor_execute", listener)
+
+    assert len([s for s in statements if s.lstrip().upper().startswith("SELECT")]) == 1
+    assert cache.calls == [("mget", (
+        build_sent_key(ips["w-low"]), build_sent_key(ips["w-high"]), build_sent_key(ips["w-paused"]),
+    ))]
+
+    by_id = {ip.id: (allowed, info) for ip, allowed, _, info in evaluations}
+    assert by_id[ips["w-low"]][0] is False
+    assert by_id[ips["w-low"]][1]["would_exceed"]
+    assert by_id[ips["w-high"]][1]["remaining"] == 900
+    assert by_id[ips["w-paused"]][1]["paused"]
+
+
+def test_available_ips_are_ranked_in_one_pass(db, cache, tenant_ips):
+    tenant_id, ips = tenant_ips
+
+    available = QuotaChecker(db).get_available_ips_for_sending(tenant_id, emails_to_send=40)
+
+    assert [ip["ip_id"] for ip in available] == [ips["active"], ips["w-high"], ips["w-low"], ips["standby"]]
+    assert [call[0] for call in cache.calls] == ["mget"]
+
+
+def test_single_ip_check_matches_batch_evaluation(db, cache, tenant_ips):
+    tenant_id, ips = tenant_ips
+    checker = QuotaChecker(db)
+
+    batch = {ip.id: result for ip, *result in checker.evaluate_ips(tenant_id, 60)}
+    for ip_id in ips.values():
+        assert list(checker.check_quota(ip_id, 60)) == batch[ip_id]
+
+
+def test_tenant_quotas_endpoint(client, cache, tenant_ips):
+    tenant_id, ips = tenant_ips
+
+    response = client.get(f"/api/v2/quotas/{tenant_id}")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["total_ips"], body["active_ips"], body["warming_ips"]) == (5, 1, 2)
+    assert body["remaining_today"] == "unlimited"
+    assert {ip["ip_id"]: ip["remaining"] for ip in body["ips"]}[ips["w-high"]] == 900
+    assert [call[0] for call in cache.calls] == ["mget"]
+
+    assert client.get("/api/v2/quotas/999").status_code == 404
+
+
+def test_reserve_quota_is_one_atomic_script_call(db, cache, tenant_ips):
+    tenant_id, ips = tenant_ips
+    checker = QuotaChecker(db)
+    key = build_sent_key(ips["w-low"])
+
+    assert checker.reserve_quota(ips["w-low"], 50) is True
+    assert cache.values[key] == 500
+    assert [call[0] for call in cache.calls].count("script") == 1
+    # Quota exhausted: rejected without touching the counter
+    assert checker.reserve_quota(ips["w-low"], 1) is False
+    assert cache.values[key] == 500
+    assert checker.reserve_quota(ips["w-paused"], 1) is False
+
+
+def test_script_rechecks_quota_taken_by_a_concurrent_send(db, cache, tenant_ips):
+    tenant_id, ips = tenant_ips
+    checker = QuotaChecker(db)
+    key = build_sent_key(ips["w-high"])
+
+    # Another worker consumed the quota between the check and the reservation
+    reservation = checker.reserve_quotas([(ips["w-high"], 1000)], 100)
+    cache.values[key] = 950
+    assert checker.reserve_quotas([(ips["w-high"], 1000)], 100).grants == {}
+    assert cache.values[key] == 950
+    assert reservation.complete
+
+
+def test_multi_ip_reservation_fills_in_order(db, cache, tenant_ips):
+    tenant_id, ips = tenant_ips
+    checker = QuotaChecker(db)
+    limits = [(ips["w-high"], 1000), (ips["w-low"], 500)]
+
+    reservation = checker.reserve_quotas(limits, 920)
+    assert reservation.grants == {ips["w-high"]: 900, ips["w-low"]: 20}
+    assert reservation.complete
+
+    # Not enough left on the pool: all or nothing unless partial is allowed
+    assert checker.reserve_quotas(limits, 100).grants == {}
+    partial = checker.reserve_quotas(limits, 100, allow_partial=True)
+    assert (partial.grants, partial.reserved, partial.complete) == ({ips["w-low"]: 30}, 30, False)
+
+    # Weighted split: per-IP wanted counts cap each grant
+    cache.values.clear()
+    split = checker.reserve_quotas(limits, 300, wanted={ips["w-high"]: 200, ips["w-low"]: 100})
+    assert split.grants == {ips["w-high"]: 200, ips["w-low"]: 100}
+
+
+def test_tenant_reservation_skips_standby_and_prefers_active(db, cache, tenant_ips):
+    tenant_id, ips = tenant_ips
+
+    reservation = QuotaChecker(db).reserve_for_tenant(tenant_id, 5000)
+
+    assert reservation.grants == {ips["active"]: 5000}
+    (_, _, keys), = [call for call in cache.calls if call[0] == "script"]
+    assert keys == tuple(build_sent_key(ips[name]) for name in ("active", "w-high", "w-low"))
+
+
+def test_refund_gives_back_unsent_quota_once(db, cache, tenant_ips):
+    tenant_id, ips = tenant_ips
+    checker = QuotaChecker(db)
+    reservation = checker.reserve_quotas([(ips["w-high"], 1000), (ips["w-low"], 500)], 920)
+
+    assert checker.refund_quota(reservation, {ips["w-low"]: 20}) == 20
+    assert cache.values[build_sent_key(ips["w-low"])] == 450
+    assert checker.refund_quota(reservation) == 900
+    assert cache.values[build_sent_key(ips["w-high"])] == 100
+    # Refunding twice never eats quota reserved by others
+    assert checker.refund_quota(reservation) == 0
+
+
+def test_counters_expire_after_day_rollover(db, cache, tenant_ips):
+    tenant_id, ips = tenant_ips
+
+    reservation = QuotaChecker(db).reserve_quotas([(ips["w-high"], 1000)], 10, day="2026-03-01")
+
+    key = build_sent_key(ips["w-high"], "2026-03-01")
+    assert cache.expire_at[key] == sent_key_expire_at("2026-03-01")
+    # 2026-03-02T00:00:00Z plus the grace period for the nightly consolidation
+    assert sent_key_expire_at("2026-03-01") == 1772409600 + SENT_KEY_GRACE_SECONDS
+    assert QuotaChecker(db).refund_quota(reservation) == 10
+    assert cache.values[key] == 0
+
+
+def test_allocate_shares_weights_and_caps():
+    assert allocate_shares([(1, 800, 100), (2, 400, 100)], 600) == {1: 400, 2: 200}
+    # Weight x3 would ask 1500 of IP 3: capped at 800, the rest spread over the others
+    assert allocate_shares([(1, 800, 100), (2, 800, 100), (3, 800, 300)], 2000) == {1: 600, 2: 600, 3: 800}
+    # Unlimited IPs weigh as if they could take everything
+    assert allocate_shares([(1, 100, 100), (2, None, 100)], 100) == {1: 50, 2: 50}
+    # Not enough quota: every IP filled, shortfall left to the caller
+    assert allocate_shares([(1, 10, 100), (2, 0, 100), (3, 50, 0)], 50) == {1: 10}
+    assert sum(allocate_shares([(i, 1000, 100) for i in range(3)], 1000).values()) == 1000
+
+
+def test_campaign_is_split_across_the_pool(db, cache, warming_pool):
+    tenant_id, ips = warming_pool
+
+    plan = SendAllocator(db).plan_campaign(tenant_id, 3000)
+
+    assert plan.complete and plan.pool_name == "pool-pool"
+    counts = {share.ip_id: share.count for share in plan.shares}
+    assert sum(counts.values()) == 3000
+    assert counts[ips[4]] == 800  # weight x3 share capped at its remaining quota
+    assert all(count <= 800 for count in counts.values())
+    assert {cache.values[build_sent_key(ip_id)] - 200 for ip_id in ips} == set(counts.values())
+    assert {share.ip_id: share.vmta_name for share in plan.shares}[ips[0]] == "vmta-provisioned"
+    assert {share.ip_id: share.vmta_name for share in plan.shares}[ips[1]] == f"vmta-pool-{ips[1]}"
+    assert plan.to_dict()["planned"] == 3000
+    assert [call[0] for call in cache.calls].count("script") == 1
+
+
+def test_plan_tops_up_after_a_concurrent_send(db, cache, warming_pool):
+    tenant_id, ips = warming_pool
+    run_script = cache.run_script
+    raced = []
+
+    def racing_run_script(script, keys, args):
+        if not raced:
+            raced.append(True)
+            cache.values[build_sent_key(ips[4])] = 1000  # another worker drained IP 4
+        return run_script(script, keys, args)
+
+    cache.run_script = racing_run_script
+    plan = SendAllocator(db).plan_campaign(tenant_id, 3000)
+
+    assert plan.complete
+    assert ips[4] not in {share.ip_id for share in plan.shares}
+    assert [call[0] for call in cache.calls].count("script") == 2
+
+
+def test_pool_too_small_reserves_nothing(db, cache, warming_pool):
+    tenant_id, ips = warming_pool
+    allocator = SendAllocator(db)
+
+    plan = allocator.plan_campaign(tenant_id, 5000)
+    assert (plan.shares, plan.complete) == ([], False)
+    assert {cache.values[build_sent_key(ip_id)] for ip_id in ips} == {200}
+
+    partial = allocator.plan_campaign(tenant_id, 5000, allow_partial=True)
+    assert partial.planned == 4000
+    assert allocator.release(partial) == 4000
+    assert {cache.values[build_sent_key(ip_id)] for ip_id in ips} == {200}
+
+
+def test_lua_scripts_on_real_redis(db, lua_cache):
+    checker = QuotaChecker(db)
+    first, second = LUA_IP_IDS
+    limits = [(first, 1000), (second, 500)]
+    lua_cache.redis.set(build_sent_key(second), 450)
+
+    reservation = checker.reserve_quotas(limits, 1020)
+    assert reservation.grants == {first: 1000, second: 20}
+    assert checker.reserve_quotas(limits, 100).grants == {}  # all or nothing
+    partial = checker.reserve_quotas(limits, 100, allow_partial=True)
+    assert partial.grants == {second: 30}
+
+    key = build_sent_key(first)
+    assert int(lua_cache.redis.get(key)) == 1000
+    expires_in = sent_key_expire_at(reservation.day) - time.time()
+    assert abs(lua_cache.redis.ttl(key) - expires_in) <= 2  # EXPIREAT applied by the script
+
+    # Refunds are floored at zero, whatever the caller asks for
+    assert checker.refund_quota(reservation, {first: 1500, second: 20}) == 1020
+    assert int(lua_cache.redis.get(key)) == 0
+    assert int(lua_cache.redis.get(build_sent_key(second))) == 480
+    assert checker.refund_quota(partial) == 30
+    assert checker.refund_quota(partial) == 0
+
+
+def test_lua_reservations_never_oversell_under_concurrency(db, lua_cache):
+    first, _ = LUA_IP_IDS
+
+    def reserve(_):
+        return QuotaChecker(db).reserve_quotas([(first, 1000)], 70, allow_partial=True).reserved
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        granted = list(executor.map(reserve, range(20)))
+
+    assert sum(granted) == 1000
+    assert int(lua_cache.redis.get(build_sent_key(first))) == 1000
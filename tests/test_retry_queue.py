@@ -0,0 +1,124 @@
+"""Tests for the segmented scraper-pro retry queue.
+
+Tests couverts :
+  - enqueue() : segment du prochain passage, rien n'est relu avant l'échéance
+  - process_queue() : seuls les segments échus sont lus, un seul pool de connexions
+  - Backoff exponentiel par entrée, abandon après MAX_RETRIES
+  - Reprise après crash depuis l'offset acquitté, import de l'ancien retry_queue.jsonl
+"""
+
+import json
+
+import httpx
+import pytest
+
+from app.services import retry_queue
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ─────────────────────────────────────────────────────────────────────────────
+
+NOW = 1_800_000_000.0
+
+
+@pytest.fixture
+def queue_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(retry_queue, "QUEUE_DIR", tmp_path)
+    monkeypatch.setattr(retry_queue, "QUEUE_FILE", tmp_path / "retry_queue.jsonl")
+    monkeypatch.setattr(retry_queue.time, "time", lambda: NOW)
+    return tmp_path
+
+
+@pytest.fixture
+def scraper_pro(monkeypatch):
+    """scraper-pro simulé : répond 200 sauf pour les emails commençant par 'down'."""
+    state = {"requests": [], "clients": 0}
+
+    def handler(request):
+        payload = json.loads(request.content)
+        state["requests"].append(payload["email"])
+        return httpx.Response(503 if payload["email"].startswith("down") else 200)
+
+    class _MockClient(httpx.AsyncClient):
+        def __init__(self, **kwargs):
+            state["clients"] += 1
+            super().__init__(transport=httpx.MockTransport(handler), **kwargs)
+
+    monkeypatch.setattr(httpx, "AsyncClient", _MockClient)
+    return state
+
+
+def _segments(queue_dir):
+    return sorted(path.name for path in (queue_dir / "retry_segments").glob("*.jsonl"))
+
+
+def _entries(queue_dir):
+    return [json.loads(line) for path in (queue_dir / "retry_segments").glob("*.jsonl")
+            for line in path.read_text().splitlines()]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+async def test_only_due_segments_are_retried(queue_dir, scraper_pro):
+    for i in range(3):
+        retry_queue.enqueue("https://scraper.test/bounce", {"email": f"up{i}@example.com"}, "bounce_forwarded")
+    retry_queue.enqueue("https://scraper.test/bounce", {"email": "down@example.com"}, "bounce_forwarded")
+    assert _segments(queue_dir) == [f"{int(NOW)}.jsonl"]
+
+    assert await retry_queue.process_queue(now=NOW - 1) == {"processed": 0, "succeeded": 0, "failed": 0, "dropped": 0}
+    assert scraper_pro["requests"] == []
+
+    stats = await retry_queue.process_queue(now=NOW + 1)
+
+    assert stats == {"processed": 4, "succeeded": 3, "failed": 1, "dropped": 0}
+    assert scraper_pro["clients"] == 1
+    (entry,) = _entries(queue_dir)
+    assert (entry["retries"], entry["next_attempt_at"]) == (1, NOW + 1 + 60)
+    assert _segments(queue_dir) == [f"{int(NOW) + 120}.jsonl"]
+    assert json.loads((queue_dir / "retry_segments" / "index.json").read_text()) == {}
+
+
+async def test_backoff_doubles_until_dropped(queue_dir, scraper_pro, monkeypatch):
+    monkeypatch.setattr(retry_queue, "MAX_RETRIES", 4)
+    retry_queue.enqueue("https://scraper.test/bounce", {"email": "down@example.com"}, "bounce_forwarded")
+
+    now, delays = NOW + 1, []
+    while _segments(queue_dir):
+        stats = await retry_queue.process_queue(now=now)
+        if stats["dropped"]:
+            break
+        (entry,) = _entries(queue_dir)
+        delays.append(entry["next_attempt_at"] - now)
+        now = entry["next_attempt_at"] + retry_queue.SEGMENT_SECONDS
+
+    assert delays == [60, 120, 240]
+    assert _entries(queue_dir) == []
+    assert len(scraper_pro["requests"]) == 4
+
+
+async def test_resumes_after_acknowledged_offset(queue_dir, scraper_pro):
+    for i in range(5):
+        retry_queue.enqueue("https://scraper.test/bounce", {"email": f"up{i}@example.com"}, "bounce_forwarded")
+    segment = queue_dir / "retry_segments" / f"{int(NOW)}.jsonl"
+    first_two = sum(len(line) for line in segment.read_bytes().splitlines(keepends=True)[:2])
+    (queue_dir / "retry_segments" / "index.json").write_text(json.dumps({segment.name: first_two}))
+
+    stats = await retry_queue.process_queue(now=NOW + 1)
+
+    assert stats["processed"] == 3
+    assert scraper_pro["requests"] == ["up2@example.com", "up3@example.com", "up4@example.com"]
+    assert not segment.exists()
+
+
+async def test_legacy_queue_file_is_imported(queue_dir, scraper_pro):
+    legacy = [{"url": "https://scraper.test/bounce", "payload": {"email": f"up{i}@example.com"},
+               "action": "bounce_forwarded", "retries": 2, "created_at": "2026-01-01T00:00:00"} for i in range(2)]
+    (queue_dir / "retry_queue.jsonl").write_text("".join(json.dumps(e) + "\n" for e in legacy) + "garbage\n")
+
+    stats = await retry_queue.process_queue(now=NOW + 61)
+
+    assert stats["succeeded"] == 2
+    assert not (queue_dir / "retry_queue.jsonl").exists()
@@ -0,0 +1,170 @@
+"""Tests for the buffered scraper-pro forwarding.
+
+Tests couverts :
+  - Livraisons additionnées par domaine, bounces fusionnés par adresse (le plus grave gagne)
+  - Vidage sur délai (fenêtre) et sur taille (lot plein)
+  - Un seul client HTTP réutilisé d'un vidage à l'autre
+  - Échecs d'un lot mis en file de retry en un seul appel
+  - Journal : événements acceptés journalisés avant l'accusé, repris au démarrage après un crash
+  - bounces_forwarded compté à l'envoi effectif, pas à l'acceptation
+  - Minuterie de vidage reprogrammée quand la boucle asyncio change
+"""
+
+import asyncio
+import json
+import os
+
+import httpx
+import pytest
+
+from app.api.routes.metrics import bounces_forwarded
+from app.config import settings
+from app.services import scraper_pro_client as module
+from app.services.scraper_pro_client import ScraperProClient, recover_journal
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ─────────────────────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def scraper_pro(monkeypatch, tmp_path):
+    """scraper-pro simulé : 200, sauf 503 pour les emails 'down@' et le domaine 'down.com'."""
+    monkeypatch.setattr(settings, "SCRAPER_PRO_BOUNCE_URL", "https://scraper.test/bounce")
+    monkeypatch.setattr(settings, "SCRAPER_PRO_DELIVERY_URL", "https://scraper.test/delivery")
+    monkeypatch.setattr(settings, "SCRAPER_PRO_HMAC_SECRET", "secret")
+    monkeypatch.setattr(settings, "SCRAPER_PRO_FLUSH_SECONDS", 0.05)
+    monkeypatch.setattr(settings, "SCRAPER_PRO_BOUNCE_BATCH_SIZE", 3)
+    monkeypatch.setattr("app.services.retry_queue.QUEUE_DIR", tmp_path)
+
+    state = {"requests": [], "clients": 0, "retried": []}
+
+    def handler(request):
+        payload = json.loads(request.content)
+        state["requests"].append((request.url.path, payload))
+        down = payload.get("email", "").startswith("down@") or payload.get("domain") == "down.com"
+        return httpx.Response(503 if down else 200)
+
+    class _MockClient(httpx.AsyncClient):
+        def __init__(self, **kwargs):
+            state["clients"] += 1
+            super().__init__(transport=httpx.MockTransport(handler), **kwargs)
+
+    monkeypatch.setattr(module.httpx, "AsyncClient", _MockClient)
+    monkeypatch.setattr("app.services.retry_queue.enqueue_many",
+                        lambda url, payloads, action: state["retried"].append((url, payloads)))
+    state["journal"] = tmp_path / "forward_journal"
+    return state
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+async def test_deliveries_and_bounces_are_coalesced(scraper_pro):
+    client = ScraperProClient()
+    for _ in range(50):
+        await client.forward_delivery_feedback("gmail.com", 2)
+    await client.forward_delivery_feedback("yahoo.com")
+    await client.forward_bounce("a@example.com", "soft")
+    await client.forward_bounce("a@example.com", "hard")
+    await client.forward_bounce("a@example.com", "soft")
+
+    assert scraper_pro["requests"] == []
+    await asyncio.sleep(0.1)
+
+    assert sorted(scraper_pro["requests"], key=lambda r: (r[0], r[1].get("email") or r[1]["domain"])) == [
+        ("/bounce", {"email": "a@example.com", "bounce_type": "hard"}),
+        ("/delivery", {"domain": "gmail.com", "count": 100}),
+        ("/delivery", {"domain": "yahoo.com", "count": 1}),
+    ]
+    await client.aclose()
+
+
+async def test_full_batch_flushes_at_once_on_one_client(scraper_pro):
+    client = ScraperProClient()
+
+    assert await client.forward_bounces([("a@x.com", "hard"), ("b@x.com", "soft"), ("c@x.com", "hard")]) == [True] * 3
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    await client.buffer.drain()
+    await client.forward_bounce("d@x.com", "hard")
+    await client.flush()
+
+    assert len(scraper_pro["requests"]) == 4
+    assert scraper_pro["clients"] == 1
+    await client.aclose()
+
+
+async def test_failed_payloads_are_queued_per_batch(scraper_pro):
+    client = ScraperProClient()
+    await client.forward_bounces([("down@x.com", "hard"), ("ok@x.com", "hard")])
+    await client.forward_delivery_feedback("down.com", 7)
+
+    stats = await client.flush()
+
+    assert stats == {"sent": 1, "retry": 2}
+    assert scraper_pro["retried"] == [
+        ("https://scraper.test/bounce", [{"email": "down@x.com", "bounce_type": "hard"}]),
+        ("https://scraper.test/delivery", [{"domain": "down.com", "count": 7}]),
+    ]
+    await client.aclose()
+
+
+async def test_not_configured_is_not_buffered(scraper_pro, monkeypatch):
+    monkeypatch.setattr(settings, "SCRAPER_PRO_HMAC_SECRET", "")
+    client = ScraperProClient()
+
+    assert await client.forward_bounce("a@x.com", "hard") is False
+    assert await client.forward_bounces([("a@x.com", "hard")]) == [False]
+    assert len(client.buffer) == 0
+
+
+async def test_accepted_events_are_journaled_until_sent(scraper_pro):
+    client = ScraperProClient()
+    sent_before = bounces_forwarded._value.get()
+
+    await client.forward_bounces([("a@x.com", "hard"), ("down@x.com", "soft")])
+    await client.forward_delivery_feedback("gmail.com", 4)
+
+    lines = (scraper_pro["journal"] / f"{os.getpid()}.jsonl").read_text().splitlines()
+    assert [json.loads(line)["payload"] for line in lines] == [
+        {"email": "a@x.com", "bounce_type": "hard"},
+        {"email": "down@x.com", "bounce_type": "soft"},
+        {"domain": "gmail.com", "count": 4},
+    ]
+    assert bounces_forwarded._value.get() == sent_before
+
+    await client.flush()
+
+    assert list(scraper_pro["journal"].iterdir()) == []
+    assert bounces_forwarded._value.get() == sent_before + 1
+    await client.aclose()
+
+
+def test_journal_of_stopped_process_is_recovered(scraper_pro):
+    scraper_pro["journal"].mkdir()
+    entry = {"url": "https://scraper.test/bounce", "payload": {"email": "a@x.com", "bounce_type": "hard"},
+             "action": "bounce_forwarded"}
+    for name in ("999999999.jsonl", f"{os.getpid()}-1.jsonl", "1.jsonl"):
+        (scraper_pro["journal"] / name).write_text(json.dumps(entry) + "\n" + '{"url": "trunc')
+
+    assert recover_journal() == 2
+
+    assert scraper_pro["retried"] == [("https://scraper.test/bounce", [entry["payload"]])] * 2
+    # pid 1 est vivant : son journal est le sien
+    assert [path.name for path in scraper_pro["journal"].iterdir()] == ["1.jsonl"]
+
+
+def test_flush_timer_follows_the_running_loop(scraper_pro):
+    client = ScraperProClient()
+
+    async def forward(email, wait):
+        await client.forward_bounce(email, "hard")
+        await asyncio.sleep(wait)
+
+    # Boucle fermée avant l'échéance de la minuterie
+    asyncio.run(forward("a@x.com", 0))
+    asyncio.run(forward("b@x.com", 0.1))
+
+    assert sorted(payload["email"] for _, payload in scraper_pro["requests"]) == ["a@x.com", "b@x.com"]
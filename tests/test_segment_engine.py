@@ -0,0 +1,345 @@
+"""Tests for the tag segment engine (SegmentEngine, TagBitmap) and find_by_tags.
+
+Tests couverts :
+  - TagBitmap : AND / OR / AND NOT identiques aux ensembles Python (conteneurs denses et creux)
+  - SegmentEngine : tags_all / tags_any / exclude_tags / statuses
+  - Cache d'index : réutilisé tant que la version Redis du tenant ne bouge pas,
+    patché avec les seuls contacts modifiés après un commit (tags, statuts,
+    suppression), reconstruit quand le journal ne couvre plus la version,
+    jamais mis en cache sans Redis
+  - Scripts Lua du journal de changements (Redis réel ou fakeredis + lupa)
+  - Rollback : l'index n'expose jamais de données non commitées
+  - find_by_tags : pas de doublons, exclusion appliquée
+  - Endpoint POST /api/v2/contacts/{tenant_id}/segment
+"""
+
+import random
+
+import pytest
+
+from app.models import DataSource, Tenant
+from src.application.use_cases.ingest_contacts import (
+    IngestContactDTO,
+    IngestContactsUseCase,
+)
+from src.domain.services import SegmentEngine, TagBitmap
+from src.domain.value_objects import TagSlug
+from src.infrastructure.cache.redis_cache import RedisCache
+from src.infrastructure.cache.segment_index import (
+    BUMP_SCRIPT,
+    build_index,
+    segment_indexes,
+)
+from src.infrastructure.persistence import SQLAlchemyContactRepository
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ─────────────────────────────────────────────────────────────────────────────
+
+class _ChangeLogCache:
+    """In-memory rendition of the segment index Redis scripts (version + change log)."""
+
+    def __init__(self):
+        self.values = {}
+        self.logs = {}
+        self.down = False
+
+    def increment(self, key, amount=1):
+        if self.down:
+            return None
+        self.values[key] = self.values.get(key, 0) + amount
+        return self.values[key]
+
+    def run_script(self, script, keys, args):
+        if self.down:
+            return None
+        version_key, log_key, floor_key = keys
+        log = self.logs.setdefault(log_key, {})
+        if script == BUMP_SCRIPT:
+            version = self.increment(version_key)
+            log.update((int(contact_id), version) for contact_id in args[1:])
+            for contact_id, score in sorted(log.items(), key=lambda item: (item[1], item[0]))[:max(len(log) - args[0], 0)]:
+                del log[contact_id]
+                self.values[floor_key] = score
+            return version
+        since, max_changes = args
+        version = self.values.get(version_key, 0)
+        changed = [str(contact_id) for contact_id, score in log.items() if score > since]
+        if self.values.get(floor_key, 0) > since or len(changed) > max_changes:
+            return [version]
+        return [version, changed]
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    fake = _ChangeLogCache()
+    monkeypatch.setattr("src.infrastructure.cache.segment_index.get_cache", lambda: fake)
+    segment_indexes.clear()
+    yield fake
+    segment_indexes.clear()
+
+
+@pytest.fixture
+def full_builds(monkeypatch):
+    """Count full index builds (a delta must not trigger one)."""
+    calls = []
+
+    def counting_build(db, tenant_id, version=None):
+        calls.append(tenant_id)
+        return build_index(db, tenant_id, version)
+
+    monkeypatch.setattr("src.infrastructure.cache.segment_index.build_index", counting_build)
+    return calls
+
+
+@pytest.fixture
+def source(db):
+    tenant = Tenant(
+        slug="acme",
+        name="Acme",
+        brand_domain="acme.com",
+        sending_domain_base="mail.acme.com",
+    )
+    db.add(tenant)
+    db.commit()
+    ds = DataSource(tenant_id=tenant.id, name="Scraper-Pro", type="scraper_pro")
+    db.add(ds)
+    db.commit()
+    return ds
+
+
+def _ingest(db, source, contacts):
+    """contacts: {email: [tags]} — returns {email: contact_id}."""
+    dtos = [
+        IngestContactDTO(tenant_id=source.tenant_id, data_source_id=source.id, email=email, tags=tags)
+        for email, tags in contacts.items()
+    ]
+    repo = SQLAlchemyContactRepository(db)
+    IngestContactsUseCase(repo).execute(dtos)
+    db.commit()
+    found = repo.find_by_emails([(d.tenant_id, _email(d.email)) for d in dtos])
+    return {email: contact.id for (_, email), contact in found.items()}
+
+
+def _email(value):
+    from src.domain.value_objects import Email
+
+    return Email(value)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# TagBitmap
+# ─────────────────────────────────────────────────────────────────────────────
+
+def test_bitmap_operations_match_python_sets():
+    rng = random.Random(42)
+    # Dense range (int containers) + scattered ids across many containers (set containers)
+    a_ids = set(range(0, 20_000, 2)) | {rng.randrange(1 << 24) for _ in range(2_000)}
+    b_ids = set(range(0, 20_000, 3)) | {rng.randrange(1 << 24) for _ in range(2_000)}
+    a, b = TagBitmap.from_ids(a_ids), TagBitmap.from_ids(b_ids)
+
+    assert list(a & b) == sorted(a_ids & b_ids)
+    assert list(a | b) == sorted(a_ids | b_ids)
+    assert list(a - b) == sorted(a_ids - b_ids)
+    assert len(a | b) == len(a_ids | b_ids)
+    assert list(a) == sorted(a_ids)  # operands untouched
+
+    after = sorted(a_ids)[5_000]
+    assert a.ids_after(after, limit=10) == sorted(i for i in a_ids if i > after)[:10]
+
+
+def test_bitmap_add_discard_switches_container_kind():
+    bitmap = TagBitmap.from_ids(range(5_000))
+    assert 4_999 in bitmap and len(bitmap) == 5_000
+
+    for contact_id in range(1_000, 5_000):
+        bitmap.discard(contact_id)
+    assert list(bitmap) == list(range(1_000))
+
+    bitmap.discard(70_000)  # missing container is a no-op
+    assert 70_000 not in bitmap
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# SegmentEngine
+# ─────────────────────────────────────────────────────────────────────────────
+
+def test_segment_expressions(db, source):
+    ids = _ingest(db, source, {
+        "a@example.com": ["blogger", "fr"],
+        "b@example.com": ["blogger", "en"],
+        "c@example.com": ["influencer", "fr"],
+        "d@example.com": [],
+    })
+    engine = SegmentEngine(db)
+    tenant_id = source.tenant_id
+
+    assert engine.contact_ids(tenant_id, tags_all=["blogger", "fr"]) == [ids["a@example.com"]]
+    assert engine.count(tenant_id, tags_any=["blogger", "influencer"]) == 3
+    assert engine.contact_ids(tenant_id, tags_any=["fr"], exclude_tags=["blogger"]) == [ids["c@example.com"]]
+    assert engine.count(tenant_id, exclude_tags=["fr"]) == 2  # b + untagged d
+    assert engine.count(tenant_id, tags_all=["unknown"]) == 0
+
+
+def test_segment_statuses(db, source):
+    ids = _ingest(db, source, {"a@example.com": ["blogger"], "b@example.com": ["blogger"]})
+    repo = SQLAlchemyContactRepository(db)
+    contact = repo.find_by_id(ids["b@example.com"])
+    contact.unsubscribe()
+    repo.save(contact)
+    db.commit()
+
+    engine = SegmentEngine(db)
+    assert engine.contact_ids(source.tenant_id, tags_all=["blogger"], statuses=["valid"]) == []
+    assert engine.contact_ids(source.tenant_id, statuses=["unsubscribed"]) == [ids["b@example.com"]]
+    assert engine.count(source.tenant_id, statuses=["pending", "unsubscribed"]) == 2
+
+
+def test_index_patched_with_changed_contacts_on_commit(db, source, full_builds):
+    ids = _ingest(db, source, {"a@example.com": ["blogger"], "c@example.com": ["es"]})
+    engine = SegmentEngine(db)
+    assert engine.count(source.tenant_id, tags_all=["blogger"]) == 1
+
+    index = segment_indexes.get(db, source.tenant_id)
+    assert segment_indexes.get(db, source.tenant_id) is index  # version unchanged: reused
+    assert full_builds == [source.tenant_id]
+
+    _ingest(db, source, {"b@example.com": ["blogger"], "a@example.com": ["fr"]})
+    patched = segment_indexes.get(db, source.tenant_id)
+    assert patched is not index
+    assert patched.tags["es"] is index.tags["es"]  # untouched bitmap shared
+    assert engine.count(source.tenant_id, tags_all=["blogger"]) == 2
+    assert engine.count(source.tenant_id, tags_all=["blogger", "fr"]) == 1
+    assert list(index.tags["blogger"]) == [ids["a@example.com"]]  # previous index unchanged
+
+    # A write from another process only shows up in the change log
+    repo = SQLAlchemyContactRepository(db)
+    contact = repo.find_by_id(ids["a@example.com"])
+    contact.blacklist()
+    repo.save(contact)
+    db.commit()
+    assert engine.count(source.tenant_id, tags_all=["blogger"], statuses=["valid", "pending"]) == 1
+
+    repo.delete(ids["c@example.com"])
+    db.commit()
+    assert engine.count(source.tenant_id) == 2
+    assert "es" not in segment_indexes.get(db, source.tenant_id).tags
+    assert full_builds == [source.tenant_id]
+
+
+def test_index_rebuilt_when_change_log_cannot_serve_delta(db, source, full_builds, monkeypatch):
+    _ingest(db, source, {"a@example.com": ["blogger"]})
+    engine = SegmentEngine(db)
+    assert engine.count(source.tenant_id) == 1
+
+    # Too many changes since the cached version
+    monkeypatch.setattr(segment_indexes, "delta_max_contacts", 1)
+    _ingest(db, source, {"b@example.com": ["blogger"], "c@example.com": ["blogger"]})
+    assert engine.count(source.tenant_id, tags_all=["blogger"]) == 3
+    assert len(full_builds) == 2
+
+    # Change log trimmed past the cached version
+    monkeypatch.setattr(segment_indexes, "delta_max_contacts", 1000)
+    monkeypatch.setattr("src.infrastructure.cache.segment_index.SEGMENT_CHANGE_LOG_MAX_SIZE", 1)
+    _ingest(db, source, {"d@example.com": ["blogger"], "e@example.com": ["blogger"]})
+    assert engine.count(source.tenant_id, tags_all=["blogger"]) == 5
+    assert len(full_builds) == 3
+
+
+def test_change_log_scripts_on_redis(db, source, monkeypatch):
+    import os
+
+    url = os.environ.get("REDIS_TEST_URL")
+    if url:
+        import redis
+
+        client = redis.Redis.from_url(url, decode_responses=True)
+        client.flushdb()
+    else:
+        fakeredis = pytest.importorskip("fakeredis")
+        pytest.importorskip("lupa")
+        client = fakeredis.FakeRedis(decode_responses=True)
+    lua_cache = RedisCache()
+    lua_cache.redis = client
+    monkeypatch.setattr("src.infrastructure.cache.segment_index.get_cache", lambda: lua_cache)
+
+    ids = _ingest(db, source, {"a@example.com": ["blogger"]})
+    assert segment_indexes.changes_since(source.tenant_id, 0) == (1, [ids["a@example.com"]])
+    ids.update(_ingest(db, source, {"b@example.com": ["fr"]}))
+    assert segment_indexes.changes_since(source.tenant_id, 1) == (2, [ids["b@example.com"]])
+    assert SegmentEngine(db).count(source.tenant_id, tags_any=["blogger", "fr"]) == 2
+
+    monkeypatch.setattr("src.infrastructure.cache.segment_index.SEGMENT_CHANGE_LOG_MAX_SIZE", 1)
+    ids.update(_ingest(db, source, {"c@example.com": ["fr"]}))
+    assert segment_indexes.changes_since(source.tenant_id, 1) is None  # trimmed
+    assert segment_indexes.changes_since(source.tenant_id, 2) == (3, [ids["c@example.com"]])
+
+
+def test_index_not_cached_without_redis(db, source, cache):
+    _ingest(db, source, {"a@example.com": ["blogger"]})
+    cache.down = True
+
+    index = segment_indexes.get(db, source.tenant_id)
+    assert segment_indexes.get(db, source.tenant_id) is not index
+    assert SegmentEngine(db).count(source.tenant_id, tags_all=["blogger"]) == 1
+
+
+def test_rollback_does_not_leak_into_index(db, source):
+    _ingest(db, source, {"a@example.com": ["blogger"]})
+    engine = SegmentEngine(db)
+    assert engine.count(source.tenant_id) == 1
+
+    repo = SQLAlchemyContactRepository(db)
+    IngestContactsUseCase(repo).execute([
+        IngestContactDTO(
+            tenant_id=source.tenant_id,
+            data_source_id=source.id,
+            email="b@example.com",
+            tags=["blogger"],
+        )
+    ])
+    db.rollback()
+
+    assert engine.count(source.tenant_id, tags_all=["blogger"]) == 1
+    assert not db.info.get("segment_index_dirty")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# find_by_tags
+# ─────────────────────────────────────────────────────────────────────────────
+
+def test_find_by_tags_filters_without_duplicates(db, source):
+    _ingest(db, source, {
+        "a@example.com": ["blogger", "fr"],
+        "b@example.com": ["blogger", "en"],
+        "c@example.com": ["influencer"],
+    })
+    repo = SQLAlchemyContactRepository(db)
+
+    def emails(**filters):
+        filters = {k: [TagSlug(v) for v in vs] for k, vs in filters.items()}
+        return [c.email.value for c in repo.find_by_tags(source.tenant_id, **filters)]
+
+    assert emails(tags_all=["blogger", "fr"]) == ["a@example.com"]
+    assert emails(tags_any=["blogger", "fr", "en"]) == ["a@example.com", "b@example.com"]
+    assert emails(tags_any=["blogger"], exclude_tags=["en"]) == ["a@example.com"]
+
+
+def test_segment_endpoint(client, db, source):
+    ids = _ingest(db, source, {f"user{i}@example.com": ["Blogger"] for i in range(5)})
+
+    response = client.post(
+        f"/api/v2/contacts/{source.tenant_id}/segment",
+        json={"tags_all": ["Blogger"], "limit": 3},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["count"] == 5
+    assert data["contact_ids"] == sorted(ids.values())[:3]
+
+    response = client.post(
+        f"/api/v2/contacts/{source.tenant_id}/segment",
+        json={"tags_all": ["blogger"], "limit": 3, "after_id": data["next_after_id"]},
+    )
+    assert response.json()["contact_ids"] == sorted(ids.values())[3:]
+    assert response.json()["next_after_id"] is None
@@ -0,0 +1,401 @@
+"""Tests for hour-by-hour campaign pacing (SendPacer + dispatcher tasks).
+
+Tests couverts :
+  - Découpage d'un plan par IP sur les heures restantes de la fenêtre 07h-23h
+  - Budget horaire respecté, report au lendemain (quota réservé à la libération)
+  - File Redis (sorted set) : réclamation atomique des lots échus
+  - Dispatcher et envoi d'un lot : remboursement des échecs, report sans quota
+  - Dispatcher : lots réclamés remis en file si la mise en file Celery échoue
+  - Campagne cadencée : une liste + un autorépondeur MailWizz par IP (désinscription, serveur de l'IP)
+  - Destinataires : contacts valides seulement (planification et envoi), tags normalisés
+  - Erreur après un remboursement partiel : quota jamais remboursé deux fois
+  - Campagne non cadencée : mêmes destinataires importés dans sa liste, client MailWizz fermé
+  - Lots cadencés : envois additionnés par IP, vérification blacklist prioritaire au seuil
+"""
+
+from datetime import datetime
+
+import pytest
+
+from app.models import IP, Campaign, Contact, DataSource, MailwizzInstance, Tenant, WarmupPlan
+from app.services.blacklist_store import BlacklistResultStore
+from src.domain.services import QuotaReservation
+from src.domain.services.quota_checker import build_sent_key
+from src.domain.services.send_allocator import SendPlan, SendShare
+from src.domain.services.send_pacer import (
+    POP_DUE_SCRIPT,
+    SCHEDULE_SCRIPT,
+    PacedBatch,
+    SendPacer,
+    build_batches,
+    hourly_send_budget,
+    next_window_open,
+    window_slots,
+)
+from src.infrastructure.background import tasks
+from tests.conftest import TestSession
+from tests.test_quota_checker import _FakeCache
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ─────────────────────────────────────────────────────────────────────────────
+
+class _PacingCache(_FakeCache):
+    """Quota counters plus a sorted set for the pacing scripts."""
+
+    def __init__(self):
+        super().__init__()
+        self.zset = {}
+
+    def run_script(self, script, keys, args):
+        if script == SCHEDULE_SCRIPT:
+            for score, member in zip(args[0::2], args[1::2], strict=True):
+                self.zset[member] = float(score)
+            return len(args) // 2
+        if script == POP_DUE_SCRIPT:
+            now, limit = args
+            due = sorted((m for m, score in self.zset.items() if score <= now), key=self.zset.get)[:limit]
+            for member in due:
+                del self.zset[member]
+            return due
+        return super().run_script(script, keys, args)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    fake = _PacingCache()
+    monkeypatch.setattr("src.domain.services.quota_checker.get_cache", lambda: fake)
+    monkeypatch.setattr("src.domain.services.send_pacer.get_cache", lambda: fake)
+    return fake
+
+
+def _plan(*shares, day="2026-03-02"):
+    return SendPlan(
+        tenant_id=1,
+        requested=sum(count for _, count in shares),
+        pool_name="acme-pool",
+        reservation=QuotaReservation(day=day, requested=0, grants=dict(shares)),
+        shares=[SendShare(ip_id, f"10.0.0.{ip_id}", "warming", f"vmta-acme-{ip_id}", count) for ip_id, count in shares],
+    )
+
+
+class _FakeMailWizzClient:
+    sent = []
+    fail_for = set()
+    closed = 0
+    lists = []
+    campaigns = []
+
+    def __init__(self, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        _FakeMailWizzClient.closed += 1
+
+    def create_list(self, name, defaults, single_opt_in=False):
+        self.lists.append({"name": name, "defaults": defaults, "single_opt_in": single_opt_in})
+        return {"list_uid": f"list-{len(self.lists)}"}
+
+    def create_subscribers_bulk(self, list_id, subscribers):
+        results = []
+        for subscriber in subscribers:
+            success = subscriber["EMAIL"] not in self.fail_for
+            if success:
+                self.sent.append({"list_id": list_id, **subscriber})
+            results.append({"email": subscriber["EMAIL"], "success": success, "subscriber_uid": None,
+                            "error": None if success else "MailWizz down"})
+        return results
+
+    def create_campaign(self, **campaign):
+        self.campaigns.append(campaign)
+        return {"campaign_uid": "mw-1"}
+
+    def send_campaign(self, campaign_uid):
+        return True
+
+
+@pytest.fixture
+def paced_campaign(db, cache, monkeypatch):
+    monkeypatch.setattr("app.database.SessionLocal", TestSession)
+    monkeypatch.setattr("src.infrastructure.external.MailWizzClient", _FakeMailWizzClient)
+    _FakeMailWizzClient.sent, _FakeMailWizzClient.fail_for, _FakeMailWizzClient.closed = [], set(), 0
+    _FakeMailWizzClient.lists, _FakeMailWizzClient.campaigns = [], []
+
+    tenant = Tenant(slug="acme", name="Acme", brand_domain="acme.com", sending_domain_base="mail.acme.com")
+    db.add(tenant)
+    db.commit()
+    ds = DataSource(tenant_id=tenant.id, name="csv", type="csv")
+    ip = IP(address="10.0.0.1", hostname="mail1.acme.com", status="warming", tenant_id=tenant.id,
+            sender_email="news@mail1.acme.com", mailwizz_server_id=7)
+    db.add_all([ds, ip, MailwizzInstance(tenant_id=tenant.id, name="mw", base_url="https://mw.acme.com")])
+    db.flush()
+    db.add(WarmupPlan(tenant_id=tenant.id, ip_id=ip.id, current_daily_quota=1000))
+    campaign = Campaign(tenant_id=tenant.id, name="Spring", status="sending", sent_count=0)
+    contacts = [Contact(tenant_id=tenant.id, data_source_id=ds.id, email=f"c{i}@example.com", first_name=f"C{i}",
+                        status="valid")
+                for i in range(3)]
+    db.add_all([campaign, *contacts])
+    db.commit()
+    ids = (tenant.id, ip.id, campaign.id, [c.id for c in contacts])
+    db.commit()
+    return ids
+
+
+class _SentCounterRedis:
+    """Redis minimal pour le compteur d'envois par IP du store blacklist."""
+
+    def __init__(self):
+        self.values = {}
+        self.ttls = {}
+
+    def pipeline(self, transaction=False):
+        return _SentCounterPipeline(self)
+
+    def expire(self, key, seconds):
+        self.ttls[key] = seconds
+
+    def delete(self, *keys):
+        return sum(self.values.pop(key, None) is not None for key in keys)
+
+
+class _SentCounterPipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.results = []
+
+    def incrby(self, key, amount):
+        self.redis.values[key] = self.redis.values.get(key, 0) + amount
+        self.results.append(self.redis.values[key])
+
+    def ttl(self, key):
+        self.results.append(self.redis.ttls.get(key, -1) if key in self.redis.values else -2)
+
+    def execute(self):
+        return self.results
+
+
+def _batch(tenant_id, ip_id, campaign_id, contact_ids, quota_day):
+    return PacedBatch(campaign_id=campaign_id, tenant_id=tenant_id, ip_id=ip_id, vmta_name="vmta-acme-1",
+                      release_at=0.0, seq=0, contact_ids=contact_ids, quota_day=quota_day, list_uid="list-ip1")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+def test_window_slots_and_opening():
+    slots = window_slots(datetime(2026, 3, 2, 20, 15))
+    assert slots == [datetime(2026, 3, 2, 20, 15), datetime(2026, 3, 2, 21), datetime(2026, 3, 2, 22)]
+    assert window_slots(datetime(2026, 3, 2, 23, 5)) == []
+    assert next_window_open(datetime(2026, 3, 2, 6, 30)) == datetime(2026, 3, 2, 7)
+    assert next_window_open(datetime(2026, 3, 2, 23, 5)) == datetime(2026, 3, 3, 7)
+    assert hourly_send_budget(1000) == 63
+
+
+def test_shares_are_spread_over_the_remaining_hours():
+    now = datetime(2026, 3, 2, 20, 15)
+    batches = build_batches(9, 1, _plan((1, 300), (2, 30)), list(range(330)), {1: None, 2: None}, now,
+                            max_batch_size=60)
+
+    per_ip_hour = {}
+    for batch in batches:
+        key = (batch.ip_id, datetime.utcfromtimestamp(batch.release_at).hour)
+        per_ip_hour[key] = per_ip_hour.get(key, 0) + len(batch.contact_ids)
+    assert per_ip_hour == {(1, 20): 100, (1, 21): 100, (1, 22): 100, (2, 20): 10, (2, 21): 10, (2, 22): 10}
+    assert max(len(batch.contact_ids) for batch in batches) == 60
+    assert [batch.seq for batch in batches] == list(range(len(batches)))
+    assert [batch.release_at for batch in batches] == sorted(batch.release_at for batch in batches)
+    assert sorted(cid for batch in batches for cid in batch.contact_ids) == list(range(330))
+    assert {batch.quota_day for batch in batches} == {"2026-03-02"}
+
+
+def test_hourly_budget_rolls_over_to_the_next_window():
+    now = datetime(2026, 3, 2, 21, 0)
+    batches = build_batches(9, 1, _plan((1, 100)), list(range(100)), {1: 30}, now)
+
+    released = [(datetime.utcfromtimestamp(b.release_at), len(b.contact_ids), b.quota_day) for b in batches]
+    assert released[:3] == [
+        (datetime(2026, 3, 2, 21), 30, "2026-03-02"),
+        (datetime(2026, 3, 2, 22), 30, "2026-03-02"),
+        (datetime(2026, 3, 3, 7), 3, None),
+    ]
+    # The 40 left over are spread over the next window, quota reserved on release
+    assert sum(count for _, count, _ in released[2:]) == 40
+    assert {(moment.date(), day) for moment, _, day in released[2:]} == {(datetime(2026, 3, 3).date(), None)}
+
+
+def test_due_batches_are_claimed_once(cache):
+    pacer = SendPacer()
+    batches = build_batches(9, 1, _plan((1, 40)), list(range(40)), {1: 10}, datetime(2026, 3, 2, 19, 30))
+    assert pacer.schedule(batches) == 4
+
+    due = pacer.pop_due(datetime(2026, 3, 2, 20, 0))
+    assert [b.contact_ids for b in due] == [list(range(10)), list(range(10, 20))]
+    assert pacer.pop_due(datetime(2026, 3, 2, 20, 0)) == []
+    assert len(cache.zset) == 2
+
+
+def test_dispatcher_releases_due_batches(cache, monkeypatch):
+    released = []
+    monkeypatch.setattr(tasks.send_paced_batch_task, "delay", released.append)
+    SendPacer().schedule(build_batches(9, 1, _plan((1, 20)), list(range(20)), {1: 10}, datetime(2020, 1, 6, 21)))
+
+    assert tasks.dispatch_paced_batches_task() == {"success": True, "released": 2}
+    assert [PacedBatch.from_json(member).seq for member in released] == [0, 1]
+
+
+def test_dispatcher_requeues_batches_it_could_not_queue(cache, monkeypatch):
+    released = []
+
+    def delay(member):
+        if released:
+            raise ConnectionError("broker down")
+        released.append(member)
+
+    monkeypatch.setattr(tasks.send_paced_batch_task, "delay", delay)
+    SendPacer().schedule(build_batches(9, 1, _plan((1, 30)), list(range(30)), {1: 10}, datetime(2020, 1, 6, 20)))
+
+    result = tasks.dispatch_paced_batches_task()
+
+    assert (result["success"], result["released"], result["requeued"]) == (False, 1, 2)
+    assert sorted(PacedBatch.from_json(member).seq for member in cache.zset) == [1, 2]
+
+
+def test_batch_is_imported_into_the_ip_list_and_failures_refunded(cache, paced_campaign, db):
+    tenant_id, ip_id, campaign_id, contact_ids = paced_campaign
+    key = build_sent_key(ip_id, "2026-03-02")
+    cache.values[key] = 3  # reserved when the campaign was planned
+    _FakeMailWizzClient.fail_for = {"c2@example.com"}
+
+    result = tasks.send_paced_batch_task(_batch(tenant_id, ip_id, campaign_id, contact_ids, "2026-03-02").to_json())
+
+    assert (result["sent"], result["failed"]) == (2, 1)
+    assert {subscriber["list_id"] for subscriber in _FakeMailWizzClient.sent} == {"list-ip1"}
+    assert _FakeMailWizzClient.sent[0]["FNAME"] == "C0"
+    assert cache.values[key] == 2
+    db.expire_all()
+    assert db.get(Campaign, campaign_id).sent_count == 2
+
+
+def test_batch_skips_contacts_no_longer_valid(cache, paced_campaign, db):
+    tenant_id, ip_id, campaign_id, contact_ids = paced_campaign
+    key = build_sent_key(ip_id, "2026-03-02")
+    cache.values[key] = 3
+    db.query(Contact).filter(Contact.id == contact_ids[1]).update({"status": "unsubscribed"})
+    db.commit()
+
+    result = tasks.send_paced_batch_task(_batch(tenant_id, ip_id, campaign_id, contact_ids, "2026-03-02").to_json())
+
+    assert (result["sent"], result["skipped"], result["failed"]) == (2, 1, 0)
+    assert [subscriber["EMAIL"] for subscriber in _FakeMailWizzClient.sent] == ["c0@example.com", "c2@example.com"]
+    assert cache.values[key] == 2
+
+
+def test_error_after_partial_refund_does_not_refund_twice(cache, paced_campaign, monkeypatch):
+    tenant_id, ip_id, campaign_id, contact_ids = paced_campaign
+    key = build_sent_key(ip_id, "2026-03-02")
+    cache.values[key] = 103  # 100 reserved by other batches of the day
+    _FakeMailWizzClient.fail_for = {"c2@example.com"}
+
+    def boom(db, sends):
+        raise RuntimeError("store down")
+
+    monkeypatch.setattr(tasks, "_request_blacklist_checks", boom)
+    result = tasks.send_paced_batch_task(_batch(tenant_id, ip_id, campaign_id, contact_ids, "2026-03-02").to_json())
+
+    assert not result["success"]
+    assert cache.values[key] == 102  # only the failed email was refunded
+
+
+def test_campaign_targets_valid_contacts_with_normalized_tags(cache, paced_campaign, db, monkeypatch):
+    from src.domain.services import SegmentEngine
+
+    queried = {}
+
+    def contact_ids(self, tenant_id, **filters):
+        queried.update(filters)
+        return []
+
+    monkeypatch.setattr(SegmentEngine, "contact_ids", contact_ids)
+    tenant_id, ip_id, campaign_id, _ = paced_campaign
+    db.query(Campaign).filter_by(id=campaign_id).update({"tags_all": '["Blogger", "fr"]'})
+    db.commit()
+
+    result = tasks.send_campaign_task(campaign_id)
+
+    assert result == {"success": False, "error": "No recipients for this campaign"}
+    assert queried["tags_all"] == ["blogger", "fr"]
+    assert queried["statuses"] == ["valid"]
+
+
+def test_paced_campaign_gets_an_autoresponder_per_ip(cache, paced_campaign, db, monkeypatch):
+    tenant_id, ip_id, campaign_id, contact_ids = paced_campaign
+    monkeypatch.setattr("src.domain.services.send_pacer.next_window_open", lambda now: now)
+    monkeypatch.setattr("src.domain.services.send_pacer.window_slots", lambda start: [start])
+    allocator = type("Allocator", (), {
+        "plan_campaign": lambda self, tenant, count: _plan((ip_id, count)),
+        "quota_checker": type("Checker", (), {"refund_quota": lambda self, reservation, counts: 0})(),
+    })()
+    campaign = db.get(Campaign, campaign_id)
+
+    result = tasks._schedule_paced_campaign(db, campaign, allocator, contact_ids)
+
+    assert result["success"], result
+    (mw_campaign,) = _FakeMailWizzClient.campaigns
+    assert mw_campaign["campaign_type"] == "autoresponder"
+    assert mw_campaign["options"]["autoresponder_event"] == "AFTER-SUBSCRIBE"
+    assert mw_campaign["delivery_server_ids"] == [7]
+    assert mw_campaign["from_email"] == "news@mail1.acme.com"
+    assert "[UNSUBSCRIBE_URL]" in mw_campaign["html_content"]
+    assert _FakeMailWizzClient.lists[0]["single_opt_in"]
+    assert {PacedBatch.from_json(member).list_uid for member in cache.zset} == {"list-1"}
+
+
+def test_rolled_over_batch_without_quota_is_pushed_back(cache, paced_campaign):
+    tenant_id, ip_id, campaign_id, contact_ids = paced_campaign
+    cache.values[build_sent_key(ip_id)] = 999
+
+    result = tasks.send_paced_batch_task(_batch(tenant_id, ip_id, campaign_id, contact_ids, None).to_json())
+
+    assert "rescheduled_at" in result
+    assert _FakeMailWizzClient.sent == []
+    (member,) = cache.zset
+    assert PacedBatch.from_json(member).contact_ids == contact_ids
+    assert cache.values[build_sent_key(ip_id)] == 999
+
+
+def test_unpaced_campaign_sends_to_its_own_list(cache, paced_campaign, db, monkeypatch):
+    monkeypatch.setattr(tasks, "_request_blacklist_checks", lambda db, sends: None)
+    tenant_id, ip_id, campaign_id, contact_ids = paced_campaign
+    db.query(Contact).filter(Contact.id == contact_ids[1]).update({"status": "unsubscribed"})
+    db.commit()
+
+    result = tasks.send_campaign_task(campaign_id)
+
+    assert result["success"], result
+    assert (result["total_recipients"], result["imported"]) == (2, 2)
+    assert result["mailwizz_campaign_id"] == "mw-1"
+    assert [subscriber["EMAIL"] for subscriber in _FakeMailWizzClient.sent] == ["c0@example.com", "c2@example.com"]
+    (mw_campaign,) = _FakeMailWizzClient.campaigns
+    assert (mw_campaign["list_id"], mw_campaign["delivery_server_ids"]) == ("list-1", [7])
+    assert _FakeMailWizzClient.closed == 1
+
+
+def test_paced_batches_add_up_to_a_priority_blacklist_check(cache, paced_campaign, monkeypatch):
+    tenant_id, ip_id, campaign_id, contact_ids = paced_campaign
+    cache.values[build_sent_key(ip_id, "2026-03-02")] = 6
+    store = BlacklistResultStore(redis_url="redis://test", priority_min_sent=5, priority_window=3600)
+    store._redis = redis = _SentCounterRedis()
+    checks = []
+    monkeypatch.setattr(store, "request_priority_check", lambda db, address: checks.append(address))
+    monkeypatch.setattr("app.services.blacklist_store.blacklist_store", store)
+
+    tasks.send_paced_batch_task(_batch(tenant_id, ip_id, campaign_id, contact_ids, "2026-03-02").to_json())
+    assert (checks, redis.values, redis.ttls) == ([], {"blacklist_sent:10.0.0.1": 3}, {"blacklist_sent:10.0.0.1": 3600})
+
+    tasks.send_paced_batch_task(_batch(tenant_id, ip_id, campaign_id, contact_ids, "2026-03-02").to_json())
+    assert (checks, redis.values) == (["10.0.0.1"], {})
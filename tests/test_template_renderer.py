@@ -0,0 +1,38 @@
+"""Tests for TemplateRenderer (Jinja2 email templates).
+
+Tests couverts :
+  - Mode non strict : variable absente → chaîne vide (attributs, index, appels, boucles)
+  - render_subject / render_preview s'appuient sur le mode non strict
+  - Erreur de syntaxe → ValueError
+"""
+
+import pytest
+
+from src.domain.services import TemplateRenderer
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+def test_non_strict_render_blanks_missing_variables():
+    renderer = TemplateRenderer()
+
+    html = renderer.render(
+        "Hi {{ first_name }} {{ company.name }}{{ tags[0] }}{{ greet() }}"
+        "{% for t in tags %}{{ t }}{% endfor %}{% if vip %}VIP{% endif %}!",
+        {"first_name": "Jean"},
+    )
+
+    assert html == "Hi Jean !"
+
+
+def test_subject_and_preview_render_without_all_variables():
+    renderer = TemplateRenderer()
+
+    assert renderer.render_subject("  Hello {{ first_name }} {{ last_name }} ", {"first_name": "Ann"}) == "Hello Ann"
+    assert renderer.render_preview("{{ first_name }} / {{ unknown }}") == "John / "
+
+
+def test_syntax_error_is_reported():
+    with pytest.raises(ValueError, match="syntax error"):
+        TemplateRenderer().render("Hello {{ first_name ", {})
@@ -0,0 +1,175 @@
+"""Tests for the bulk validation pipeline (ValidateContactsBulkUseCase).
+
+Tests couverts :
+  - Sélection des PENDING côté base, résultats écrits en masse
+  - Vérifications de domaine exécutées une fois par domaine
+  - Curseur reprenable : un run limité reprend où le précédent s'est arrêté
+  - Curseur avancé seulement après le commit de la page
+  - MX (check_mx=True) : un lot par page via le cache de verdicts, un DNS par domaine
+"""
+
+import json
+
+import pytest
+
+from app.models import Contact, DataSource, Tenant
+from app.services import email_validator
+from app.services.domain_cache import DomainVerdictCache
+from src.application.use_cases.ingest_contacts import (
+    IngestContactDTO,
+    IngestContactsUseCase,
+)
+from src.application.use_cases.validate_contacts_bulk import (
+    ValidateContactsBulkUseCase,
+    build_validation_cursor_key,
+)
+from src.domain.services import ContactValidator
+from src.infrastructure.persistence import SQLAlchemyContactRepository
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ─────────────────────────────────────────────────────────────────────────────
+
+class _DictStore(dict):
+    """In-memory stand-in for the RedisCache get/set/delete interface."""
+
+    def set(self, key, value):
+        self[key] = value
+
+    def delete(self, key):
+        self.pop(key, None)
+
+
+class _CountingValidator(ContactValidator):
+    def __init__(self):
+        super().__init__()
+        self.domains_checked = []
+
+    def check_domain(self, domain, has_mx=None):
+        self.domains_checked.append(domain)
+        return super().check_domain(domain, has_mx)
+
+
+@pytest.fixture
+def tenant(db):
+    tenant = Tenant(
+        slug="acme",
+        name="Acme",
+        brand_domain="acme.com",
+        sending_domain_base="mail.acme.com",
+    )
+    db.add(tenant)
+    db.commit()
+    ds = DataSource(tenant_id=tenant.id, name="Scraper-Pro", type="scraper_pro")
+    db.add(ds)
+    db.commit()
+
+    emails = [f"user{i}@example.com" for i in range(5)]
+    emails += ["admin@mailinator.com", "bob@gmial.com", "carol@example.org"]
+    IngestContactsUseCase(SQLAlchemyContactRepository(db)).execute([
+        IngestContactDTO(tenant_id=tenant.id, data_source_id=ds.id, email=email) for email in emails
+    ])
+    # Already validated: must not be selected again
+    db.query(Contact).filter_by(email="carol@example.org").update({"status": "valid"})
+    db.commit()
+    return tenant
+
+
+def _validate(db, tenant, **kwargs):
+    limit = kwargs.pop("limit", 100)
+    use_case = ValidateContactsBulkUseCase(SQLAlchemyContactRepository(db), **kwargs)
+    result = use_case.execute(tenant.id, limit=limit)
+    db.commit()
+    return result
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+def test_validates_pending_contacts_and_writes_results(db, tenant):
+    validator = _CountingValidator()
+    result = _validate(db, tenant, validator=validator, page_size=3)
+
+    assert result.total_validated == 7
+    assert (result.valid_count, result.invalid_count, result.risky_count) == (5, 1, 1)
+    assert result.backlog_exhausted
+    assert sorted(validator.domains_checked) == [
+        "example.com", "example.com", "gmial.com", "mailinator.com",  # example.com: one per page
+    ]
+
+    disposable = db.query(Contact).filter_by(email="admin@mailinator.com").one()
+    db.refresh(disposable)
+    assert (disposable.status, disposable.validation_status) == ("invalid", "invalid")
+    assert json.loads(disposable.validation_errors) == [
+        "Disposable email domain",
+        "Role-based email address",
+    ]
+    typo = db.query(Contact).filter_by(email="bob@gmial.com").one()
+    assert (typo.status, typo.validation_status) == ("pending", "risky")
+
+    assert _validate(db, tenant).total_validated == 0
+
+
+def test_limited_runs_resume_from_cursor(db, tenant):
+    store = _DictStore()
+    key = build_validation_cursor_key(tenant.id)
+
+    first = _validate(db, tenant, cursor_store=store, commit=db.commit, page_size=2, limit=4)
+    assert first.total_validated == 4
+    assert not first.backlog_exhausted
+    assert store[key] == first.last_contact_id
+
+    second = _validate(db, tenant, cursor_store=store, commit=db.commit, page_size=2, limit=100)
+    assert second.total_validated == 3
+    assert second.backlog_exhausted
+    assert key not in store
+    assert db.query(Contact).filter(Contact.validation_status.is_(None)).count() == 1  # carol
+
+
+def test_cursor_not_moved_past_uncommitted_page(db, tenant):
+    store = _DictStore()
+    key = build_validation_cursor_key(tenant.id)
+    commits = []
+
+    def commit():
+        if len(commits) == 1:
+            raise RuntimeError("connection lost")
+        db.commit()
+        commits.append(store.get(key))
+
+    use_case = ValidateContactsBulkUseCase(
+        SQLAlchemyContactRepository(db), cursor_store=store, commit=commit, page_size=2
+    )
+    with pytest.raises(RuntimeError):
+        use_case.execute(tenant.id, limit=6)
+    db.rollback()
+
+    assert commits == [None]  # cursor saved after the first commit, not before
+    first_page = db.query(Contact.id).filter(Contact.validation_status.isnot(None)).order_by(Contact.id).all()
+    assert store[key] == first_page[-1].id
+    assert len(first_page) == 2
+
+
+def test_cursor_store_requires_commit(db):
+    with pytest.raises(ValueError):
+        ValidateContactsBulkUseCase(SQLAlchemyContactRepository(db), cursor_store=_DictStore())
+
+
+def test_mx_verdicts_resolved_once_through_domain_cache(db, tenant, monkeypatch):
+    resolved = []
+
+    async def fake_resolve_mx(domain):
+        resolved.append(domain)
+        return domain != "gmial.com"
+
+    monkeypatch.setattr(email_validator, "_resolve_mx_async", fake_resolve_mx)
+    cache = DomainVerdictCache(redis_url="")
+    validator = ContactValidator(check_mx=True, domain_cache=cache)
+    result = _validate(db, tenant, validator=validator, page_size=3)
+
+    assert (result.valid_count, result.invalid_count, result.risky_count) == (5, 2, 0)
+    assert sorted(resolved) == ["example.com", "gmial.com", "mailinator.com"]  # later pages hit the cache
+    typo = db.query(Contact).filter_by(email="bob@gmial.com").one()
+    assert "No MX records for domain" in json.loads(typo.validation_errors)
@@ -0,0 +1,140 @@
+"""Tests for the bulk warmup quota sync to MailWizz (job_sync_warmup_quotas).
+
+Tests couverts :
+  - Un seul UPDATE ... CASE server_id dans une transaction
+  - Quotas inchangés ignorés, renvoyés après MAILWIZZ_QUOTA_RESYNC_SECONDS
+  - Job : plans + IPs en une requête jointe, plans terminés / en pause exclus
+"""
+
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.models import IP, Tenant, WarmupPlan
+from app.scheduler import jobs
+from app.services import mailwizz_db as mailwizz_db_module
+from app.services.mailwizz_db import MailWizzDB
+from app.services.warmup_engine import daily_to_hourly_quota
+from tests.conftest import TestSession
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ─────────────────────────────────────────────────────────────────────────────
+
+class _RecordingConnection:
+    def __init__(self, log):
+        self.log = log
+
+    async def ping(self, reconnect=False):
+        pass
+
+    def cursor(self):
+        return _RecordingCursor(self.log)
+
+    async def begin(self):
+        self.log.append(("begin",))
+
+    async def commit(self):
+        self.log.append(("commit",))
+
+    async def rollback(self):
+        self.log.append(("rollback",))
+
+
+class _RecordingCursor:
+    rowcount = 1
+
+    def __init__(self, log):
+        self.log = log
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def execute(self, query, params=()):
+        self.log.append((" ".join(query.split()), params))
+
+
+class _RecordingPool:
+    size = maxsize = 1
+    freesize = 0
+
+    def __init__(self):
+        self.log = []
+
+    async def acquire(self):
+        return _RecordingConnection(self.log)
+
+    def release(self, conn):
+        pass
+
+
+@pytest.fixture
+def mw():
+    loader = MailWizzDB()
+    loader._pool = _RecordingPool()
+    return loader
+
+
+def _updates(pool):
+    return [entry for entry in pool.log if entry[0].startswith("UPDATE")]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+def test_bulk_sync_uses_one_case_update_in_a_transaction(mw):
+    result = asyncio.run(mw.sync_warmup_quotas({11: 50, 12: 1000, 13: 20000}))
+
+    assert result == {"updated": 3, "unchanged": 0, "success": True}
+    assert [entry[0] for entry in mw._pool.log if len(entry) == 1] == ["begin", "commit"]
+    (query, params), = _updates(mw._pool)
+    assert "CASE server_id WHEN %s THEN %s WHEN %s THEN %s WHEN %s THEN %s END" in query
+    assert params[:6] == (11, daily_to_hourly_quota(50), 12, 50, 13, daily_to_hourly_quota(20000))
+    assert params[-3:] == (11, 12, 13)
+
+
+def test_unchanged_quotas_are_skipped_until_resync(mw, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(mailwizz_db_module.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(settings, "MAILWIZZ_QUOTA_RESYNC_SECONDS", 3600)
+
+    asyncio.run(mw.sync_warmup_quotas({11: 50, 12: 1000}))
+    result = asyncio.run(mw.sync_warmup_quotas({11: 50, 12: 1250}))
+    assert result == {"updated": 1, "unchanged": 1, "success": True}
+    assert _updates(mw._pool)[-1][1][:2] == (12, daily_to_hourly_quota(1250))
+
+    assert asyncio.run(mw.sync_warmup_quotas({11: 50, 12: 1250}))["updated"] == 0
+    assert len(_updates(mw._pool)) == 2
+
+    now[0] += 3600
+    assert asyncio.run(mw.sync_warmup_quotas({11: 50, 12: 1250}))["updated"] == 2
+
+
+def test_job_syncs_active_plans_with_one_update(db, mw, monkeypatch):
+    monkeypatch.setattr(jobs, "SessionLocal", TestSession)
+    monkeypatch.setattr(mailwizz_db_module, "mailwizz_db", mw)
+
+    tenant = Tenant(slug="acme", name="Acme", brand_domain="acme.com", sending_domain_base="mail.acme.com")
+    db.add(tenant)
+    db.commit()
+    plans = [("week_2", False, 21, 200), ("week_3", True, 22, 400), ("completed", False, 23, 20000),
+             ("week_1", False, None, 50), ("week_4", False, 25, 800)]
+    for i, (phase, paused, server_id, quota) in enumerate(plans):
+        ip = IP(address=f"10.0.0.{i}", hostname=f"mail{i}.acme.com", mailwizz_server_id=server_id)
+        db.add(ip)
+        db.flush()
+        db.add(WarmupPlan(tenant_id=tenant.id, ip_id=ip.id, phase=phase, paused=paused, current_daily_quota=quota))
+    db.commit()
+    db.close()
+
+    asyncio.run(jobs.job_sync_warmup_quotas())
+
+    (query, params), = _updates(mw._pool)
+    assert params[-2:] == (21, 25)
+    assert dict(zip(params[0:4:2], params[1:4:2], strict=True)) == {21: daily_to_hourly_quota(200), 25: daily_to_hourly_quota(800)}
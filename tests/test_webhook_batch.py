@@ -0,0 +1,248 @@
+"""Tests for batch webhooks and the PowerMTA accounting consumer.
+
+Tests couverts :
+  - /api/v1/webhooks/pmta-bounce/batch : tableau JSON ou NDJSON, une signature, résultat par élément
+  - /api/v2/webhooks/powermta/batch : validation par élément, file pleine, lot trop grand
+  - parse_records() : classification des catégories, en-tête map-header-to-column, champs CSV quotés
+  - AccountingConsumer : lignes partielles ignorées, reprise depuis le checkpoint, fichier tronqué
+  - parse_batch_body() : taille et nombre de lignes NDJSON vérifiés avant le décodage JSON
+  - Mode pipe : lot incomplet traité après PMTA_ACCT_FLUSH_SECONDS, spool repris au redémarrage
+"""
+
+import hashlib
+import hmac
+import json
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.config import settings
+from app.enums import BounceType
+from app.services.pmta_accounting import (
+    AccountingConsumer,
+    classify_bounce,
+    consume_stream,
+    parse_records,
+)
+from app.services.webhook_batch import parse_batch_body
+from src.infrastructure.background.webhook_pipeline import get_webhook_pipeline
+from tests.test_webhook_pipeline import _RecordingPipeline
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ─────────────────────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def webhook_secret(monkeypatch):
+    monkeypatch.setattr(settings, "WEBHOOK_SECRET", "batch-secret")
+    return "batch-secret"
+
+
+def _signed(body: bytes, secret: str) -> dict:
+    digest = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return {"X-Webhook-Signature": f"sha256={digest}", "Content-Type": "application/x-ndjson"}
+
+
+@pytest.fixture
+def forwarded():
+    """scraper-pro : transmission OK sauf pour les adresses 'down@'."""
+    mock = AsyncMock(side_effect=lambda items: [not email.startswith("down@") for email, _ in items])
+    with patch("app.services.webhook_batch.scraper_pro_client") as client:
+        client.forward_bounces = mock
+        client.forward_delivery_feedback = AsyncMock(return_value=True)
+        yield client
+
+
+def _pmta(recipient, event="bounced", **extra):
+    return {"event": event, "recipient": recipient, "vmta": "vmta-acme", "domain": "example.com",
+            "message_id": recipient, **extra}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Endpoints /batch
+# ─────────────────────────────────────────────────────────────────────────────
+
+def test_v1_bounce_batch_ndjson_single_signature(client, webhook_secret, forwarded):
+    lines = [
+        {"email": "a@example.com", "bounce_type": "hard"},
+        {"email": "down@example.com", "bounce_type": "soft"},
+        {"email": "b@example.com", "bounce_type": "nope"},
+    ]
+    body = "\n".join(json.dumps(line) for line in lines).encode()
+
+    response = client.post("/api/v1/webhooks/pmta-bounce/batch", content=body,
+                           headers=_signed(body, webhook_secret))
+
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["received"], data["rejected"], data["forwarded_to_scraper_pro"]) == (2, 1, 1)
+    assert data["accepted_for_scraper_pro"] == 1
+    assert [r["index"] for r in data["results"]] == [0, 1, 2]
+    assert data["results"][1]["forwarded_to_scraper_pro"] is False
+    assert data["results"][1]["accepted_for_scraper_pro"] is False
+    assert data["results"][2]["received"] is False
+    forwarded.forward_bounces.assert_awaited_once_with([("a@example.com", "hard"), ("down@example.com", "soft")])
+
+
+def test_v1_bounce_batch_rejects_bad_signature_and_body(client, webhook_secret, forwarded):
+    body = json.dumps([{"email": "a@example.com"}]).encode()
+
+    tampered = client.post("/api/v1/webhooks/pmta-bounce/batch", content=body + b" ",
+                           headers=_signed(body, webhook_secret))
+    broken = client.post("/api/v1/webhooks/pmta-bounce/batch", content=b"[{",
+                         headers=_signed(b"[{", webhook_secret))
+
+    assert tampered.status_code == 401
+    assert broken.status_code == 400
+    forwarded.forward_bounces.assert_not_awaited()
+
+
+def test_v2_powermta_batch_per_item_results(client, monkeypatch):
+    from app.main import app
+
+    pipeline = _RecordingPipeline()
+    app.dependency_overrides[get_webhook_pipeline] = lambda: pipeline
+    items = [
+        _pmta("a@example.com", bounce_category="bad-mailbox"),
+        _pmta("b@example.com", event="exploded"),
+        {"event": "bounced"},
+        _pmta("c@example.com", event="delivered"),
+    ]
+
+    response = client.post("/api/v2/webhooks/powermta/batch", json=items)
+
+    assert response.status_code == 202
+    data = response.json()
+    assert (data["success"], data["received"], data["queued"]) == (False, 4, 2)
+    assert [r["queued"] for r in data["results"]] == [True, False, False, True]
+    assert data["results"][1]["error"] == "Unknown event type"
+    assert data["results"][2]["error"].startswith("recipient")
+    assert [(e.email, e.contact_status) for e in pipeline.events] == [
+        ("a@example.com", "invalid"), ("c@example.com", None),
+    ]
+
+    pipeline.accept = False
+    full = client.post("/api/v2/webhooks/powermta/batch", json=items[:1]).json()
+    assert full["results"][0]["error"] == "Webhook queue full, retry later"
+
+    monkeypatch.setattr(settings, "WEBHOOK_BATCH_MAX_EVENTS", 3)
+    assert client.post("/api/v2/webhooks/powermta/batch", json=items).status_code == 400
+
+
+def test_batch_limits_checked_before_json_decoding(monkeypatch):
+    def no_decoding(*args, **kwargs):
+        raise AssertionError("decoded")
+
+    monkeypatch.setattr("app.services.webhook_batch.json.loads", no_decoding)
+    ndjson = b"\n".join([b'{"email": "a@example.com"}'] * 4)
+
+    with pytest.raises(ValueError, match="octets"):
+        parse_batch_body(b"[" + b" " * 100 + b"]", max_bytes=50)
+    with pytest.raises(ValueError, match="4 événements"):
+        parse_batch_body(ndjson, max_events=3)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Accounting PowerMTA
+# ─────────────────────────────────────────────────────────────────────────────
+
+def test_parse_records_classifies_and_follows_header():
+    lines = [
+        "b,bad-mailbox,vmta-1,n@acme.com,a@example.com,mta,10.0.0.1,j1,5.1.1,mx,\"user unknown, sorry\"\n",
+        "b,spam-related,vmta-1,n@acme.com,b@example.com,mta,10.0.0.1,j1,5.7.1,mx,blocked\n",
+        "d,vmta-1,n@acme.com,c@Example.com,mta,10.0.0.1,j1,2.0.0,mx,ok\n",
+        "type,rcpt,bounceCat,dlvSourceIp\n",
+        "b,d@example.com,quota-issues,10.0.0.2\n",
+        "t,ignored\n",
+    ]
+
+    batch, header = parse_records(lines)
+
+    assert [(b.email, b.bounce_type) for b in batch.bounces] == [
+        ("a@example.com", BounceType.HARD),
+        ("b@example.com", BounceType.COMPLAINT),
+        ("d@example.com", BounceType.SOFT),
+    ]
+    assert batch.bounces[0].reason == "bad-mailbox: 5.1.1 user unknown, sorry"
+    assert batch.bounces[2].source_ip == "10.0.0.2"
+    assert batch.deliveries == {"example.com": 1}
+    assert batch.skipped == 1
+    assert header == ["type", "rcpt", "bounceCat", "dlvSourceIp"]
+    assert classify_bounce("unknown-category") == BounceType.SOFT
+
+
+@pytest.mark.asyncio
+async def test_consumer_resumes_from_checkpoint(tmp_path, forwarded):
+    acct = tmp_path / "acct-2026-03-02.csv"
+    checkpoint = tmp_path / "state" / "offsets.json"
+    record = "b,bad-mailbox,vmta-1,n@acme.com,{},mta,10.0.0.1,j1,5.1.1,mx,unknown\n"
+    acct.write_text(record.format("a@example.com") + record.format("b@example.com") + "b,bad-mail")
+
+    consumer = AccountingConsumer(directory=str(tmp_path), checkpoint_file=str(checkpoint), batch_size=1)
+    stats = await consumer.poll_once()
+
+    assert (stats["records"], stats["bounces"]) == (2, 2)
+    assert forwarded.forward_bounces.await_count == 2  # un appel par lot
+    offsets = json.loads(checkpoint.read_text())
+    assert offsets[str(acct)]["offset"] == len(record.format("a@example.com")) * 2
+
+    # Suite de la ligne partielle + nouvelle ligne, lues par un nouveau process
+    with open(acct, "a") as f:
+        f.write("box,vmta-1,n@acme.com,c@example.com,mta,10.0.0.1,j1,5.1.1,mx,unknown\n")
+    stats = await AccountingConsumer(directory=str(tmp_path), checkpoint_file=str(checkpoint)).poll_once()
+
+    assert stats["bounces"] == 1
+    assert forwarded.forward_bounces.await_args.args[0] == [("c@example.com", "hard")]
+
+    # Fichier tronqué (rotation sur place) : reprise au début
+    acct.write_text(record.format("d@example.com"))
+    stats = await AccountingConsumer(directory=str(tmp_path), checkpoint_file=str(checkpoint)).poll_once()
+    assert forwarded.forward_bounces.await_args.args[0] == [("d@example.com", "hard")]
+
+
+class _SlowPipe:
+    """stdin PowerMTA : des lignes, un silence, puis d'autres lignes."""
+
+    def __init__(self, *chunks):
+        self.lines = [line for chunk in chunks for line in chunk]
+        self.pauses = {sum(len(chunk) for chunk in chunks[:i + 1]) for i in range(len(chunks) - 1)}
+        self.read = 0
+
+    def readline(self):
+        if self.read in self.pauses:
+            self.pauses.discard(self.read)
+            time.sleep(0.3)
+        if self.read == len(self.lines):
+            return ""
+        self.read += 1
+        return self.lines[self.read - 1]
+
+
+@pytest.mark.asyncio
+async def test_stream_flushes_partial_batch_after_max_latency(tmp_path, forwarded):
+    record = "b,bad-mailbox,vmta-1,n@acme.com,{},mta,10.0.0.1,j1,5.1.1,mx,unknown\n"
+    pipe = _SlowPipe([record.format("a@example.com")], [record.format("b@example.com")])
+
+    stats = await consume_stream(pipe, batch_size=100, flush_seconds=0.05, spool_file=str(tmp_path / "spool.csv"))
+
+    assert (stats["records"], stats["bounces"]) == (2, 2)
+    assert [call.args[0] for call in forwarded.forward_bounces.await_args_list] == [
+        [("a@example.com", "hard")], [("b@example.com", "hard")],
+    ]
+    assert not (tmp_path / "spool.csv").exists()
+
+
+@pytest.mark.asyncio
+async def test_stream_replays_spool_left_by_a_crash(tmp_path, forwarded):
+    spool = tmp_path / "spool.csv"
+    spool.write_text("type,rcpt,bounceCat\nb,a@example.com,bad-mailbox\n")
+    pipe = _SlowPipe(["b,b@example.com,bad-domain\n"])
+
+    stats = await consume_stream(pipe, batch_size=100, flush_seconds=0.05, spool_file=str(spool))
+
+    assert stats["bounces"] == 2
+    assert [call.args[0] for call in forwarded.forward_bounces.await_args_list] == [
+        [("a@example.com", "hard")], [("b@example.com", "hard")],
+    ]
@@ -0,0 +1,266 @@
+"""Tests for the batched webhook ingestion pipeline (/api/v2/webhooks).
+
+Tests couverts :
+  - Endpoints : validation + accusé 202 immédiat, 503 si la file est pleine
+  - process_batch : contacts et IPs résolus en lot, INSERT multi-lignes, un UPDATE par statut
+  - Tenant du contact déduit de l'IP d'envoi / VMTA, compteurs warmup agrégés
+  - Consommateur asyncio : lots de WEBHOOK_BATCH_SIZE max, vidage de la file
+  - Lot en échec : réécrit événement par événement, l'événement fautif part en dead letter
+  - Statuts : un désabonnement / une blacklist n'est jamais rétrogradé en "invalid"
+  - Bounce MailWizz : "invalid" seulement si bounce_type vaut explicitement "hard"
+  - Journal : événement journalisé avant l'accusé, segment supprimé une fois écrit,
+    journal d'un process arrêté écrit au démarrage
+"""
+
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import event
+
+from app.models import IP, Contact, ContactEvent, DataSource, Tenant, WarmupPlan
+from src.infrastructure.background.webhook_pipeline import (
+    WebhookEvent,
+    WebhookPipeline,
+    get_webhook_pipeline,
+)
+from tests.conftest import TestSession, test_engine
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ─────────────────────────────────────────────────────────────────────────────
+
+class _RecordingPipeline:
+    def __init__(self, accept=True):
+        self.accept = accept
+        self.events = []
+
+    def submit(self, event):
+        self.events.append(event)
+        return self.accept
+
+
+@pytest.fixture
+def recorder(client):
+    from app.main import app
+
+    pipeline = _RecordingPipeline()
+    app.dependency_overrides[get_webhook_pipeline] = lambda: pipeline
+    return pipeline
+
+
+class _CounterCache:
+    def __init__(self):
+        self.values = {}
+
+    def increment(self, key, amount=1):
+        self.values[key] = self.values.get(key, 0) + amount
+        return self.values[key]
+
+
+@pytest.fixture
+def two_tenants(db, monkeypatch):
+    cache = _CounterCache()
+    monkeypatch.setattr("src.infrastructure.cache.get_cache", lambda: cache)
+
+    ids = {"cache": cache}
+    for slug in ("acme", "globex"):
+        tenant = Tenant(slug=slug, name=slug, brand_domain=f"{slug}.com", sending_domain_base=f"mail.{slug}.com")
+        db.add(tenant)
+        db.flush()
+        ds = DataSource(tenant_id=tenant.id, name="csv", type="csv")
+        db.add(ds)
+        db.flush()
+        ip = IP(address=f"10.0.0.{tenant.id}", hostname=f"mail.{slug}.com", status="warming",
+                tenant_id=tenant.id, vmta_name=f"vmta-{slug}")
+        db.add(ip)
+        db.flush()
+        db.add(WarmupPlan(tenant_id=tenant.id, ip_id=ip.id, current_daily_quota=100))
+        shared = Contact(tenant_id=tenant.id, data_source_id=ds.id, email="shared@example.com")
+        own = Contact(tenant_id=tenant.id, data_source_id=ds.id, email=f"only@{slug}.com")
+        db.add_all([shared, own])
+        db.flush()
+        ids[slug] = {"tenant": tenant.id, "ip": ip.id, "shared": shared.id, "own": own.id}
+    db.commit()
+    return ids
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+def test_endpoints_acknowledge_and_queue(client, recorder):
+    response = client.post("/api/v2/webhooks/mailwizz", json={
+        "event": "bounced", "subscriber_uid": "s1", "campaign_uid": "c1",
+        "email": "a@example.com", "ip_address": "10.0.0.1", "bounce_type": "hard",
+    })
+    assert response.status_code == 202
+    assert response.json()["queued"] is True
+
+    client.post("/api/v2/webhooks/powermta", json={
+        "event": "deferred", "recipient": "b@example.com", "vmta": "vmta-acme",
+        "domain": "example.com", "message_id": "m1", "bounce_category": "quota-issues",
+    })
+    client.post("/api/v2/webhooks/generic", json={"email": "c@example.com", "event_type": "unsubscribed"})
+
+    mw, pmta, generic = recorder.events
+    assert (mw.event_type, mw.contact_status, mw.sending_ip) == ("bounced", "invalid", "10.0.0.1")
+    assert (pmta.event_type, pmta.contact_status, pmta.vmta) == ("bounced", None, "vmta-acme")
+    assert (generic.event_type, generic.contact_status) == ("unsubscribed", "unsubscribed")
+
+    unknown = client.post("/api/v2/webhooks/generic", json={"email": "c@example.com", "event_type": "nope"})
+    assert unknown.json()["success"] is False
+    assert len(recorder.events) == 3
+
+
+def test_only_explicit_hard_mailwizz_bounces_invalidate(client, recorder):
+    for bounce_type in (None, "soft", "internal", "HARD"):
+        payload = {"event": "bounced", "subscriber_uid": "s1", "campaign_uid": "c1", "email": "a@example.com"}
+        if bounce_type:
+            payload["bounce_type"] = bounce_type
+        client.post("/api/v2/webhooks/mailwizz", json=payload)
+
+    assert [e.contact_status for e in recorder.events] == [None, None, None, "invalid"]
+
+
+def test_full_queue_asks_for_a_retry(client, recorder):
+    recorder.accept = False
+
+    response = client.post("/api/v2/webhooks/generic", json={"email": "c@example.com", "event_type": "opened"})
+
+    assert response.status_code == 503
+
+
+def test_batch_is_written_with_bulk_statements(two_tenants, db):
+    acme, globex = two_tenants["acme"], two_tenants["globex"]
+    events = [
+        WebhookEvent(source="powermta", email="shared@example.com", event_type="delivered", vmta="vmta-globex"),
+        WebhookEvent(source="mailwizz", email="shared@example.com", event_type="opened", sending_ip="10.0.0.1"),
+        WebhookEvent(source="mailwizz", email="only@acme.com", event_type="bounced",
+                     sending_ip="10.0.0.1", contact_status="invalid"),
+        WebhookEvent(source="generic", email="only@globex.com", event_type="complained", contact_status="blacklisted"),
+        WebhookEvent(source="generic", email="ghost@example.com", event_type="opened"),
+    ]
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement.split()[0])  # noqa: E731
+    event.listen(test_engine, "before_cursor_execute", listener)
+    try:
+        result = WebhookPipeline(session_factory=TestSession).process_batch(events)
+    finally:
+        event.remove(test_engine, "before_cursor_execute", listener)
+
+    assert result == {"written": 4, "unmatched": 1, "status_updates": 2}
+    # IPs (+ warmup plans), contacts, one multi-row INSERT, one UPDATE per status
+    assert statements.count("SELECT") == 3
+    assert statements.count("UPDATE") == 2
+    assert statements.count("INSERT") == 1
+
+    rows = {(e.contact_id, e.event_type): e for e in db.query(ContactEvent)}
+    assert (globex["shared"], "delivered") in rows  # tenant from the VMTA
+    assert (acme["shared"], "opened") in rows  # tenant from the sending IP
+    assert json.loads(rows[(acme["own"], "bounced")].event_data)["source"] == "mailwizz"
+    assert rows[(globex["shared"], "delivered")].tenant_id == globex["tenant"]
+
+    statuses = dict(db.query(Contact.id, Contact.status))
+    assert (statuses[acme["own"]], statuses[globex["own"]]) == ("invalid", "blacklisted")
+
+    counters = two_tenants["cache"].values
+    assert sorted(key.rsplit(":", 1)[1] for key in counters) == ["bounced", "delivered", "opens"]
+    assert counters[next(k for k in counters if k.startswith(f"warmup:ip:{acme['ip']}:") and k.endswith("opens"))] == 1
+
+
+def test_consumer_writes_in_batches(two_tenants, db):
+    pipeline = WebhookPipeline(batch_size=100, flush_seconds=0.05, session_factory=TestSession)
+    sizes = []
+    process_batch = pipeline.process_batch
+    pipeline.process_batch = lambda batch: (sizes.append(len(batch)), process_batch(batch))[1]
+
+    async def run():
+        for _ in range(250):
+            assert pipeline.submit(WebhookEvent(source="generic", email="only@acme.com", event_type="opened"))
+        await pipeline.stop()
+
+    asyncio.run(run())
+
+    assert sizes == [100, 100, 50]
+    assert db.query(ContactEvent).count() == 250
+    assert pipeline.stats["written"] == 250
+
+
+def test_suppression_status_is_never_downgraded(two_tenants, db):
+    acme, globex = two_tenants["acme"], two_tenants["globex"]
+    db.query(Contact).filter(Contact.id == globex["own"]).update({"status": "blacklisted"})
+    db.commit()
+    events = [
+        WebhookEvent(source="generic", email="only@acme.com", event_type="unsubscribed", contact_status="unsubscribed"),
+        WebhookEvent(source="mailwizz", email="only@acme.com", event_type="bounced", contact_status="invalid"),
+        WebhookEvent(source="mailwizz", email="only@globex.com", event_type="bounced", contact_status="invalid"),
+        WebhookEvent(source="generic", email="only@globex.com", event_type="unsubscribed", contact_status="unsubscribed"),
+    ]
+
+    WebhookPipeline(session_factory=TestSession).process_batch(events)
+
+    db.expire_all()
+    statuses = dict(db.query(Contact.id, Contact.status))
+    assert (statuses[acme["own"]], statuses[globex["own"]]) == ("unsubscribed", "blacklisted")
+
+
+def test_failed_batch_is_retried_per_event_and_dead_lettered(two_tenants, db):
+    pipeline = WebhookPipeline(batch_size=10, flush_seconds=0.05, session_factory=TestSession)
+    process_batch = pipeline.process_batch
+
+    def flaky(batch):
+        if any(e.email == "poison@example.com" for e in batch):
+            raise RuntimeError("bad row")
+        return process_batch(batch)
+
+    pipeline.process_batch = flaky
+
+    async def run():
+        for email in ("only@acme.com", "poison@example.com", "only@globex.com"):
+            pipeline.submit(WebhookEvent(source="generic", email=email, event_type="opened"))
+        await pipeline.stop()
+
+    asyncio.run(run())
+
+    assert db.query(ContactEvent).count() == 2
+    assert [e.email for e in pipeline.dead_letters] == ["poison@example.com"]
+    assert (pipeline.stats["written"], pipeline.stats["failed"]) == (2, 1)
+
+
+def test_events_are_journaled_until_written(two_tenants, db, tmp_path):
+    journal = tmp_path / "webhook_journal"
+    pipeline = WebhookPipeline(batch_size=10, flush_seconds=0.05, session_factory=TestSession, journal_dir=journal)
+    journaled = []
+
+    async def run():
+        for email in ("only@acme.com", "only@globex.com"):
+            assert pipeline.submit(WebhookEvent(source="generic", email=email, event_type="opened"))
+        journaled.extend(line for path in journal.glob("*.jsonl") for line in path.read_text().splitlines())
+        await pipeline.stop()
+
+    asyncio.run(run())
+
+    assert [WebhookEvent.from_json(line).email for line in journaled] == ["only@acme.com", "only@globex.com"]
+    assert list(journal.glob("*.jsonl")) == []
+    assert db.query(ContactEvent).count() == 2
+
+
+def test_journal_of_a_stopped_process_is_written_on_startup(two_tenants, db, tmp_path, monkeypatch):
+    from src.infrastructure.background import webhook_pipeline
+
+    journal = tmp_path / "webhook_journal"
+    journal.mkdir()
+    event = WebhookEvent(source="mailwizz", email="only@acme.com", event_type="bounced", contact_status="invalid")
+    (journal / "4242-0.jsonl").write_text(event.to_json() + "\n" + '{"source": "gen')
+    (journal / "4343-0.jsonl").write_text(event.to_json() + "\n")
+    monkeypatch.setattr(webhook_pipeline, "_pid_alive", lambda pid: pid == 4343)
+
+    pipeline = WebhookPipeline(session_factory=TestSession, journal_dir=journal)
+
+    assert pipeline.recover_journal() == 1
+    assert [path.name for path in journal.glob("*.jsonl")] == ["4343-0.jsonl"]
+    db.expire_all()
+    assert db.get(Contact, two_tenants["acme"]["own"]).status == "invalid"